@@ -17,6 +17,9 @@ let nativePort = null;
 let connectionState = 'disconnected';
 let lastError = null;
 
+// Chunked streams being received from the native host, by stream id
+const incomingStreams = new Map();
+
 /**
  * Initialize extension on startup
  */
@@ -108,6 +111,13 @@ function handleNativeMessage(message) {
                 handlePlaybackCommand(message.data);
                 break;
                 
+            case 'stream_start':
+            case 'stream_chunk':
+            case 'stream_end':
+            case 'stream_abort':
+                handleStreamMessage(message);
+                break;
+                
             default:
                 console.log('[MKD] Unknown message type from native host:', message.type);
         }
@@ -116,6 +126,63 @@ function handleNativeMessage(message) {
     }
 }
 
+/**
+ * Reassemble a chunked stream from the native host
+ *
+ * Each chunk is acknowledged as it arrives so the host can keep sending;
+ * the completed stream is handled like a normal response.
+ */
+function handleStreamMessage(message) {
+    const stream = incomingStreams.get(message.stream);
+    
+    switch (message.type) {
+        case 'stream_start':
+            incomingStreams.set(message.stream, {
+                id: message.id,
+                encoding: message.encoding,
+                contentType: message.content_type,
+                chunks: []
+            });
+            break;
+            
+        case 'stream_chunk':
+            if (!stream) return;
+            stream.chunks.push(decodeStreamChunk(message));
+            sendToNativeHost({command: 'STREAM_ACK', params: {stream: message.stream, seq: message.seq}});
+            break;
+            
+        case 'stream_end':
+            if (!stream) return;
+            incomingStreams.delete(message.stream);
+            Promise.all(stream.chunks).then(chunks => {
+                const blob = new Blob(chunks, {type: stream.contentType});
+                return stream.encoding === 'json' ? blob.text().then(JSON.parse) : blob;
+            }).then(data => {
+                handleNativeMessage({id: stream.id, type: 'response', success: true, data: data});
+            }).catch(error => {
+                console.error('[MKD] Failed to decode stream:', message.stream, error);
+            });
+            break;
+            
+        case 'stream_abort':
+            incomingStreams.delete(message.stream);
+            console.warn('[MKD] Stream aborted by native host:', message.stream, message.error);
+            break;
+    }
+}
+
+/**
+ * Decode one stream chunk: base64, then inflate if the host compressed it
+ */
+function decodeStreamChunk(message) {
+    const bytes = Uint8Array.from(atob(message.data), c => c.charCodeAt(0));
+    if (!message.compressed) {
+        return Promise.resolve(bytes);
+    }
+    const inflated = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+    return new Response(inflated).arrayBuffer().then(buffer => new Uint8Array(buffer));
+}
+
 /**
  * Handle native host disconnect
  */
@@ -301,6 +368,7 @@ if (typeof module !== 'undefined' && module.exports) {
         connectToNativeHost,
         sendToNativeHost,
         handleNativeMessage,
+        handleStreamMessage,
         broadcastToTabs
     };
 }
@@ -0,0 +1,284 @@
+"""
+Push channel for browser events captured by injected JavaScript.
+"""
+import json
+import logging
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Page side of the channel: events go into a ring buffer with per-page sequence
+# numbers and are flushed in batches to the collector, one request at a time.
+CAPTURE_SCRIPT = """
+return (function(config) {
+    if (window.__mkdRecorder) return window.__mkdRecorder.pageId;
+    
+    const ring = [];
+    let seq = 0;
+    let inFlight = false;
+    let timer = null;
+    let failures = 0;
+    
+    const channel = {
+        pageId: Math.random().toString(36).slice(2) + Date.now().toString(36),
+        dropped: 0,
+        
+        record: function(type, data) {
+            if (ring.length >= config.capacity) {
+                ring.shift();  // The sequence gap tells the collector what was lost
+                channel.dropped++;
+            }
+            ring.push({seq: ++seq, type: type, timestamp: Date.now(), data: data});
+            if (ring.length >= config.maxBatch) {
+                channel.flush();
+            } else if (!timer) {
+                timer = setTimeout(channel.flush, config.flushDelay);
+            }
+        },
+        
+        flush: function() {
+            clearTimeout(timer);
+            timer = null;
+            if (!config.endpoint || inFlight || !ring.length) return;
+            
+            const batch = ring.slice(0, config.maxBatch);
+            const lastSeq = batch[batch.length - 1].seq;
+            inFlight = true;
+            fetch(config.endpoint, {
+                method: 'POST',
+                mode: 'no-cors',
+                keepalive: true,
+                headers: {'Content-Type': 'text/plain'},
+                body: JSON.stringify({token: config.token, page: channel.pageId, events: batch})
+            }).then(function() {
+                while (ring.length && ring[0].seq <= lastSeq) ring.shift();
+                inFlight = false;
+                failures = 0;
+                if (ring.length) channel.flush();
+            }, function() {
+                // Unreachable collector (e.g. blocked by CSP): keep events for drain()
+                inFlight = false;
+                failures++;
+                timer = setTimeout(channel.flush, Math.min(30000, config.flushDelay * Math.pow(2, failures)));
+            });
+        },
+        
+        drain: function() {
+            const events = ring.splice(0, ring.length);
+            return {page: channel.pageId, events: events, dropped: channel.dropped};
+        }
+    };
+    window.__mkdRecorder = channel;
+    
+    // Capture scroll events
+    let lastScrollTime = 0;
+    window.addEventListener('scroll', function(e) {
+        const now = Date.now();
+        if (now - lastScrollTime > 500) {  // Throttle to 500ms
+            lastScrollTime = now;
+            channel.record('scroll', {x: window.scrollX, y: window.scrollY});
+        }
+    });
+    
+    // Capture form submits
+    document.addEventListener('submit', function(e) {
+        const form = e.target;
+        channel.record('submit', {
+            id: form.id || null,
+            name: form.getAttribute('name'),
+            action: form.getAttribute('action')
+        });
+    });
+    
+    // Capture key presses (for shortcuts)
+    document.addEventListener('keydown', function(e) {
+        if (e.ctrlKey || e.metaKey || e.altKey) {
+            channel.record('keypress', {
+                key: e.key,
+                ctrl: e.ctrlKey,
+                alt: e.altKey,
+                shift: e.shiftKey,
+                meta: e.metaKey
+            });
+        }
+    });
+    
+    // Send what is left before the page goes away
+    window.addEventListener('pagehide', function() {
+        if (config.endpoint && ring.length && navigator.sendBeacon) {
+            const events = ring.splice(0, ring.length);
+            navigator.sendBeacon(config.endpoint,
+                JSON.stringify({token: config.token, page: channel.pageId, events: events}));
+        }
+    });
+    
+    return channel.pageId;
+})(%s);
+"""
+
+# Returns the events still buffered in the page, in one round-trip
+DRAIN_SCRIPT = "return window.__mkdRecorder ? window.__mkdRecorder.drain() : null;"
+
+
+class EventCollector:
+    """
+    Receives batches of page events and delivers them in order.
+    
+    Events carry per-page sequence numbers: duplicates (an event both
+    pushed and drained) are dropped, and missing numbers are counted
+    as lost events.
+    """
+    
+    def __init__(self, on_event: Callable[[Dict[str, Any]], None],
+                 capacity: int = 1000, max_batch: int = 50, flush_delay: int = 50):
+        """
+        Initialize the collector.
+        
+        Args:
+            on_event: Called with each new event, in sequence order
+            capacity: Events the page buffers while the collector is unreachable
+            max_batch: Events per pushed batch
+            flush_delay: Milliseconds the page waits to batch events before pushing
+        """
+        self.on_event = on_event
+        self.capacity = capacity
+        self.max_batch = max_batch
+        self.flush_delay = flush_delay
+        self.token = secrets.token_hex(16)
+        
+        self._lock = threading.Lock()
+        self._last_seq: Dict[str, int] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.gaps: List[Tuple[str, int, int]] = []  # (page, first missing seq, last missing seq)
+        
+        self.stats = {
+            'batches': 0,
+            'events': 0,
+            'duplicates': 0,
+            'lost_events': 0,
+            'rejected_batches': 0,
+            'last_batch_time': None
+        }
+        
+    @property
+    def endpoint(self) -> Optional[str]:
+        """URL the page pushes to, or None when the collector is not serving."""
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/events"
+        
+    def start(self) -> None:
+        """Start serving on a free local port."""
+        if self._server is not None:
+            return
+            
+        handler = type('EventRequestHandler', (_EventRequestHandler,), {'collector': self})
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="browser-event-collector", daemon=True)
+        self._thread.start()
+        logger.debug(f"Browser event collector listening on {self.endpoint}")
+        
+    def stop(self) -> None:
+        """Stop serving."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+        
+    def capture_script(self) -> str:
+        """Script installing the page side of the channel."""
+        config = {
+            'endpoint': self.endpoint,
+            'token': self.token,
+            'capacity': self.capacity,
+            'maxBatch': self.max_batch,
+            'flushDelay': self.flush_delay
+        }
+        return CAPTURE_SCRIPT % json.dumps(config)
+        
+    def ingest(self, batch: Optional[Dict[str, Any]]) -> int:
+        """
+        Deliver the new events of a pushed or drained batch.
+        
+        Returns:
+            Number of events delivered
+        """
+        if not batch or not batch.get('events'):
+            return 0
+            
+        page = batch.get('page', '')
+        delivered = []
+        with self._lock:
+            last = self._last_seq.get(page, 0)
+            for event in sorted(batch['events'], key=lambda e: e.get('seq', 0)):
+                seq = event.get('seq', 0)
+                if seq <= last:
+                    self.stats['duplicates'] += 1
+                    continue
+                if seq > last + 1:
+                    self.gaps.append((page, last + 1, seq - 1))
+                    self.stats['lost_events'] += seq - last - 1
+                    logger.warning(f"Lost browser events {last + 1}-{seq - 1} of page {page}")
+                last = seq
+                delivered.append(event)
+            self._last_seq[page] = last
+            self.stats['batches'] += 1
+            self.stats['events'] += len(delivered)
+            self.stats['last_batch_time'] = time.time()
+            
+        for event in delivered:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                logger.error(f"Failed to handle browser event: {e}")
+        return len(delivered)
+        
+        
+class _EventRequestHandler(BaseHTTPRequestHandler):
+    """Accepts event batches posted by the capture script."""
+    
+    collector: EventCollector = None
+    
+    def do_OPTIONS(self):
+        """Answer CORS and private-network preflights."""
+        self.send_response(204)
+        self._send_cors_headers()
+        self.end_headers()
+        
+    def do_POST(self):
+        """Ingest one batch."""
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            batch = json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            batch = None
+            
+        if not isinstance(batch, dict) or batch.get('token') != self.collector.token:
+            self.collector.stats['rejected_batches'] += 1
+            self.send_response(403)
+        else:
+            self.collector.ingest(batch)
+            self.send_response(204)
+        self._send_cors_headers()
+        self.end_headers()
+        
+    def _send_cors_headers(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Private-Network', 'true')
+        
+    def log_message(self, format, *args):
+        pass
+        
\ No newline at end of file
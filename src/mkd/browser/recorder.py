@@ -3,7 +3,7 @@ Browser action recorder for capturing user interactions.
 """
 import time
 import logging
-from typing import List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable
 from threading import Thread, Event
 import json
 
@@ -12,6 +12,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.events import EventFiringWebDriver, AbstractEventListener
 
 from .actions import BrowserAction, BrowserActionType
+from .event_channel import EventCollector, DRAIN_SCRIPT
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,7 @@ class BrowserEventListener(AbstractEventListener):
         
     def before_navigate_to(self, url, driver):
         """Record navigation action."""
+        self.recorder.drain_js_events()
         action = BrowserAction(
             type=BrowserActionType.NAVIGATE,
             target=url,
@@ -32,6 +34,10 @@ class BrowserEventListener(AbstractEventListener):
         )
         self.recorder.add_action(action)
         
+    def after_navigate_to(self, url, driver):
+        """Reinstall page event capture on the new page."""
+        self.recorder._inject_js_listeners()
+        
     def before_click(self, element, driver):
         """Record click action."""
         selector = self._get_element_selector(element)
@@ -113,16 +119,28 @@ class BrowserRecorder:
     Records browser interactions for playback.
     
     This recorder captures user interactions with the browser
-    and converts them into reproducible actions.
+    and converts them into reproducible actions. Events seen by
+    injected JavaScript are pushed by the page to a local collector
+    as they happen instead of being polled.
     """
     
-    def __init__(self, controller=None):
-        """Initialize browser recorder."""
+    def __init__(self, controller=None, push_events: bool = True):
+        """
+        Initialize browser recorder.
+        
+        Args:
+            controller: Browser controller to record
+            push_events: Let the page push events to a local collector; when
+                False (or the page cannot reach it) events are only collected
+                by drain_js_events()
+        """
         self.controller = controller
+        self.push_events = push_events
         self.actions: List[BrowserAction] = []
         self._recording = False
         self._event_driver: Optional[EventFiringWebDriver] = None
         self._listener: Optional[BrowserEventListener] = None
+        self.collector = EventCollector(self._handle_page_event)
         
     def start_recording(self) -> None:
         """Start recording browser actions."""
@@ -143,11 +161,14 @@ class BrowserRecorder:
         # Replace controller's driver with event-firing wrapper
         self.controller.driver = self._event_driver
         
+        self.actions.clear()
+        self._recording = True
+        
         # Add JavaScript event listeners for additional events
+        if self.push_events:
+            self.collector.start()
         self._inject_js_listeners()
         
-        self.actions.clear()
-        self._recording = True
         logger.info("Started recording browser actions")
         
     def stop_recording(self) -> List[BrowserAction]:
@@ -155,6 +176,10 @@ class BrowserRecorder:
         if not self._recording:
             return self.actions
             
+        # Collect events the page has not pushed yet
+        self.drain_js_events()
+        self.collector.stop()
+        
         # Restore original driver
         if self._event_driver and self.controller:
             self.controller.driver = self._event_driver.wrapped_driver
@@ -198,66 +223,82 @@ class BrowserRecorder:
         
     def _inject_js_listeners(self) -> None:
         """Inject JavaScript to capture additional events."""
-        js_code = """
-        // Capture scroll events
-        let lastScrollTime = 0;
-        window.addEventListener('scroll', function(e) {
-            const now = Date.now();
-            if (now - lastScrollTime > 500) {  // Throttle to 500ms
-                lastScrollTime = now;
-                window.__mkd_scroll = {
-                    x: window.scrollX,
-                    y: window.scrollY,
-                    timestamp: now
-                };
-            }
-        });
-        
-        // Capture form submits
-        document.addEventListener('submit', function(e) {
-            window.__mkd_submit = {
-                target: e.target,
-                timestamp: Date.now()
-            };
-        });
-        
-        // Capture key presses (for shortcuts)
-        document.addEventListener('keydown', function(e) {
-            if (e.ctrlKey || e.metaKey || e.altKey) {
-                window.__mkd_keypress = {
-                    key: e.key,
-                    ctrl: e.ctrlKey,
-                    alt: e.altKey,
-                    shift: e.shiftKey,
-                    meta: e.metaKey,
-                    timestamp: Date.now()
-                };
-            }
-        });
+        if not self._recording or not self.controller or not self.controller._is_active:
+            return
+            
+        try:
+            self.controller.execute_script(self.collector.capture_script())
+        except Exception as e:
+            logger.warning(f"Failed to inject event capture: {e}")
+            
+    def drain_js_events(self) -> int:
         """
+        Collect the events still buffered in the page in one round-trip.
         
-        if self.controller and self.controller._is_active:
-            self.controller.execute_script(js_code)
+        Returns:
+            Number of new events recorded
+        """
+        if not self._recording or not self.controller or not self.controller._is_active:
+            return 0
             
-    def poll_js_events(self) -> None:
-        """Poll for JavaScript events (run in separate thread)."""
+        try:
+            return self.collector.ingest(self.controller.execute_script(DRAIN_SCRIPT))
+        except Exception as e:
+            logger.debug(f"Error draining JS events: {e}")
+            return 0
+            
+    def poll_js_events(self, interval: float = 1.0) -> None:
+        """
+        Drain JavaScript events periodically (run in separate thread).
+        
+        Only needed when the page cannot push to the collector, e.g. when
+        push_events is off or a content security policy blocks it. Events
+        wait in the page buffer between polls, so none are lost.
+        """
         while self._recording:
             if not self.controller or not self.controller._is_active:
                 break
                 
-            try:
-                # Check for scroll events
-                scroll_data = self.controller.execute_script("return window.__mkd_scroll;")
-                if scroll_data:
-                    action = BrowserAction(
-                        type=BrowserActionType.SCROLL,
-                        timestamp=scroll_data['timestamp'] / 1000,
-                        metadata={'x': scroll_data['x'], 'y': scroll_data['y']}
-                    )
-                    self.add_action(action)
-                    self.controller.execute_script("window.__mkd_scroll = null;")
-                    
-            except Exception as e:
-                logger.debug(f"Error polling JS events: {e}")
-                
-            time.sleep(0.1)  # Poll every 100ms
\ No newline at end of file
+            self.drain_js_events()
+            time.sleep(interval)
+            
+    def get_event_stats(self) -> Dict[str, Any]:
+        """Get page event channel statistics."""
+        stats = self.collector.stats.copy()
+        stats['push_endpoint'] = self.collector.endpoint
+        stats['gaps'] = list(self.collector.gaps)
+        return stats
+        
+    def _handle_page_event(self, event: Dict[str, Any]) -> None:
+        """Convert a captured page event into an action."""
+        data = event.get('data') or {}
+        timestamp = event.get('timestamp', time.time() * 1000) / 1000
+        
+        if event.get('type') == 'scroll':
+            action = BrowserAction(
+                type=BrowserActionType.SCROLL,
+                timestamp=timestamp,
+                metadata={'x': data.get('x'), 'y': data.get('y')}
+            )
+        elif event.get('type') == 'submit':
+            target = f"#{data['id']}" if data.get('id') else (
+                f"form[name='{data['name']}']" if data.get('name') else 'form')
+            action = BrowserAction(
+                type=BrowserActionType.SUBMIT,
+                target=target,
+                timestamp=timestamp,
+                metadata={'action': data.get('action')}
+            )
+        elif event.get('type') == 'keypress':
+            action = BrowserAction(
+                type=BrowserActionType.KEY_PRESS,
+                value=data.get('key'),
+                timestamp=timestamp,
+                metadata={k: data.get(k) for k in ('ctrl', 'alt', 'shift', 'meta')}
+            )
+        else:
+            return
+            
+        action.metadata['seq'] = event.get('seq')
+        self.add_action(action)
+        
\ No newline at end of file
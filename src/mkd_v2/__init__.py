@@ -12,18 +12,36 @@ This module provides:
 - Secure user authentication and role management
 """
 
+import importlib
+
 __version__ = "2.0.0"
 __author__ = "MKD Automation Team"
 
-# Core components
-from .core.message_broker import MessageBroker
-from .core.session_manager import SessionManager
+# Components are imported on first access, so light entry points such as
+# the native messaging host do not load the whole platform at startup
+_LAZY_EXPORTS = {
+    # Core components
+    "MessageBroker": ".core.message_broker",
+    "SessionManager": ".core.session_manager",
+    # Platform detection
+    "PlatformDetector": ".platform.detector",
+    # Recording components
+    "RecordingEngine": ".recording.recording_engine",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
-# Platform detection
-from .platform.detector import PlatformDetector
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
-# Recording components
-from .recording.recording_engine import RecordingEngine
 
 __all__ = [
     "MessageBroker",
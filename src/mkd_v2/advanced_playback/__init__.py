@@ -10,7 +10,9 @@ Provides intelligent playback features for context-aware automation:
 
 from .context_verifier import ContextVerifier, VerificationResult
 from .adaptive_executor import AdaptiveExecutor, AdaptationResult
+from .adaptation_store import AdaptationStore, LearnedAdaptation
 from .recovery_engine import RecoveryEngine, RecoveryStrategy, RecoveryResult
+from .recovery_model import RecoveryModel, StrategyOutcomes
 from .performance_optimizer import PerformanceOptimizer, OptimizationLevel, OptimizationResult
 from .advanced_playback_engine import AdvancedPlaybackEngine, PlaybackMode, PlaybackConfig, PlaybackResult
 
@@ -19,9 +21,13 @@ __all__ = [
     'VerificationResult', 
     'AdaptiveExecutor',
     'AdaptationResult',
+    'AdaptationStore',
+    'LearnedAdaptation',
     'RecoveryEngine',
     'RecoveryStrategy',
     'RecoveryResult',
+    'RecoveryModel',
+    'StrategyOutcomes',
     'PerformanceOptimizer',
     'OptimizationLevel',
     'OptimizationResult',
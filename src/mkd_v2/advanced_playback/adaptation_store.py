@@ -0,0 +1,169 @@
+"""
+Adaptation Store
+
+Persistent store of learned adaptations for adaptive execution:
+- Keyed by action signature and application context fingerprint
+- Stores the adaptation (coordinate shift and changed parameters), never the
+  adapted action itself, so it is re-applied to each incoming action
+- Tracks success/failure counts and adaptation latency
+- Serves known-good adaptations from an in-memory index
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LearnedAdaptation:
+    """A persisted adaptation for one (signature, context) pair."""
+    signature: str
+    context_fingerprint: str
+    adaptation_type: str
+    parameters: Dict[str, Any]  # Action fields the adaptation set, other than coordinates
+    coordinate_shift: Optional[Tuple[int, int]] = None
+    successes: int = 0
+    failures: int = 0
+    avg_latency: float = 0.0
+    updated_at: float = 0.0
+    
+    @property
+    def is_known_good(self) -> bool:
+        """Whether this adaptation has worked more often than it failed."""
+        return self.successes > self.failures
+    
+    def apply(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the learned adaptation to a fresh action; its own fields (key, text, ...) are kept."""
+        adapted = action.copy()
+        adapted.update(self.parameters)
+        if self.coordinate_shift is not None and 'coordinates' in action:
+            x, y = action['coordinates']
+            dx, dy = self.coordinate_shift
+            adapted['coordinates'] = (x + dx, y + dy)
+        return adapted
+
+
+class AdaptationStore(SQLiteStore):
+    """
+    SQLite-backed store of learned adaptations.
+    
+    All rows are mirrored in memory so lookups on the execution path
+    never touch the database; writes go through to disk immediately.
+    """
+    
+    DB_NAME = "adaptations.db"
+    # Rows of the former "adaptations" table held whole adapted actions and are not reused
+    TABLE = "adaptation_deltas"
+    COLUMNS = (
+        ("signature", "TEXT NOT NULL"),
+        ("context_fingerprint", "TEXT NOT NULL"),
+        ("adaptation_type", "TEXT NOT NULL"),
+        ("parameters", "TEXT NOT NULL"),
+        ("shift_x", "INTEGER"),
+        ("shift_y", "INTEGER"),
+        ("successes", "INTEGER DEFAULT 0"),
+        ("failures", "INTEGER DEFAULT 0"),
+        ("avg_latency", "REAL DEFAULT 0"),
+        ("updated_at", "REAL"),
+    )
+    PRIMARY_KEY = ("signature", "context_fingerprint")
+    
+    def __init__(self, storage_path: Optional[Path] = None):
+        self._entries: Dict[Tuple[str, str], LearnedAdaptation]
+        super().__init__(storage_path)
+        logger.info(f"AdaptationStore initialized with {len(self._entries)} entries")
+    
+    def _entry_key(self, entry: LearnedAdaptation) -> Tuple[str, str]:
+        return (entry.signature, entry.context_fingerprint)
+    
+    def _entry_from_row(self, row) -> LearnedAdaptation:
+        shift = None
+        if row['shift_x'] is not None and row['shift_y'] is not None:
+            shift = (row['shift_x'], row['shift_y'])
+        
+        return LearnedAdaptation(
+            signature=row['signature'],
+            context_fingerprint=row['context_fingerprint'],
+            adaptation_type=row['adaptation_type'],
+            parameters=json.loads(row['parameters']),
+            coordinate_shift=shift,
+            successes=row['successes'],
+            failures=row['failures'],
+            avg_latency=row['avg_latency'],
+            updated_at=row['updated_at'] or 0.0
+        )
+    
+    def _entry_to_row(self, entry: LearnedAdaptation) -> Tuple:
+        shift_x, shift_y = entry.coordinate_shift if entry.coordinate_shift else (None, None)
+        return (entry.signature, entry.context_fingerprint, entry.adaptation_type,
+                json.dumps(entry.parameters, default=str),
+                shift_x, shift_y, entry.successes, entry.failures,
+                entry.avg_latency, entry.updated_at)
+    
+    def lookup(self, signature: str, context_fingerprint: str) -> Optional[LearnedAdaptation]:
+        """
+        Get the known-good adaptation for an action in a context.
+        
+        Returns:
+            LearnedAdaptation or None if nothing reliable is stored
+        """
+        with self._lock:
+            entry = self._entries.get((signature, context_fingerprint))
+        
+        if entry and entry.is_known_good:
+            return entry
+        return None
+    
+    def record_success(self, signature: str, context_fingerprint: str,
+                       adaptation_type: str, parameters: Dict[str, Any],
+                       coordinate_shift: Optional[Tuple[int, int]], latency: float):
+        """Record a successful adaptation, replacing a different stored one."""
+        with self._lock:
+            key = (signature, context_fingerprint)
+            entry = self._entries.get(key)
+            
+            if (entry is None or entry.adaptation_type != adaptation_type or
+                    entry.coordinate_shift != coordinate_shift or entry.parameters != parameters):
+                entry = LearnedAdaptation(
+                    signature=signature,
+                    context_fingerprint=context_fingerprint,
+                    adaptation_type=adaptation_type,
+                    parameters=parameters,
+                    coordinate_shift=coordinate_shift
+                )
+                self._entries[key] = entry
+            
+            entry.successes += 1
+            entry.avg_latency += (latency - entry.avg_latency) / entry.successes
+            entry.updated_at = time.time()
+            self._persist(entry)
+    
+    def record_failure(self, signature: str, context_fingerprint: str):
+        """Record that the stored adaptation failed in this context."""
+        with self._lock:
+            entry = self._entries.get((signature, context_fingerprint))
+            if entry is None:
+                return
+            
+            entry.failures += 1
+            entry.updated_at = time.time()
+            self._persist(entry)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        with self._lock:
+            entries = list(self._entries.values())
+        
+        return {
+            'entries': len(entries),
+            'known_good': sum(1 for e in entries if e.is_known_good),
+            'total_successes': sum(e.successes for e in entries),
+            'total_failures': sum(e.failures for e in entries)
+        }
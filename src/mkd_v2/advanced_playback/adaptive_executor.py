@@ -7,15 +7,21 @@ Provides intelligent adjustment for reliable playback in dynamic environments.
 """
 
 import time
+import json
+import hashlib
 import logging
+from collections import deque
 from typing import Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass, field
 from enum import Enum
 
 from ..intelligence.context_detector import ContextDetector, ApplicationContext
 from ..automation.intelligent_automation import IntelligentAutomationEngine
+from ..automation.spatial_index import SpatialIndex
+from ..automation.display_topology import get_display_topology
 from ..platform.base import PlatformInterface
 from .context_verifier import ContextVerifier, VerificationCriteria, VerificationLevel
+from .adaptation_store import AdaptationStore
 
 
 logger = logging.getLogger(__name__)
@@ -24,7 +30,9 @@ logger = logging.getLogger(__name__)
 class AdaptationType(Enum):
     """Types of execution adaptations."""
     COORDINATE_SHIFT = "coordinate_shift"
+    WINDOW_OFFSET = "window_offset"
     ELEMENT_SEARCH = "element_search"
+    TEMPLATE_MATCH = "template_match"
     CONTEXT_WAIT = "context_wait"
     SCALE_ADJUSTMENT = "scale_adjustment"
     RETRY_WITH_DELAY = "retry_with_delay"
@@ -97,8 +105,16 @@ class AdaptiveExecutor:
     to maintain reliable automation playback.
     """
     
+    # Adaptations whose outcome is reproducible and worth replaying on the next run
+    PERSISTED_ADAPTATIONS = frozenset({
+        AdaptationType.ELEMENT_SEARCH,
+        AdaptationType.TEMPLATE_MATCH,
+        AdaptationType.WINDOW_OFFSET
+    })
+    
     def __init__(self, automation_engine: IntelligentAutomationEngine, 
-                 context_verifier: ContextVerifier):
+                 context_verifier: ContextVerifier,
+                 adaptation_store: Optional[AdaptationStore] = None):
         self.automation_engine = automation_engine
         self.context_verifier = context_verifier
         self.context_detector = automation_engine.context_detector
@@ -107,6 +123,16 @@ class AdaptiveExecutor:
         self.adaptation_history: List[AdaptationResult] = []
         self.successful_adaptations: Dict[str, List[AdaptationResult]] = {}
         self.failed_adaptations: Dict[str, List[AdaptationResult]] = {}
+        self.adaptation_store = adaptation_store or AdaptationStore()
+        
+        # Recorded monitor layout, mapped onto the current one before adapting
+        self.display_topology = get_display_topology(automation_engine.platform)
+        self.recorded_layout: Optional[List[Dict[str, Any]]] = None
+        
+        # Spatial index over the most recently searched element list (held, not just its id,
+        # so a new list can never be mistaken for it)
+        self._element_index: Optional[SpatialIndex] = None
+        self._element_index_source: Optional[List[Any]] = None
         
         # Configuration
         self.config = {
@@ -125,7 +151,15 @@ class AdaptiveExecutor:
             'failed_adaptations': 0,
             'avg_adaptation_time': 0.0,
             'adaptation_types_used': {},
-            'precision_scores': []
+            'precision_scores': [],
+            'first_try_successes': 0,
+            'learned_adaptations_used': 0,
+            'template_matches': 0,
+            'template_misses': 0,
+            'layout_mapped_actions': 0,
+            'adaptation_latencies': deque(maxlen=1000),
+            'template_search_times': deque(maxlen=1000),
+            'template_confidences': deque(maxlen=1000)
         }
         
         logger.info("Adaptive executor initialized")
@@ -146,10 +180,16 @@ class AdaptiveExecutor:
         """
         start_time = time.time()
         max_attempts = max_attempts or self.config['max_adaptation_attempts']
+        self.stats['total_executions'] += 1
         
         try:
+            # Recorded coordinates are moved onto the current monitor layout once, up front
+            action = self._map_to_current_layout(action)
+            
             # Initialize adaptation context
             adaptation_context = self._create_adaptation_context(action)
+            action_signature = self._get_action_signature(action)
+            context_fingerprint = self._get_context_fingerprint(adaptation_context.current_context)
             
             # Try execution with adaptations
             for attempt in range(1, max_attempts + 1):
@@ -158,14 +198,28 @@ class AdaptiveExecutor:
                 adaptation_context.execution_attempt = attempt
                 adaptation_context.last_attempt_time = time.time()
                 
-                # Choose adaptation strategy for this attempt
-                adapted_action, adaptation_type = self._adapt_action(
-                    action, adaptation_context, strategy, attempt
-                )
+                # Choose adaptation strategy for this attempt, preferring a known-good one first
+                adaptation_started = time.perf_counter()
+                learned = None
+                if attempt == 1 and self.config['learning_enabled']:
+                    learned = self.adaptation_store.lookup(action_signature, context_fingerprint)
+                
+                if learned:
+                    adapted_action = learned.apply(action)
+                    adaptation_type = AdaptationType(learned.adaptation_type)
+                    self.stats['learned_adaptations_used'] += 1
+                else:
+                    adapted_action, adaptation_type = self._adapt_action(
+                        action, adaptation_context, strategy, attempt
+                    )
+                self.stats['adaptation_latencies'].append(time.perf_counter() - adaptation_started)
                 
                 # Execute adapted action
                 execution_result = self._execute_adapted_action(adapted_action, adaptation_type)
                 
+                if learned and not execution_result['success']:
+                    self.adaptation_store.record_failure(action_signature, context_fingerprint)
+                
                 if execution_result['success']:
                     # Success! Create result
                     result = AdaptationResult(
@@ -177,9 +231,14 @@ class AdaptiveExecutor:
                         attempts_made=attempt,
                         adaptations_applied=self._get_adaptations_applied(action, adapted_action),
                         precision_score=self._calculate_precision_score(action, adapted_action, execution_result),
-                        reliability_score=self._calculate_reliability_score(adaptation_type)
+                        reliability_score=self._calculate_reliability_score(adaptation_type),
+                        metadata={'learned': learned is not None}
                     )
                     
+                    self.stats['successful_adaptations'] += 1
+                    if attempt == 1:
+                        self.stats['first_try_successes'] += 1
+                    
                     # Learn from successful adaptation
                     self._learn_from_success(action, result, adaptation_context)
                     
@@ -201,6 +260,7 @@ class AdaptiveExecutor:
                 error_info=f"All {max_attempts} adaptation attempts failed",
                 reliability_score=0.0
             )
+            self.stats['failed_adaptations'] += 1
             
             # Learn from failure
             self._learn_from_failure(action, result, adaptation_context)
@@ -219,6 +279,18 @@ class AdaptiveExecutor:
                 error_info=f"Execution error: {e}"
             )
     
+    def _get_context_fingerprint(self, context: ApplicationContext) -> str:
+        """Fingerprint the parts of a context that affect where UI elements land."""
+        bounds = context.window_bounds or {}
+        content = "|".join([
+            context.process_name,
+            context.context_type.value,
+            context.ui_state.value,
+            str(bounds.get('width', 0)),
+            str(bounds.get('height', 0))
+        ])
+        return hashlib.sha1(content.encode()).hexdigest()[:16]
+    
     def _create_adaptation_context(self, action: Dict[str, Any]) -> AdaptationContext:
         """Create adaptation context for the action."""
         current_context = self.context_detector.detect_current_context()
@@ -262,14 +334,11 @@ class AdaptiveExecutor:
                 x, y = action['coordinates']
                 
                 # Check if window moved
-                current_bounds = context.current_context.window_bounds
-                expected_bounds = context.expected_context.window_bounds
-                
-                dx = current_bounds.get('x', 0) - expected_bounds.get('x', 0)
-                dy = current_bounds.get('y', 0) - expected_bounds.get('y', 0)
+                dx, dy = self._get_window_offset(context)
                 
                 if abs(dx) > 5 or abs(dy) > 5:  # Window moved significantly
                     adapted_action['coordinates'] = (x + dx, y + dy)
+                    adaptation_type = AdaptationType.WINDOW_OFFSET
                     logger.info(f"Applied window offset: ({dx}, {dy})")
                 else:
                     # Small random adjustment to handle minor changes
@@ -287,6 +356,13 @@ class AdaptiveExecutor:
         adapted_action = action.copy()
         
         if action.get('type') in ['click', 'double_click'] and 'coordinates' in action:
+            # Icon-only targets: match the reference crop recorded with the action
+            if action.get('template'):
+                element = self._find_element_by_template(action, context)
+                if element:
+                    adapted_action['coordinates'] = element.center_point
+                    return adapted_action, AdaptationType.TEMPLATE_MATCH
+            
             # Try element search adaptation
             x, y = action['coordinates']
             radius = self.config['coordinate_search_radius']
@@ -301,11 +377,10 @@ class AdaptiveExecutor:
                 closest_element = self._find_closest_element(elements, (x, y))
                 if closest_element:
                     # Use element center as new coordinates
-                    element_bounds = closest_element.get('bounds', {})
+                    element_bounds = self._get_element_bounds(closest_element)
                     if element_bounds:
-                        new_x = element_bounds.get('x', x) + element_bounds.get('width', 0) // 2
-                        new_y = element_bounds.get('y', y) + element_bounds.get('height', 0) // 2
-                        adapted_action['coordinates'] = (new_x, new_y)
+                        ex, ey, ew, eh = element_bounds
+                        adapted_action['coordinates'] = (ex + ew // 2, ey + eh // 2)
                         return adapted_action, AdaptationType.ELEMENT_SEARCH
             
             # Fallback to scale adjustment
@@ -360,11 +435,10 @@ class AdaptiveExecutor:
                 # Try to find element by type or attributes rather than just proximity
                 best_element = self._find_best_matching_element(elements, action)
                 if best_element:
-                    element_bounds = best_element.get('bounds', {})
+                    element_bounds = self._get_element_bounds(best_element)
                     if element_bounds:
-                        new_x = element_bounds.get('x', x) + element_bounds.get('width', 0) // 2
-                        new_y = element_bounds.get('y', y) + element_bounds.get('height', 0) // 2
-                        adapted_action['coordinates'] = (new_x, new_y)
+                        ex, ey, ew, eh = element_bounds
+                        adapted_action['coordinates'] = (ex + ew // 2, ey + eh // 2)
                         return adapted_action, AdaptationType.ELEMENT_SEARCH
         
         # Sequence modification - add wait before action
@@ -435,31 +509,94 @@ class AdaptiveExecutor:
             logger.error(f"Action execution failed: {e}")
             return {'success': False, 'confidence': 0.0, 'execution_time': 0.0, 'error': str(e)}
     
-    def _find_closest_element(self, elements: List[Dict[str, Any]], 
-                            coordinates: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+    def set_recorded_layout(self, layout: Optional[List[Dict[str, Any]]]):
+        """Set the monitor layout the actions were recorded on (the recording's 'displays')."""
+        self.recorded_layout = layout
+    
+    def _map_to_current_layout(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Map an action's recorded coordinates and template bounds onto the current displays."""
+        layout = action.get('display_layout') or self.recorded_layout
+        if not layout or 'coordinates' not in action:
+            return action
+        
+        mapping = self.display_topology.get_mapping(layout)
+        if mapping.is_identity:
+            return action
+        
+        mapped = action.copy()
+        x, y = action['coordinates']
+        mapped['coordinates'] = mapping.map_point(x, y)
+        
+        template = action.get('template')
+        if template and template.get('bounds'):
+            bounds = tuple(template['bounds'])
+            # The crop was captured at the recorded monitor's DPI; search for it at the current one
+            mapped['template'] = dict(template, bounds=list(mapping.map_bounds(bounds)),
+                                      pixel_scale=mapping.pixel_scale_at(bounds[0], bounds[1]))
+        elif template:
+            mapped['template'] = dict(template, pixel_scale=mapping.pixel_scale_at(x, y))
+        
+        self.stats['layout_mapped_actions'] += 1
+        return mapped
+    
+    def _get_window_offset(self, context: AdaptationContext) -> Tuple[int, int]:
+        """Movement of the target window since the action was recorded."""
+        current_bounds = context.current_context.window_bounds
+        expected_bounds = context.expected_context.window_bounds
+        
+        dx = current_bounds.get('x', 0) - expected_bounds.get('x', 0)
+        dy = current_bounds.get('y', 0) - expected_bounds.get('y', 0)
+        return dx, dy
+    
+    def _find_element_by_template(self, action: Dict[str, Any], context: AdaptationContext) -> Optional[Any]:
+        """Locate the action's recorded reference crop, starting where it is expected."""
+        template = action['template']
+        bounds = template.get('bounds')
+        
+        element = self.automation_engine.find_element_by_template(
+            template['path'],
+            tuple(bounds) if bounds else None,
+            self._get_window_offset(context),
+            template.get('pixel_scale', 1.0)
+        )
+        
+        if element is None:
+            self.stats['template_misses'] += 1
+            return None
+        
+        self.stats['template_matches'] += 1
+        self.stats['template_search_times'].append(element.attributes.get('search_time', 0.0))
+        self.stats['template_confidences'].append(element.confidence)
+        return element
+    
+    def _find_closest_element(self, elements: List[Any], 
+                            coordinates: Tuple[int, int]) -> Optional[Any]:
         """Find element closest to given coordinates."""
         if not elements:
             return None
         
-        x, y = coordinates
-        closest_element = None
-        min_distance = float('inf')
-        
-        for element in elements:
-            bounds = element.get('bounds', {})
-            if bounds:
-                # Calculate center of element
-                elem_x = bounds.get('x', 0) + bounds.get('width', 0) // 2
-                elem_y = bounds.get('y', 0) + bounds.get('height', 0) // 2
-                
-                # Calculate distance
-                distance = ((elem_x - x) ** 2 + (elem_y - y) ** 2) ** 0.5
-                
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_element = element
+        # Reuse the index while the caller keeps passing the same element list
+        if self._element_index is None or self._element_index_source is not elements \
+                or len(self._element_index) != len(elements):
+            self._element_index = SpatialIndex.from_items(elements, self._get_element_bounds)
+            self._element_index_source = elements
         
-        return closest_element
+        x, y = coordinates
+        return self._element_index.nearest(x, y)
+    
+    def invalidate_element_index(self) -> None:
+        """Drop the spatial index, e.g. after changing the indexed element list in place."""
+        self._element_index = None
+        self._element_index_source = None
+    
+    def _get_element_bounds(self, element: Any) -> Optional[Tuple[int, int, int, int]]:
+        """Get (x, y, width, height) from an element dict or UIElementInfo."""
+        bounds = element.get('bounds') if isinstance(element, dict) else getattr(element, 'bounds', None)
+        if not bounds:
+            return None
+        if isinstance(bounds, dict):
+            return (bounds.get('x', 0), bounds.get('y', 0), bounds.get('width', 0), bounds.get('height', 0))
+        return tuple(bounds)
     
     def _find_best_matching_element(self, elements: List[Dict[str, Any]], 
                                   action: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -480,7 +617,7 @@ class AdaptiveExecutor:
         return elements[0] if elements else None
     
     def _calculate_scale_factor(self, context: AdaptationContext) -> float:
-        """Calculate scale factor based on resolution changes."""
+        """Calculate scale factor based on window resizes (display changes are mapped up front)."""
         current_bounds = context.current_context.window_bounds
         expected_bounds = context.expected_context.window_bounds
         
@@ -538,7 +675,9 @@ class AdaptiveExecutor:
         """Calculate reliability score for adaptation type."""
         reliability_scores = {
             AdaptationType.COORDINATE_SHIFT: 0.7,
+            AdaptationType.WINDOW_OFFSET: 0.8,
             AdaptationType.ELEMENT_SEARCH: 0.8,
+            AdaptationType.TEMPLATE_MATCH: 0.85,
             AdaptationType.CONTEXT_WAIT: 0.6,
             AdaptationType.SCALE_ADJUSTMENT: 0.7,
             AdaptationType.RETRY_WITH_DELAY: 0.5,
@@ -573,6 +712,27 @@ class AdaptiveExecutor:
         
         self.successful_adaptations[action_signature].append(result)
         
+        # Persist deterministic outcomes so the same adaptation is tried first next time;
+        # random jitter and blind retries would only replay noise
+        original = action.get('coordinates')
+        adapted = result.adapted_action.get('coordinates')
+        if (result.adaptation_type in self.PERSISTED_ADAPTATIONS and original is not None and
+                adapted is not None and result.adapted_action.get('type') == action.get('type')):
+            shift = (adapted[0] - original[0], adapted[1] - original[1])
+            parameters = {
+                key: value for key, value in result.adapted_action.items()
+                if key != 'coordinates' and action.get(key) != value
+            }
+            
+            self.adaptation_store.record_success(
+                action_signature,
+                self._get_context_fingerprint(context.current_context),
+                result.adaptation_type.value,
+                parameters,
+                shift,
+                result.execution_time
+            )
+        
         # Keep only recent successes
         if len(self.successful_adaptations[action_signature]) > 20:
             self.successful_adaptations[action_signature] = \
@@ -606,13 +766,13 @@ class AdaptiveExecutor:
             quantized_x = (coords[0] // 50) * 50
             quantized_y = (coords[1] // 50) * 50
             return f"{action_type}_{quantized_x}_{quantized_y}"
-        elif action_type == 'type':
-            text = action.get('text', '')
-            if len(text) > 20:
-                text = text[:20] + "..."
-            return f"{action_type}_{text}"
-        else:
-            return action_type
+        
+        # Everything that identifies the input (key, text, modifiers, ...) so that
+        # two different key presses or texts never share learned adaptations
+        identity = {key: value for key, value in action.items()
+                    if key not in ('coordinates', 'timestamp', 'delay', 'duration')}
+        digest = hashlib.sha1(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return f"{action_type}_{digest}"
     
     def get_adaptation_history(self, limit: int = 50) -> List[AdaptationResult]:
         """Get recent adaptation history."""
@@ -621,11 +781,33 @@ class AdaptiveExecutor:
     def get_adaptation_stats(self) -> Dict[str, Any]:
         """Get adaptation performance statistics."""
         stats = self.stats.copy()
+        latencies = sorted(stats.pop('adaptation_latencies'))
+        template_times = stats.pop('template_search_times')
+        template_confidences = stats.pop('template_confidences')
         
         if stats['total_executions'] > 0:
             stats['success_rate'] = stats['successful_adaptations'] / stats['total_executions']
+            stats['first_try_success_rate'] = stats['first_try_successes'] / stats['total_executions']
         else:
             stats['success_rate'] = 0.0
+            stats['first_try_success_rate'] = 0.0
+        
+        if latencies:
+            stats['avg_adaptation_latency'] = sum(latencies) / len(latencies)
+            stats['p95_adaptation_latency'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        else:
+            stats['avg_adaptation_latency'] = 0.0
+            stats['p95_adaptation_latency'] = 0.0
+        
+        if template_times:
+            stats['avg_template_search_time'] = sum(template_times) / len(template_times)
+            stats['avg_template_confidence'] = sum(template_confidences) / len(template_confidences)
+        else:
+            stats['avg_template_search_time'] = 0.0
+            stats['avg_template_confidence'] = 0.0
+        
+        stats['adaptation_store'] = self.adaptation_store.get_stats()
+        stats['display_topology'] = self.display_topology.get_topology_stats()
         
         if stats['precision_scores']:
             stats['avg_precision'] = sum(stats['precision_scores']) / len(stats['precision_scores'])
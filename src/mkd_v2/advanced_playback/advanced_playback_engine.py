@@ -18,6 +18,7 @@ from .context_verifier import ContextVerifier, VerificationLevel, VerificationCr
 from .adaptive_executor import AdaptiveExecutor, AdaptationStrategy, AdaptationResult
 from .recovery_engine import RecoveryEngine, RecoveryStrategy, FailureInfo, RecoveryResult
 from .performance_optimizer import PerformanceOptimizer, OptimizationLevel, OptimizationResult
+from ..platform.base import PlatformInterface
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +27,7 @@ class PlaybackMode(Enum):
     """Advanced playback execution modes"""
     STANDARD = "standard"           # Normal execution with basic optimization
     SAFE = "safe"                  # Conservative with extensive verification
-    FAST = "fast"                  # Aggressive optimization for speed
+    FAST = "fast"                  # Batched dispatch through the optimizer, no adaptation
     ADAPTIVE = "adaptive"          # Dynamic adjustment based on conditions
     RECOVERY = "recovery"          # Focus on error recovery and reliability
 
@@ -65,14 +66,14 @@ class PlaybackResult:
 class AdvancedPlaybackEngine:
     """Unified advanced playback engine with all intelligent features"""
     
-    def __init__(self, config: PlaybackConfig = None):
+    def __init__(self, config: PlaybackConfig = None, platform: Optional[PlatformInterface] = None):
         self.config = config or PlaybackConfig()
         
         # Initialize component systems
         self.context_verifier = ContextVerifier()
         self.adaptive_executor = AdaptiveExecutor()
         self.recovery_engine = RecoveryEngine()
-        self.performance_optimizer = PerformanceOptimizer(self.config.optimization_level)
+        self.performance_optimizer = PerformanceOptimizer(self.config.optimization_level, platform=platform)
         
         # Execution state
         self.current_execution = None
@@ -119,15 +120,25 @@ class AdvancedPlaybackEngine:
                 result.errors.append("Context verification failed in SAFE mode")
                 return result
             
-            # Phase 2: Performance Optimization
-            if self.config.performance_monitoring:
-                optimization_result = self.performance_optimizer.optimize_execution(actions, self.config.optimization_level)
+            # Phases 2 and 3: the optimizer either executes the actions itself (FAST mode
+            # with a platform) or only plans them for adaptive execution, never both
+            if self._uses_direct_execution():
+                optimization_result = self.performance_optimizer.optimize_execution(
+                    actions, self.config.optimization_level, execute=True
+                )
                 result.optimization_result = optimization_result
-                if optimization_result.success:
-                    actions = self._apply_optimization_suggestions(actions, optimization_result)
-            
-            # Phase 3: Adaptive Execution
-            execution_success = self._execute_with_adaptation(actions, context, result)
+                self._record_optimized_results(optimization_result, result)
+            else:
+                if self.config.performance_monitoring:
+                    optimization_result = self.performance_optimizer.optimize_execution(
+                        actions, self.config.optimization_level, execute=False
+                    )
+                    result.optimization_result = optimization_result
+                    if optimization_result.success:
+                        actions = self._apply_optimization_suggestions(optimization_result.planned_actions,
+                                                                       optimization_result)
+                
+                self._execute_with_adaptation(actions, context, result)
             
             # Phase 4: Results Analysis
             execution_time = time.time() - start_time
@@ -160,6 +171,23 @@ class AdvancedPlaybackEngine:
         
         return result
     
+    def _uses_direct_execution(self) -> bool:
+        """Whether the optimizer dispatches actions instead of the adaptive executor"""
+        return self.config.mode == PlaybackMode.FAST and self.performance_optimizer.platform is not None
+    
+    def _record_optimized_results(self, optimization_result: OptimizationResult,
+                                  result: PlaybackResult) -> None:
+        """Count the outcomes of actions the optimizer executed directly"""
+        result.successful_actions = sum(
+            1 for outcome in optimization_result.action_results
+            if isinstance(outcome, dict) and outcome.get('success')
+        )
+        result.failed_actions = result.total_actions - result.successful_actions
+        self.failure_count += result.failed_actions
+        
+        if not optimization_result.success:
+            result.errors.extend(optimization_result.recommendations)
+    
     def _verify_execution_context(self, actions: List[Dict[str, Any]], 
                                  context: Dict[str, Any], 
                                  result: PlaybackResult) -> bool:
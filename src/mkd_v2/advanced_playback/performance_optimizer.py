@@ -9,14 +9,18 @@ Provides performance monitoring and optimization for automation playback:
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional, Tuple, Callable
+from typing import Dict, List, Any, Optional, Tuple, Callable, Union
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor, Future
+from itertools import groupby
 import time
 import threading
 from collections import defaultdict, deque
 import statistics
 import logging
 
+from ..platform.base import PlatformInterface, MouseAction, KeyboardAction, MouseButton, KeyModifier
+
 logger = logging.getLogger(__name__)
 
 
@@ -79,13 +83,23 @@ class OptimizationResult:
     metrics_before: PerformanceMetrics
     metrics_after: Optional[PerformanceMetrics] = None
     applied_optimizations: List[str] = field(default_factory=list)
+    planned_actions: List[Dict[str, Any]] = field(default_factory=list)
+    action_results: List[Any] = field(default_factory=list)  # Empty when only planned
+
+
+# Action types that only observe state and may run off the input thread
+INDEPENDENT_ACTION_TYPES = {'screenshot', 'capture', 'verify', 'log'}
 
 
 class PerformanceOptimizer:
     """Advanced performance optimizer for automation playback"""
     
-    def __init__(self, optimization_level: OptimizationLevel = OptimizationLevel.BALANCED):
+    def __init__(self, optimization_level: OptimizationLevel = OptimizationLevel.BALANCED,
+                 platform: Optional[PlatformInterface] = None,
+                 action_handler: Optional[Callable[[Dict[str, Any]], Any]] = None):
         self.optimization_level = optimization_level
+        self.platform = platform
+        self.action_handler = action_handler
         self.metrics_history: deque = deque(maxlen=1000)
         self.resource_monitors: Dict[ResourceType, Any] = {}
         self.optimization_rules: List[OptimizationRule] = []
@@ -96,6 +110,15 @@ class PerformanceOptimizer:
         self.stats_lock = threading.Lock()
         self.current_metrics = PerformanceMetrics(0, {}, 0, 0, 0, 0)
         
+        # Persistent pool for independent actions; input runs stay on the caller
+        self._worker_pool: Optional[ThreadPoolExecutor] = None
+        self.dispatch_stats = {
+            'platform_calls': 0,
+            'batched_actions': 0,
+            'handler_actions': 0,
+            'independent_actions': 0
+        }
+        
         self._initialize_optimization_rules()
         self._start_monitoring()
     
@@ -234,14 +257,31 @@ class PerformanceOptimizer:
                 logger.error(f"Error applying rule {rule.name}: {e}")
     
     def optimize_execution(self, actions: List[Dict[str, Any]], 
-                          target_level: OptimizationLevel = None) -> OptimizationResult:
-        """Optimize execution of action sequence"""
+                          target_level: OptimizationLevel = None,
+                          execute: bool = True) -> OptimizationResult:
+        """
+        Optimize execution of action sequence.
+        
+        With execute=False the sequence is only planned: planned_actions is
+        returned for the caller to run and nothing is dispatched.
+        """
         target_level = target_level or self.optimization_level
         metrics_before = self.current_metrics
         
         try:
             # Apply pre-execution optimizations
             optimized_actions = self._optimize_action_sequence(actions)
+            
+            if not execute:
+                return OptimizationResult(
+                    success=True,
+                    improvements={},
+                    recommendations=self._generate_recommendations(metrics_before),
+                    metrics_before=metrics_before,
+                    applied_optimizations=["sequence_optimization"],
+                    planned_actions=optimized_actions
+                )
+            
             batched_actions = self._create_optimal_batches(optimized_actions)
             
             # Execute with optimization
@@ -265,7 +305,9 @@ class PerformanceOptimizer:
                     "sequence_optimization",
                     "batch_processing", 
                     "adaptive_scheduling"
-                ]
+                ],
+                planned_actions=optimized_actions,
+                action_results=results
             )
             
         except Exception as e:
@@ -288,26 +330,24 @@ class PerformanceOptimizer:
         # Reorder for optimal execution
         optimized_sequence = []
         for group in grouped_actions:
-            # Sort within group by priority/efficiency
-            sorted_group = sorted(group, key=self._calculate_action_priority, reverse=True)
-            optimized_sequence.extend(sorted_group)
+            # Input order is significant; only independent actions may be reordered
+            if all(self._is_independent_action(action) for action in group):
+                group = sorted(group, key=self._calculate_action_priority, reverse=True)
+            optimized_sequence.extend(group)
         
         return optimized_sequence
     
     def _group_similar_actions(self, actions: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
-        """Group similar actions for batch processing"""
-        groups = defaultdict(list)
-        
-        for action in actions:
+        """Group contiguous runs of similar actions for batch processing"""
+        def group_key(action: Dict[str, Any]) -> Tuple[str, str, str]:
             # Group by action type and target application
-            key = (
+            return (
                 action.get('type', ''),
                 action.get('application', ''),
                 action.get('window_title', '')
             )
-            groups[key].append(action)
         
-        return list(groups.values())
+        return [list(group) for _, group in groupby(actions, key=group_key)]
     
     def _calculate_action_priority(self, action: Dict[str, Any]) -> float:
         """Calculate priority score for action ordering"""
@@ -392,35 +432,162 @@ class PerformanceOptimizer:
         return base_complexity
     
     def _execute_optimized_batches(self, batches: List[List[Dict[str, Any]]]) -> List[Any]:
-        """Execute batches with optimization"""
+        """Execute batches in order, overlapping only independent actions"""
         results = []
+        pending: List[Tuple[int, Future]] = []
         
-        # Execute batches in parallel where possible
-        if len(batches) <= self.batch_config.parallel_batches:
-            # Small number of batches - execute in parallel
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor(max_workers=len(batches)) as executor:
-                futures = [executor.submit(self._execute_batch, batch) for batch in batches]
-                for future in concurrent.futures.as_completed(futures):
-                    results.extend(future.result())
-        else:
-            # Large number of batches - execute sequentially with some parallelism
-            for batch in batches:
-                batch_results = self._execute_batch(batch)
-                results.extend(batch_results)
+        for batch in batches:
+            batch_results = self._execute_batch(batch)
+            for result in batch_results:
+                if isinstance(result, Future):
+                    pending.append((len(results), result))
+                results.append(result)
+        
+        # Resolve independent actions that ran on the worker pool
+        for index, future in pending:
+            try:
+                results[index] = future.result(timeout=self.batch_config.batch_timeout)
+            except Exception as e:
+                results[index] = {"success": False, "action": None, "error": str(e)}
         
         return results
     
     def _execute_batch(self, batch: List[Dict[str, Any]]) -> List[Any]:
-        """Execute a single batch of actions"""
-        # Mock execution - in real implementation would call actual action executor
-        results = []
-        for action in batch:
-            # Simulate action execution
-            time.sleep(0.01)  # Minimal delay
-            results.append({"success": True, "action": action})
+        """
+        Execute a single batch of actions.
+        
+        Contiguous runs of primitive input actions are sent to the platform
+        in one execute_batch call. Independent actions are submitted to the
+        persistent worker pool and returned as futures; everything else goes
+        through the action handler in order.
+        """
+        results: List[Any] = [None] * len(batch)
+        run: List[Tuple[int, Dict[str, Any], Union[MouseAction, KeyboardAction]]] = []
+        
+        def flush_run():
+            if run:
+                run_results = self._dispatch_input_run([(action, platform_action) for _, action, platform_action in run])
+                for (index, _, _), result in zip(run, run_results):
+                    results[index] = result
+                run.clear()
+        
+        for index, action in enumerate(batch):
+            if self._is_independent_action(action):
+                results[index] = self._get_worker_pool().submit(self._execute_single_action, action)
+                with self.stats_lock:
+                    self.dispatch_stats['independent_actions'] += 1
+                continue
+            
+            platform_action = self._to_platform_action(action)
+            if platform_action is not None:
+                run.append((index, action, platform_action))
+                continue
+            
+            flush_run()
+            results[index] = self._execute_single_action(action)
+        
+        flush_run()
         return results
     
+    def _dispatch_input_run(self, run: List[Tuple[Dict[str, Any], Union[MouseAction, KeyboardAction]]]) -> List[Dict[str, Any]]:
+        """Send a contiguous run of primitive input actions as one platform call"""
+        if self.platform is None:
+            return [{"success": True, "action": action, "dry_run": True} for action, _ in run]
+        
+        try:
+            flags = self.platform.execute_batch([platform_action for _, platform_action in run])
+        except Exception as e:
+            logger.error(f"Batch input dispatch failed: {e}")
+            flags = [False] * len(run)
+        
+        with self.stats_lock:
+            self.dispatch_stats['platform_calls'] += 1
+            self.dispatch_stats['batched_actions'] += len(run)
+        
+        return [{"success": bool(flag), "action": action} for (action, _), flag in zip(run, flags)]
+    
+    def _execute_single_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a non-batchable action through the configured handler"""
+        if self.action_handler is None:
+            return {"success": True, "action": action, "dry_run": True}
+        
+        with self.stats_lock:
+            self.dispatch_stats['handler_actions'] += 1
+        
+        try:
+            outcome = self.action_handler(action)
+            success = outcome.get('success', False) if isinstance(outcome, dict) else bool(getattr(outcome, 'success', outcome))
+            return {"success": success, "action": action, "result": outcome}
+        except Exception as e:
+            logger.error(f"Action handler failed for {action.get('type', 'unknown')}: {e}")
+            return {"success": False, "action": action, "error": str(e)}
+    
+    def _is_independent_action(self, action: Dict[str, Any]) -> bool:
+        """Check whether an action has no ordering dependency on input"""
+        if 'independent' in action:
+            return bool(action['independent'])
+        return action.get('type') in INDEPENDENT_ACTION_TYPES
+    
+    def _to_platform_action(self, action: Dict[str, Any]) -> Optional[Union[MouseAction, KeyboardAction]]:
+        """Convert a primitive action dict to a platform action, or None if not batchable"""
+        if action.get('use_ocr') or action.get('image_template') or action.get('wait_before'):
+            return None
+        
+        action_type = action.get('type', '').lower()
+        modifiers = [KeyModifier(m) for m in action.get('modifiers', []) if m in KeyModifier._value2member_map_]
+        
+        if action_type in ('click', 'mouse_click', 'double_click', 'right_click', 'move', 'mouse_move', 'scroll', 'drag'):
+            if 'coordinates' in action:
+                x, y = action['coordinates']
+            elif 'x' in action and 'y' in action:
+                x, y = action['x'], action['y']
+            else:
+                return None
+            
+            button = MouseButton.RIGHT if action_type == 'right_click' else \
+                MouseButton._value2member_map_.get(action.get('button', 'left'), MouseButton.LEFT)
+            mouse_action = {
+                'click': 'click', 'mouse_click': 'click', 'right_click': 'click',
+                'double_click': 'double_click', 'move': 'move', 'mouse_move': 'move',
+                'scroll': 'scroll', 'drag': 'drag'
+            }[action_type]
+            
+            return MouseAction(
+                action=mouse_action, button=button, x=x, y=y,
+                dx=action.get('dx', 0), dy=action.get('dy', 0),
+                modifiers=modifiers or None
+            )
+        
+        if action_type in ('type', 'type_text') and action.get('text') is not None:
+            if action.get('clear_first'):
+                return None
+            return KeyboardAction(action='type', text=action['text'])
+        
+        if action_type in ('key_press', 'keyboard', 'key') and action.get('key'):
+            key_action = action.get('action', 'press')
+            if key_action not in ('press', 'release'):
+                return None
+            return KeyboardAction(action=key_action, key=action['key'], modifiers=modifiers or None)
+        
+        return None
+    
+    def _get_worker_pool(self) -> ThreadPoolExecutor:
+        """Get the persistent worker pool, creating it on first use"""
+        with self.processing_lock:
+            if self._worker_pool is None:
+                self._worker_pool = ThreadPoolExecutor(
+                    max_workers=max(1, self.batch_config.parallel_batches),
+                    thread_name_prefix="mkd-optimizer"
+                )
+            return self._worker_pool
+    
+    def shutdown(self) -> None:
+        """Release the worker pool"""
+        with self.processing_lock:
+            pool, self._worker_pool = self._worker_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+    
     def _calculate_improvements(self, before: PerformanceMetrics, after: PerformanceMetrics) -> Dict[str, float]:
         """Calculate performance improvements"""
         improvements = {}
@@ -552,6 +719,7 @@ class PerformanceOptimizer:
                 "parallel_batches": self.batch_config.parallel_batches,
                 "batch_timeout": self.batch_config.batch_timeout,
             },
+            "batch_dispatch": dict(self.dispatch_stats),
             "active_rules": len([r for r in self.optimization_rules if r.last_applied]),
             "recommendations": self._generate_recommendations(self.current_metrics)
         }
\ No newline at end of file
@@ -8,6 +8,7 @@ Handles various failure scenarios with appropriate recovery strategies.
 
 import time
 import logging
+from collections import deque
 from typing import Dict, List, Optional, Any, Callable
 from dataclasses import dataclass, field
 from enum import Enum
@@ -15,6 +16,7 @@ from enum import Enum
 from ..intelligence.context_detector import ContextDetector, ApplicationContext
 from .context_verifier import ContextVerifier, VerificationCriteria, VerificationLevel
 from .adaptive_executor import AdaptiveExecutor, AdaptationResult
+from .recovery_model import RecoveryModel
 
 
 logger = logging.getLogger(__name__)
@@ -121,7 +123,28 @@ class RecoveryEngine:
     to maintain robust automation playback.
     """
     
-    def __init__(self, context_detector: ContextDetector, context_verifier: ContextVerifier):
+    # Strategies that give up on the action rather than recover it; the
+    # learned ordering never moves them ahead of real recoveries
+    TERMINAL_STRATEGIES = [
+        RecoveryStrategy.SKIP_AND_CONTINUE,
+        RecoveryStrategy.USER_INTERVENTION,
+        RecoveryStrategy.ABORT_SEQUENCE
+    ]
+    
+    # Latency priors (seconds) used until a strategy has been observed
+    STRATEGY_LATENCY_PRIORS = {
+        RecoveryStrategy.RETRY_IMMEDIATELY: 0.2,
+        RecoveryStrategy.RETRY_WITH_DELAY: 3.0,
+        RecoveryStrategy.CONTEXT_RESTORATION: 2.5,
+        RecoveryStrategy.APPLICATION_RESTART: 10.0,
+        RecoveryStrategy.ALTERNATIVE_METHOD: 1.0,
+        RecoveryStrategy.SKIP_AND_CONTINUE: 0.0,
+        RecoveryStrategy.USER_INTERVENTION: 60.0,
+        RecoveryStrategy.ABORT_SEQUENCE: 0.0
+    }
+    
+    def __init__(self, context_detector: ContextDetector, context_verifier: ContextVerifier,
+                 recovery_model: Optional[RecoveryModel] = None):
         self.context_detector = context_detector
         self.context_verifier = context_verifier
         
@@ -129,6 +152,7 @@ class RecoveryEngine:
         self.recovery_history: List[RecoveryResult] = []
         self.successful_strategies: Dict[FailureType, List[RecoveryStrategy]] = {}
         self.failed_strategies: Dict[FailureType, List[RecoveryStrategy]] = {}
+        self.recovery_model = recovery_model or RecoveryModel()
         
         # Configuration
         self.config = {
@@ -182,7 +206,9 @@ class RecoveryEngine:
             'failed_recoveries': 0,
             'avg_recovery_time': 0.0,
             'strategy_success_rates': {},
-            'failure_type_counts': {}
+            'failure_type_counts': {},
+            'recovery_times': deque(maxlen=1000),
+            'recovery_times_by_type': {}
         }
         
         logger.info("Recovery engine initialized")
@@ -205,14 +231,18 @@ class RecoveryEngine:
             # Analyze failure and select recovery strategies
             strategies = self._select_recovery_strategies(failure_info)
             
+            app_context = self._get_app_context_key(failure_info)
+            
             # Attempt recovery with each strategy
             for i, strategy in enumerate(strategies):
                 logger.info(f"Attempting recovery strategy {i+1}/{len(strategies)}: {strategy.value}")
                 
                 recovery_action = self._create_recovery_action(strategy, failure_info)
+                strategy_started = time.time()
                 
                 if recovery_action:
                     result = self._execute_recovery_action(recovery_action, failure_info)
+                    strategy_latency = time.time() - strategy_started
                     
                     if result.success:
                         # Success! Learn and return
@@ -231,14 +261,15 @@ class RecoveryEngine:
                             can_continue_sequence=self._can_continue_after_recovery(result, failure_info)
                         )
                         
-                        self._learn_from_success(failure_info.failure_type, strategy)
+                        self._learn_from_success(failure_info.failure_type, strategy, app_context, strategy_latency)
                         self._update_stats(final_result)
                         
                         return final_result
                 
                 # Strategy failed, try next one
                 logger.warning(f"Recovery strategy {strategy.value} failed")
-                self._learn_from_failure(failure_info.failure_type, strategy)
+                self._learn_from_failure(failure_info.failure_type, strategy, app_context,
+                                         time.time() - strategy_started)
             
             # All strategies failed
             recovery_time = time.time() - start_time
@@ -283,7 +314,9 @@ class RecoveryEngine:
         
         # Adjust based on learning
         if self.config['learning_enabled']:
-            strategies = self._adjust_strategies_by_learning(failure_type, base_strategies)
+            strategies = self._adjust_strategies_by_learning(
+                failure_type, base_strategies, self._get_app_context_key(failure_info)
+            )
         else:
             strategies = base_strategies.copy()
         
@@ -306,30 +339,31 @@ class RecoveryEngine:
         return strategies[:self.config['max_recovery_attempts']]
     
     def _adjust_strategies_by_learning(self, failure_type: FailureType, 
-                                     base_strategies: List[RecoveryStrategy]) -> List[RecoveryStrategy]:
-        """Adjust strategies based on learned success/failure rates."""
+                                     base_strategies: List[RecoveryStrategy],
+                                     app_context: str = "") -> List[RecoveryStrategy]:
+        """
+        Order strategies by expected time-to-recover in this app context.
         
-        successful = self.successful_strategies.get(failure_type, [])
-        failed = self.failed_strategies.get(failure_type, [])
+        Recovering strategies are ranked by the persisted model (latency
+        divided by success probability); terminal strategies keep their
+        base order at the end.
+        """
+        recovering = [s for s in base_strategies if s not in self.TERMINAL_STRATEGIES]
+        terminal = [s for s in base_strategies if s in self.TERMINAL_STRATEGIES]
         
-        # Calculate success rates
-        strategy_scores = {}
-        for strategy in base_strategies:
-            success_count = successful.count(strategy)
-            failure_count = failed.count(strategy)
-            total = success_count + failure_count
-            
-            if total > 0:
-                strategy_scores[strategy] = success_count / total
-            else:
-                strategy_scores[strategy] = 0.5  # Neutral score
+        priors = {s.value: self.STRATEGY_LATENCY_PRIORS.get(s, 1.0) for s in recovering}
+        ranked = self.recovery_model.rank(failure_type.value, app_context, [s.value for s in recovering], priors)
         
-        # Sort strategies by success rate
-        sorted_strategies = sorted(base_strategies, 
-                                 key=lambda s: strategy_scores.get(s, 0.5), 
-                                 reverse=True)
+        return [RecoveryStrategy(value) for value in ranked] + terminal
+    
+    def _get_app_context_key(self, failure_info: FailureInfo) -> str:
+        """Get the application context key used by the recovery model."""
+        context = failure_info.context_at_failure
+        if context is None:
+            return ""
         
-        return sorted_strategies
+        context_type = getattr(context.context_type, 'value', context.context_type)
+        return f"{context.app_name}:{context_type}"
     
     def _create_recovery_action(self, strategy: RecoveryStrategy, 
                               failure_info: FailureInfo) -> Optional[RecoveryAction]:
@@ -634,11 +668,15 @@ class RecoveryEngine:
         except:
             return False
     
-    def _learn_from_success(self, failure_type: FailureType, strategy: RecoveryStrategy):
+    def _learn_from_success(self, failure_type: FailureType, strategy: RecoveryStrategy,
+                            app_context: Optional[str] = None, latency: float = 0.0):
         """Learn from successful recovery."""
         if not self.config['learning_enabled']:
             return
         
+        if app_context is not None:
+            self.recovery_model.record(failure_type.value, app_context, strategy.value, True, latency)
+        
         if failure_type not in self.successful_strategies:
             self.successful_strategies[failure_type] = []
         
@@ -649,11 +687,15 @@ class RecoveryEngine:
             self.successful_strategies[failure_type] = \
                 self.successful_strategies[failure_type][-50:]
     
-    def _learn_from_failure(self, failure_type: FailureType, strategy: RecoveryStrategy):
+    def _learn_from_failure(self, failure_type: FailureType, strategy: RecoveryStrategy,
+                            app_context: Optional[str] = None, latency: float = 0.0):
         """Learn from failed recovery."""
         if not self.config['learning_enabled']:
             return
         
+        if app_context is not None:
+            self.recovery_model.record(failure_type.value, app_context, strategy.value, False, latency)
+        
         if failure_type not in self.failed_strategies:
             self.failed_strategies[failure_type] = []
         
@@ -678,6 +720,12 @@ class RecoveryEngine:
         current_avg = self.stats['avg_recovery_time']
         self.stats['avg_recovery_time'] = (current_avg * (count - 1) + result.recovery_time) / count
         
+        # Track time-to-recover samples for percentiles
+        if result.success:
+            failure_type_key = result.original_failure.failure_type.value
+            self.stats['recovery_times'].append(result.recovery_time)
+            self.stats['recovery_times_by_type'].setdefault(failure_type_key, deque(maxlen=200)).append(result.recovery_time)
+        
         # Update strategy success rates
         strategy = result.strategy_used.value
         if strategy not in self.stats['strategy_success_rates']:
@@ -737,6 +785,14 @@ class RecoveryEngine:
         """Get recovery performance statistics."""
         stats = self.stats.copy()
         
+        # Export time-to-recover percentiles instead of raw samples
+        stats['time_to_recover'] = self._percentiles(stats.pop('recovery_times'))
+        stats['time_to_recover_by_type'] = {
+            failure_type: self._percentiles(samples)
+            for failure_type, samples in stats.pop('recovery_times_by_type').items()
+        }
+        stats['recovery_model'] = self.recovery_model.get_stats()
+        
         if stats['total_recoveries'] > 0:
             stats['success_rate'] = stats['successful_recoveries'] / stats['total_recoveries']
         else:
@@ -751,6 +807,18 @@ class RecoveryEngine:
         
         return stats
     
+    @staticmethod
+    def _percentiles(samples) -> Dict[str, float]:
+        """Get p50/p90/p95/p99 of a sample collection."""
+        values = sorted(samples)
+        if not values:
+            return {'count': 0, 'p50': 0.0, 'p90': 0.0, 'p95': 0.0, 'p99': 0.0}
+        
+        def pick(q):
+            return values[min(len(values) - 1, int(len(values) * q))]
+        
+        return {'count': len(values), 'p50': pick(0.5), 'p90': pick(0.9), 'p95': pick(0.95), 'p99': pick(0.99)}
+    
     def update_config(self, **kwargs):
         """Update recovery engine configuration."""
         for key, value in kwargs.items():
@@ -0,0 +1,134 @@
+"""
+Recovery Model
+
+Persistent success/latency model for recovery strategy ordering:
+- Keyed by failure type, application context and strategy
+- Tracks attempts, successes and mean strategy latency
+- Ranks strategies by expected time-to-recover
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from .sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StrategyOutcomes:
+    """Observed outcomes of one strategy for one (failure type, app context) pair."""
+    failure_type: str
+    app_context: str
+    strategy: str
+    attempts: int = 0
+    successes: int = 0
+    avg_latency: float = 0.0
+    updated_at: float = 0.0
+    
+    @property
+    def success_probability(self) -> float:
+        """Laplace-smoothed success probability."""
+        return (self.successes + 1) / (self.attempts + 2)
+
+
+class RecoveryModel(SQLiteStore):
+    """
+    SQLite-backed model of recovery strategy outcomes.
+    
+    Strategies are ranked by latency / success probability, which is the
+    order that minimizes expected time until the first successful
+    strategy when attempts are tried one after another.
+    """
+    
+    DB_NAME = "recovery_model.db"
+    TABLE = "recovery_outcomes"
+    COLUMNS = (
+        ("failure_type", "TEXT NOT NULL"),
+        ("app_context", "TEXT NOT NULL"),
+        ("strategy", "TEXT NOT NULL"),
+        ("attempts", "INTEGER DEFAULT 0"),
+        ("successes", "INTEGER DEFAULT 0"),
+        ("avg_latency", "REAL DEFAULT 0"),
+        ("updated_at", "REAL"),
+    )
+    PRIMARY_KEY = ("failure_type", "app_context", "strategy")
+    
+    def __init__(self, storage_path: Optional[Path] = None):
+        self._entries: Dict[Tuple[str, str, str], StrategyOutcomes]
+        super().__init__(storage_path)
+        logger.info(f"RecoveryModel initialized with {len(self._entries)} entries")
+    
+    def _entry_key(self, entry: StrategyOutcomes) -> Tuple[str, str, str]:
+        return (entry.failure_type, entry.app_context, entry.strategy)
+    
+    def _entry_from_row(self, row) -> StrategyOutcomes:
+        return StrategyOutcomes(
+            failure_type=row['failure_type'],
+            app_context=row['app_context'],
+            strategy=row['strategy'],
+            attempts=row['attempts'],
+            successes=row['successes'],
+            avg_latency=row['avg_latency'],
+            updated_at=row['updated_at'] or 0.0
+        )
+    
+    def _entry_to_row(self, entry: StrategyOutcomes) -> Tuple:
+        return (entry.failure_type, entry.app_context, entry.strategy,
+                entry.attempts, entry.successes, entry.avg_latency, entry.updated_at)
+    
+    def get(self, failure_type: str, app_context: str, strategy: str) -> Optional[StrategyOutcomes]:
+        """Get observed outcomes for a strategy."""
+        with self._lock:
+            return self._entries.get((failure_type, app_context, strategy))
+    
+    def record(self, failure_type: str, app_context: str, strategy: str,
+               success: bool, latency: float):
+        """Record one strategy attempt."""
+        with self._lock:
+            key = (failure_type, app_context, strategy)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = StrategyOutcomes(failure_type=failure_type, app_context=app_context, strategy=strategy)
+                self._entries[key] = entry
+            
+            entry.attempts += 1
+            if success:
+                entry.successes += 1
+            entry.avg_latency += (latency - entry.avg_latency) / entry.attempts
+            entry.updated_at = time.time()
+            self._persist(entry)
+    
+    def expected_cost(self, failure_type: str, app_context: str, strategy: str,
+                      prior_latency: float) -> float:
+        """Expected seconds spent per successful recovery with this strategy."""
+        entry = self.get(failure_type, app_context, strategy)
+        if entry is None:
+            return prior_latency / 0.5
+        
+        # Blend the prior in until a few observations exist
+        weight = min(entry.attempts, 3) / 3
+        latency = weight * entry.avg_latency + (1 - weight) * prior_latency
+        return latency / entry.success_probability
+    
+    def rank(self, failure_type: str, app_context: str, strategies: List[str],
+             prior_latencies: Dict[str, float]) -> List[str]:
+        """Order strategies by expected cost; ties keep the given order."""
+        return sorted(strategies, key=lambda s: self.expected_cost(
+            failure_type, app_context, s, prior_latencies.get(s, 1.0)
+        ))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get model statistics."""
+        with self._lock:
+            entries = list(self._entries.values())
+        
+        return {
+            'entries': len(entries),
+            'contexts': len({(e.failure_type, e.app_context) for e in entries}),
+            'total_attempts': sum(e.attempts for e in entries),
+            'total_successes': sum(e.successes for e in entries)
+        }
@@ -0,0 +1,103 @@
+"""
+SQLite Store
+
+Shared persistence for the small playback learning tables:
+- One SQLite file per store under the playback storage directory
+- Table created from a column list and primary key on first use
+- All rows mirrored in memory behind a lock
+- Rows written through on every change with INSERT OR REPLACE
+"""
+
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteStore(ABC):
+    """
+    Base class for in-memory entries persisted to one SQLite table.
+    
+    Subclasses declare the table layout and convert entries to and from
+    rows; lookups read `_entries` under `_lock` and never touch the
+    database.
+    """
+    
+    DB_NAME: str = ""
+    TABLE: str = ""
+    COLUMNS: Sequence[Tuple[str, str]] = ()  # (name, SQL type) in row order
+    PRIMARY_KEY: Sequence[str] = ()
+    
+    def __init__(self, storage_path: Optional[Path] = None):
+        self.storage_path = storage_path or Path.home() / ".mkd" / "playback"
+        self.storage_path.mkdir(parents=True, exist_ok=True)
+        
+        self.db_path = self.storage_path / self.DB_NAME
+        self._lock = threading.RLock()
+        self._entries: Dict[Tuple, Any] = {}
+        
+        self._init_database()
+        self._load_entries()
+    
+    @abstractmethod
+    def _entry_key(self, entry: Any) -> Tuple:
+        """In-memory key of an entry."""
+        pass
+    
+    @abstractmethod
+    def _entry_from_row(self, row: sqlite3.Row) -> Any:
+        """Build an entry from a stored row."""
+        pass
+    
+    @abstractmethod
+    def _entry_to_row(self, entry: Any) -> Tuple:
+        """Column values of an entry, in COLUMNS order."""
+        pass
+    
+    def _init_database(self):
+        """Create the table if it does not exist."""
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in self.COLUMNS)
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {self.TABLE} "
+                             f"({columns}, PRIMARY KEY ({', '.join(self.PRIMARY_KEY)}))")
+                conn.commit()
+        
+        except Exception as e:
+            logger.error(f"{type(self).__name__} database initialization error: {e}")
+            raise
+    
+    def _load_entries(self):
+        """Load all persisted rows into memory."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            for row in conn.execute(f"SELECT * FROM {self.TABLE}"):
+                entry = self._entry_from_row(row)
+                self._entries[self._entry_key(entry)] = entry
+    
+    def _persist(self, entry: Any):
+        """Write an entry to disk."""
+        names = [name for name, _ in self.COLUMNS]
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.TABLE} ({', '.join(names)}) "
+                    f"VALUES ({', '.join('?' * len(names))})",
+                    self._entry_to_row(entry)
+                )
+                conn.commit()
+        
+        except Exception as e:
+            logger.error(f"Failed to persist {self.TABLE} entry {self._entry_key(entry)}: {e}")
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(f"DELETE FROM {self.TABLE}")
+                conn.commit()
@@ -10,13 +10,23 @@ Provides cross-platform UI automation capabilities:
 """
 
 from .element_detector import ElementDetector, UIElementInfo, DetectionResult
+from .screen_capture import ScreenCapture, ScreenFrame
+from .display_topology import DisplayTopology, Monitor, get_display_topology
 from .window_manager import WindowManager, WindowInfo
+from .window_state import WindowStateModel, WindowStateEvent
+from .screen_index import ScreenIndex
+from .template_locator import TemplateLocator, TemplateMatch, TemplateStore
 from .automation_engine import AutomationEngine
 from .intelligent_automation import IntelligentAutomationEngine
 
 __all__ = [
     "ElementDetector", "UIElementInfo", "DetectionResult",
+    "ScreenCapture", "ScreenFrame",
+    "DisplayTopology", "Monitor", "get_display_topology",
     "WindowManager", "WindowInfo", 
+    "WindowStateModel", "WindowStateEvent",
+    "ScreenIndex",
+    "TemplateLocator", "TemplateMatch", "TemplateStore",
     "AutomationEngine",
     "IntelligentAutomationEngine"
 ]
\ No newline at end of file
@@ -11,7 +11,12 @@ from typing import Dict, List, Optional, Tuple, Any, Callable
 from dataclasses import dataclass
 
 from .element_detector import ElementDetector, UIElementInfo, DetectionResult, create_element_detector
+from .screen_capture import ScreenFrame, create_screen_capture
 from .window_manager import WindowManager, WindowInfo, create_window_manager
+from .window_state import WindowStateModel
+from .screen_index import ScreenIndex
+from .template_locator import TemplateLocator
+from .display_topology import get_display_topology
 from ..platform.base import PlatformInterface
 
 logger = logging.getLogger(__name__)
@@ -21,7 +26,7 @@ logger = logging.getLogger(__name__)
 class AutomationContext:
     """Context information for automation operations."""
     target_window: Optional[WindowInfo] = None
-    screenshot: Optional[bytes] = None
+    screenshot: Optional[ScreenFrame] = None  # Raw pixels; encode only when persisting
     detected_elements: List[UIElementInfo] = None
     timestamp: float = 0.0
     
@@ -43,15 +48,24 @@ class AutomationEngine:
     - Smart waiting and retries
     """
     
-    def __init__(self, platform: PlatformInterface):
+    def __init__(self, platform: PlatformInterface, window_state: Optional[WindowStateModel] = None):
         self.platform = platform
         self.window_manager = create_window_manager()
+        self.window_state = window_state or WindowStateModel(self.window_manager)
+        self.screen_index = ScreenIndex(self.window_state)
+        self.screen_capture = create_screen_capture(screenshot_func=self.platform.take_screenshot)
+        self.display_topology = get_display_topology(platform, self.screen_capture)
         self.element_detector = create_element_detector(
-            screenshot_func=self.platform.take_screenshot
+            screenshot_func=self.platform.take_screenshot,
+            screen_capture=self.screen_capture,
+            display_topology=self.display_topology
         )
+        self.template_locator = TemplateLocator(self.screen_capture)
+        self.window_state.add_listener(self._on_window_state_change)
         
         # Automation state
         self.current_context: Optional[AutomationContext] = None
+        self._context_version = -1
         self.operation_history: List[Dict[str, Any]] = []
         
         # Configuration
@@ -266,7 +280,7 @@ class AutomationEngine:
         """
         try:
             # Get all windows
-            windows = self.window_manager.get_window_list()
+            windows = self.window_state.get_window_list()
             
             # Search for matching window
             target_window = None
@@ -327,26 +341,72 @@ class AutomationEngine:
             # Update context
             self._update_automation_context()
             
-            # Detect elements in region
-            result = self.element_detector.detect_elements_in_region(x, y, width, height)
-            
-            if result.success:
-                # Filter by confidence threshold
-                filtered_elements = [
-                    element for element in result.elements
-                    if element.confidence >= self.element_confidence_threshold
-                ]
+            # Re-detect only if no fresh detection covers this region
+            if not self.screen_index.is_region_fresh(x, y, width, height):
+                result = self.element_detector.detect_elements_in_region(x, y, width, height)
                 
-                logger.info(f"Found {len(filtered_elements)} elements in region ({x}, {y}, {width}, {height})")
-                return filtered_elements
-            else:
-                logger.error(f"Failed to detect elements in region: {result.error_message}")
-                return []
+                if not result.success:
+                    logger.error(f"Failed to detect elements in region: {result.error_message}")
+                    return []
+                
+                self.screen_index.update_elements(result.elements, region=(x, y, width, height))
+            
+            # Filter by confidence threshold
+            filtered_elements = [
+                element for element in self.screen_index.get_elements_in_region(x, y, width, height)
+                if element.confidence >= self.element_confidence_threshold
+            ]
+            
+            logger.info(f"Found {len(filtered_elements)} elements in region ({x}, {y}, {width}, {height})")
+            return filtered_elements
                 
         except Exception as e:
             logger.error(f"Error during get_elements_in_region: {e}")
             return []
     
+    def find_element_by_template(self, template: str, predicted_bounds: Optional[Tuple[int, int, int, int]] = None,
+                                 offset: Tuple[int, int] = (0, 0), scale: float = 1.0) -> Optional[UIElementInfo]:
+        """
+        Locate an element by its recorded reference crop.
+        
+        Args:
+            template: Path of the reference crop
+            predicted_bounds: Screen bounds the crop was recorded at
+            offset: Window movement since recording
+            scale: Expected size change of the crop (display DPI ratio)
+        
+        Returns:
+            UIElementInfo for the best match, or None
+        """
+        match = self.template_locator.locate(template, predicted=predicted_bounds, offset=offset, scale=scale)
+        if match is None:
+            return None
+        
+        x, y, w, h = match.bounds
+        logger.info(f"Template matched at {match.bounds} (confidence {match.confidence:.2f}, "
+                    f"{match.search_time * 1000:.1f}ms{', full frame' if match.full_frame else ''})")
+        return UIElementInfo(
+            element_id=f"template_{x}_{y}",
+            element_type="icon",
+            bounds=match.bounds,
+            confidence=match.confidence,
+            detection_method="template_match",
+            attributes={'template': match.template, 'scale': match.scale, 'search_time': match.search_time}
+        )
+    
+    def get_window_at_point(self, x: int, y: int) -> Optional[WindowInfo]:
+        """
+        Get the topmost window at screen coordinates.
+        
+        Args:
+            x: Screen X coordinate
+            y: Screen Y coordinate
+            
+        Returns:
+            WindowInfo of the topmost visible window, or None
+        """
+        return self.screen_index.get_window_at_point(x, y)
+    
     def get_automation_status(self) -> Dict[str, Any]:
         """Get current automation engine status."""
         return {
@@ -364,7 +424,9 @@ class AutomationEngine:
             'history': {
                 'operations_count': len(self.operation_history),
                 'recent_operations': self.operation_history[-5:] if self.operation_history else []
-            }
+            },
+            'template_locator': self.template_locator.get_locator_stats(),
+            'display_topology': self.display_topology.get_topology_stats()
         }
     
     def _click_element(self, element: UIElementInfo) -> bool:
@@ -380,20 +442,31 @@ class AutomationEngine:
             logger.error(f"Error clicking element {element.element_id}: {e}")
             return False
     
+    def _on_window_state_change(self, event):
+        """Re-read the monitor layout when the screen is resized (display hotplug)."""
+        if event.event_type == 'screen_changed':
+            self.display_topology.refresh()
+    
     def _update_automation_context(self):
         """Update current automation context with fresh information."""
         try:
-            # Get active window
-            active_window = self.window_manager.get_active_window()
+            # Active window comes from the event-driven snapshot
+            active_window = self.window_state.get_active_window()
+            
+            # Reuse the context while the window state is unchanged
+            if (self.current_context and self.current_context.target_window is active_window and
+                    self._context_version == self.window_state.version):
+                return
             
-            # Take screenshot
-            screenshot = self.platform.take_screenshot()
+            # Capture raw pixels
+            screenshot = self.screen_capture.capture()
             
             # Create new context
             self.current_context = AutomationContext(
                 target_window=active_window,
                 screenshot=screenshot
             )
+            self._context_version = self.window_state.version
             
         except Exception as e:
             logger.error(f"Failed to update automation context: {e}")
@@ -417,6 +490,14 @@ class AutomationEngine:
             
             if hasattr(self.element_detector, 'cleanup'):
                 self.element_detector.cleanup()
+            self.template_locator.clear_cache()
+            # The topology is shared per platform: detach our capture, leave its workers running
+            self.display_topology.release_capture(self.screen_capture)
+            self.screen_capture.close()
+            
+            self.window_state.remove_listener(self._on_window_state_change)
+            self.screen_index.close()
+            self.window_state.stop()
             
             self.current_context = None
             self.operation_history.clear()
@@ -0,0 +1,350 @@
+"""
+Display Topology Service.
+
+One cached view of the monitor layout for capture and playback:
+- Monitor geometry and scale factors cached, re-read on display changes
+  and after a short interval (hotplug on platforms without change events)
+- Per-monitor capture, all monitors grabbed in parallel
+- Recorded-to-replay coordinate mapping with precomputed per-monitor transforms,
+  including the DPI change used to scale reference crops
+- Serialisable layouts stored with recordings
+"""
+
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .screen_capture import ScreenCapture, ScreenFrame, create_screen_capture
+from ..platform.base import PlatformInterface
+
+logger = logging.getLogger(__name__)
+
+Bounds = Tuple[int, int, int, int]  # x, y, width, height
+
+
+@dataclass(frozen=True)
+class Monitor:
+    """Geometry of one monitor in virtual-screen coordinates."""
+    index: int
+    name: str
+    x: int
+    y: int
+    width: int
+    height: int
+    scale_factor: float = 1.0
+    is_primary: bool = False
+    
+    @classmethod
+    def from_info(cls, info: Dict[str, Any], index: int = 0) -> 'Monitor':
+        """Build from a platform `get_monitor_info()` entry or a stored layout."""
+        return cls(
+            index=info.get('index', index),
+            name=info.get('name', f"monitor-{index}"),
+            x=int(info.get('x', 0)),
+            y=int(info.get('y', 0)),
+            width=int(info.get('width', 0)),
+            height=int(info.get('height', 0)),
+            scale_factor=float(info.get('scale_factor', 1.0) or 1.0),
+            is_primary=bool(info.get('is_primary', index == 0))
+        )
+    
+    @property
+    def bounds(self) -> Bounds:
+        return (self.x, self.y, self.width, self.height)
+    
+    def contains(self, x: int, y: int) -> bool:
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+    
+    def distance_to(self, x: int, y: int) -> float:
+        dx = max(self.x - x, 0, x - (self.x + self.width - 1))
+        dy = max(self.y - y, 0, y - (self.y + self.height - 1))
+        return (dx * dx + dy * dy) ** 0.5
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index, 'name': self.name,
+            'x': self.x, 'y': self.y, 'width': self.width, 'height': self.height,
+            'scale_factor': self.scale_factor, 'is_primary': self.is_primary
+        }
+
+
+@dataclass(frozen=True)
+class MonitorTransform:
+    """
+    Axis-aligned affine map from a recorded monitor to a replay monitor.
+    
+    x' = sx * x + tx, y' = sy * y + ty; monitors are never rotated or
+    sheared, so the 2x3 matrix reduces to a scale and a translation.
+    """
+    source: Monitor
+    target: Monitor
+    sx: float
+    sy: float
+    tx: float
+    ty: float
+    pixel_scale: float  # Change in physical pixels per logical pixel
+    
+    @classmethod
+    def between(cls, source: Monitor, target: Monitor) -> 'MonitorTransform':
+        sx = target.width / source.width if source.width else 1.0
+        sy = target.height / source.height if source.height else 1.0
+        return cls(
+            source, target, sx, sy,
+            target.x - source.x * sx,
+            target.y - source.y * sy,
+            target.scale_factor / source.scale_factor
+        )
+    
+    @property
+    def is_identity(self) -> bool:
+        return self.sx == 1.0 and self.sy == 1.0 and self.tx == 0 and self.ty == 0
+    
+    def apply(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(round(self.sx * x + self.tx)), int(round(self.sy * y + self.ty)))
+    
+    def apply_bounds(self, bounds: Bounds) -> Bounds:
+        x, y, w, h = bounds
+        nx, ny = self.apply(x, y)
+        return (nx, ny, max(1, int(round(w * self.sx))), max(1, int(round(h * self.sy))))
+
+
+class LayoutMapping:
+    """Transforms from every monitor of a recorded layout onto the current one."""
+    
+    def __init__(self, recorded: Sequence[Monitor], current: Sequence[Monitor]):
+        self.recorded = list(recorded)
+        self.transforms = [MonitorTransform.between(m, self._match(m, current)) for m in self.recorded]
+        self.is_identity = all(t.is_identity and t.pixel_scale == 1.0 for t in self.transforms)
+    
+    def transform_at(self, x: int, y: int) -> Optional[MonitorTransform]:
+        """Transform for the recorded monitor containing (or nearest to) a point."""
+        if not self.transforms:
+            return None
+        for transform in self.transforms:
+            if transform.source.contains(x, y):
+                return transform
+        return min(self.transforms, key=lambda t: t.source.distance_to(x, y))
+    
+    def map_point(self, x: int, y: int) -> Tuple[int, int]:
+        transform = self.transform_at(x, y)
+        return transform.apply(x, y) if transform else (x, y)
+    
+    def map_bounds(self, bounds: Bounds) -> Bounds:
+        transform = self.transform_at(bounds[0], bounds[1])
+        return transform.apply_bounds(bounds) if transform else bounds
+    
+    def pixel_scale_at(self, x: int, y: int) -> float:
+        """Size change of on-screen content recorded at a point (DPI ratio)."""
+        transform = self.transform_at(x, y)
+        return transform.pixel_scale if transform else 1.0
+    
+    @staticmethod
+    def _match(recorded: Monitor, current: Sequence[Monitor]) -> Monitor:
+        """Same connector name first, then same index, then the primary monitor."""
+        for monitor in current:
+            if monitor.name == recorded.name:
+                return monitor
+        for monitor in current:
+            if monitor.index == recorded.index:
+                return monitor
+        return next((m for m in current if m.is_primary), current[0]) if current else recorded
+
+
+class DisplayTopology:
+    """
+    Cached monitor layout shared by capture, overlays and playback.
+    
+    Geometry is read from the platform and kept until `refresh()` (called on
+    display change events) or until it is `refresh_interval` seconds old;
+    mappings from recorded layouts are computed once per distinct layout
+    and dropped when the layout changes.
+    """
+    
+    def __init__(self, platform: PlatformInterface, screen_capture: Optional[ScreenCapture] = None,
+                 max_workers: Optional[int] = None, max_mappings: int = 16,
+                 refresh_interval: Optional[float] = 5.0):
+        self.platform = platform
+        self.screen_capture = screen_capture
+        self.max_workers = max_workers
+        self.max_mappings = max_mappings
+        self.refresh_interval = refresh_interval  # None: only refresh() re-reads geometry
+        
+        self._lock = threading.RLock()
+        self._monitors: Optional[List[Monitor]] = None
+        self._refreshed_at = 0.0
+        self._mappings: 'OrderedDict[Tuple[Monitor, ...], LayoutMapping]' = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.version = 0
+        
+        self.stats = {
+            'refreshes': 0,
+            'layout_changes': 0,
+            'mapping_hits': 0,
+            'mapping_builds': 0,
+            'monitor_captures': 0,
+            'parallel_captures': 0,
+            'total_capture_time': 0.0
+        }
+    
+    @property
+    def monitors(self) -> List[Monitor]:
+        """Monitors of the current layout, primary first."""
+        with self._lock:
+            if self._monitors is None or (self.refresh_interval is not None and
+                                          time.monotonic() - self._refreshed_at > self.refresh_interval):
+                self.refresh()
+            return self._monitors
+    
+    def refresh(self) -> List[Monitor]:
+        """Re-read monitor geometry, e.g. after a display change; cached mappings survive an unchanged layout."""
+        monitors = []
+        try:
+            monitors = [Monitor.from_info(info, i) for i, info in enumerate(self.platform.get_monitor_info() or [])]
+        except Exception as e:
+            logger.error(f"Failed to read monitor info: {e}")
+        
+        if not monitors and self.screen_capture is not None:
+            bounds = self.screen_capture.get_screen_bounds()
+            if bounds:
+                monitors = [Monitor(0, "screen", *bounds, is_primary=True)]
+        
+        monitors.sort(key=lambda m: (not m.is_primary, m.index))
+        with self._lock:
+            self._refreshed_at = time.monotonic()
+            self.stats['refreshes'] += 1
+            if monitors != self._monitors:
+                if self._monitors is not None:
+                    logger.info(f"Display layout changed: {len(monitors)} monitor(s)")
+                    self.stats['layout_changes'] += 1
+                self._monitors = monitors
+                self._mappings.clear()
+                self.version += 1
+            return self._monitors
+    
+    def get_monitor_info(self) -> List[Dict[str, Any]]:
+        """Monitor layout as platform-style dictionaries."""
+        return [m.to_dict() for m in self.monitors]
+    
+    def to_layout(self) -> List[Dict[str, Any]]:
+        """Serialisable layout, stored with recordings."""
+        return self.get_monitor_info()
+    
+    def monitor_at(self, x: int, y: int) -> Optional[Monitor]:
+        """Monitor containing a point, or the nearest one."""
+        monitors = self.monitors
+        for monitor in monitors:
+            if monitor.contains(x, y):
+                return monitor
+        return min(monitors, key=lambda m: m.distance_to(x, y)) if monitors else None
+    
+    def scale_factor_at(self, x: int, y: int) -> float:
+        monitor = self.monitor_at(x, y)
+        return monitor.scale_factor if monitor else 1.0
+    
+    def get_mapping(self, recorded_layout: Sequence[Dict[str, Any]]) -> LayoutMapping:
+        """Mapping from a recorded layout onto the current one (cached per layout)."""
+        recorded = tuple(Monitor.from_info(info, i) for i, info in enumerate(recorded_layout))
+        with self._lock:
+            mapping = self._mappings.get(recorded)
+            if mapping is not None:
+                self._mappings.move_to_end(recorded)
+                self.stats['mapping_hits'] += 1
+                return mapping
+            
+            mapping = LayoutMapping(recorded, self.monitors)
+            self._mappings[recorded] = mapping
+            self.stats['mapping_builds'] += 1
+            while len(self._mappings) > self.max_mappings:
+                self._mappings.popitem(last=False)
+            return mapping
+    
+    def map_point(self, x: int, y: int, recorded_layout: Optional[Sequence[Dict[str, Any]]]) -> Tuple[int, int]:
+        """Map recorded coordinates onto the current layout."""
+        if not recorded_layout:
+            return (x, y)
+        return self.get_mapping(recorded_layout).map_point(x, y)
+    
+    def capture_monitor(self, monitor: Monitor) -> Optional[ScreenFrame]:
+        """Capture a single monitor."""
+        start_time = time.perf_counter()
+        frame = self._get_capture().capture(monitor.bounds)
+        self.stats['monitor_captures'] += 1
+        self.stats['total_capture_time'] += time.perf_counter() - start_time
+        return frame
+    
+    def capture_monitors(self, indices: Optional[Sequence[int]] = None) -> Dict[int, ScreenFrame]:
+        """
+        Capture monitors independently and concurrently.
+        
+        Args:
+            indices: Monitor indices to capture (all when None)
+        
+        Returns:
+            Frames by monitor index; monitors that failed are left out
+        """
+        monitors = [m for m in self.monitors if indices is None or m.index in indices]
+        if len(monitors) <= 1:
+            frames = {m.index: self.capture_monitor(m) for m in monitors}
+        else:
+            self.stats['parallel_captures'] += 1
+            frames = dict(zip((m.index for m in monitors),
+                              self._get_executor().map(self.capture_monitor, monitors)))
+        return {index: frame for index, frame in frames.items() if frame is not None}
+    
+    def release_capture(self, screen_capture: ScreenCapture) -> None:
+        """Stop using a caller's capture instance before the caller closes it."""
+        with self._lock:
+            if self.screen_capture is screen_capture:
+                self.screen_capture = None
+    
+    def close(self) -> None:
+        """Stop capture workers (the topology is shared per platform; only its owner should close it)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def get_topology_stats(self) -> Dict[str, Any]:
+        """Get topology statistics."""
+        stats = self.stats.copy()
+        stats['monitors'] = len(self._monitors or [])
+        stats['cached_mappings'] = len(self._mappings)
+        stats['avg_monitor_capture_time'] = (stats['total_capture_time'] / stats['monitor_captures']
+                                             if stats['monitor_captures'] else 0.0)
+        return stats
+    
+    def _get_capture(self) -> ScreenCapture:
+        with self._lock:
+            if self.screen_capture is None:
+                self.screen_capture = create_screen_capture(screenshot_func=self.platform.take_screenshot)
+            return self.screen_capture
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Capture handles are per thread, so each worker keeps its own
+                workers = self.max_workers or max(2, len(self._monitors or []))
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="monitor-capture")
+            return self._executor
+
+
+_topologies: 'weakref.WeakKeyDictionary[PlatformInterface, DisplayTopology]' = weakref.WeakKeyDictionary()
+_topologies_lock = threading.Lock()
+
+
+def get_display_topology(platform: PlatformInterface,
+                         screen_capture: Optional[ScreenCapture] = None) -> DisplayTopology:
+    """Get the shared display topology for a platform."""
+    with _topologies_lock:
+        topology = _topologies.get(platform)
+        if topology is None:
+            topology = DisplayTopology(platform, screen_capture)
+            _topologies[platform] = topology
+        elif topology.screen_capture is None and screen_capture is not None:
+            topology.screen_capture = screen_capture
+        return topology
@@ -6,16 +6,26 @@ Provides intelligent UI element detection using multiple approaches:
 - Visual pattern matching
 - Platform-specific accessibility APIs
 - Coordinate-based element mapping
+- Raw-pixel region capture (no encode/decode round trips)
+- Incremental re-detection limited to changed screen tiles
+- Content-hashed OCR cache and inverted text index for text lookups
+- Tile-parallel detection of large captures on a process pool
 """
 
 import logging
+import threading
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Any, Union
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List, Optional, Tuple, Any, Union
 from pathlib import Path
 import hashlib
 
+from .frame_diff import FrameDiffTracker
+from .screen_capture import ScreenCapture, ScreenFrame
+from .spatial_index import SpatialIndex
+from .text_index import OCRResultCache, TextIndex
+
 try:
     import cv2
     import numpy as np
@@ -80,6 +90,7 @@ class DetectionResult:
     screenshot_path: Optional[str] = None
     detection_time: float = 0.0
     error_message: Optional[str] = None
+    stage_timings: Dict[str, float] = field(default_factory=dict)
     
     def __post_init__(self):
         if self.detection_time == 0.0:
@@ -100,7 +111,7 @@ class ElementDetector(ABC):
         pass
     
     @abstractmethod
-    def detect_text_elements(self, screenshot: Optional[bytes] = None) -> DetectionResult:
+    def detect_text_elements(self, screenshot: Optional[Union[bytes, ScreenFrame]] = None) -> DetectionResult:
         """Detect text elements using OCR."""
         pass
     
@@ -110,14 +121,61 @@ class ElementDetector(ABC):
         pass
 
 
+class _RegionElements:
+    """Cached elements of one detected region, indexed by position and text."""
+    
+    def __init__(self, cell_size: int):
+        self.spatial = SpatialIndex(cell_size)
+        self.text = TextIndex()
+        self.refreshed_at = 0.0
+    
+    def insert(self, element: UIElementInfo) -> None:
+        key = (element.detection_method, element.bounds)
+        self.spatial.insert(key, element.bounds, element)
+        self.text.add(key, element)
+    
+    def remove(self, element: UIElementInfo) -> None:
+        key = (element.detection_method, element.bounds)
+        self.spatial.remove(key)
+        self.text.remove(key, element)
+
+
 class VisualElementDetector(ElementDetector):
     """Visual element detector using computer vision and OCR."""
     
-    def __init__(self, screenshot_func=None):
+    def __init__(self, screenshot_func=None, screen_capture: Optional[ScreenCapture] = None,
+                 display_topology=None):
         self.screenshot_func = screenshot_func
+        self.screen_capture = screen_capture or ScreenCapture(screenshot_func=screenshot_func)
+        # Full-screen passes capture each monitor separately when a topology is given
+        self.display_topology = display_topology
         self.cache = {}
         self.cache_ttl = 2.0  # seconds
         
+        # Incremental detection: only changed tiles are re-analysed
+        self.frame_diff = FrameDiffTracker(tile_size=64)
+        self.full_redetect_ratio = 0.5  # Above this dirty fraction, re-run on the whole frame
+        self.redetect_margin = 16  # Context pixels around dirty tiles
+        self._element_caches: Dict[Any, _RegionElements] = {}
+        self._detect_lock = threading.Lock()
+        
+        # Text lookups: OCR reused by content, answered from the token index
+        self.ocr_cache = OCRResultCache(max_entries=512)
+        self.text_index_ttl = 0.25  # seconds a screen text index is trusted without re-capture
+        self._screen_text_keys: List[Any] = []
+        
+        # Large captures are split into tiles and detected on a process pool
+        self.tiled_detection = True
+        self._tiled_detector = None
+        
+        self.stats = {
+            'full_detections': 0,
+            'partial_detections': 0,
+            'cached_detections': 0,
+            'text_lookups': 0,
+            'indexed_text_lookups': 0
+        }
+        
         # Check dependencies
         if not CV2_AVAILABLE:
             logger.warning("OpenCV not available - visual detection limited")
@@ -154,9 +212,9 @@ class VisualElementDetector(ElementDetector):
             start_time = time.time()
             elements = []
             
-            # Take screenshot if no screenshot function provided
-            screenshot_data = self._get_screenshot_region(x, y, width, height)
-            if not screenshot_data:
+            # Capture the region as raw pixels
+            frame = self._get_screenshot_region(x, y, width, height)
+            if frame is None:
                 return DetectionResult(
                     success=False,
                     elements=[],
@@ -164,16 +222,8 @@ class VisualElementDetector(ElementDetector):
                 )
             
             if CV2_AVAILABLE:
-                # Convert screenshot to OpenCV format
-                image = self._bytes_to_cv2_image(screenshot_data)
-                if image is not None:
-                    # Detect button-like elements
-                    button_elements = self._detect_buttons(image, x, y)
-                    elements.extend(button_elements)
-                    
-                    # Detect text elements
-                    text_elements = self._detect_text_regions(image, x, y)
-                    elements.extend(text_elements)
+                # Detect buttons and text regions on changed tiles only
+                elements = self._detect_incremental("contours", frame, self._detect_frame_elements)
             
             detection_time = time.time() - start_time
             
@@ -191,8 +241,8 @@ class VisualElementDetector(ElementDetector):
                 error_message=str(e)
             )
     
-    def detect_text_elements(self, screenshot: Optional[bytes] = None) -> DetectionResult:
-        """Detect text elements using OCR."""
+    def detect_text_elements(self, screenshot: Optional[Union[bytes, ScreenFrame]] = None) -> DetectionResult:
+        """Detect text elements using OCR on a captured frame or encoded image."""
         if not TESSERACT_AVAILABLE:
             return DetectionResult(
                 success=False,
@@ -206,22 +256,26 @@ class VisualElementDetector(ElementDetector):
             
             # Get screenshot
             if screenshot is None:
-                screenshot = self._take_full_screenshot()
+                frames = self._take_full_screenshot()
+            elif isinstance(screenshot, ScreenFrame):
+                frames = [screenshot]
+            else:
+                image = self._bytes_to_cv2_image(screenshot)
+                frames = [ScreenFrame(image, (0, 0), "encoded")] if image is not None else []
             
-            if not screenshot:
+            if not frames:
                 return DetectionResult(
                     success=False,
                     elements=[],
                     error_message="Failed to capture screenshot"
                 )
             
-            # Convert to OpenCV image
             if CV2_AVAILABLE:
-                image = self._bytes_to_cv2_image(screenshot)
-                if image is not None:
-                    # Use OCR to detect text
-                    text_elements = self._ocr_detect_text(image)
-                    elements.extend(text_elements)
+                # Use OCR to detect text on changed tiles only
+                for frame in frames:
+                    elements.extend(self._detect_incremental("ocr", frame, self._ocr_cached))
+                if screenshot is None:
+                    self._screen_text_keys = [("ocr", frame.bounds) for frame in frames]
             
             detection_time = time.time() - start_time
             
@@ -242,84 +296,185 @@ class VisualElementDetector(ElementDetector):
     def find_element_by_text(self, text: str, fuzzy: bool = True) -> Optional[UIElementInfo]:
         """Find element containing specific text using OCR."""
         try:
-            # Detect all text elements
-            result = self.detect_text_elements()
-            if not result.success:
-                return None
-            
-            search_text = text.lower().strip()
+            self.stats['text_lookups'] += 1
             
-            # Search for matching text
-            for element in result.elements:
-                if element.text:
-                    element_text = element.text.lower().strip()
-                    
-                    if fuzzy:
-                        # Fuzzy matching - check if search text is contained
-                        if search_text in element_text or element_text in search_text:
-                            return element
-                    else:
-                        # Exact matching
-                        if element_text == search_text:
-                            return element
+            # Refresh the screen text index unless it was refreshed just now
+            regions = [self._element_caches.get(key) for key in self._screen_text_keys]
+            if not regions or any(region is None or time.time() - region.refreshed_at > self.text_index_ttl
+                                  for region in regions):
+                result = self.detect_text_elements()
+                if not result.success:
+                    return None
+                regions = [self._element_caches.get(key) for key in self._screen_text_keys]
+            else:
+                self.stats['indexed_text_lookups'] += 1
             
+            # Fuzzy matching checks containment either way; exact is a token hit.
+            # Monitors are searched primary first.
+            for region in regions:
+                matches = region.text.lookup(text, fuzzy=fuzzy) if region is not None else []
+                if matches:
+                    return matches[0]
             return None
-            
+        
         except Exception as e:
             logger.error(f"Failed to find element by text '{text}': {e}")
             return None
     
-    def _get_screenshot_region(self, x: int, y: int, width: int, height: int) -> Optional[bytes]:
-        """Get screenshot of specific region."""
-        try:
-            if self.screenshot_func:
-                # Use provided screenshot function with region
-                return self.screenshot_func(region=(x, y, width, height))
-            else:
-                # Fallback to full screenshot
-                full_screenshot = self._take_full_screenshot()
-                if full_screenshot and CV2_AVAILABLE:
-                    # Crop the region from full screenshot
-                    image = self._bytes_to_cv2_image(full_screenshot)
-                    if image is not None:
-                        cropped = image[y:y+height, x:x+width]
-                        return self._cv2_image_to_bytes(cropped)
-                
-                return full_screenshot
+    def get_detection_stats(self) -> Dict[str, Any]:
+        """Get incremental detection statistics."""
+        stats = self.stats.copy()
+        stats['frame_diff'] = self.frame_diff.get_diff_stats()
+        stats['cached_regions'] = len(self._element_caches)
+        stats['ocr_cache'] = self.ocr_cache.get_cache_stats()
+        return stats
+    
+    def _detect_incremental(self, kind: str, frame: ScreenFrame,
+                            detect: Callable[[ScreenFrame], List[UIElementInfo]]) -> List[UIElementInfo]:
+        """
+        Run a detection pass over the tiles that changed since the previous
+        capture of the same region, reusing cached elements for the rest.
+        """
+        key = (kind, frame.bounds)
+        
+        with self._detect_lock:
+            diff = self.frame_diff.update(frame, key)
+            cache = self._element_caches.get(key)
+            
+            if cache is None or diff.dirty_ratio > self.full_redetect_ratio:
+                cache = _RegionElements(self.frame_diff.tile_size)
+                for element in detect(frame):
+                    cache.insert(element)
+                self._element_caches[key] = cache
+                self.stats['full_detections'] += 1
+            
+            elif diff.dirty_regions:
+                for region in diff.dirty_regions:
+                    for element in cache.spatial.query_region(*region):
+                        cache.remove(element)
                 
+                margin = self.redetect_margin
+                for rx, ry, rw, rh in diff.dirty_regions:
+                    area = frame.crop(rx - margin, ry - margin, rw + 2 * margin, rh + 2 * margin)
+                    for element in detect(area):
+                        ex, ey, ew, eh = element.bounds
+                        if ex < rx + rw and rx < ex + ew and ey < ry + rh and ry < ey + eh:
+                            cache.insert(element)
+                self.stats['partial_detections'] += 1
+            
+            else:
+                self.stats['cached_detections'] += 1
+            
+            cache.refreshed_at = time.time()
+            
+            # Drop element caches whose tile hashes were evicted
+            for stale_key in [k for k in self._element_caches if k not in self.frame_diff]:
+                del self._element_caches[stale_key]
+            
+            return cache.spatial.query_region(*frame.bounds)
+    
+    def detect_elements_tiled(self, x: int, y: int, width: int, height: int,
+                              include_ocr: bool = False) -> DetectionResult:
+        """Detect elements in a region with tile-parallel detection, reporting per-stage timings."""
+        start_time = time.perf_counter()
+        frame = self._get_screenshot_region(x, y, width, height)
+        if frame is None:
+            return DetectionResult(
+                success=False,
+                elements=[],
+                error_message="Failed to capture screenshot"
+            )
+        capture_time = time.perf_counter() - start_time
+        
+        stages = ("buttons", "text_regions", "ocr") if include_ocr else ("buttons", "text_regions")
+        # The tiled detector reuses one shared memory block per frame
+        with self._detect_lock:
+            result = self._get_tiled_detector().detect(frame, stages)
+        result.stage_timings['capture'] = capture_time
+        result.detection_time = time.perf_counter() - start_time
+        return result
+    
+    def _get_tiled_detector(self):
+        if self._tiled_detector is None:
+            from .tiled_detection import TiledDetector
+            self._tiled_detector = TiledDetector(ocr_config=self.ocr_config)
+        return self._tiled_detector
+    
+    def _detect_frame_elements(self, frame: ScreenFrame) -> List[UIElementInfo]:
+        """Detect buttons and text regions in a frame."""
+        if self.tiled_detection and self._get_tiled_detector().should_tile(frame):
+            result = self._tiled_detector.detect(frame, ("buttons", "text_regions"))
+            if result.success:
+                return result.elements
+        
+        offset_x, offset_y = frame.origin
+        return (self._detect_buttons(frame.pixels, offset_x, offset_y) +
+                self._detect_text_regions(frame.pixels, offset_x, offset_y))
+    
+    def _ocr_cached(self, frame: ScreenFrame) -> List[UIElementInfo]:
+        """OCR a frame, reusing results for previously seen pixel content."""
+        relative = self.ocr_cache.get(frame.pixels)
+        if relative is None:
+            relative = None
+            if self.tiled_detection and self._get_tiled_detector().should_tile(frame):
+                result = self._tiled_detector.detect(ScreenFrame(frame.pixels, (0, 0), frame.backend), ("ocr",))
+                relative = result.elements if result.success else None
+            if relative is None:
+                relative = self._ocr_detect_text(frame.pixels)
+            self.ocr_cache.put(frame.pixels, relative)
+        
+        offset_x, offset_y = frame.origin
+        elements = []
+        for element in relative:
+            x, y, w, h = element.bounds
+            elements.append(replace(
+                element,
+                element_id=f"ocr_text_{offset_x + x}_{offset_y + y}",
+                bounds=(offset_x + x, offset_y + y, w, h)
+            ))
+        return elements
+    
+    def _get_screenshot_region(self, x: int, y: int, width: int, height: int) -> Optional[ScreenFrame]:
+        """Capture a specific region as raw pixels."""
+        try:
+            return self.screen_capture.capture((x, y, width, height))
         except Exception as e:
             logger.error(f"Failed to get screenshot region: {e}")
             return None
     
-    def _take_full_screenshot(self) -> Optional[bytes]:
-        """Take full screen screenshot."""
+    def _take_full_screenshot(self) -> List[ScreenFrame]:
+        """
+        Capture the full screen as raw pixels.
+        
+        With several monitors each is captured on its own, in parallel, so
+        the gaps of the virtual screen between them are never grabbed or scanned.
+        """
         try:
-            if self.screenshot_func:
-                return self.screenshot_func()
-            else:
-                # Mock screenshot for testing
-                return b"mock_screenshot_data"
-                
+            if self.display_topology is not None and len(self.display_topology.monitors) > 1:
+                frames = self.display_topology.capture_monitors()
+                if frames:
+                    return [frames[m.index] for m in self.display_topology.monitors if m.index in frames]
+            
+            frame = self.screen_capture.capture()
+            return [frame] if frame is not None else []
         except Exception as e:
             logger.error(f"Failed to take screenshot: {e}")
-            return None
+            return []
     
     def _bytes_to_cv2_image(self, image_bytes: bytes):
-        """Convert bytes to OpenCV image."""
+        """Decode encoded image bytes to an OpenCV image."""
         if not CV2_AVAILABLE or not image_bytes:
             return None
         
         try:
-            # For now, return a mock image since we don't have real image bytes
-            # In real implementation, would decode image bytes
-            return np.zeros((100, 100, 3), dtype=np.uint8)
-            
+            return cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        
         except Exception as e:
             logger.error(f"Failed to convert bytes to image: {e}")
             return None
     
     def _cv2_image_to_bytes(self, image) -> bytes:
-        """Convert OpenCV image to bytes."""
+        """Encode an OpenCV image to PNG bytes (only needed when persisting)."""
         if not CV2_AVAILABLE or image is None:
             return b""
         
@@ -335,7 +490,8 @@ class VisualElementDetector(ElementDetector):
             logger.error(f"Failed to convert image to bytes: {e}")
             return b""
     
-    def _detect_buttons(self, image, offset_x: int = 0, offset_y: int = 0) -> List[UIElementInfo]:
+    @staticmethod
+    def _detect_buttons(image, offset_x: int = 0, offset_y: int = 0) -> List[UIElementInfo]:
         """Detect button-like elements in image."""
         elements = []
         
@@ -349,14 +505,14 @@ class VisualElementDetector(ElementDetector):
             # Find contours (simplified button detection)
             contours, _ = cv2.findContours(gray, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
-            for i, contour in enumerate(contours):
+            for contour in contours:
                 # Get bounding rectangle
                 x, y, w, h = cv2.boundingRect(contour)
                 
                 # Filter by size (reasonable button dimensions)
                 if 20 <= w <= 300 and 15 <= h <= 100:
                     element = UIElementInfo(
-                        element_id=f"button_{i}",
+                        element_id=f"button_{offset_x + x}_{offset_y + y}",
                         element_type="button",
                         bounds=(offset_x + x, offset_y + y, w, h),
                         confidence=0.7,
@@ -370,7 +526,8 @@ class VisualElementDetector(ElementDetector):
             logger.error(f"Failed to detect buttons: {e}")
             return elements
     
-    def _detect_text_regions(self, image, offset_x: int = 0, offset_y: int = 0) -> List[UIElementInfo]:
+    @staticmethod
+    def _detect_text_regions(image, offset_x: int = 0, offset_y: int = 0) -> List[UIElementInfo]:
         """Detect text regions in image."""
         elements = []
         
@@ -387,14 +544,14 @@ class VisualElementDetector(ElementDetector):
             # Find contours
             contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
-            for i, contour in enumerate(contours):
+            for contour in contours:
                 x, y, w, h = cv2.boundingRect(contour)
                 
                 # Filter by aspect ratio for text-like regions
                 aspect_ratio = w / h if h > 0 else 0
                 if 0.5 <= aspect_ratio <= 10 and w >= 10 and h >= 8:
                     element = UIElementInfo(
-                        element_id=f"text_{i}",
+                        element_id=f"text_{offset_x + x}_{offset_y + y}",
                         element_type="text",
                         bounds=(offset_x + x, offset_y + y, w, h),
                         confidence=0.6,
@@ -408,8 +565,13 @@ class VisualElementDetector(ElementDetector):
             logger.error(f"Failed to detect text regions: {e}")
             return elements
     
-    def _ocr_detect_text(self, image) -> List[UIElementInfo]:
+    def _ocr_detect_text(self, image, offset_x: int = 0, offset_y: int = 0) -> List[UIElementInfo]:
         """Use OCR to detect and extract text elements."""
+        return self._ocr_image(image, self.ocr_config, offset_x, offset_y)
+    
+    @staticmethod
+    def _ocr_image(image, ocr_config: str, offset_x: int = 0, offset_y: int = 0) -> List[UIElementInfo]:
+        """Run tesseract on an image and build text elements."""
         elements = []
         
         if not TESSERACT_AVAILABLE or not CV2_AVAILABLE:
@@ -417,7 +579,7 @@ class VisualElementDetector(ElementDetector):
         
         try:
             # Get detailed OCR data with bounding boxes
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, config=self.ocr_config)
+            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, config=ocr_config)
             
             for i in range(len(data['text'])):
                 text = data['text'][i].strip()
@@ -428,9 +590,9 @@ class VisualElementDetector(ElementDetector):
                     x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
                     
                     element = UIElementInfo(
-                        element_id=f"ocr_text_{i}",
+                        element_id=f"ocr_text_{offset_x + x}_{offset_y + y}",
                         element_type="text",
-                        bounds=(x, y, w, h),
+                        bounds=(offset_x + x, offset_y + y, w, h),
                         text=text,
                         confidence=confidence / 100.0,
                         detection_method="tesseract_ocr"
@@ -442,8 +604,17 @@ class VisualElementDetector(ElementDetector):
         except Exception as e:
             logger.error(f"OCR text detection failed: {e}")
             return elements
+    
+    def cleanup(self):
+        """Release screen capture handles and the detection pool."""
+        self.screen_capture.close()
+        with self._detect_lock:
+            if self._tiled_detector is not None:
+                self._tiled_detector.close()
 
 
-def create_element_detector(screenshot_func=None) -> ElementDetector:
+def create_element_detector(screenshot_func=None, screen_capture: Optional[ScreenCapture] = None,
+                            display_topology=None) -> ElementDetector:
     """Create appropriate element detector for the current platform."""
-    return VisualElementDetector(screenshot_func=screenshot_func)
\ No newline at end of file
+    return VisualElementDetector(screenshot_func=screenshot_func, screen_capture=screen_capture,
+                                 display_topology=display_topology)
\ No newline at end of file
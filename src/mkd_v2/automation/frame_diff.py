@@ -0,0 +1,184 @@
+"""
+Tile-Hash Frame Differencing.
+
+Tracks which parts of repeatedly captured regions changed:
+- Frames split into fixed-size tiles, each hashed (xxhash or CRC32)
+- Dirty tiles reported against the previous capture of the same region
+- Dirty tiles merged into rectangles for partial re-detection
+"""
+
+import logging
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Set, Tuple, Any
+
+from .screen_capture import ScreenFrame, NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    xxhash = None
+    XXHASH_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+Bounds = Tuple[int, int, int, int]  # x, y, width, height
+
+
+@dataclass
+class FrameDiff:
+    """Changes in a frame since the previous capture of the same region."""
+    frame_bounds: Bounds
+    dirty_regions: List[Bounds] = field(default_factory=list)  # Screen coordinates
+    dirty_tiles: int = 0
+    total_tiles: int = 0
+    full: bool = False  # No comparable previous frame
+    
+    @property
+    def is_clean(self) -> bool:
+        return not self.full and self.dirty_tiles == 0
+    
+    @property
+    def dirty_ratio(self) -> float:
+        if self.full:
+            return 1.0
+        return self.dirty_tiles / self.total_tiles if self.total_tiles else 0.0
+
+
+class FrameDiffTracker:
+    """
+    Per-region tile hashes for consecutive captures.
+    
+    Each tracked key (usually a detection kind plus region) keeps the tile
+    hashes of its last frame; `update` hashes the new frame and reports
+    which tiles differ. The least recently used keys are dropped beyond
+    `max_keys`.
+    """
+    
+    def __init__(self, tile_size: int = 64, max_keys: int = 16):
+        self.tile_size = tile_size
+        self.max_keys = max_keys
+        self._hashes: 'OrderedDict[Hashable, Tuple[Tuple[int, int], List[List[int]]]]' = OrderedDict()
+        self._hash = xxhash.xxh3_64_intdigest if XXHASH_AVAILABLE else zlib.crc32
+        
+        self.stats = {
+            'frames': 0,
+            'full_frames': 0,
+            'clean_frames': 0,
+            'tiles_hashed': 0,
+            'dirty_tiles': 0
+        }
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._hashes
+    
+    def update(self, frame: ScreenFrame, key: Hashable = "screen") -> FrameDiff:
+        """Hash a frame's tiles and diff them against the key's previous frame."""
+        hashes = self._hash_tiles(frame.pixels)
+        shape = (frame.height, frame.width)
+        previous = self._hashes.pop(key, None)
+        
+        self._hashes[key] = (shape, hashes)
+        while len(self._hashes) > self.max_keys:
+            self._hashes.popitem(last=False)
+        
+        rows, cols = len(hashes), len(hashes[0]) if hashes else 0
+        diff = FrameDiff(frame_bounds=frame.bounds, total_tiles=rows * cols)
+        self.stats['frames'] += 1
+        self.stats['tiles_hashed'] += rows * cols
+        
+        if previous is None or previous[0] != shape:
+            diff.full = True
+            diff.dirty_tiles = diff.total_tiles
+            diff.dirty_regions = [frame.bounds]
+            self.stats['full_frames'] += 1
+            return diff
+        
+        old = previous[1]
+        dirty = {(r, c) for r in range(rows) for c in range(cols) if hashes[r][c] != old[r][c]}
+        diff.dirty_tiles = len(dirty)
+        self.stats['dirty_tiles'] += len(dirty)
+        
+        if not dirty:
+            self.stats['clean_frames'] += 1
+            return diff
+        
+        ox, oy = frame.origin
+        for r, c, row_span, col_span in self.merge_tiles(dirty):
+            x, y = c * self.tile_size, r * self.tile_size
+            w = min(col_span * self.tile_size, frame.width - x)
+            h = min(row_span * self.tile_size, frame.height - y)
+            diff.dirty_regions.append((ox + x, oy + y, w, h))
+        return diff
+    
+    def forget(self, key: Hashable) -> None:
+        """Drop a key's hashes; its next frame is reported as full."""
+        self._hashes.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop all tracked hashes."""
+        self._hashes.clear()
+    
+    def get_diff_stats(self) -> Dict[str, Any]:
+        """Get differencing statistics."""
+        stats = self.stats.copy()
+        stats['tracked_regions'] = len(self._hashes)
+        stats['hash'] = "xxh3" if XXHASH_AVAILABLE else "crc32"
+        return stats
+    
+    def _hash_tiles(self, pixels) -> List[List[int]]:
+        """Hash every tile of an (h, w, c) array, row-major."""
+        height, width = pixels.shape[:2]
+        size = self.tile_size
+        return [
+            [self._hash(np.ascontiguousarray(pixels[y:y + size, x:x + size])) for x in range(0, width, size)]
+            for y in range(0, height, size)
+        ]
+    
+    @staticmethod
+    def merge_tiles(tiles: Set[Tuple[int, int]]) -> List[Tuple[int, int, int, int]]:
+        """
+        Merge (row, col) tiles into rectangles.
+        
+        Horizontal runs are found per row, then identical runs on
+        consecutive rows are stacked.
+        
+        Returns:
+            List of (row, col, row_span, col_span)
+        """
+        runs_by_row: Dict[int, List[Tuple[int, int]]] = {}
+        for row in sorted({r for r, _ in tiles}):
+            cols = sorted(c for r, c in tiles if r == row)
+            runs = []
+            start = prev = cols[0]
+            for col in cols[1:]:
+                if col != prev + 1:
+                    runs.append((start, prev - start + 1))
+                    start = col
+                prev = col
+            runs.append((start, prev - start + 1))
+            runs_by_row[row] = runs
+        
+        rects = []
+        open_rects: Dict[Tuple[int, int], List[int]] = {}  # run -> [row, col, row_span, col_span]
+        for row in sorted(runs_by_row):
+            next_open = {}
+            for run in runs_by_row[row]:
+                rect = open_rects.pop(run, None)
+                if rect is not None and rect[0] + rect[2] == row:
+                    rect[2] += 1
+                else:
+                    if rect is not None:
+                        rects.append(tuple(rect))
+                    rect = [row, run[0], 1, run[1]]
+                next_open[run] = rect
+            rects.extend(tuple(rect) for rect in open_rects.values())
+            open_rects = next_open
+        rects.extend(tuple(rect) for rect in open_rects.values())
+        
+        return sorted(rects)
@@ -60,7 +60,7 @@ class IntelligentAutomationEngine:
         self.automation_engine = AutomationEngine(platform)
         
         # Intelligence components
-        self.context_detector = ContextDetector(platform)
+        self.context_detector = ContextDetector(platform, window_state=self.automation_engine.window_state)
         self.pattern_analyzer = PatternAnalyzer()
         self.smart_recorder = SmartRecorder(self.context_detector, self.pattern_analyzer)
         
@@ -728,4 +728,9 @@ class IntelligentAutomationEngine:
     
     def get_elements_in_region(self, x: int, y: int, width: int, height: int) -> List[Any]:
         """Traditional element detection - delegates to base engine."""
-        return self.automation_engine.get_elements_in_region(x, y, width, height)
\ No newline at end of file
+        return self.automation_engine.get_elements_in_region(x, y, width, height)
+    
+    def find_element_by_template(self, template: str, predicted_bounds: Optional[tuple] = None,
+                                 offset: tuple = (0, 0), scale: float = 1.0) -> Optional[Any]:
+        """Template-matching lookup - delegates to base engine."""
+        return self.automation_engine.find_element_by_template(template, predicted_bounds, offset, scale)
\ No newline at end of file
@@ -0,0 +1,324 @@
+"""
+Raw-Pixel Screen Capture.
+
+Captures screen regions straight into NumPy arrays for detectors:
+- mss grabs (XShm/XGetImage, GDI, CoreGraphics) wrapped without copying
+- X11 XGetImage over a persistent python-xlib connection
+- Platform screenshot functions as a decode-once fallback
+- True region capture; images are only encoded when persisted
+"""
+
+import logging
+import platform
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    CV2_AVAILABLE = False
+
+try:
+    import mss
+    MSS_AVAILABLE = True
+except ImportError:
+    mss = None
+    MSS_AVAILABLE = False
+
+if platform.system() == "Linux":
+    try:
+        from Xlib import X, display as xdisplay
+        XLIB_AVAILABLE = True
+    except ImportError:
+        XLIB_AVAILABLE = False
+else:
+    XLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]  # x, y, width, height
+
+
+def bgrx_to_array(data: Union[bytes, bytearray, memoryview], width: int, height: int):
+    """
+    Wrap 32-bit BGRX/BGRA pixel data as an (h, w, 3) BGR array.
+    
+    No pixels are copied: the result is a strided view over `data`.
+    """
+    pixels = np.frombuffer(data, dtype=np.uint8)
+    return pixels.reshape(height, width, 4)[:, :, :3]
+
+
+@dataclass
+class ScreenFrame:
+    """A captured screen region."""
+    pixels: Any  # (h, w, 3) BGR uint8, possibly a view over the capture buffer
+    origin: Tuple[int, int]  # Screen coordinates of pixels[0, 0]
+    backend: str
+    timestamp: float = 0.0
+    
+    def __post_init__(self):
+        if self.timestamp == 0.0:
+            self.timestamp = time.time()
+    
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+    
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+    
+    @property
+    def bounds(self) -> Region:
+        return (self.origin[0], self.origin[1], self.width, self.height)
+    
+    def crop(self, x: int, y: int, width: int, height: int) -> Optional['ScreenFrame']:
+        """Crop to a region in screen coordinates (a view, not a copy)."""
+        ox, oy = self.origin
+        left, top = max(x, ox), max(y, oy)
+        right = min(x + width, ox + self.width)
+        bottom = min(y + height, oy + self.height)
+        if right <= left or bottom <= top:
+            return None
+        
+        pixels = self.pixels[top - oy:bottom - oy, left - ox:right - ox]
+        return ScreenFrame(pixels, (left, top), self.backend, self.timestamp)
+    
+    def copy(self) -> 'ScreenFrame':
+        """Detach the frame from the capture buffer."""
+        return ScreenFrame(np.ascontiguousarray(self.pixels).copy(), self.origin, self.backend, self.timestamp)
+    
+    def encode(self, fmt: str = ".png") -> bytes:
+        """Encode the frame for persistence."""
+        if not CV2_AVAILABLE:
+            return b""
+        
+        try:
+            success, encoded = cv2.imencode(fmt, np.ascontiguousarray(self.pixels))
+            return encoded.tobytes() if success else b""
+        except Exception as e:
+            logger.error(f"Failed to encode frame: {e}")
+            return b""
+    
+    def save(self, path: Union[str, Path]) -> bool:
+        """Write the frame to an image file."""
+        path = Path(path)
+        data = self.encode(path.suffix or ".png")
+        if not data:
+            return False
+        path.write_bytes(data)
+        return True
+
+
+class ScreenCapture:
+    """
+    Region capture into NumPy arrays.
+    
+    The backend is chosen once: mss when installed, XGetImage over a
+    persistent X connection on Linux, otherwise the platform screenshot
+    function (decoded once, no re-encoding). Native handles are kept per
+    thread since neither mss nor Xlib connections are thread-safe.
+    """
+    
+    BACKENDS = ("mss", "xlib", "function")
+    
+    def __init__(self, backend: str = "auto", screenshot_func: Optional[Callable] = None,
+                 display_name: Optional[str] = None):
+        self.screenshot_func = screenshot_func
+        self.display_name = display_name
+        self._local = threading.local()
+        self._handles: List[Any] = []
+        self._lock = threading.Lock()
+        
+        self.backend = self._select_backend(backend)
+        
+        self.stats = {
+            'captures': 0,
+            'failures': 0,
+            'pixels_captured': 0,
+            'total_capture_time': 0.0
+        }
+        
+        logger.info(f"ScreenCapture using {self.backend or 'no'} backend")
+    
+    @property
+    def available(self) -> bool:
+        return self.backend is not None
+    
+    def capture(self, region: Optional[Region] = None, out=None) -> Optional[ScreenFrame]:
+        """
+        Capture a screen region (the whole virtual screen if None).
+        
+        Args:
+            region: (x, y, width, height) in screen coordinates
+            out: Optional preallocated (h, w, 3) uint8 array to fill, so
+                 repeated captures of one region reuse the same buffer
+        
+        Returns:
+            ScreenFrame, or None if nothing could be captured
+        """
+        if self.backend is None:
+            return None
+        
+        start_time = time.perf_counter()
+        try:
+            if self.backend == "mss":
+                frame = self._grab_mss(region)
+            elif self.backend == "xlib":
+                frame = self._grab_xlib(region)
+            else:
+                frame = self._grab_function(region)
+        except Exception as e:
+            logger.error(f"Screen capture failed ({self.backend}): {e}")
+            frame = None
+        
+        if frame is None:
+            self.stats['failures'] += 1
+            return None
+        
+        if out is not None and out.shape == frame.pixels.shape:
+            np.copyto(out, frame.pixels)
+            frame.pixels = out
+        
+        self.stats['captures'] += 1
+        self.stats['pixels_captured'] += frame.width * frame.height
+        self.stats['total_capture_time'] += time.perf_counter() - start_time
+        return frame
+    
+    def get_screen_bounds(self) -> Optional[Region]:
+        """Get the virtual screen rectangle."""
+        if self.backend == "mss":
+            monitor = self._mss().monitors[0]
+            return (monitor['left'], monitor['top'], monitor['width'], monitor['height'])
+        if self.backend == "xlib":
+            screen = self._xlib_display().screen()
+            return (0, 0, screen.width_in_pixels, screen.height_in_pixels)
+        return None
+    
+    def close(self) -> None:
+        """Release native capture handles."""
+        with self._lock:
+            handles, self._handles = self._handles, []
+        
+        for handle in handles:
+            try:
+                handle.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+    
+    def get_capture_stats(self) -> Dict[str, Any]:
+        """Get capture statistics."""
+        stats = self.stats.copy()
+        stats['backend'] = self.backend
+        stats['avg_capture_time'] = stats['total_capture_time'] / stats['captures'] if stats['captures'] else 0.0
+        return stats
+    
+    def _select_backend(self, requested: str) -> Optional[str]:
+        if not NUMPY_AVAILABLE:
+            logger.warning("NumPy not available - screen capture disabled")
+            return None
+        
+        candidates = self.BACKENDS if requested == "auto" else (requested,)
+        for backend in candidates:
+            if backend == "mss" and MSS_AVAILABLE:
+                return backend
+            if backend == "xlib" and XLIB_AVAILABLE and self._xlib_usable():
+                return backend
+            if backend == "function" and self.screenshot_func is not None and CV2_AVAILABLE:
+                return backend
+        return None
+    
+    def _clamp(self, region: Optional[Region]) -> Optional[Region]:
+        """Clip a region to the virtual screen."""
+        sx, sy, sw, sh = self.get_screen_bounds()
+        if region is None:
+            return (sx, sy, sw, sh)
+        
+        x, y, w, h = region
+        left, top = max(x, sx), max(y, sy)
+        right, bottom = min(x + w, sx + sw), min(y + h, sy + sh)
+        if right <= left or bottom <= top:
+            return None
+        return (left, top, right - left, bottom - top)
+    
+    def _track(self, handle):
+        with self._lock:
+            self._handles.append(handle)
+        return handle
+    
+    def _mss(self):
+        sct = getattr(self._local, 'mss', None)
+        if sct is None:
+            sct = self._local.mss = self._track(mss.mss())
+        return sct
+    
+    def _grab_mss(self, region: Optional[Region]) -> Optional[ScreenFrame]:
+        region = self._clamp(region)
+        if region is None:
+            return None
+        
+        x, y, w, h = region
+        shot = self._mss().grab({'left': x, 'top': y, 'width': w, 'height': h})
+        return ScreenFrame(bgrx_to_array(shot.raw, shot.width, shot.height), (x, y), "mss")
+    
+    def _xlib_usable(self) -> bool:
+        try:
+            self._xlib_display()
+            return True
+        except Exception as e:
+            logger.debug(f"X11 capture unavailable: {e}")
+            return False
+    
+    def _xlib_display(self):
+        conn = getattr(self._local, 'display', None)
+        if conn is None:
+            conn = self._local.display = self._track(xdisplay.Display(self.display_name))
+        return conn
+    
+    def _grab_xlib(self, region: Optional[Region]) -> Optional[ScreenFrame]:
+        region = self._clamp(region)
+        if region is None:
+            return None
+        
+        x, y, w, h = region
+        screen = self._xlib_display().screen()
+        if screen.root_depth not in (24, 32):
+            logger.warning(f"Unsupported X visual depth for raw capture: {screen.root_depth}")
+            return None
+        
+        image = screen.root.get_image(x, y, w, h, X.ZPixmap, 0xffffffff)
+        return ScreenFrame(bgrx_to_array(image.data, w, h), (x, y), "xlib")
+    
+    def _grab_function(self, region: Optional[Region]) -> Optional[ScreenFrame]:
+        data = self.screenshot_func(region=region) if region else self.screenshot_func()
+        if not data:
+            return None
+        
+        pixels = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if pixels is None:
+            return None
+        
+        frame = ScreenFrame(pixels, (region[0], region[1]) if region else (0, 0), "function")
+        if region and (frame.width > region[2] or frame.height > region[3]):
+            # Function ignored the region and returned the full screen
+            frame = ScreenFrame(pixels, (0, 0), "function").crop(*region)
+        return frame
+
+
+def create_screen_capture(screenshot_func: Optional[Callable] = None) -> ScreenCapture:
+    """Create a screen capture using the fastest available backend."""
+    return ScreenCapture(screenshot_func=screenshot_func)
@@ -0,0 +1,181 @@
+"""
+Shared Screen Index.
+
+Spatial indexes over on-screen windows and detected UI elements:
+- Windows indexed with z-order, updated from WindowStateModel events
+- Elements indexed per detection refresh, replaced region by region
+- Sub-millisecond point hit-tests and region queries
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Any
+
+from .element_detector import UIElementInfo
+from .spatial_index import SpatialIndex, Bounds
+from .window_manager import WindowInfo
+from .window_state import WindowStateModel, WindowStateEvent
+
+logger = logging.getLogger(__name__)
+
+
+class ScreenIndex:
+    """
+    Window and element hit-testing shared by automation components.
+    
+    The window index follows the window state model incrementally (moves
+    re-grid one window, restacks only update z). Element detections
+    replace whatever was indexed inside the detected region, and remember
+    which regions are fresh for the current window state.
+    """
+    
+    def __init__(self, window_state: Optional[WindowStateModel] = None,
+                 window_cell_size: int = 128, element_cell_size: int = 64,
+                 element_ttl: float = 2.0, max_fresh_regions: int = 32):
+        self.window_state = window_state
+        self.element_ttl = element_ttl
+        self.max_fresh_regions = max_fresh_regions
+        
+        self.windows = SpatialIndex(window_cell_size)
+        self.elements = SpatialIndex(element_cell_size)
+        self._fresh_regions: List[Tuple[Bounds, int, float]] = []  # (region, state version, detected at)
+        self._windows_loaded = False
+        self._lock = threading.RLock()
+        
+        self.stats = {
+            'window_updates': 0,
+            'element_updates': 0,
+            'point_queries': 0,
+            'region_queries': 0
+        }
+        
+        if window_state is not None:
+            window_state.add_listener(self._on_window_state_change)
+    
+    def get_window_at_point(self, x: int, y: int) -> Optional[WindowInfo]:
+        """Get the topmost visible window containing the point."""
+        self._ensure_windows()
+        with self._lock:
+            self.stats['point_queries'] += 1
+            for window in self.windows.query_point(x, y):
+                if window.is_visible and not window.is_minimized:
+                    return window
+            return None
+    
+    def get_windows_in_region(self, x: int, y: int, width: int, height: int) -> List[WindowInfo]:
+        """Get windows intersecting the region, topmost first."""
+        self._ensure_windows()
+        with self._lock:
+            self.stats['region_queries'] += 1
+            return self.windows.query_region(x, y, width, height)
+    
+    def get_element_at_point(self, x: int, y: int) -> Optional[UIElementInfo]:
+        """Get the smallest indexed element containing the point."""
+        with self._lock:
+            self.stats['point_queries'] += 1
+            hits = self.elements.query_point(x, y)
+            return min(hits, key=lambda e: e.area) if hits else None
+    
+    def get_elements_in_region(self, x: int, y: int, width: int, height: int) -> List[UIElementInfo]:
+        """Get indexed elements intersecting the region."""
+        with self._lock:
+            self.stats['region_queries'] += 1
+            return self.elements.query_region(x, y, width, height)
+    
+    def nearest_element(self, x: int, y: int, max_distance: Optional[float] = None) -> Optional[UIElementInfo]:
+        """Get the element whose center is closest to the point."""
+        with self._lock:
+            return self.elements.nearest(x, y, max_distance)
+    
+    def update_elements(self, elements: List[UIElementInfo], region: Optional[Bounds] = None) -> None:
+        """
+        Index a detection result.
+        
+        Args:
+            elements: Elements detected in the region
+            region: Region that was scanned; None means the whole screen
+        """
+        with self._lock:
+            if region is None:
+                self.elements.sync((e.element_id, e.bounds, e, 0) for e in elements)
+                self._fresh_regions.clear()
+            else:
+                rx, ry, rw, rh = region
+                stale = [e.element_id for e in self.elements.query_region(rx, ry, rw, rh)
+                         if self._within(e.bounds, region)]
+                for element_id in stale:
+                    self.elements.remove(element_id)
+                for element in elements:
+                    self.elements.insert(element.element_id, element.bounds, element)
+            
+            self._fresh_regions.append((region or (0, 0, 1 << 30, 1 << 30), self._state_version(), time.time()))
+            del self._fresh_regions[:-self.max_fresh_regions]
+            self.stats['element_updates'] += 1
+    
+    def is_region_fresh(self, x: int, y: int, width: int, height: int) -> bool:
+        """Whether a recent detection at the current window state covers the region."""
+        version = self._state_version()
+        now = time.time()
+        with self._lock:
+            return any(
+                fresh_version == version and now - detected_at <= self.element_ttl and
+                self._within((x, y, width, height), fresh_region)
+                for fresh_region, fresh_version, detected_at in self._fresh_regions
+            )
+    
+    def clear_elements(self) -> None:
+        """Drop all indexed elements."""
+        with self._lock:
+            self.elements.clear()
+            self._fresh_regions.clear()
+    
+    def close(self) -> None:
+        """Stop following the window state model."""
+        if self.window_state is not None:
+            self.window_state.remove_listener(self._on_window_state_change)
+    
+    def get_index_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            stats = self.stats.copy()
+            stats['windows'] = len(self.windows)
+            stats['elements'] = len(self.elements)
+        return stats
+    
+    def _ensure_windows(self) -> None:
+        if self._windows_loaded or self.window_state is None:
+            return
+        self._reload_windows(self.window_state.get_window_list())
+    
+    def _reload_windows(self, windows: List[WindowInfo]) -> None:
+        with self._lock:
+            self.windows.sync((w.window_id, w.bounds, w, w.z_order) for w in windows)
+            self._windows_loaded = True
+            self.stats['window_updates'] += 1
+    
+    def _on_window_state_change(self, event: WindowStateEvent) -> None:
+        """Apply a window state change incrementally."""
+        with self._lock:
+            if not self._windows_loaded:
+                return
+            
+            if event.event_type == 'window_removed':
+                self.windows.remove(event.window_id)
+            elif event.event_type in ('window_added', 'window_changed') and event.window is not None:
+                window = event.window
+                self.windows.insert(window.window_id, window.bounds, window, window.z_order)
+            elif event.event_type == 'stacking_changed':
+                for z, window_id in enumerate(self.window_state.get_stacking_order()):
+                    if window_id in self.windows:
+                        self.windows.set_z(window_id, z)
+            self.stats['window_updates'] += 1
+    
+    def _state_version(self) -> int:
+        return self.window_state.version if self.window_state is not None else 0
+    
+    @staticmethod
+    def _within(inner: Bounds, outer: Bounds) -> bool:
+        return (inner[0] >= outer[0] and inner[1] >= outer[1] and
+                inner[0] + inner[2] <= outer[0] + outer[2] and
+                inner[1] + inner[3] <= outer[1] + outer[3])
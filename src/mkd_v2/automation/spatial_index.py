@@ -0,0 +1,259 @@
+"""
+Spatial Index for Screen Rectangles.
+
+Uniform-grid index over screen-space rectangles (UI elements, windows)
+supporting nearest-center, point and region queries without scanning
+every item. Items carry a z-order (0 = topmost) so overlapping windows
+hit-test correctly, and `sync` applies refreshed item lists incrementally.
+"""
+
+import logging
+import math
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Bounds = Tuple[int, int, int, int]  # x, y, width, height
+
+
+class SpatialIndex:
+    """
+    Uniform grid index over rectangles.
+    
+    Each item is registered in every cell its rectangle overlaps (for
+    point/region queries) and in the cell containing its center (for
+    nearest-neighbour search). Cell size should be on the order of a
+    typical element size. Point and region results are ordered by z
+    (lower z first).
+    """
+    
+    def __init__(self, cell_size: int = 64):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        
+        self.cell_size = cell_size
+        self._items: Dict[Hashable, Tuple[Bounds, Any]] = {}
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._center_cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._z: Dict[Hashable, int] = {}
+    
+    @classmethod
+    def from_items(cls, items: Iterable[Any], bounds_func: Callable[[Any], Optional[Bounds]],
+                   cell_size: int = 64) -> 'SpatialIndex':
+        """Build an index from items, keyed by position in the iterable."""
+        index = cls(cell_size)
+        for i, item in enumerate(items):
+            bounds = bounds_func(item)
+            if bounds is not None:
+                index.insert(i, bounds, item)
+        return index
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+    
+    def insert(self, key: Hashable, bounds: Bounds, item: Any = None, z: int = 0) -> None:
+        """Insert or replace an item."""
+        if key in self._items:
+            self.remove(key)
+        
+        bounds = tuple(int(v) for v in bounds)
+        self._items[key] = (bounds, item if item is not None else key)
+        self._z[key] = z
+        
+        for cell in self._cells_for_bounds(bounds):
+            self._cells.setdefault(cell, set()).add(key)
+        self._center_cells.setdefault(self._center_cell(bounds), set()).add(key)
+    
+    def update(self, key: Hashable, bounds: Bounds) -> None:
+        """Move an existing item to new bounds."""
+        if key not in self._items:
+            raise KeyError(key)
+        _, item = self._items[key]
+        self.insert(key, bounds, item, self._z[key])
+    
+    def set_z(self, key: Hashable, z: int) -> None:
+        """Restack an item without re-gridding it."""
+        if key not in self._items:
+            raise KeyError(key)
+        self._z[key] = z
+    
+    def sync(self, entries: Iterable[Tuple[Hashable, Bounds, Any, int]]) -> Dict[str, int]:
+        """
+        Make the index match a refreshed list of (key, bounds, item, z).
+        
+        Only items whose bounds changed are re-gridded; items missing from
+        the list are removed.
+        
+        Returns:
+            Counts of inserted, moved, unchanged and removed items
+        """
+        counts = {'inserted': 0, 'moved': 0, 'unchanged': 0, 'removed': 0}
+        seen: Set[Hashable] = set()
+        
+        for key, bounds, item, z in entries:
+            seen.add(key)
+            bounds = tuple(int(v) for v in bounds)
+            current = self._items.get(key)
+            
+            if current is None:
+                self.insert(key, bounds, item, z)
+                counts['inserted'] += 1
+            elif current[0] != bounds:
+                self.insert(key, bounds, item, z)
+                counts['moved'] += 1
+            else:
+                self._items[key] = (bounds, item if item is not None else key)
+                self._z[key] = z
+                counts['unchanged'] += 1
+        
+        for key in [k for k in self._items if k not in seen]:
+            self.remove(key)
+            counts['removed'] += 1
+        
+        return counts
+    
+    def remove(self, key: Hashable) -> bool:
+        """Remove an item; returns False if it was not indexed."""
+        entry = self._items.pop(key, None)
+        if entry is None:
+            return False
+        self._z.pop(key, None)
+        
+        bounds, _ = entry
+        for cell in self._cells_for_bounds(bounds):
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._cells[cell]
+        
+        center_cell = self._center_cell(bounds)
+        members = self._center_cells.get(center_cell)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self._center_cells[center_cell]
+        
+        return True
+    
+    def clear(self) -> None:
+        """Remove all items."""
+        self._items.clear()
+        self._cells.clear()
+        self._center_cells.clear()
+        self._z.clear()
+    
+    def get_bounds(self, key: Hashable) -> Optional[Bounds]:
+        """Get the bounds stored for an item."""
+        entry = self._items.get(key)
+        return entry[0] if entry else None
+    
+    def query_point(self, x: int, y: int) -> List[Any]:
+        """Get all items whose rectangle contains the point, lowest z first."""
+        keys = [k for k in self._cells.get(self._cell(x, y), ()) if self._contains(self._items[k][0], x, y)]
+        keys.sort(key=self._z.__getitem__)
+        return [self._items[k][1] for k in keys]
+    
+    def topmost_at(self, x: int, y: int) -> Optional[Any]:
+        """Get the lowest-z item containing the point."""
+        best_key = None
+        for key in self._cells.get(self._cell(x, y), ()):
+            if self._contains(self._items[key][0], x, y) and (best_key is None or self._z[key] < self._z[best_key]):
+                best_key = key
+        return self._items[best_key][1] if best_key is not None else None
+    
+    def query_region(self, x: int, y: int, width: int, height: int) -> List[Any]:
+        """Get all items whose rectangle intersects the region, lowest z first."""
+        region = (x, y, width, height)
+        seen: Set[Hashable] = set()
+        hits = []
+        
+        for cell in self._cells_for_bounds(region):
+            for key in self._cells.get(cell, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if self._intersects(self._items[key][0], region):
+                    hits.append(key)
+        
+        hits.sort(key=self._z.__getitem__)
+        return [self._items[k][1] for k in hits]
+    
+    def nearest(self, x: int, y: int, max_distance: Optional[float] = None) -> Optional[Any]:
+        """
+        Find the item whose center is closest to the point.
+        
+        Searches grid rings outward from the query cell and stops once no
+        unvisited ring can contain a closer center.
+        """
+        if not self._center_cells:
+            return None
+        
+        cx, cy = self._cell(x, y)
+        limit_d2 = max_distance * max_distance if max_distance is not None else math.inf
+        best_item = None
+        best_d2 = limit_d2
+        visited = 0
+        ring = 0
+        
+        while visited < len(self._items):
+            # Every center in this ring is at least (ring - 1) cells away
+            ring_floor = max(0, ring - 1) * self.cell_size
+            if ring_floor * ring_floor > best_d2:
+                break
+            
+            for cell in self._ring_cells(cx, cy, ring):
+                for key in self._center_cells.get(cell, ()):
+                    visited += 1
+                    bounds, item = self._items[key]
+                    ex = bounds[0] + bounds[2] // 2
+                    ey = bounds[1] + bounds[3] // 2
+                    d2 = (ex - x) * (ex - x) + (ey - y) * (ey - y)
+                    if d2 < best_d2 or (d2 == best_d2 and best_item is None):
+                        best_d2 = d2
+                        best_item = item
+            ring += 1
+        
+        return best_item
+    
+    def items(self) -> List[Tuple[Hashable, Bounds, Any]]:
+        """Get all indexed entries as (key, bounds, item)."""
+        return [(key, bounds, item) for key, (bounds, item) in self._items.items()]
+    
+    def _cell(self, x: int, y: int) -> Tuple[int, int]:
+        return (int(x) // self.cell_size, int(y) // self.cell_size)
+    
+    def _center_cell(self, bounds: Bounds) -> Tuple[int, int]:
+        x, y, w, h = bounds
+        return self._cell(x + w // 2, y + h // 2)
+    
+    def _cells_for_bounds(self, bounds: Bounds) -> Iterable[Tuple[int, int]]:
+        x, y, w, h = bounds
+        x0, y0 = self._cell(x, y)
+        x1, y1 = self._cell(x + max(w - 1, 0), y + max(h - 1, 0))
+        for gx in range(x0, x1 + 1):
+            for gy in range(y0, y1 + 1):
+                yield (gx, gy)
+    
+    def _ring_cells(self, cx: int, cy: int, ring: int) -> Iterable[Tuple[int, int]]:
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for gx in range(cx - ring, cx + ring + 1):
+            yield (gx, cy - ring)
+            yield (gx, cy + ring)
+        for gy in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, gy)
+            yield (cx + ring, gy)
+    
+    @staticmethod
+    def _contains(bounds: Bounds, x: int, y: int) -> bool:
+        bx, by, bw, bh = bounds
+        return bx <= x < bx + bw and by <= y < by + bh
+    
+    @staticmethod
+    def _intersects(a: Bounds, b: Bounds) -> bool:
+        return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
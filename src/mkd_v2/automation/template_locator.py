@@ -0,0 +1,261 @@
+"""
+Template-Matching Element Locator.
+
+Finds icon-only controls by the pixels recorded for them:
+- Reference crops captured at record time and stored next to the recording
+- Multi-scale template pyramids built once and cached (LRU)
+- Search limited to the region predicted from recorded bounds and window offset
+- Full-frame search as a fallback
+- Match confidence and search timing reported per lookup
+"""
+
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .screen_capture import ScreenCapture, ScreenFrame, CV2_AVAILABLE, NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+if CV2_AVAILABLE:
+    import cv2
+
+logger = logging.getLogger(__name__)
+
+Bounds = Tuple[int, int, int, int]  # x, y, width, height
+
+
+@dataclass
+class TemplateMatch:
+    """A template located on screen."""
+    template: str
+    bounds: Bounds
+    confidence: float
+    scale: float
+    search_time: float
+    full_frame: bool = False  # Found by the full-frame fallback
+    
+    @property
+    def center_point(self) -> Tuple[int, int]:
+        x, y, w, h = self.bounds
+        return (x + w // 2, y + h // 2)
+
+
+class TemplateStore:
+    """
+    Reference crops stored as PNG files in a directory.
+    
+    Recordings keep their crops in a sibling directory named after the
+    recording file, so the two are moved and deleted together.
+    """
+    
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+    
+    @classmethod
+    def for_recording(cls, recording_path: Union[str, Path]) -> 'TemplateStore':
+        """Store next to a recording file."""
+        recording_path = Path(recording_path)
+        return cls(recording_path.with_name(f"{recording_path.stem}.templates"))
+    
+    def save(self, template_id: str, frame: ScreenFrame) -> Optional[str]:
+        """
+        Write a reference crop.
+        
+        Returns:
+            Path of the stored template, or None if it could not be written
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{template_id}.png"
+        return str(path) if frame.save(path) else None
+    
+    def path(self, template_id: str) -> Path:
+        """Path of a stored template."""
+        return self.directory / f"{template_id}.png"
+
+
+class TemplateLocator:
+    """
+    Locates reference crops on screen with normalised cross-correlation.
+    
+    Each template is loaded once and resized to every search scale; the
+    grayscale pyramid is kept in an LRU cache so repeated playback of the
+    same recording only pays for the correlation itself.
+    """
+    
+    def __init__(self, screen_capture: ScreenCapture,
+                 scales: Sequence[float] = (1.0, 0.9, 1.1, 0.8, 1.25),
+                 threshold: float = 0.8,
+                 search_margin: int = 64,
+                 max_templates: int = 64):
+        self.screen_capture = screen_capture
+        self.scales = tuple(scales)  # Nearest-to-recorded first
+        self.threshold = threshold
+        self.accept_confidence = 0.95  # Stop trying scales once a match is this good
+        self.search_margin = search_margin
+        self.max_templates = max_templates
+        
+        self._pyramids: 'OrderedDict[Tuple[str, float], List[Tuple[float, Any]]]' = OrderedDict()
+        
+        self.stats = {
+            'searches': 0,
+            'region_matches': 0,
+            'full_frame_matches': 0,
+            'misses': 0,
+            'pyramid_hits': 0,
+            'pyramid_builds': 0,
+            'search_times': deque(maxlen=1000),
+            'confidences': deque(maxlen=1000)
+        }
+    
+    @property
+    def available(self) -> bool:
+        return CV2_AVAILABLE and NUMPY_AVAILABLE
+    
+    def locate(self, template: Union[str, Path], predicted: Optional[Bounds] = None,
+               offset: Tuple[int, int] = (0, 0), full_frame_fallback: bool = True,
+               scale: float = 1.0) -> Optional[TemplateMatch]:
+        """
+        Find a template on screen.
+        
+        Args:
+            template: Path of the reference crop
+            predicted: Bounds the crop was recorded at
+            offset: Window movement since recording, applied to `predicted`
+            full_frame_fallback: Search the whole screen if the predicted region misses
+            scale: Expected on-screen size relative to the recording (display DPI
+                   change); the search scales are tried around it
+        
+        Returns:
+            Best match above the confidence threshold, or None
+        """
+        if not self.available:
+            return None
+        
+        started = time.perf_counter()
+        self.stats['searches'] += 1
+        
+        try:
+            pyramid = self._get_pyramid(str(template), scale)
+            if not pyramid:
+                self.stats['misses'] += 1
+                return None
+            
+            best = None
+            if predicted is not None:
+                best = self._search(pyramid, self._predicted_region(pyramid, predicted, offset))
+                if best is not None:
+                    self.stats['region_matches'] += 1
+            
+            if best is None and full_frame_fallback:
+                best = self._search(pyramid, None)
+                if best is not None:
+                    self.stats['full_frame_matches'] += 1
+            
+            search_time = time.perf_counter() - started
+            self.stats['search_times'].append(search_time)
+            
+            if best is None:
+                self.stats['misses'] += 1
+                logger.debug(f"Template not found: {template}")
+                return None
+            
+            bounds, confidence, scale, full_frame = best
+            self.stats['confidences'].append(confidence)
+            return TemplateMatch(str(template), bounds, confidence, scale, search_time, full_frame)
+        
+        except Exception as e:
+            logger.error(f"Template search failed for {template}: {e}")
+            self.stats['misses'] += 1
+            return None
+    
+    def clear_cache(self) -> None:
+        """Drop all cached pyramids."""
+        self._pyramids.clear()
+    
+    def get_locator_stats(self) -> Dict[str, Any]:
+        """Get template search statistics."""
+        stats = {k: v for k, v in self.stats.items() if k not in ('search_times', 'confidences')}
+        stats['cached_templates'] = len(self._pyramids)
+        
+        times = sorted(self.stats['search_times'])
+        stats['avg_search_time'] = sum(times) / len(times) if times else 0.0
+        stats['p95_search_time'] = times[min(len(times) - 1, int(len(times) * 0.95))] if times else 0.0
+        
+        confidences = self.stats['confidences']
+        stats['avg_confidence'] = sum(confidences) / len(confidences) if confidences else 0.0
+        
+        found = stats['region_matches'] + stats['full_frame_matches']
+        stats['region_match_rate'] = stats['region_matches'] / found if found else 0.0
+        return stats
+    
+    def _get_pyramid(self, template: str, base_scale: float = 1.0) -> List[Tuple[float, Any]]:
+        """Grayscale template at every search scale around `base_scale`, built once per template and scale."""
+        key = (template, round(base_scale, 3))
+        pyramid = self._pyramids.get(key)
+        if pyramid is not None:
+            self._pyramids.move_to_end(key)
+            self.stats['pyramid_hits'] += 1
+            return pyramid
+        
+        image = cv2.imread(template, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            logger.warning(f"Could not read template: {template}")
+            return []
+        
+        pyramid = []
+        height, width = image.shape[:2]
+        for scale in (key[1] * s for s in self.scales):
+            w, h = int(round(width * scale)), int(round(height * scale))
+            if w < 4 or h < 4:
+                continue
+            
+            level = image if scale == 1.0 else cv2.resize(
+                image, (w, h), interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            )
+            pyramid.append((scale, level))
+        
+        self._pyramids[key] = pyramid
+        self.stats['pyramid_builds'] += 1
+        while len(self._pyramids) > self.max_templates:
+            self._pyramids.popitem(last=False)
+        
+        return pyramid
+    
+    def _predicted_region(self, pyramid: List[Tuple[float, Any]], predicted: Bounds,
+                          offset: Tuple[int, int]) -> Bounds:
+        """Recorded bounds moved by the window offset, padded for scale and drift."""
+        x, y, w, h = predicted
+        max_h = max(level.shape[0] for _, level in pyramid)
+        max_w = max(level.shape[1] for _, level in pyramid)
+        pad_x = self.search_margin + max(0, max_w - w)
+        pad_y = self.search_margin + max(0, max_h - h)
+        return (x + offset[0] - pad_x, y + offset[1] - pad_y, w + 2 * pad_x, h + 2 * pad_y)
+    
+    def _search(self, pyramid: List[Tuple[float, Any]],
+                region: Optional[Bounds]) -> Optional[Tuple[Bounds, float, float, bool]]:
+        """Best match of any pyramid level within a screen region (None for full frame)."""
+        frame = self.screen_capture.capture(region)
+        if frame is None:
+            return None
+        
+        gray = cv2.cvtColor(np.ascontiguousarray(frame.pixels), cv2.COLOR_BGR2GRAY)
+        best = None
+        for scale, level in pyramid:
+            h, w = level.shape[:2]
+            if h > gray.shape[0] or w > gray.shape[1]:
+                continue
+            
+            scores = cv2.matchTemplate(gray, level, cv2.TM_CCOEFF_NORMED)
+            _, confidence, _, (mx, my) = cv2.minMaxLoc(scores)
+            if confidence >= self.threshold and (best is None or confidence > best[1]):
+                bounds = (frame.origin[0] + mx, frame.origin[1] + my, w, h)
+                best = (bounds, float(confidence), scale, region is None)
+                if confidence >= self.accept_confidence:
+                    break
+        
+        return best
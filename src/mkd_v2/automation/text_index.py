@@ -0,0 +1,146 @@
+"""
+OCR Result Cache and Text Index.
+
+Avoids repeated OCR and linear text scans:
+- OCR output cached by region content hash with LRU eviction
+- Inverted index from normalised tokens to element boxes
+- Exact and substring lookups over the token vocabulary
+"""
+
+import logging
+import zlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Tuple
+
+from .frame_diff import XXHASH_AVAILABLE, xxhash
+from .screen_capture import NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+if TYPE_CHECKING:
+    from .element_detector import UIElementInfo
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Normalise OCR or query text for matching."""
+    return (text or "").lower().strip()
+
+
+class OCRResultCache:
+    """
+    OCR results keyed by the hash of the pixels they were read from.
+    
+    Elements are stored relative to the image origin so a region whose
+    content reappears anywhere on screen (a dialog reopened, a hover
+    state reverted) is served without running OCR again.
+    """
+    
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[Any, int], List[UIElementInfo]]' = OrderedDict()
+        self._hash = xxhash.xxh3_64_intdigest if XXHASH_AVAILABLE else zlib.crc32
+        
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, pixels) -> Optional[List['UIElementInfo']]:
+        """Get cached elements (relative bounds) for identical pixels."""
+        key = self._key(pixels)
+        elements = self._entries.get(key)
+        if elements is None:
+            self.stats['misses'] += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return elements
+    
+    def put(self, pixels, elements: List['UIElementInfo']) -> None:
+        """Cache elements (relative bounds) read from the pixels."""
+        self._entries[self._key(pixels)] = elements
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+    
+    def clear(self) -> None:
+        """Drop all cached results."""
+        self._entries.clear()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        stats = self.stats.copy()
+        stats['entries'] = len(self._entries)
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / total if total else 0.0
+        return stats
+    
+    def _key(self, pixels) -> Tuple[Any, int]:
+        return (pixels.shape, self._hash(np.ascontiguousarray(pixels)))
+
+
+class TextIndex:
+    """
+    Inverted index from normalised text to elements.
+    
+    Exact lookups are a dict hit; fuzzy (substring) lookups scan the
+    token vocabulary rather than every element.
+    """
+    
+    def __init__(self):
+        self._tokens: Dict[str, Dict[Hashable, 'UIElementInfo']] = {}
+    
+    def __len__(self) -> int:
+        return sum(len(elements) for elements in self._tokens.values())
+    
+    def add(self, key: Hashable, element: 'UIElementInfo') -> None:
+        """Index an element's text."""
+        token = normalize_text(element.text)
+        if token:
+            self._tokens.setdefault(token, {})[key] = element
+    
+    def remove(self, key: Hashable, element: 'UIElementInfo') -> None:
+        """Remove an element from the index."""
+        token = normalize_text(element.text)
+        elements = self._tokens.get(token)
+        if elements is not None:
+            elements.pop(key, None)
+            if not elements:
+                del self._tokens[token]
+    
+    def clear(self) -> None:
+        """Drop all indexed text."""
+        self._tokens.clear()
+    
+    def lookup(self, text: str, fuzzy: bool = True) -> List['UIElementInfo']:
+        """
+        Find elements by text, in reading order.
+        
+        Args:
+            text: Text to search for
+            fuzzy: Match when either text contains the other
+        
+        Returns:
+            Matching elements sorted top-to-bottom, left-to-right
+        """
+        search = normalize_text(text)
+        if not search:
+            return []
+        
+        if fuzzy:
+            matches = [element
+                       for token, elements in self._tokens.items()
+                       if search in token or token in search
+                       for element in elements.values()]
+        else:
+            matches = list(self._tokens.get(search, {}).values())
+        
+        return sorted(matches, key=lambda e: (e.bounds[1], e.bounds[0]))
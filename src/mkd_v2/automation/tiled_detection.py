@@ -0,0 +1,341 @@
+"""
+Parallel Tiled Element Detection.
+
+Spreads contour and OCR detection of large captures across CPU cores:
+- Captures split into overlapping tiles
+- Tiles processed by a persistent process pool reading pixels from shared memory
+- Boxes merged and deduplicated across tile seams
+- Per-stage timings reported with the result
+"""
+
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .element_detector import (
+    VisualElementDetector, UIElementInfo, DetectionResult, CV2_AVAILABLE, TESSERACT_AVAILABLE
+)
+from .screen_capture import ScreenFrame, NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+    SHARED_MEMORY_AVAILABLE = True
+except ImportError:
+    shared_memory = None
+    SHARED_MEMORY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+Bounds = Tuple[int, int, int, int]  # x, y, width, height
+
+# Worker-side shared memory attachments, by block name
+_worker_blocks: Dict[str, Any] = {}
+
+
+def plan_tiles(width: int, height: int, tile_size: int, overlap: int) -> List[Tuple[Bounds, Bounds]]:
+    """
+    Split a frame into tiles.
+    
+    Returns:
+        List of (core, extended) bounds relative to the frame; cores
+        partition the frame, extended tiles add `overlap` on each side.
+    """
+    tiles = []
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            core = (x, y, min(tile_size, width - x), min(tile_size, height - y))
+            ex, ey = max(0, x - overlap), max(0, y - overlap)
+            ex2 = min(width, x + core[2] + overlap)
+            ey2 = min(height, y + core[3] + overlap)
+            tiles.append((core, (ex, ey, ex2 - ex, ey2 - ey)))
+    return tiles
+
+
+def _run_stages(image, origin: Tuple[int, int], stages: Sequence[str],
+                ocr_config: str) -> Tuple[List[UIElementInfo], Dict[str, float]]:
+    """Run detection stages on one tile image."""
+    elements: List[UIElementInfo] = []
+    timings: Dict[str, float] = {}
+    offset_x, offset_y = origin
+    
+    for stage in stages:
+        start_time = time.perf_counter()
+        if stage == "buttons":
+            elements.extend(VisualElementDetector._detect_buttons(image, offset_x, offset_y))
+        elif stage == "text_regions":
+            elements.extend(VisualElementDetector._detect_text_regions(image, offset_x, offset_y))
+        elif stage == "ocr":
+            elements.extend(VisualElementDetector._ocr_image(image, ocr_config, offset_x, offset_y))
+        timings[stage] = time.perf_counter() - start_time
+    
+    return elements, timings
+
+
+def _detect_shared_tile(block_name: str, shape: Tuple[int, ...], tile: Bounds, origin: Tuple[int, int],
+                        stages: Sequence[str], ocr_config: str) -> Tuple[List[UIElementInfo], Dict[str, float]]:
+    """Process-pool entry point: detect elements in a tile of a shared frame."""
+    block = _worker_blocks.get(block_name)
+    if block is None:
+        # The parent replaced its block; drop attachments to the old one
+        for stale in _worker_blocks.values():
+            stale.close()
+        _worker_blocks.clear()
+        
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=block_name, track=False)
+        else:
+            # Spawned workers share the parent's resource tracker, so attaching only
+            # re-registers the parent's own entry; the parent's unlink() clears it.
+            # Unregistering here would remove that entry and make unlink() fail in the tracker.
+            block = shared_memory.SharedMemory(name=block_name)
+        _worker_blocks[block_name] = block
+    
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=block.buf)
+    x, y, w, h = tile
+    return _run_stages(frame[y:y + h, x:x + w], (origin[0] + x, origin[1] + y), stages, ocr_config)
+
+
+class TiledDetector:
+    """
+    Tile-parallel detection over a persistent process pool.
+    
+    The frame is copied once into a reusable shared memory block; workers
+    attach to it by name and slice their tile, so pixels are never
+    pickled. When a pool cannot be started the tiles run in-process.
+    """
+    
+    def __init__(self, tile_size: int = 512, overlap: int = 64, max_workers: Optional[int] = None,
+                 min_pixels: int = 1_000_000, ocr_config: str = ""):
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.min_pixels = min_pixels  # Smaller frames are not worth dispatching
+        self.ocr_config = ocr_config
+        
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._block = None
+        self._pool_failed = False
+        
+        self.stats = {
+            'frames': 0,
+            'tiles': 0,
+            'parallel_frames': 0,
+            'seam_merges': 0,
+            'duplicates_removed': 0
+        }
+    
+    def should_tile(self, frame: ScreenFrame) -> bool:
+        """Whether a frame is large enough to benefit from tiling."""
+        return frame.width * frame.height >= self.min_pixels
+    
+    def detect(self, frame: ScreenFrame, stages: Sequence[str] = ("buttons", "text_regions")) -> DetectionResult:
+        """
+        Detect elements in a frame tile by tile.
+        
+        Args:
+            frame: Captured frame
+            stages: Any of "buttons", "text_regions", "ocr"
+        
+        Returns:
+            DetectionResult with merged elements and per-stage timings
+            (stage times are summed CPU-side across tiles)
+        """
+        if not CV2_AVAILABLE:
+            return DetectionResult(success=False, elements=[], error_message="OpenCV not available")
+        if "ocr" in stages and not TESSERACT_AVAILABLE:
+            stages = [stage for stage in stages if stage != "ocr"]
+        
+        start_time = time.perf_counter()
+        timings: Dict[str, float] = {stage: 0.0 for stage in stages}
+        tiles = plan_tiles(frame.width, frame.height, self.tile_size, self.overlap)
+        
+        try:
+            results = None
+            if len(tiles) > 1 and self._ensure_pool():
+                share_start = time.perf_counter()
+                self._share(frame.pixels)
+                timings['share'] = time.perf_counter() - share_start
+                results = self._run_pooled(frame, tiles, stages)
+            
+            if results is None:
+                results = [
+                    _run_stages(frame.pixels[ey:ey + eh, ex:ex + ew],
+                                (frame.origin[0] + ex, frame.origin[1] + ey), stages, self.ocr_config)
+                    for _, (ex, ey, ew, eh) in tiles
+                ]
+            else:
+                self.stats['parallel_frames'] += 1
+            
+            for _, tile_timings in results:
+                for stage, elapsed in tile_timings.items():
+                    timings[stage] += elapsed
+            
+            merge_start = time.perf_counter()
+            elements = self._merge(frame, tiles, [elements for elements, _ in results])
+            timings['merge'] = time.perf_counter() - merge_start
+            timings['total'] = time.perf_counter() - start_time
+            
+            self.stats['frames'] += 1
+            self.stats['tiles'] += len(tiles)
+            
+            return DetectionResult(
+                success=True,
+                elements=elements,
+                detection_time=timings['total'],
+                stage_timings=timings
+            )
+        
+        except Exception as e:
+            logger.error(f"Tiled detection failed: {e}")
+            return DetectionResult(success=False, elements=[], error_message=str(e))
+    
+    def close(self) -> None:
+        """Shut down the pool and release shared memory."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+    
+    def get_tiling_stats(self) -> Dict[str, Any]:
+        """Get tiled detection statistics."""
+        stats = self.stats.copy()
+        stats['workers'] = self.max_workers if self._executor is not None else 0
+        stats['shared_memory_bytes'] = self._block.size if self._block is not None else 0
+        return stats
+    
+    def _ensure_pool(self) -> bool:
+        if self._executor is not None:
+            return True
+        if self._pool_failed or not SHARED_MEMORY_AVAILABLE or self.max_workers < 2:
+            return False
+        
+        try:
+            # Spawned workers: forking a process with capture/X11 threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Process pool unavailable, detecting tiles in-process: {e}")
+            self._pool_failed = True
+            return False
+    
+    def _share(self, pixels) -> None:
+        """Copy the frame into the shared block, growing it when needed."""
+        if self._block is None or self._block.size < pixels.nbytes:
+            if self._block is not None:
+                self._block.close()
+                self._block.unlink()
+            self._block = shared_memory.SharedMemory(create=True, size=pixels.nbytes)
+        
+        shared = np.ndarray(pixels.shape, dtype=np.uint8, buffer=self._block.buf)
+        np.copyto(shared, pixels)
+    
+    def _run_pooled(self, frame: ScreenFrame, tiles, stages):
+        try:
+            futures = [
+                self._executor.submit(_detect_shared_tile, self._block.name, frame.pixels.shape,
+                                      extended, frame.origin, tuple(stages), self.ocr_config)
+                for _, extended in tiles
+            ]
+            return [future.result() for future in futures]
+        except Exception as e:
+            logger.warning(f"Process pool failed, detecting tiles in-process: {e}")
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._pool_failed = True
+            return None
+    
+    def _merge(self, frame: ScreenFrame, tiles, tile_elements: List[List[UIElementInfo]]) -> List[UIElementInfo]:
+        """
+        Combine per-tile elements.
+        
+        Boxes cut by an interior tile edge are dropped when another tile
+        saw the element whole, otherwise unioned with their other parts;
+        whole boxes seen by several overlapping tiles are deduplicated.
+        """
+        ox, oy = frame.origin
+        whole: List[UIElementInfo] = []
+        clipped: List[UIElementInfo] = []
+        
+        for (_, (ex, ey, ew, eh)), elements in zip(tiles, tile_elements):
+            left, top = ox + ex, oy + ey
+            right, bottom = left + ew, top + eh
+            for element in elements:
+                x, y, w, h = element.bounds
+                cut = ((x <= left and ex > 0) or (y <= top and ey > 0) or
+                       (x + w >= right and ex + ew < frame.width) or
+                       (y + h >= bottom and ey + eh < frame.height))
+                (clipped if cut else whole).append(element)
+        
+        merged: List[UIElementInfo] = []
+        for element in sorted(whole, key=lambda e: -e.confidence):
+            if any(self._same_element(element, kept) for kept in merged):
+                self.stats['duplicates_removed'] += 1
+                continue
+            merged.append(element)
+        
+        parts: List[UIElementInfo] = []
+        for element in clipped:
+            if any(self._same_kind(element, kept) and self._coverage(element.bounds, kept.bounds) >= 0.9
+                   for kept in merged):
+                continue
+            for i, part in enumerate(parts):
+                if self._same_kind(element, part) and self._overlap_area(element.bounds, part.bounds) > 0:
+                    parts[i] = self._union(part, element)
+                    self.stats['seam_merges'] += 1
+                    break
+            else:
+                parts.append(element)
+        
+        return sorted(merged + parts, key=lambda e: (e.bounds[1], e.bounds[0]))
+    
+    @staticmethod
+    def _same_kind(a: UIElementInfo, b: UIElementInfo) -> bool:
+        return a.element_type == b.element_type and a.detection_method == b.detection_method
+    
+    @classmethod
+    def _same_element(cls, a: UIElementInfo, b: UIElementInfo) -> bool:
+        if not cls._same_kind(a, b):
+            return False
+        inter = cls._overlap_area(a.bounds, b.bounds)
+        union = a.area + b.area - inter
+        return union > 0 and inter / union >= 0.5
+    
+    @staticmethod
+    def _overlap_area(a: Bounds, b: Bounds) -> int:
+        w = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+        h = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+        return w * h if w > 0 and h > 0 else 0
+    
+    @classmethod
+    def _coverage(cls, inner: Bounds, outer: Bounds) -> float:
+        area = inner[2] * inner[3]
+        return cls._overlap_area(inner, outer) / area if area else 0.0
+    
+    @staticmethod
+    def _union(a: UIElementInfo, b: UIElementInfo) -> UIElementInfo:
+        x, y = min(a.bounds[0], b.bounds[0]), min(a.bounds[1], b.bounds[1])
+        right = max(a.bounds[0] + a.bounds[2], b.bounds[0] + b.bounds[2])
+        bottom = max(a.bounds[1] + a.bounds[3], b.bounds[1] + b.bounds[3])
+        prefix = a.element_id.rsplit("_", 2)[0]
+        first, second = sorted((a, b), key=lambda e: e.bounds[0])
+        text = " ".join(t for t in (first.text, second.text) if t) if a.text != b.text else a.text
+        return UIElementInfo(
+            element_id=f"{prefix}_{x}_{y}",
+            element_type=a.element_type,
+            bounds=(x, y, right - x, bottom - y),
+            text=text,
+            confidence=min(a.confidence, b.confidence),
+            detection_method=a.detection_method
+        )
@@ -6,13 +6,18 @@ using platform-specific APIs.
 """
 
 import logging
+import os
 import platform
+import re
 import subprocess
+import threading
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple, Any
 import time
 
+from .screen_capture import ScreenFrame, bgrx_to_array, NUMPY_AVAILABLE
+
 # Platform-specific imports
 if platform.system() == "Darwin":
     try:
@@ -34,6 +39,15 @@ if platform.system() == "Windows":
 else:
     WIN32_AVAILABLE = False
 
+if platform.system() == "Linux":
+    try:
+        from Xlib import X, display as xdisplay, error as xerror, protocol as xprotocol
+        XLIB_AVAILABLE = True
+    except ImportError:
+        XLIB_AVAILABLE = False
+else:
+    XLIB_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -415,9 +429,287 @@ class WindowsWindowManager(WindowManager):
 
 
 class LinuxWindowManager(WindowManager):
-    """Linux window manager using X11/Wayland utilities."""
+    """
+    Linux window manager using a persistent X11 connection.
+    
+    EWMH properties and geometry are read over one python-xlib connection;
+    per-window static data (PID, process name) is cached by window id.
+    The xprop/wmctrl subprocess path is used when Xlib is unavailable or
+    the connection cannot be established.
+    """
+    
+    EWMH_ATOMS = [
+        "_NET_ACTIVE_WINDOW", "_NET_CLIENT_LIST", "_NET_CLIENT_LIST_STACKING",
+        "_NET_WM_NAME", "_NET_WM_PID", "_NET_WM_STATE", "_NET_WM_STATE_HIDDEN", "UTF8_STRING"
+    ]
+    
+    def __init__(self, display_name: Optional[str] = None):
+        self.display_name = display_name
+        self._display = None
+        self._root = None
+        self._atoms: Dict[str, int] = {}
+        self._process_cache: Dict[int, Tuple[int, str]] = {}
+        self._lock = threading.RLock()
+        self._connect_failed = False
+        
+        if self._ensure_display():
+            logger.info("Linux WindowManager initialized with persistent X11 connection")
+        else:
+            logger.info("Linux WindowManager using subprocess fallback")
+    
+    def _ensure_display(self) -> bool:
+        """Open the X connection on first use; returns False if unavailable."""
+        if self._display is not None:
+            return True
+        if not XLIB_AVAILABLE or self._connect_failed:
+            return False
+        if not (self.display_name or os.environ.get("DISPLAY")):
+            self._connect_failed = True
+            return False
+        
+        with self._lock:
+            try:
+                self._display = xdisplay.Display(self.display_name)
+                self._root = self._display.screen().root
+                self._atoms = {name: self._display.intern_atom(name) for name in self.EWMH_ATOMS}
+                return True
+            except Exception as e:
+                logger.warning(f"Could not open X display, falling back to subprocess tools: {e}")
+                self._display = None
+                self._connect_failed = True
+                return False
+    
+    def _drop_display(self, error: Exception) -> None:
+        """Discard a broken connection; the next call reconnects."""
+        logger.warning(f"X11 connection error, reconnecting on next call: {error}")
+        try:
+            if self._display is not None:
+                self._display.close()
+        except Exception:
+            pass
+        self._display = None
+        self._root = None
+    
+    def close(self) -> None:
+        """Close the X connection."""
+        with self._lock:
+            if self._display is not None:
+                self._display.close()
+                self._display = None
+                self._root = None
     
     def get_active_window(self) -> Optional[WindowInfo]:
+        """Get active window from _NET_ACTIVE_WINDOW."""
+        if self._ensure_display():
+            with self._lock:
+                try:
+                    active_id = self._get_active_window_id()
+                    if not active_id:
+                        return None
+                    return self._xlib_window_info(active_id, is_active=True)
+                except xerror.ConnectionClosedError as e:
+                    self._drop_display(e)
+                except Exception as e:
+                    logger.error(f"Failed to get active window: {e}")
+                    return None
+        
+        return self._get_active_window_subprocess()
+    
+    def get_window_list(self) -> List[WindowInfo]:
+        """Get client windows, topmost first."""
+        if self._ensure_display():
+            with self._lock:
+                try:
+                    active_id = self._get_active_window_id()
+                    stacking = self._get_client_stacking()
+                    
+                    windows = []
+                    for z_order, window_id in enumerate(stacking):
+                        try:
+                            info = self._xlib_window_info(window_id, is_active=window_id == active_id, z_order=z_order)
+                        except xerror.XError:
+                            continue  # Window destroyed mid-query
+                        if info:
+                            windows.append(info)
+                    return windows
+                except xerror.ConnectionClosedError as e:
+                    self._drop_display(e)
+                except Exception as e:
+                    logger.error(f"Failed to get window list: {e}")
+                    return []
+        
+        return self._get_window_list_subprocess()
+    
+    def get_window_info(self, window_id: str) -> Optional[WindowInfo]:
+        """Get fresh information for a single window."""
+        if self._ensure_display():
+            with self._lock:
+                try:
+                    wid = int(window_id, 16)
+                    return self._xlib_window_info(wid, is_active=wid == self._get_active_window_id())
+                except xerror.ConnectionClosedError as e:
+                    self._drop_display(e)
+                except Exception as e:
+                    logger.debug(f"Failed to get window info for {window_id}: {e}")
+                    return None
+        
+        return self._get_window_info_by_id(window_id)
+    
+    def get_window_at_point(self, x: int, y: int) -> Optional[WindowInfo]:
+        """Get topmost visible window containing the point."""
+        for window in self.get_window_list():
+            if not window.is_visible or window.is_minimized:
+                continue
+            wx, wy, ww, wh = window.bounds
+            if wx <= x < wx + ww and wy <= y < wy + wh:
+                return window
+        
+        return None
+    
+    def focus_window(self, window_id: str) -> bool:
+        """Focus window with a _NET_ACTIVE_WINDOW client message."""
+        if self._ensure_display():
+            with self._lock:
+                try:
+                    window = self._display.create_resource_object('window', int(window_id, 16))
+                    event = xprotocol.event.ClientMessage(
+                        window=window,
+                        client_type=self._atoms["_NET_ACTIVE_WINDOW"],
+                        data=(32, [2, X.CurrentTime, 0, 0, 0])  # Source indication 2 = pager
+                    )
+                    self._root.send_event(event, event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask)
+                    self._display.flush()
+                    return True
+                except xerror.ConnectionClosedError as e:
+                    self._drop_display(e)
+                except Exception as e:
+                    logger.error(f"Failed to focus window {window_id}: {e}")
+                    return False
+        
+        try:
+            result = subprocess.run([
+                "wmctrl", "-i", "-a", window_id
+            ], capture_output=True, timeout=3)
+            
+            return result.returncode == 0
+            
+        except Exception as e:
+            logger.error(f"Failed to focus window {window_id}: {e}")
+            return False
+    
+    def get_window_pixels(self, window_id: str):
+        """Capture a window as an (h, w, 3) BGR array with XGetImage."""
+        if not NUMPY_AVAILABLE or not self._ensure_display():
+            return None
+        
+        with self._lock:
+            try:
+                window = self._display.create_resource_object('window', int(window_id, 16))
+                geometry = window.get_geometry()
+                if geometry.depth not in (24, 32):
+                    return None
+                image = window.get_image(0, 0, geometry.width, geometry.height, X.ZPixmap, 0xffffffff)
+                return bgrx_to_array(image.data, geometry.width, geometry.height)
+            except xerror.ConnectionClosedError as e:
+                self._drop_display(e)
+            except Exception as e:
+                logger.error(f"Failed to capture window {window_id}: {e}")
+        
+        return None
+    
+    def get_window_screenshot(self, window_id: str) -> Optional[bytes]:
+        """Take an encoded window screenshot (raw capture, import command fallback)."""
+        pixels = self.get_window_pixels(window_id)
+        if pixels is not None:
+            encoded = ScreenFrame(pixels, (0, 0), "xlib").encode()
+            if encoded:
+                return encoded
+        
+        try:
+            result = subprocess.run([
+                "import", "-window", window_id, "png:-"
+            ], capture_output=True, timeout=10)
+            
+            if result.returncode == 0:
+                return result.stdout
+            
+            return None
+            
+        except Exception as e:
+            logger.error(f"Failed to screenshot window {window_id}: {e}")
+            return None
+    
+    def _get_property_values(self, window, atom_name: str, property_type=None) -> List[Any]:
+        """Read a property as a list of values (empty if unset)."""
+        prop = window.get_full_property(self._atoms[atom_name], property_type or X.AnyPropertyType)
+        return list(prop.value) if prop is not None else []
+    
+    def _get_active_window_id(self) -> int:
+        values = self._get_property_values(self._root, "_NET_ACTIVE_WINDOW")
+        return int(values[0]) if values else 0
+    
+    def _get_client_stacking(self) -> List[int]:
+        """Get client window ids topmost first."""
+        stacking = self._get_property_values(self._root, "_NET_CLIENT_LIST_STACKING")
+        if not stacking:
+            stacking = self._get_property_values(self._root, "_NET_CLIENT_LIST")
+        
+        # EWMH stacking order is bottom-to-top
+        return [int(w) for w in reversed(stacking)]
+    
+    def _xlib_window_info(self, window_id: int, is_active: bool = False, z_order: int = 0) -> Optional[WindowInfo]:
+        """Build WindowInfo from X properties and geometry."""
+        window = self._display.create_resource_object('window', window_id)
+        
+        name = window.get_full_property(self._atoms["_NET_WM_NAME"], self._atoms["UTF8_STRING"])
+        if name is not None:
+            title = name.value.decode('utf-8', 'replace') if isinstance(name.value, bytes) else str(name.value)
+        else:
+            title = window.get_wm_name() or ""
+        
+        process_id, process_name = self._get_process_info(window, window_id)
+        
+        geometry = window.get_geometry()
+        origin = window.translate_coords(self._root, 0, 0)
+        
+        state = self._get_property_values(window, "_NET_WM_STATE")
+        is_minimized = self._atoms["_NET_WM_STATE_HIDDEN"] in state
+        
+        return WindowInfo(
+            window_id=f"0x{window_id:08x}",
+            title=title,
+            process_name=process_name,
+            process_id=process_id,
+            bounds=(-origin.x, -origin.y, geometry.width, geometry.height),
+            is_visible=not is_minimized,
+            is_minimized=is_minimized,
+            is_active=is_active,
+            z_order=z_order
+        )
+    
+    def _get_process_info(self, window, window_id: int) -> Tuple[int, str]:
+        """Get (pid, process name) for a window, cached per window id."""
+        cached = self._process_cache.get(window_id)
+        if cached is not None:
+            return cached
+        
+        values = self._get_property_values(window, "_NET_WM_PID")
+        process_id = int(values[0]) if values else 0
+        process_name = "Unknown"
+        
+        if process_id:
+            try:
+                with open(f"/proc/{process_id}/comm") as f:
+                    process_name = f.read().strip()
+            except OSError:
+                pass
+        
+        if len(self._process_cache) > 1024:
+            self._process_cache.clear()
+        self._process_cache[window_id] = (process_id, process_name)
+        return process_id, process_name
+    
+    def _get_active_window_subprocess(self) -> Optional[WindowInfo]:
         """Get active window using xprop."""
         try:
             result = subprocess.run([
@@ -437,78 +729,73 @@ class LinuxWindowManager(WindowManager):
             logger.error(f"Failed to get active window: {e}")
             return None
     
-    def get_window_list(self) -> List[WindowInfo]:
-        """Get window list using wmctrl."""
+    def _get_window_list_subprocess(self) -> List[WindowInfo]:
+        """
+        Get window list with PIDs and geometry using wmctrl, topmost first.
+        
+        Stacking order and focus come from the root window's
+        _NET_CLIENT_LIST_STACKING and _NET_ACTIVE_WINDOW via one xprop call;
+        if xprop is unavailable, z_order follows wmctrl's (mapping) order.
+        """
         windows = []
         
         try:
             result = subprocess.run([
-                "wmctrl", "-l"
+                "wmctrl", "-l", "-p", "-G"
             ], capture_output=True, text=True, timeout=5)
             
             if result.returncode == 0:
                 for line in result.stdout.strip().split('\n'):
-                    parts = line.split(None, 3)
-                    if len(parts) >= 4:
-                        window_id, desktop, host, title = parts
+                    parts = line.split(None, 8)
+                    if len(parts) >= 8:
+                        window_id, desktop, pid, x, y, w, h, host = parts[:8]
+                        title = parts[8] if len(parts) > 8 else ""
                         windows.append(WindowInfo(
                             window_id=window_id,
                             title=title,
                             process_name="Unknown",
-                            process_id=0,
-                            bounds=(0, 0, 800, 600),  # Would get actual bounds
+                            process_id=int(pid) if pid.isdigit() else 0,
+                            bounds=(int(x), int(y), int(w), int(h)),
                             is_visible=True
                         ))
             
+            if windows:
+                stacking, active_id = self._get_root_stacking_subprocess()
+                position = {window_id: z for z, window_id in enumerate(stacking)}
+                for i, window in enumerate(windows):
+                    window_id = int(window.window_id, 16)
+                    window.z_order = position.get(window_id, len(stacking) + i)
+                    window.is_active = window_id == active_id
+                windows.sort(key=lambda w: w.z_order)
+            
             return windows
             
         except Exception as e:
             logger.error(f"Failed to get window list: {e}")
             return []
     
-    def get_window_at_point(self, x: int, y: int) -> Optional[WindowInfo]:
-        """Get window at point using xwininfo."""
+    def _get_root_stacking_subprocess(self) -> Tuple[List[int], int]:
+        """Get (client window ids topmost first, active window id) using xprop."""
+        stacking, active_id = [], 0
         try:
             result = subprocess.run([
-                "xwininfo", "-int", "-root", "-tree"
-            ], capture_output=True, text=True, timeout=5)
-            
-            # Parse output to find window at coordinates
-            # This is a simplified implementation
-            return None
-            
-        except Exception as e:
-            logger.error(f"Failed to get window at point ({x}, {y}): {e}")
-            return None
-    
-    def focus_window(self, window_id: str) -> bool:
-        """Focus window using wmctrl."""
-        try:
-            result = subprocess.run([
-                "wmctrl", "-i", "-a", window_id
-            ], capture_output=True, timeout=3)
-            
-            return result.returncode == 0
-            
-        except Exception as e:
-            logger.error(f"Failed to focus window {window_id}: {e}")
-            return False
-    
-    def get_window_screenshot(self, window_id: str) -> Optional[bytes]:
-        """Take window screenshot using import command."""
-        try:
-            result = subprocess.run([
-                "import", "-window", window_id, "png:-"
-            ], capture_output=True, timeout=10)
+                "xprop", "-root", "_NET_CLIENT_LIST_STACKING", "_NET_ACTIVE_WINDOW"
+            ], capture_output=True, text=True, timeout=3)
             
             if result.returncode == 0:
-                return result.stdout
-            
-            return None
-            
+                for line in result.stdout.split('\n'):
+                    name, _, value = line.partition(':')
+                    window_ids = [int(w, 16) for w in re.findall(r"0x[0-9a-fA-F]+", value)]
+                    if name.startswith("_NET_CLIENT_LIST_STACKING"):
+                        # EWMH stacking order is bottom-to-top
+                        stacking = window_ids[::-1]
+                    elif name.startswith("_NET_ACTIVE_WINDOW") and window_ids:
+                        active_id = window_ids[0]
+        
         except Exception as e:
-            logger.error(f"Failed to screenshot window {window_id}: {e}")
-            return None
+            logger.debug(f"Failed to read window stacking: {e}")
+        
+        return stacking, active_id
     
     def _get_window_info_by_id(self, window_id: str, is_active: bool = False) -> Optional[WindowInfo]:
         """Get window information by ID using xprop."""
@@ -0,0 +1,375 @@
+"""
+Event-Driven Window State Model.
+
+Keeps an always-current snapshot of the window list, stacking order and
+focus so consumers can read window state without per-query IPC:
+- X11: subscribes to PropertyNotify/ConfigureNotify/DestroyNotify events,
+  including root window resizes from display hotplug
+- Other platforms: a single shared poller diffs the window list, backing off
+  while nothing changes and speeding up again on change or read
+- Change callbacks for focus, window, stacking and screen changes
+"""
+
+import logging
+import os
+import select
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .window_manager import WindowManager, WindowInfo, LinuxWindowManager, XLIB_AVAILABLE
+
+if XLIB_AVAILABLE:
+    from Xlib import X, display as xdisplay, error as xerror
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WindowStateEvent:
+    """A change to the window state snapshot."""
+    event_type: str  # focus_changed, window_added, window_removed, window_changed, stacking_changed, screen_changed
+    window_id: Optional[str]
+    window: Optional[WindowInfo]
+    version: int
+    timestamp: float = 0.0
+    
+    def __post_init__(self):
+        if self.timestamp == 0.0:
+            self.timestamp = time.time()
+
+
+class WindowStateModel:
+    """
+    In-memory window list, stacking order and focus.
+    
+    Reads are served from the snapshot; the snapshot is updated by X11
+    events when available and by a shared poller otherwise. `version`
+    increments on every change so callers can cache derived state.
+    """
+    
+    ROOT_ATOMS = ("_NET_ACTIVE_WINDOW", "_NET_CLIENT_LIST", "_NET_CLIENT_LIST_STACKING")
+    WINDOW_ATOMS = ("_NET_WM_NAME", "WM_NAME", "_NET_WM_STATE")
+    
+    def __init__(self, window_manager: WindowManager, poll_interval: float = 0.5,
+                 use_x11_events: bool = True, max_poll_interval: float = 8.0):
+        self.window_manager = window_manager
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, poll_interval)
+        self.use_x11_events = use_x11_events
+        
+        self._windows: Dict[str, WindowInfo] = {}
+        self._stacking: List[str] = []  # Topmost first
+        self._snapshot: List[WindowInfo] = []
+        self._active_window_id: Optional[str] = None
+        self.version = 0
+        
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[WindowStateEvent], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._poll_wake = threading.Event()
+        self._current_poll_interval = poll_interval
+        self._started = False
+        self.event_source = "none"
+        
+        self.stats = {
+            'refreshes': 0,
+            'events_received': 0,
+            'polls_idle': 0,
+            'changes_emitted': 0,
+            'reads': 0
+        }
+    
+    def start(self) -> None:
+        """Load the initial snapshot and begin tracking changes."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        
+        self.refresh()
+        self._stop_event.clear()
+        
+        if self._can_use_x11_events():
+            self.event_source = "x11"
+            target = self._run_x11_events
+        else:
+            self.event_source = "polling"
+            target = self._run_polling
+        
+        self._thread = threading.Thread(target=target, name="window-state", daemon=True)
+        self._thread.start()
+        logger.info(f"Window state model started ({self.event_source})")
+    
+    def stop(self) -> None:
+        """Stop tracking changes."""
+        self._stop_event.set()
+        self._poll_wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        with self._lock:
+            self._started = False
+    
+    def add_listener(self, listener: Callable[[WindowStateEvent], None]) -> None:
+        """Register a change callback."""
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[WindowStateEvent], None]) -> None:
+        """Unregister a change callback."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def get_active_window(self) -> Optional[WindowInfo]:
+        """Get the focused window from the snapshot."""
+        self._ensure_started()
+        self.stats['reads'] += 1
+        with self._lock:
+            return self._windows.get(self._active_window_id) if self._active_window_id else None
+    
+    def get_window(self, window_id: str) -> Optional[WindowInfo]:
+        """Get a window from the snapshot."""
+        self._ensure_started()
+        with self._lock:
+            return self._windows.get(window_id)
+    
+    def get_window_list(self) -> List[WindowInfo]:
+        """Get windows topmost first; the returned list must not be modified."""
+        self._ensure_started()
+        self.stats['reads'] += 1
+        with self._lock:
+            return self._snapshot
+    
+    def get_stacking_order(self) -> List[str]:
+        """Get window ids topmost first."""
+        self._ensure_started()
+        with self._lock:
+            return list(self._stacking)
+    
+    def refresh(self) -> bool:
+        """
+        Re-read the full window list and emit changes against the snapshot.
+        
+        Returns:
+            True if the snapshot changed
+        """
+        try:
+            windows = self.window_manager.get_window_list()
+            active = next((w for w in windows if w.is_active), None)
+            if active is None:
+                active = self.window_manager.get_active_window()
+        except Exception as e:
+            logger.error(f"Window state refresh failed: {e}")
+            return False
+        
+        self.stats['refreshes'] += 1
+        events = []
+        
+        with self._lock:
+            new_windows = {w.window_id: w for w in windows}
+            if active is not None and active.window_id not in new_windows:
+                new_windows[active.window_id] = active
+            new_stacking = [w.window_id for w in sorted(windows, key=lambda w: w.z_order)]
+            
+            for window_id in self._windows.keys() - new_windows.keys():
+                events.append(('window_removed', window_id, self._windows[window_id]))
+            for window_id, window in new_windows.items():
+                previous = self._windows.get(window_id)
+                if previous is None:
+                    events.append(('window_added', window_id, window))
+                elif self._window_changed(previous, window):
+                    events.append(('window_changed', window_id, window))
+            
+            stacking_changed = new_stacking != self._stacking
+            active_id = active.window_id if active else None
+            focus_changed = active_id != self._active_window_id
+            
+            self._windows = new_windows
+            self._stacking = new_stacking
+            self._active_window_id = active_id
+            
+            if stacking_changed:
+                events.append(('stacking_changed', None, None))
+            if focus_changed:
+                events.append(('focus_changed', active_id, active))
+            
+            emitted = self._commit(events)
+        
+        self._emit(emitted)
+        return bool(emitted)
+    
+    def update_window(self, window_id: str) -> None:
+        """Re-read a single window (title, geometry or state change)."""
+        get_info = getattr(self.window_manager, 'get_window_info', None)
+        if get_info is None:
+            self.refresh()
+            return
+        
+        window = get_info(window_id)
+        with self._lock:
+            previous = self._windows.get(window_id)
+            if window is None or previous is None:
+                emitted = []
+            else:
+                window.z_order = previous.z_order
+                window.is_active = window_id == self._active_window_id
+                self._windows[window_id] = window
+                emitted = self._commit([('window_changed', window_id, window)]) if self._window_changed(previous, window) else []
+        
+        self._emit(emitted)
+    
+    def get_state_stats(self) -> Dict[str, int]:
+        """Get model statistics."""
+        with self._lock:
+            stats = self.stats.copy()
+            stats['windows'] = len(self._windows)
+            stats['version'] = self.version
+        stats['event_source'] = self.event_source
+        stats['poll_interval'] = self._current_poll_interval
+        return stats
+    
+    def _ensure_started(self) -> None:
+        if not self._started:
+            self.start()
+        elif self._current_poll_interval > self.poll_interval:
+            # Someone is reading again after a quiet spell; don't leave them on a backed-off poll
+            self._poll_wake.set()
+    
+    def _commit(self, events) -> List[WindowStateEvent]:
+        """Rebuild the ordered snapshot and stamp events; caller holds the lock."""
+        if not events:
+            return []
+        
+        self.version += 1
+        ordered = [self._windows[w] for w in self._stacking if w in self._windows]
+        for window_id, window in self._windows.items():
+            window.is_active = window_id == self._active_window_id
+        self._snapshot = ordered
+        
+        return [WindowStateEvent(event_type, window_id, window, self.version)
+                for event_type, window_id, window in events]
+    
+    def _emit(self, events: List[WindowStateEvent]) -> None:
+        """Notify listeners outside the lock."""
+        for event in events:
+            self.stats['changes_emitted'] += 1
+            for listener in list(self._listeners):
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.error(f"Window state listener error: {e}")
+    
+    @staticmethod
+    def _window_changed(old: WindowInfo, new: WindowInfo) -> bool:
+        return (old.title != new.title or old.bounds != new.bounds or
+                old.is_visible != new.is_visible or old.is_minimized != new.is_minimized)
+    
+    def _can_use_x11_events(self) -> bool:
+        return (self.use_x11_events and XLIB_AVAILABLE and
+                isinstance(self.window_manager, LinuxWindowManager) and
+                bool(self.window_manager.display_name or os.environ.get("DISPLAY")))
+    
+    def _run_polling(self) -> None:
+        """
+        Shared poller for platforms without a usable event source.
+        
+        Each poll may fork a helper (wmctrl), so the interval doubles up to
+        max_poll_interval while the window list is unchanged and drops back to
+        poll_interval on a change or a read.
+        """
+        self._current_poll_interval = self.poll_interval
+        while not self._stop_event.is_set():
+            woken = self._poll_wake.wait(self._current_poll_interval)
+            self._poll_wake.clear()
+            if self._stop_event.is_set():
+                break
+            self._current_poll_interval = self._next_poll_interval(self.refresh() or woken)
+    
+    def _next_poll_interval(self, active: bool) -> float:
+        if active:
+            return self.poll_interval
+        self.stats['polls_idle'] += 1
+        return min(self._current_poll_interval * 2, self.max_poll_interval)
+    
+    def _run_x11_events(self) -> None:
+        """Track changes from X events on a dedicated connection."""
+        try:
+            conn = xdisplay.Display(self.window_manager.display_name)
+        except Exception as e:
+            logger.warning(f"X11 event connection failed, polling instead: {e}")
+            self.event_source = "polling"
+            self._run_polling()
+            return
+        
+        try:
+            root = conn.screen().root
+            root_atoms = {conn.intern_atom(name) for name in self.ROOT_ATOMS}
+            window_atoms = {conn.intern_atom(name) for name in self.WINDOW_ATOMS}
+            watched = set()
+            
+            # StructureNotify on the root reports screen resizes (RandR hotplug)
+            root.change_attributes(event_mask=X.PropertyChangeMask | X.SubstructureNotifyMask |
+                                   X.StructureNotifyMask)
+            self._watch_clients(conn, watched)
+            
+            while not self._stop_event.is_set():
+                readable, _, _ = select.select([conn], [], [], 0.5)
+                if not readable and not conn.pending_events():
+                    continue
+                
+                refresh_all = False
+                screen_changed = False
+                dirty = set()
+                
+                while conn.pending_events():
+                    event = conn.next_event()
+                    self.stats['events_received'] += 1
+                    
+                    if event.type == X.PropertyNotify:
+                        if event.window.id == root.id and event.atom in root_atoms:
+                            refresh_all = True
+                        elif event.atom in window_atoms:
+                            dirty.add(event.window.id)
+                    elif event.type == X.ConfigureNotify:
+                        if event.window.id == root.id:
+                            screen_changed = True
+                        else:
+                            dirty.add(event.window.id)
+                    elif event.type in (X.DestroyNotify, X.UnmapNotify, X.MapNotify):
+                        refresh_all = True
+                
+                if screen_changed:
+                    self._emit([WindowStateEvent('screen_changed', None, None, self.version)])
+                
+                # Coalesce a burst of events into one refresh
+                if refresh_all:
+                    self.refresh()
+                    self._watch_clients(conn, watched)
+                else:
+                    for window_id in dirty:
+                        self.update_window(f"0x{window_id:08x}")
+        
+        except Exception as e:
+            logger.error(f"X11 event loop stopped: {e}")
+        finally:
+            conn.close()
+    
+    def _watch_clients(self, conn, watched: set) -> None:
+        """Select title/geometry events on newly seen client windows."""
+        with self._lock:
+            window_ids = [int(w, 16) for w in self._windows]
+        
+        for window_id in window_ids:
+            if window_id in watched:
+                continue
+            try:
+                window = conn.create_resource_object('window', window_id)
+                window.change_attributes(event_mask=X.PropertyChangeMask | X.StructureNotifyMask)
+                watched.add(window_id)
+            except xerror.XError:
+                continue
+        
+        watched.intersection_update(window_ids)
+        conn.flush()
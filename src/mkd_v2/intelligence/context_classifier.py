@@ -0,0 +1,215 @@
+"""
+Compiled Context Classification
+
+Fast building blocks for context detection:
+- Pattern tables compiled once into a single alternation regex
+- Rule priority preserved across literal and user-supplied regex rules
+- Bounded TTL cache of detections with eviction on process exit
+"""
+
+import os
+import re
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+
+def process_alive(pid: int) -> bool:
+    """Check whether a process still exists (assumes yes when it cannot tell)."""
+    if pid <= 0:
+        return True
+    
+    if PSUTIL_AVAILABLE:
+        return psutil.pid_exists(pid)
+    
+    if os.name == "posix":
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+    
+    return True
+
+
+class PatternClassifier:
+    """
+    Substring/regex classifier compiled into one regular expression.
+    
+    Rules keep the order they were added in: when several rules match,
+    the earliest one wins, even where matches overlap. Each alternative
+    sits inside a lookahead so no match consumes text another rule needs,
+    and alternatives are listed in rule order so each position reports
+    its highest-priority rule.
+    """
+    
+    def __init__(self, rules: Iterable[Tuple[str, Any]] = ()):
+        self._rules: List[Tuple[str, Any, bool]] = []  # (pattern, label, is_regex)
+        self._regex: Optional[re.Pattern] = None
+        for pattern, label in rules:
+            self.add(pattern, label)
+    
+    def __len__(self) -> int:
+        return len(self._rules)
+    
+    def add(self, pattern: str, label: Any, regex: bool = False) -> None:
+        """Add a rule, or relabel an existing one in place."""
+        pattern = pattern if regex else pattern.lower()
+        for i, (existing, _, is_regex) in enumerate(self._rules):
+            if existing == pattern and is_regex == regex:
+                self._rules[i] = (pattern, label, regex)
+                break
+        else:
+            if regex:
+                re.compile(pattern)  # Reject bad rules when added, not on the next classification
+            self._rules.append((pattern, label, regex))
+        self._regex = None
+    
+    def remove(self, pattern: str) -> bool:
+        """Remove every rule with this pattern."""
+        before = len(self._rules)
+        self._rules = [r for r in self._rules if r[0] not in (pattern, pattern.lower())]
+        self._regex = None
+        return len(self._rules) != before
+    
+    def classify(self, text: str) -> Optional[Any]:
+        """Label of the highest-priority rule found in the text, or None."""
+        if not self._rules or not text:
+            return None
+        
+        if self._regex is None:
+            self._compile()
+        
+        best = None
+        for match in self._regex.finditer(text.lower()):
+            priority = int(match.lastgroup[1:])
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        
+        return self._rules[best][1] if best is not None else None
+    
+    def _compile(self) -> None:
+        alternatives = [
+            f"(?P<r{i}>{pattern if is_regex else re.escape(pattern)})"
+            for i, (pattern, _, is_regex) in enumerate(self._rules)
+        ]
+        self._regex = re.compile(f"(?=(?:{'|'.join(alternatives)}))")
+
+
+class DetectionCache:
+    """
+    Bounded LRU cache of per-process detections with a TTL.
+    
+    Entries remember the pid they belong to so a process exit drops
+    them immediately; entries of processes that exit unnoticed are
+    removed by a periodic liveness sweep.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl: float = 5.0, sweep_interval: float = 30.0,
+                 is_alive: Callable[[int], bool] = process_alive):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._is_alive = is_alive
+        self._entries: 'OrderedDict[Hashable, Tuple[int, float, Any]]' = OrderedDict()
+        self._last_sweep = time.time()
+        
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evictions': 0,
+            'process_exits': 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a detection if it is younger than the TTL."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        
+        if time.time() - entry[1] >= self.ttl:
+            del self._entries[key]
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return entry[2]
+    
+    def put(self, key: Hashable, pid: int, value: Any) -> None:
+        """Cache a detection for a process."""
+        now = time.time()
+        self._entries[key] = (pid, now, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+        
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep(now)
+    
+    def evict_process(self, pid: int) -> int:
+        """Drop all detections of a process; returns how many were dropped."""
+        keys = [key for key, entry in self._entries.items() if entry[0] == pid]
+        for key in keys:
+            del self._entries[key]
+        if keys:
+            self.stats['process_exits'] += 1
+        return len(keys)
+    
+    def sweep(self, now: Optional[float] = None) -> None:
+        """Drop expired entries and entries of processes that have exited."""
+        now = now or time.time()
+        self._last_sweep = now
+        
+        alive: Dict[int, bool] = {}
+        for key, (pid, stored_at, _) in list(self._entries.items()):
+            if now - stored_at >= self.ttl:
+                del self._entries[key]
+                self.stats['expired'] += 1
+                continue
+            
+            if pid not in alive:
+                alive[pid] = self._is_alive(pid)
+                if not alive[pid]:
+                    self.stats['process_exits'] += 1
+            if not alive[pid]:
+                del self._entries[key]
+    
+    def clear(self) -> None:
+        """Drop all detections."""
+        self._entries.clear()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        stats = self.stats.copy()
+        stats['size'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / total if total else 0.0
+        return stats
@@ -14,6 +14,7 @@ from enum import Enum
 from abc import ABC, abstractmethod
 
 from ..platform.base import PlatformInterface, WindowInfo
+from .context_classifier import PatternClassifier, DetectionCache
 
 
 logger = logging.getLogger(__name__)
@@ -88,26 +89,39 @@ class ContextDetector:
     to provide intelligent automation decisions.
     """
     
-    def __init__(self, platform: PlatformInterface):
+    def __init__(self, platform: PlatformInterface, window_state=None):
         self.platform = platform
+        self.window_state = window_state  # Optional automation.window_state.WindowStateModel
+        self._context_version = -1
         self.current_context: Optional[ApplicationContext] = None
         self.context_history: List[ApplicationContext] = []
         self.change_listeners: List[callable] = []
         
-        # Detection patterns
+        # Detection patterns, compiled into one matcher per table
         self.app_patterns: Dict[str, ContextType] = {}
+        self.title_patterns: Dict[str, ContextType] = {}
         self.ui_patterns: Dict[str, UIState] = {}
-        self.detection_cache: Dict[str, ApplicationContext] = {}
+        self.process_classifier = PatternClassifier()
+        self.title_classifier = PatternClassifier()
+        self.ui_classifier = PatternClassifier()
+        self.detection_cache = DetectionCache(max_entries=256, ttl=5.0)
         
         # Performance tracking
         self.detection_stats = {
             'detections': 0,
             'cache_hits': 0,
             'avg_detection_time': 0.0,
+            'classifications': 0,
+            'classification_time': 0.0,
             'confidence_scores': []
         }
         
         self._initialize_patterns()
+        
+        # Push focus changes to context listeners instead of waiting for the next poll
+        if self.window_state is not None:
+            self.window_state.add_listener(self._on_window_state_change)
+        
         logger.info("Context detector initialized")
     
     def _initialize_patterns(self):
@@ -141,10 +155,48 @@ class ContextDetector:
             'dialog': UIState.MODAL_DIALOG,
             'alert': UIState.MODAL_DIALOG,
             'confirm': UIState.MODAL_DIALOG,
+            'context menu': UIState.CONTEXT_MENU,  # Before 'menu', which it contains
             'menu': UIState.MENU_OPEN,
-            'context menu': UIState.CONTEXT_MENU,
             'fullscreen': UIState.FULLSCREEN
         })
+        
+        # Window title hints, used when the process name is not recognised
+        for patterns, context_type in (
+            (['http', 'www', 'chrome', 'firefox'], ContextType.WEB_BROWSER),
+            (['code', 'editor', '.py', '.js', '.html'], ContextType.DEVELOPMENT_IDE),
+            (['terminal', 'command', 'shell', 'bash'], ContextType.TERMINAL)
+        ):
+            self.title_patterns.update(dict.fromkeys(patterns, context_type))
+        
+        # Compile the tables; the matchers are rebuilt lazily when rules are added
+        for table, classifier in ((self.app_patterns, self.process_classifier),
+                                  (self.title_patterns, self.title_classifier),
+                                  (self.ui_patterns, self.ui_classifier)):
+            for pattern, label in table.items():
+                classifier.add(pattern, label)
+    
+    def add_app_rule(self, pattern: str, context_type: ContextType,
+                     match_title: bool = False, regex: bool = False):
+        """
+        Add an application classification rule.
+        
+        Args:
+            pattern: Substring (or regular expression) to look for
+            context_type: Context reported when the rule matches
+            match_title: Match the window title instead of the process name
+            regex: Treat the pattern as a regular expression
+        """
+        table, classifier = ((self.title_patterns, self.title_classifier) if match_title
+                             else (self.app_patterns, self.process_classifier))
+        classifier.add(pattern, context_type, regex=regex)
+        if not regex:
+            table[pattern.lower()] = context_type
+    
+    def add_ui_rule(self, pattern: str, ui_state: UIState, regex: bool = False):
+        """Add a window-title rule for UI state detection."""
+        self.ui_classifier.add(pattern, ui_state, regex=regex)
+        if not regex:
+            self.ui_patterns[pattern.lower()] = ui_state
     
     def detect_current_context(self, force_refresh: bool = False) -> ApplicationContext:
         """
@@ -159,18 +211,23 @@ class ContextDetector:
         start_time = time.time()
         
         try:
+            # With an event-driven window model the context only changes when the model does
+            if self.window_state is not None and not force_refresh and self.current_context \
+                    and self._context_version == self.window_state.version:
+                self.detection_stats['cache_hits'] += 1
+                return self.current_context
+            
             # Get active window information
-            active_window = self.platform.get_active_window_info()
+            active_window = self._get_active_window()
             
             if not active_window:
                 return self._create_unknown_context()
             
-            # Check cache first  
+            # Check cache first (entries expire after the cache TTL)
             cache_key = f"{active_window.process_name}:{active_window.pid}"
-            if not force_refresh and cache_key in self.detection_cache:
-                cached_context = self.detection_cache[cache_key]
-                # Use cache if recent (within 5 seconds)
-                if time.time() - cached_context.detection_time < 5.0:
+            if not force_refresh:
+                cached_context = self.detection_cache.get(cache_key)
+                if cached_context is not None:
                     self.detection_stats['cache_hits'] += 1
                     return cached_context
             
@@ -178,7 +235,7 @@ class ContextDetector:
             context = self._detect_context_from_window(active_window)
             
             # Update cache
-            self.detection_cache[cache_key] = context
+            self.detection_cache.put(cache_key, active_window.pid, context)
             
             # Update statistics
             detection_time = time.time() - start_time
@@ -189,20 +246,63 @@ class ContextDetector:
                 self._handle_context_change(self.current_context, context)
             
             self.current_context = context
+            if self.window_state is not None:
+                self._context_version = self.window_state.version
             return context
             
         except Exception as e:
             logger.error(f"Context detection failed: {e}")
             return self._create_unknown_context()
     
+    def _on_window_state_change(self, event):
+        """Re-detect context when focus moves or the focused window changes."""
+        if event.event_type == 'window_removed' and event.window is not None:
+            # Drop cached detections once the process has no windows left
+            pid = event.window.process_id
+            if not any(w.process_id == pid for w in self.window_state.get_window_list()):
+                self.detection_cache.evict_process(pid)
+            return
+        
+        if event.event_type == 'focus_changed' or (
+                event.event_type == 'window_changed' and event.window is not None and event.window.is_active):
+            self.detect_current_context()
+    
+    def _get_active_window(self) -> Optional[WindowInfo]:
+        """Get the active window from the window model if present, else the platform."""
+        if self.window_state is None:
+            return self.platform.get_active_window_info()
+        
+        window = self.window_state.get_active_window()
+        if window is None:
+            return None
+        
+        x, y, width, height = window.bounds
+        return WindowInfo(
+            title=window.title,
+            class_name="",
+            process_name=window.process_name,
+            pid=window.process_id,
+            x=x,
+            y=y,
+            width=width,
+            height=height,
+            is_active=True,
+            is_visible=window.is_visible
+        )
+    
     def _detect_context_from_window(self, window: WindowInfo) -> ApplicationContext:
         """Detect context from window information."""
+        classify_start = time.perf_counter()
+        
         # Determine context type
         context_type = self._classify_application(window.process_name, window.title)
         
         # Analyze UI state
         ui_state = self._analyze_ui_state(window)
         
+        self.detection_stats['classifications'] += 1
+        self.detection_stats['classification_time'] += time.perf_counter() - classify_start
+        
         # Get window bounds
         bounds = {
             'x': window.x,
@@ -237,34 +337,17 @@ class ContextDetector:
     
     def _classify_application(self, process_name: str, window_title: str) -> ContextType:
         """Classify application based on process name and window title."""
-        process_lower = process_name.lower()
-        title_lower = window_title.lower()
-        
-        # Check exact matches first
-        for pattern, context_type in self.app_patterns.items():
-            if pattern in process_lower:
-                return context_type
-        
-        # Check window title patterns
-        if any(browser in title_lower for browser in ['http', 'www', 'chrome', 'firefox']):
-            return ContextType.WEB_BROWSER
-        
-        if any(code in title_lower for code in ['code', 'editor', '.py', '.js', '.html']):
-            return ContextType.DEVELOPMENT_IDE
-        
-        if any(term in title_lower for term in ['terminal', 'command', 'shell', 'bash']):
-            return ContextType.TERMINAL
-        
-        return ContextType.UNKNOWN
+        # Process name rules take precedence over window title hints
+        return (self.process_classifier.classify(process_name) or
+                self.title_classifier.classify(window_title) or
+                ContextType.UNKNOWN)
     
     def _analyze_ui_state(self, window: WindowInfo) -> UIState:
         """Analyze current UI state from window information."""
-        title_lower = window.title.lower()
-        
         # Check for common UI state indicators
-        for pattern, state in self.ui_patterns.items():
-            if pattern in title_lower:
-                return state
+        state = self.ui_classifier.classify(window.title)
+        if state is not None:
+            return state
         
         # Default states based on context
         if window.width < 400 or window.height < 300:
@@ -425,6 +508,14 @@ class ContextDetector:
             stats['avg_confidence'] = sum(stats['confidence_scores']) / len(stats['confidence_scores'])
         else:
             stats['avg_confidence'] = 0.0
+        
+        if stats['classifications']:
+            stats['avg_classification_time'] = stats['classification_time'] / stats['classifications']
+        else:
+            stats['avg_classification_time'] = 0.0
+        
+        stats['cache'] = self.detection_cache.get_cache_stats()
+        stats['cache_size'] = len(self.detection_cache)
         return stats
     
     def is_context_stable(self, duration: float = 2.0) -> bool:
@@ -455,6 +546,8 @@ class ContextDetector:
     
     def cleanup(self):
         """Clean up detector resources."""
+        if self.window_state is not None:
+            self.window_state.remove_listener(self._on_window_state_change)
         self.detection_cache.clear()
         self.change_listeners.clear()
         logger.info("Context detector cleaned up")
\ No newline at end of file
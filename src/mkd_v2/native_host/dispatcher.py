@@ -0,0 +1,195 @@
+"""
+Concurrent Command Dispatch.
+
+Lets the native host work on several extension commands at once:
+- Commands run on a bounded worker pool
+- Exclusive concurrency classes run one command at a time, in arrival order
+- Shared commands (status queries) run alongside everything else
+- Responses are written by a single writer thread in completion order
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SHARED = "shared"
+
+
+class CommandDispatcher:
+    """
+    Runs command handlers concurrently, honouring concurrency classes.
+    
+    Each exclusive class is a FIFO lane: its commands run one after
+    another on a pool worker, so e.g. START_RECORDING always finishes
+    before a STOP_RECORDING sent after it starts. Commands of the
+    shared class are handed to the pool directly. A lane never holds
+    a worker while waiting, so a slow exclusive command cannot starve
+    status queries.
+    """
+    
+    def __init__(self, classes: Dict[str, str], max_workers: int = 4, max_pending: int = 64):
+        """
+        Initialize the dispatcher.
+        
+        Args:
+            classes: Concurrency class per command; unlisted commands are shared
+            max_workers: Worker threads
+            max_pending: Commands accepted but not finished before submit() blocks
+        """
+        self.classes = classes
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._lanes: Dict[str, Deque[Tuple[Callable, tuple]]] = {}
+        self._draining: Set[str] = set()
+        self._pending = 0
+        
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'max_pending': 0,
+            'backpressure_waits': 0
+        }
+    
+    @property
+    def pending(self) -> int:
+        """Commands accepted but not finished."""
+        return self._pending
+    
+    def submit(self, command: Optional[str], handler: Callable, *args) -> None:
+        """Schedule a handler for a command; blocks while too many are pending."""
+        if not self._slots.acquire(blocking=False):
+            self.stats['backpressure_waits'] += 1
+            self._slots.acquire()
+        
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="native-host-worker")
+            self._pending += 1
+            self.stats['submitted'] += 1
+            self.stats['max_pending'] = max(self.stats['max_pending'], self._pending)
+            
+            concurrency_class = self.classes.get(command, SHARED)
+            if concurrency_class == SHARED:
+                self._executor.submit(self._run, handler, args)
+                return
+            
+            self._lanes.setdefault(concurrency_class, deque()).append((handler, args))
+            if concurrency_class not in self._draining:
+                self._draining.add(concurrency_class)
+                self._executor.submit(self._drain, concurrency_class)
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work; with wait, finish everything already submitted."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    
+    def get_dispatch_stats(self) -> Dict[str, Any]:
+        """Get dispatch statistics."""
+        stats = self.stats.copy()
+        stats['pending'] = self._pending
+        stats['busy_classes'] = sorted(self._draining)
+        return stats
+    
+    def _drain(self, concurrency_class: str) -> None:
+        while True:
+            with self._lock:
+                lane = self._lanes[concurrency_class]
+                if not lane:
+                    self._draining.discard(concurrency_class)
+                    return
+                handler, args = lane.popleft()
+            self._run(handler, args)
+    
+    def _run(self, handler: Callable, args: tuple) -> None:
+        failed = False
+        try:
+            handler(*args)
+        except Exception as e:
+            failed = True
+            logger.error(f"Command handler failed: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.stats['completed'] += 1
+                self.stats['failed'] += failed
+            self._slots.release()
+
+
+class ResponseWriter:
+    """
+    Single thread that owns the output stream.
+    
+    Workers hand over finished responses; they are written whole and in
+    the order they were handed over, so concurrent responses never
+    interleave on the wire.
+    """
+    
+    _CLOSE = object()
+    
+    def __init__(self, write: Callable[[Union[Dict[str, Any], bytes]], None]):
+        self._write = write
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        
+        self.stats = {
+            'sent': 0,
+            'max_queued': 0,
+            'write_time': 0.0
+        }
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> None:
+        """Start the writer thread."""
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name="native-host-writer", daemon=True)
+        self._thread.start()
+    
+    def send(self, message: Union[Dict[str, Any], bytes]) -> None:
+        """Queue a message; written directly when the writer is not running."""
+        if not self.running:
+            self._write_one(message)
+            return
+        self._queue.put(message)
+        self.stats['max_queued'] = max(self.stats['max_queued'], self._queue.qsize())
+    
+    def close(self) -> None:
+        """Write everything queued, then stop the writer thread."""
+        if not self.running:
+            return
+        self._queue.put(self._CLOSE)
+        self._thread.join()
+        self._thread = None
+    
+    def _run(self) -> None:
+        while True:
+            message = self._queue.get()
+            if message is self._CLOSE:
+                return
+            self._write_one(message)
+    
+    def _write_one(self, message: Union[Dict[str, Any], bytes]) -> None:
+        started = time.perf_counter()
+        try:
+            self._write(message)
+        except Exception as e:
+            logger.error(f"Error writing message: {e}")
+        self.stats['sent'] += 1
+        self.stats['write_time'] += time.perf_counter() - started
@@ -2,23 +2,57 @@
 Native Messaging Host Implementation.
 
 Handles communication between Chrome extension and Python backend
-using Chrome's native messaging protocol.
+using Chrome's native messaging protocol. Commands are processed
+concurrently and answered in completion order, correlated by id;
+results too large for one message are sent as chunked streams.
+Heavy components are created on first use so a freshly launched host
+answers PING within milliseconds.
 """
 
 import sys
 import json
 import logging
-import threading
 import struct
-from typing import Dict, Any, Optional, Callable
+import threading
+import time
+from typing import TYPE_CHECKING, BinaryIO, Dict, Any, Optional, Callable, Union
 from pathlib import Path
 
-from ..core.message_broker import MessageBroker
-from ..core.session_manager import SessionManager
-from ..recording.recording_engine import RecordingEngine
+from .dispatcher import CommandDispatcher, ResponseWriter
+from .streaming import StreamManager, STREAM_COMMANDS, MAX_MESSAGE_SIZE, MAX_INBOUND_MESSAGE_SIZE
+
+if TYPE_CHECKING:
+    from ..core.message_broker import MessageBroker
+    from ..core.session_manager import SessionManager
+    from ..recording.recording_engine import RecordingEngine
 
 logger = logging.getLogger(__name__)
 
+# Commands sharing a class run one at a time, in arrival order;
+# commands not listed here (status queries, ping) run concurrently.
+COMMAND_CLASSES = {
+    'START_RECORDING': 'recording',
+    'STOP_RECORDING': 'recording',
+    'PAUSE_RECORDING': 'recording',
+    'RESUME_RECORDING': 'recording',
+    'AUTHENTICATE': 'session'
+}
+
+
+class _LazyComponent:
+    """Host component built by `NativeHost._create_<name>()` on first access."""
+    
+    def __set_name__(self, owner, name):
+        self.name = name
+    
+    def __get__(self, host, owner=None):
+        if host is None:
+            return self
+        return host._component(self.name)
+    
+    def __set__(self, host, value):
+        host._components[self.name] = value
+
 
 class NativeHost:
     """
@@ -28,18 +62,41 @@ class NativeHost:
     communication between the extension and Python backend.
     """
     
-    def __init__(self, storage_path: Optional[Path] = None):
+    # Core components, imported and created on first use
+    message_broker: 'MessageBroker' = _LazyComponent()
+    session_manager: 'SessionManager' = _LazyComponent()
+    recording_engine: 'RecordingEngine' = _LazyComponent()
+    
+    def __init__(self, storage_path: Optional[Path] = None, max_workers: int = 4,
+                 warm_up_delay: Optional[float] = 1.0, input_stream: Optional[BinaryIO] = None,
+                 output_stream: Optional[BinaryIO] = None):
+        """
+        Initialize the host without creating its heavy components.
+        
+        Args:
+            storage_path: Directory for the session database and recordings
+            max_workers: Worker threads for command processing
+            warm_up_delay: Seconds after the first message before components are
+                created in the background; None creates them only on first use
+            input_stream: Binary stream messages are read from (default: stdin)
+            output_stream: Binary stream messages are written to (default: stdout)
+        """
         self.storage_path = storage_path or Path.home() / ".mkd"
         self.running = False
+        self.warm_up_delay = warm_up_delay
+        self.input_stream = input_stream or sys.stdin.buffer
+        self.output_stream = output_stream or sys.stdout.buffer
         
-        # Initialize core components
-        self.message_broker = MessageBroker()
-        self.session_manager = SessionManager(storage_path=self.storage_path)
-        self.recording_engine = RecordingEngine(self.session_manager)
+        self._components: Dict[str, Any] = {}
+        self._components_lock = threading.RLock()
+        self._warm_up_timer: Optional[threading.Timer] = None
+        self.component_init_times: Dict[str, float] = {}
         
         # Message processing
-        self._lock = threading.RLock()
         self.message_handlers = {}
+        self.dispatcher = CommandDispatcher(COMMAND_CLASSES, max_workers=max_workers)
+        self.writer = ResponseWriter(self._write_message)
+        self.streams = StreamManager(self._send_message)
         
         # Setup message handlers
         self._setup_handlers()
@@ -65,8 +122,7 @@ class NativeHost:
         try:
             self.running = True
             
-            # Start message broker
-            self.message_broker.start()
+            self.writer.start()
             
             logger.info("Native messaging host started")
             
@@ -83,11 +139,22 @@ class NativeHost:
         self.running = False
         
         try:
-            # Clean up components
-            if hasattr(self, 'recording_engine'):
+            # Finish commands in progress and flush their responses
+            self.dispatcher.shutdown(wait=True)
+            self.writer.close()
+            
+            # Let a warm-up in progress finish so everything it created is cleaned up
+            timer = self._warm_up_timer
+            if timer is not None:
+                timer.cancel()
+                if timer.is_alive():
+                    timer.join(timeout=10.0)
+            
+            # Clean up components that were created
+            if 'recording_engine' in self._components:
                 self.recording_engine.cleanup()
             
-            if hasattr(self, 'message_broker'):
+            if 'message_broker' in self._components:
                 self.message_broker.stop()
             
             logger.info("Native messaging host stopped")
@@ -107,9 +174,20 @@ class NativeHost:
                     logger.info("Received null message, exiting loop.")
                     break
                 
-                # Process message
-                self._process_message(message)
+                # Stream control is applied right away: senders may be waiting on an ack
+                if message.get('command') in STREAM_COMMANDS:
+                    message = self.streams.handle_control(message['command'], message.get('params') or {})
+                    if message is None:
+                        continue
+                
+                # Process message on a worker; the response is sent when it finishes
+                self.dispatcher.submit(message.get('command'), self._process_message, message)
                 
+                if self._warm_up_timer is None and self.warm_up_delay is not None:
+                    self._warm_up_timer = threading.Timer(self.warm_up_delay, self._warm_up)
+                    self._warm_up_timer.daemon = True
+                    self._warm_up_timer.start()
+            
             except KeyboardInterrupt:
                 logger.info("Received interrupt signal")
                 break
@@ -132,22 +210,19 @@ class NativeHost:
         """
         try:
             # Read message length (4 bytes, little endian)
-            logger.info("Waiting for message length...")
-            raw_length = sys.stdin.buffer.read(4)
-            logger.info(f"Read raw_length: {raw_length}")
+            raw_length = self.input_stream.read(4)
             if not raw_length or len(raw_length) != 4:
                 return None
             
             message_length = struct.unpack('=I', raw_length)[0]
-            logger.info(f"Message length: {message_length}")
             
             # Validate message length
-            if message_length == 0 or message_length > 1024 * 1024:  # Max 1MB
+            if message_length == 0 or message_length > MAX_INBOUND_MESSAGE_SIZE:
                 logger.error(f"Invalid message length: {message_length}")
                 return None
             
             # Read message content
-            raw_message = sys.stdin.buffer.read(message_length)
+            raw_message = self.input_stream.read(message_length)
             if len(raw_message) != message_length:
                 logger.error(f"Incomplete message read: {len(raw_message)}/{message_length}")
                 return None
@@ -166,28 +241,45 @@ class NativeHost:
             logger.error(f"Error reading message: {e}")
             return None
     
-    def _send_message(self, message: Dict[str, Any]):
+    def _send_message(self, message: Union[Dict[str, Any], bytes]):
         """
-        Send message to Chrome extension using native messaging protocol.
+        Send message to Chrome extension through the writer thread.
         
         Args:
-            message: Message dictionary to send
+            message: Message dictionary, or message already encoded as JSON
+        """
+        self.writer.send(message)
+    
+    def _write_message(self, message: Union[Dict[str, Any], bytes]):
+        """
+        Write message to stdout using native messaging protocol.
+        
+        Args:
+            message: Message dictionary, or message already encoded as JSON
         """
         try:
             # Serialize message
-            message_json = json.dumps(message, default=str)
-            message_bytes = message_json.encode('utf-8')
+            if isinstance(message, bytes):
+                message_bytes = message
+            else:
+                message_bytes = json.dumps(message, default=str).encode('utf-8')
+            
+            if len(message_bytes) > MAX_MESSAGE_SIZE:
+                # Chrome disconnects the host on oversized messages
+                logger.error(f"Dropping {len(message_bytes)} byte message over the native messaging limit")
+                return
             
             # Send message length (4 bytes, little endian)
             length_bytes = struct.pack('=I', len(message_bytes))
-            sys.stdout.buffer.write(length_bytes)
+            self.output_stream.write(length_bytes)
             
             # Send message content
-            sys.stdout.buffer.write(message_bytes)
-            sys.stdout.buffer.flush()
-            
-            logger.debug(f"Sent message: {message.get('type', 'response')} (id: {message.get('id')})")
+            self.output_stream.write(message_bytes)
+            self.output_stream.flush()
             
+            if isinstance(message, dict):
+                logger.debug(f"Sent message: {message.get('type', 'response')} (id: {message.get('id')})")
+        
         except Exception as e:
             logger.error(f"Error sending message: {e}")
     
@@ -203,7 +295,7 @@ class NativeHost:
             command = message.get('command')
             params = message.get('params', {})
             
-            logger.info(f"Processing command: {command} (id: {message_id})")
+            logger.debug(f"Processing command: {command} (id: {message_id})")
             
             # Find handler for command
             handler = self.message_handlers.get(command)
@@ -212,8 +304,7 @@ class NativeHost:
                 return
             
             # Execute handler
-            with self._lock:
-                result = handler(params)
+            result = handler(params)
             
             # Send response
             self._send_success_response(message_id, result)
@@ -223,15 +314,14 @@ class NativeHost:
             self._send_error_response(message.get('id'), str(e))
     
     def _send_success_response(self, message_id: str, data: Any):
-        """Send success response to Chrome extension."""
+        """Send success response to Chrome extension, streamed if it is large."""
         response = {
             'id': message_id,
             'type': 'response',
             'success': True,
-            'data': data,
             'timestamp': self._get_timestamp()
         }
-        self._send_message(response)
+        self.streams.send_json(response, data)
     
     def _send_error_response(self, message_id: str, error: str):
         """Send error response to Chrome extension."""
@@ -246,9 +336,50 @@ class NativeHost:
     
     def _get_timestamp(self) -> float:
         """Get current timestamp."""
-        import time
         return time.time()
     
+    # Lazily created components
+    
+    def _component(self, name: str) -> Any:
+        """Get a component, creating it on first use."""
+        component = self._components.get(name)
+        if component is None:
+            with self._components_lock:
+                component = self._components.get(name)
+                if component is None:
+                    started = time.perf_counter()
+                    component = getattr(self, f"_create_{name}")()
+                    self._components[name] = component
+                    self.component_init_times[name] = time.perf_counter() - started
+                    logger.info(f"Created {name} in {self.component_init_times[name] * 1000:.1f}ms")
+        return component
+    
+    def _create_message_broker(self) -> 'MessageBroker':
+        from ..core.message_broker import MessageBroker
+        broker = MessageBroker()
+        if self.running:
+            broker.start()
+        return broker
+    
+    def _create_session_manager(self) -> 'SessionManager':
+        from ..core.session_manager import SessionManager
+        return SessionManager(storage_path=self.storage_path)
+    
+    def _create_recording_engine(self) -> 'RecordingEngine':
+        from ..recording.recording_engine import RecordingEngine
+        return RecordingEngine(self.session_manager)
+    
+    def _warm_up(self):
+        """Create the components in the background once the host is idle after startup."""
+        for name in ('session_manager', 'recording_engine', 'message_broker'):
+            if not self.running:
+                return
+            try:
+                self._component(name)
+            except Exception as e:
+                logger.error(f"Failed to create {name} during warm-up: {e}")
+                return
+    
     # Message Handlers
     
     def _handle_ping(self, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -260,16 +391,26 @@ class NativeHost:
         }
     
     def _handle_get_status(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle get status command."""
+        """Handle get status command (never creates components just to report on them)."""
         try:
-            engine_status = self.recording_engine.get_status()
-            broker_status = self.message_broker.get_status() if hasattr(self.message_broker, 'get_status') else {'running': True}
+            if 'recording_engine' in self._components:
+                engine_status = self.recording_engine.get_status()
+            else:
+                engine_status = {'state': 'idle', 'is_recording': False, 'is_paused': False, 'initialized': False}
+            
+            if 'message_broker' in self._components:
+                broker_status = self.message_broker.get_status() if hasattr(self.message_broker, 'get_status') else {'running': True}
+            else:
+                broker_status = {'running': False, 'initialized': False}
             
             return {
                 'host': {
                     'running': self.running,
                     'storage_path': str(self.storage_path),
-                    'version': '2.0.0'
+                    'version': '2.0.0',
+                    'dispatch': self.dispatcher.get_dispatch_stats(),
+                    'streams': self.streams.get_stream_stats(),
+                    'component_init_times': dict(self.component_init_times)
                 },
                 'engine': engine_status,
                 'broker': broker_status
@@ -292,12 +433,17 @@ class NativeHost:
             return {
                 'isConnected': self.running,
                 'lastError': None,
-                'pendingMessages': 0,  # We don't track pending messages in this implementation
+                'pendingMessages': self.dispatcher.pending,
                 'hostVersion': '2.0.0',
                 'nativeMessaging': {
                     'available': True,
                     'protocol': 'stdio',
-                    'maxMessageSize': 1024 * 1024  # 1MB
+                    'maxMessageSize': MAX_MESSAGE_SIZE,
+                    'streaming': {
+                        'chunkSize': self.streams.chunk_size,
+                        'window': self.streams.window,
+                        'compression': 'zlib' if self.streams.compress else None
+                    }
                 },
                 'capabilities': {
                     'recording': True,
@@ -431,12 +577,19 @@ def main():
     parser = argparse.ArgumentParser(description='MKD Automation Native Messaging Host')
     parser.add_argument('--storage', type=str, help='Storage directory path')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
-    
+    parser.add_argument('--startup-report', action='store_true',
+                        help='Launch a host, time its first PING and print its import costs')
+
     args = parser.parse_args()
     
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    if args.startup_report:
+        from .startup import measure_startup
+        print(measure_startup(storage_path=args.storage).report())
+        return
+
     # Create storage directory
     storage_path = Path(args.storage) if args.storage else Path.home() / '.mkd'
     storage_path.mkdir(parents=True, exist_ok=True)
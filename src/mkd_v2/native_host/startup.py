@@ -0,0 +1,134 @@
+"""
+Native Host Startup Profiling.
+
+Measures how quickly a freshly launched host can answer the extension:
+- Launches the host the way Chrome does, as a child process on stdin/stdout
+- Times the first PING from process start to response
+- Collects per-module import costs with `python -X importtime`
+- Formats a report of the slowest imports
+"""
+
+import json
+import os
+import re
+import struct
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+IMPORT_TIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+@dataclass
+class ImportTiming:
+    """Import cost of one module, in microseconds."""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class StartupProfile:
+    """Result of one measured host launch."""
+    time_to_first_response: float
+    response: Optional[Dict[str, Any]]
+    imports: List[ImportTiming] = field(default_factory=list)
+    
+    def imported(self, module: str) -> bool:
+        """Whether the host imported a module before it was stopped."""
+        return any(timing.module == module for timing in self.imports)
+    
+    def report(self, top: int = 15) -> str:
+        """Human-readable summary with the slowest imports."""
+        total_us = sum(timing.self_us for timing in self.imports)
+        lines = [
+            f"Time to first response: {self.time_to_first_response * 1000:.1f}ms",
+            f"Modules imported: {len(self.imports)} ({total_us / 1000:.1f}ms)",
+            "",
+            f"{'self ms':>9} {'cumul. ms':>10}  module"
+        ]
+        for timing in sorted(self.imports, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+            lines.append(f"{timing.self_us / 1000:>9.1f} {timing.cumulative_us / 1000:>10.1f}  {timing.module}")
+        return "\n".join(lines)
+
+
+def parse_import_times(text: str) -> List[ImportTiming]:
+    """Parse the `-X importtime` lines of a process's stderr."""
+    timings = []
+    for line in text.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            timings.append(ImportTiming(module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return timings
+
+
+def measure_startup(python: Optional[str] = None, storage_path: Optional[Union[str, Path]] = None,
+                    env: Optional[Dict[str, str]] = None, timeout: float = 10.0) -> StartupProfile:
+    """
+    Launch a host, send it PING and time the response.
+    
+    Args:
+        python: Interpreter to run the host with (defaults to the current one)
+        storage_path: Storage directory passed to the host
+        env: Extra environment variables for the host process
+        timeout: Seconds to wait for the response
+    
+    Returns:
+        Startup profile; response is None if the host did not answer in time
+    """
+    src_dir = str(Path(__file__).resolve().parents[2])
+    process_env = dict(os.environ)
+    process_env.update(env or {})
+    process_env['PYTHONPATH'] = os.pathsep.join(filter(None, [src_dir, process_env.get('PYTHONPATH')]))
+    
+    command = [python or sys.executable, '-X', 'importtime', '-m', 'mkd_v2.native_host.host']
+    if storage_path is not None:
+        command += ['--storage', str(storage_path)]
+    
+    body = json.dumps({'id': 'startup-ping', 'command': 'PING', 'params': {}}).encode('utf-8')
+    stderr_chunks: List[bytes] = []
+    response: Dict[str, Any] = {}
+    
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, env=process_env)
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    stderr_reader.start()
+    
+    def read_response():
+        raw_length = process.stdout.read(4)
+        if len(raw_length) == 4:
+            length = struct.unpack('=I', raw_length)[0]
+            response['message'] = json.loads(process.stdout.read(length))
+            response['elapsed'] = time.perf_counter() - started
+    
+    try:
+        process.stdin.write(struct.pack('=I', len(body)) + body)
+        process.stdin.flush()
+        reader = threading.Thread(target=read_response, daemon=True)
+        reader.start()
+        reader.join(timeout)
+    finally:
+        # Closing stdin ends the host's message loop
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        stderr_reader.join(timeout)
+    
+    return StartupProfile(
+        time_to_first_response=response.get('elapsed', time.perf_counter() - started),
+        response=response.get('message'),
+        imports=parse_import_times(b''.join(stderr_chunks).decode('utf-8', 'replace'))
+    )
@@ -0,0 +1,332 @@
+"""
+Chunked Stream Transfer.
+
+Sub-protocol on top of native messaging for payloads too large for one message:
+- Payloads split into numbered chunks of a stream, each base64 encoded
+- Per-chunk zlib compression when it pays off
+- Flow-control window: at most `window` chunks unacknowledged by the receiver
+- JSON results serialised incrementally, never as one string
+- Inbound chunked messages from the extension reassembled and verified
+
+Host to extension::
+    
+    {"type": "stream_start", "id": <request id>, "stream": "s1", "encoding": "json" | "binary", ...}
+    {"type": "stream_chunk", "stream": "s1", "seq": 0, "data": <base64>, "compressed": true}
+    {"type": "stream_end", "id": <request id>, "stream": "s1", "chunks": n, "size": bytes, "sha256": hex}
+
+The extension answers each chunk with a STREAM_ACK command ({"stream", "seq"})
+and may send STREAM_CANCEL ({"stream"}). It sends large messages to the host
+as STREAM_CHUNK commands ({"stream", "seq", "data", "compressed", "last"}); the
+reassembled message is processed like any other.
+"""
+
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_SIZE = 1024 * 1024  # Chrome's limit for host-to-extension messages
+MAX_INBOUND_MESSAGE_SIZE = 64 * 1024 * 1024  # Chrome's limit for extension-to-host messages
+
+STREAM_COMMANDS = ('STREAM_ACK', 'STREAM_CANCEL', 'STREAM_CHUNK')
+
+
+@dataclass
+class BinaryPayload:
+    """Handler result sent to the extension as a binary stream (e.g. a screenshot)."""
+    data: bytes
+    content_type: str = "application/octet-stream"
+
+
+class StreamAborted(Exception):
+    """A stream was cancelled by the receiver or stopped being acknowledged."""
+    pass
+
+
+class OutboundStream:
+    """Flow-control state of one stream being sent."""
+    
+    def __init__(self, stream_id: str, window: int):
+        self.stream_id = stream_id
+        self.window = window
+        self.acked = -1  # Highest acknowledged sequence number
+        self.cancelled = False
+        self._condition = threading.Condition()
+    
+    def wait_for_window(self, seq: int, timeout: float) -> None:
+        """Block until chunk `seq` may be sent."""
+        with self._condition:
+            opened = self._condition.wait_for(
+                lambda: self.cancelled or seq - self.acked <= self.window, timeout)
+            if self.cancelled:
+                raise StreamAborted("cancelled by receiver")
+            if not opened:
+                raise StreamAborted(f"no acknowledgement within {timeout}s")
+    
+    def ack(self, seq: int) -> None:
+        with self._condition:
+            self.acked = max(self.acked, seq)
+            self._condition.notify_all()
+    
+    def cancel(self) -> None:
+        with self._condition:
+            self.cancelled = True
+            self._condition.notify_all()
+
+
+class InboundStream:
+    """Chunks of a message the extension is sending in pieces."""
+    
+    def __init__(self, stream_id: str):
+        self.stream_id = stream_id
+        self.next_seq = 0
+        self.size = 0
+        self.parts: List[bytes] = []
+
+
+class StreamManager:
+    """
+    Sends and receives chunked streams over the native messaging pipe.
+    
+    Sending runs on the worker that produced the result and blocks while
+    the flow-control window is full; acknowledgements are applied by the
+    reader thread, so a full window never waits on a busy worker.
+    """
+    
+    def __init__(self, send: Callable[[Union[Dict[str, Any], bytes]], None], chunk_size: int = 256 * 1024,
+                 window: int = 8, ack_timeout: float = 30.0, compress: bool = True,
+                 compress_min_size: int = 1024, max_inbound_size: int = 256 * 1024 * 1024):
+        """
+        Initialize the stream manager.
+        
+        Args:
+            send: Queues one protocol message (a dict, or bytes already encoded as JSON)
+            chunk_size: Raw bytes per chunk (base64 grows it by a third)
+            window: Chunks that may be unacknowledged at once
+            ack_timeout: Seconds to wait for a window to open before aborting
+            compress: Compress chunks with zlib when that makes them smaller
+            compress_min_size: Chunks smaller than this are never compressed
+            max_inbound_size: Largest message accepted as an inbound stream
+        """
+        self._send = send
+        self.chunk_size = chunk_size
+        self.window = window
+        self.ack_timeout = ack_timeout
+        self.compress = compress
+        self.compress_min_size = compress_min_size
+        self.max_inbound_size = max_inbound_size
+        
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._outbound: Dict[str, OutboundStream] = {}
+        self._inbound: Dict[str, InboundStream] = {}
+        
+        self.stats = {
+            'streams_sent': 0,
+            'streams_aborted': 0,
+            'streams_received': 0,
+            'chunks_sent': 0,
+            'chunks_received': 0,
+            'compressed_chunks': 0,
+            'raw_bytes': 0,
+            'wire_bytes': 0,
+            'window_waits': 0
+        }
+    
+    def send_json(self, envelope: Dict[str, Any], data: Any, inline_limit: int = MAX_MESSAGE_SIZE // 2) -> bool:
+        """
+        Send a result, streaming it when it is too large for one message.
+        
+        The result is serialised incrementally: small results go out as one
+        pre-encoded message (the envelope plus "data"), larger ones switch
+        to a stream as soon as they pass `inline_limit` bytes.
+        
+        Args:
+            envelope: Response fields other than "data" (id, type, success, ...)
+            data: Result to send
+        
+        Returns:
+            False if a stream was aborted
+        """
+        message_id = envelope.get('id')
+        if isinstance(data, BinaryPayload):
+            return self.send_stream(message_id, [data.data], encoding='binary', content_type=data.content_type)
+        
+        pieces = json.JSONEncoder(default=str).iterencode(data)
+        head: List[bytes] = []
+        size = 0
+        for piece in pieces:
+            encoded = piece.encode('utf-8')
+            head.append(encoded)
+            size += len(encoded)
+            if size > inline_limit:
+                return self.send_stream(message_id, itertools.chain(head, (p.encode('utf-8') for p in pieces)),
+                                        encoding='json', content_type='application/json')
+        
+        prefix = json.dumps(envelope, default=str).encode('utf-8')[:-1]
+        self._send(prefix + b', "data": ' + b''.join(head) + b'}')
+        return True
+    
+    def send_stream(self, message_id: Any, parts: Iterable[bytes], encoding: str = 'binary',
+                    content_type: str = "application/octet-stream") -> bool:
+        """
+        Send bytes as a stream of chunks, respecting the flow-control window.
+        
+        Returns:
+            False if the receiver cancelled or stopped acknowledging
+        """
+        stream_id = f"s{next(self._ids)}"
+        stream = OutboundStream(stream_id, self.window)
+        with self._lock:
+            self._outbound[stream_id] = stream
+        
+        self._send({
+            'id': message_id,
+            'type': 'stream_start',
+            'stream': stream_id,
+            'encoding': encoding,
+            'content_type': content_type,
+            'chunk_size': self.chunk_size,
+            'window': self.window
+        })
+        
+        digest = hashlib.sha256()
+        size = 0
+        seq = -1
+        try:
+            for seq, raw in enumerate(self._rechunk(parts)):
+                if seq - stream.acked > self.window:
+                    self.stats['window_waits'] += 1
+                stream.wait_for_window(seq, self.ack_timeout)
+                
+                digest.update(raw)
+                size += len(raw)
+                self._send(self._encode_chunk(stream_id, seq, raw))
+            
+            self._send({
+                'id': message_id,
+                'type': 'stream_end',
+                'stream': stream_id,
+                'chunks': seq + 1,
+                'size': size,
+                'sha256': digest.hexdigest()
+            })
+            self.stats['streams_sent'] += 1
+            return True
+        
+        except StreamAborted as e:
+            logger.warning(f"Stream {stream_id} aborted after {seq} chunks: {e}")
+            self.stats['streams_aborted'] += 1
+            self._send({'id': message_id, 'type': 'stream_abort', 'stream': stream_id, 'error': str(e)})
+            return False
+        
+        finally:
+            with self._lock:
+                self._outbound.pop(stream_id, None)
+    
+    def handle_control(self, command: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply a stream control command from the extension.
+        
+        Returns:
+            The reassembled message when an inbound stream completes, else None
+        """
+        stream_id = params.get('stream')
+        
+        if command == 'STREAM_ACK':
+            stream = self._outbound.get(stream_id)
+            if stream is not None:
+                stream.ack(int(params.get('seq', -1)))
+            return None
+        
+        if command == 'STREAM_CANCEL':
+            stream = self._outbound.get(stream_id)
+            if stream is not None:
+                stream.cancel()
+            self._inbound.pop(stream_id, None)
+            return None
+        
+        if command == 'STREAM_CHUNK':
+            return self._receive_chunk(stream_id, params)
+        
+        return None
+    
+    def get_stream_stats(self) -> Dict[str, Any]:
+        """Get stream transfer statistics."""
+        stats = self.stats.copy()
+        stats['active_outbound'] = len(self._outbound)
+        stats['active_inbound'] = len(self._inbound)
+        stats['compression_ratio'] = stats['wire_bytes'] / stats['raw_bytes'] if stats['raw_bytes'] else 1.0
+        return stats
+    
+    def _receive_chunk(self, stream_id: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        stream = self._inbound.setdefault(stream_id, InboundStream(stream_id))
+        seq = params.get('seq')
+        
+        try:
+            if seq != stream.next_seq:
+                raise ValueError(f"expected chunk {stream.next_seq}, got {seq}")
+            
+            raw = base64.b64decode(params.get('data', ''))
+            if params.get('compressed'):
+                raw = zlib.decompress(raw)
+            stream.size += len(raw)
+            if stream.size > self.max_inbound_size:
+                raise ValueError(f"stream exceeds {self.max_inbound_size} bytes")
+        except (ValueError, zlib.error) as e:
+            logger.error(f"Dropping inbound stream {stream_id}: {e}")
+            self._inbound.pop(stream_id, None)
+            self._send({'type': 'stream_abort', 'stream': stream_id, 'error': str(e)})
+            return None
+        
+        stream.parts.append(raw)
+        stream.next_seq += 1
+        self.stats['chunks_received'] += 1
+        self._send({'type': 'stream_ack', 'stream': stream_id, 'seq': seq})
+        
+        if not params.get('last'):
+            return None
+        
+        del self._inbound[stream_id]
+        self.stats['streams_received'] += 1
+        try:
+            return json.loads(b''.join(stream.parts))
+        except ValueError as e:
+            logger.error(f"Invalid JSON in inbound stream {stream_id}: {e}")
+            return None
+    
+    def _rechunk(self, parts: Iterable[bytes]) -> Iterator[bytes]:
+        buffer = bytearray()
+        for part in parts:
+            buffer += part
+            while len(buffer) >= self.chunk_size:
+                yield bytes(buffer[:self.chunk_size])
+                del buffer[:self.chunk_size]
+        if buffer:
+            yield bytes(buffer)
+    
+    def _encode_chunk(self, stream_id: str, seq: int, raw: bytes) -> Dict[str, Any]:
+        payload, compressed = raw, False
+        if self.compress and len(raw) >= self.compress_min_size:
+            packed = zlib.compress(raw, 6)
+            if len(packed) < len(raw):
+                payload, compressed = packed, True
+                self.stats['compressed_chunks'] += 1
+        
+        self.stats['chunks_sent'] += 1
+        self.stats['raw_bytes'] += len(raw)
+        self.stats['wire_bytes'] += len(payload)
+        return {
+            'type': 'stream_chunk',
+            'stream': stream_id,
+            'seq': seq,
+            'data': base64.b64encode(payload).decode('ascii'),
+            'compressed': compressed
+        }
@@ -5,7 +5,7 @@ Defines the contract that all platform implementations must follow.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Tuple, Callable
+from typing import Dict, List, Any, Optional, Tuple, Callable, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -206,6 +206,29 @@ class PlatformInterface(ABC):
         """
         pass
     
+    def execute_batch(self, actions: List[Union[MouseAction, KeyboardAction]]) -> List[bool]:
+        """
+        Execute a contiguous run of primitive input actions in order.
+        
+        The default implementation dispatches each action individually.
+        Platforms that can submit many input events in a single call
+        (one XTest flush, one xdotool process, one SendInput array)
+        should override this to amortise per-action overhead.
+        
+        Args:
+            actions: Ordered list of MouseAction/KeyboardAction objects
+            
+        Returns:
+            List of per-action success flags, in input order
+        """
+        results = []
+        for action in actions:
+            if isinstance(action, MouseAction):
+                results.append(self.execute_mouse_action(action))
+            else:
+                results.append(self.execute_keyboard_action(action))
+        return results
+    
     # Window and UI Methods
     
     @abstractmethod
@@ -3,12 +3,26 @@ Linux Platform Implementation for MKD v2.
 """
 
 import logging
-from typing import Dict, List, Any, Optional, Tuple, Callable
+import shutil
+import subprocess
+from typing import Dict, List, Any, Optional, Tuple, Callable, Union
 
-from ..base import PlatformInterface, MouseAction, KeyboardAction, WindowInfo, UIElement, OverlayConfig
+from ..base import (
+    PlatformInterface, MouseAction, KeyboardAction, MouseButton, KeyModifier,
+    WindowInfo, UIElement, OverlayConfig
+)
 
 logger = logging.getLogger(__name__)
 
+# xdotool keysym names for modifiers; Cmd and Win both land on Super
+XDOTOOL_MODIFIERS = {
+    KeyModifier.CTRL: "ctrl",
+    KeyModifier.ALT: "alt",
+    KeyModifier.SHIFT: "shift",
+    KeyModifier.CMD: "super",
+    KeyModifier.WIN: "super",
+}
+
 
 class LinuxPlatform(PlatformInterface):
     """Linux implementation of PlatformInterface for MKD v2."""
@@ -18,6 +32,7 @@ class LinuxPlatform(PlatformInterface):
         self.name = "Linux"
         self.version = "2.0.0"
         self.overlays = {}
+        self._xdotool_path = shutil.which("xdotool")
     
     def initialize(self) -> Dict[str, Any]:
         """Initialize Linux platform."""
@@ -100,6 +115,114 @@ class LinuxPlatform(PlatformInterface):
         logger.info(f"Linux executing keyboard action: {action.action}")
         return True
     
+    def execute_batch(self, actions: List[Union[MouseAction, KeyboardAction]]) -> List[bool]:
+        """
+        Execute a run of input actions with as few xdotool processes as possible.
+        
+        Key and mouse commands are piped to one xdotool script. xdotool splits
+        script lines on whitespace and expands $ in them, so each text run is
+        typed with its own argv call instead. Execution stops at the first
+        failed call; it and every later action are reported as failed.
+        """
+        if not actions:
+            return []
+        
+        if not self._xdotool_path:
+            return super().execute_batch(actions)
+        
+        results: List[bool] = []
+        script_lines: List[str] = []
+        script_actions = 0
+        
+        def flush_script() -> bool:
+            nonlocal script_actions
+            if not script_actions:
+                return True
+            succeeded = self._run_xdotool([self._xdotool_path, "-"], "\n".join(script_lines) + "\n")
+            results.extend([succeeded] * script_actions)
+            script_lines.clear()
+            script_actions = 0
+            return succeeded
+        
+        try:
+            for action in actions:
+                if isinstance(action, KeyboardAction) and action.action == "type":
+                    if not flush_script():
+                        break
+                    succeeded = self._run_xdotool([self._xdotool_path, "type", "--", action.text or ""])
+                    results.append(succeeded)
+                    if not succeeded:
+                        break
+                    continue
+                
+                script_lines.extend(self._xdotool_commands(action))
+                script_actions += 1
+            else:
+                flush_script()
+        
+        except Exception as e:
+            logger.error(f"Failed to execute input batch: {e}")
+        
+        return results + [False] * (len(actions) - len(results))
+    
+    def _run_xdotool(self, argv: List[str], script: Optional[str] = None) -> bool:
+        """Run one xdotool process, optionally feeding it a script on stdin."""
+        result = subprocess.run(argv, input=script, capture_output=True, text=True, timeout=10)
+        if result.returncode != 0:
+            logger.error(f"xdotool batch failed: {result.stderr.strip()}")
+            return False
+        return True
+    
+    def _xdotool_commands(self, action: Union[MouseAction, KeyboardAction]) -> List[str]:
+        """Translate a key or mouse action into xdotool script lines; text is typed separately."""
+        modifiers = list(dict.fromkeys(XDOTOOL_MODIFIERS[m] for m in (action.modifiers or [])))
+        
+        if isinstance(action, MouseAction):
+            commands = self._xdotool_mouse_commands(action)
+            if not modifiers:
+                return commands
+            # Hold the modifiers for the whole pointer gesture (e.g. ctrl+click, shift+drag)
+            held = "+".join(modifiers)
+            return [f"keydown {held}"] + commands + [f"keyup {held}"]
+        
+        if not action.key:
+            raise ValueError(f"Keyboard action '{action.action}' needs a key")
+        
+        key = "+".join(modifiers + [action.key])
+        if action.action == "press":
+            return [f"keydown {key}"]
+        if action.action == "release":
+            return [f"keyup {key}"]
+        if action.action == "key_combination":
+            return [f"key {key}"]
+        raise ValueError(f"Unsupported keyboard action: {action.action}")
+    
+    def _xdotool_mouse_commands(self, action: MouseAction) -> List[str]:
+        """Translate a mouse action into xdotool script lines, without modifiers."""
+        button = {
+            MouseButton.LEFT: 1, MouseButton.MIDDLE: 2, MouseButton.RIGHT: 3
+        }.get(action.button, 1)
+        move = f"mousemove {int(action.x)} {int(action.y)}"
+        
+        if action.action == "move":
+            return [move]
+        if action.action == "click":
+            return [move, f"click {button}"]
+        if action.action == "double_click":
+            return [move, f"click --repeat 2 {button}"]
+        if action.action == "drag":
+            return [move, f"mousedown {button}",
+                    f"mousemove {int(action.x + action.dx)} {int(action.y + action.dy)}",
+                    f"mouseup {button}"]
+        if action.action == "scroll":
+            commands = [move]
+            if action.dy:
+                commands.append(f"click --repeat {abs(int(action.dy))} {4 if action.dy > 0 else 5}")
+            if action.dx:
+                commands.append(f"click --repeat {abs(int(action.dx))} {7 if action.dx > 0 else 6}")
+            return commands
+        raise ValueError(f"Unsupported mouse action: {action.action}")
+    
     def get_active_window_info(self) -> Optional[WindowInfo]:
         """Get active window info on Linux."""
         return WindowInfo(
@@ -18,6 +18,9 @@ import uuid
 from ..core.session_manager import SessionManager, RecordingSession, SessionState
 from ..platform.detector import PlatformDetector
 from ..ui.overlay import ScreenOverlay, BorderConfig, TimerConfig
+from ..automation.screen_capture import ScreenFrame, create_screen_capture
+from ..automation.template_locator import TemplateStore
+from ..automation.display_topology import get_display_topology
 from .input_capturer import InputCapturer
 from .event_processor import EventProcessor
 
@@ -75,6 +78,11 @@ class RecordingEngine:
         self.recorded_events: List[RecordingEvent] = []
         self.event_count = 0
         
+        # Reference crops around clicks, for template matching at playback
+        self.screen_capture = None
+        self.template_size = 48  # pixels per side
+        self._template_crops: Dict[str, ScreenFrame] = {}
+        
         # Threading and synchronization
         self._lock = threading.RLock()
         self._event_loop = None
@@ -85,6 +93,7 @@ class RecordingEngine:
             'events_captured': 0,
             'events_filtered': 0,
             'events_processed': 0,
+            'templates_captured': 0,
             'recording_start_time': None,
             'recording_duration': 0,
             'average_event_rate': 0
@@ -434,6 +443,10 @@ class RecordingEngine:
                     context=processed_event.get('context')
                 )
                 
+                # Capture what was clicked while it is still on screen
+                if recording_event.event_type == 'mouse_click':
+                    self._capture_template(recording_event)
+                
                 # Store event
                 with self._lock:
                     self.recorded_events.append(recording_event)
@@ -446,6 +459,26 @@ class RecordingEngine:
         except Exception as e:
             logger.error(f"Error handling input event: {e}")
     
+    def _capture_template(self, event: RecordingEvent):
+        """Keep a reference crop centred on a click."""
+        if not self.current_session or not self.current_session.config.screenshot_on_events:
+            return
+        
+        try:
+            if self.screen_capture is None:
+                self.screen_capture = create_screen_capture(screenshot_func=self.platform.take_screenshot)
+            
+            size = self.template_size
+            x, y = event.data.get('x', 0), event.data.get('y', 0)
+            frame = self.screen_capture.capture((x - size // 2, y - size // 2, size, size))
+            if frame is not None:
+                # Detach from the capture buffer, which the next grab reuses
+                self._template_crops[event.id] = frame.copy()
+                self.stats['templates_captured'] += 1
+        
+        except Exception as e:
+            logger.debug(f"Template capture failed: {e}")
+    
     def _save_recording_data(self, session: RecordingSession) -> str:
         """
         Save recording data to file.
@@ -469,6 +502,17 @@ class RecordingEngine:
             filename = f"recording_{timestamp}_{session.id[:8]}.mkd"
             file_path = output_dir / filename
             
+            # Reference crops live next to the recording
+            templates = {}
+            if self._template_crops:
+                store = TemplateStore.for_recording(file_path)
+                for event in self.recorded_events:
+                    crop = self._template_crops.get(event.id)
+                    if crop is not None:
+                        event.screenshot_path = store.save(event.id, crop)
+                        if event.screenshot_path:
+                            templates[event.id] = {'path': event.screenshot_path, 'bounds': list(crop.bounds)}
+            
             # Prepare recording data
             recording_data = {
                 'version': '2.0.0',
@@ -486,7 +530,8 @@ class RecordingEngine:
                         'event_type': event.event_type,
                         'source': event.source,
                         'data': event.data,
-                        'context': event.context
+                        'context': event.context,
+                        'template': templates.get(event.id)
                     }
                     for event in self.recorded_events
                 ],
@@ -494,7 +539,8 @@ class RecordingEngine:
                 'platform': {
                     'name': self.platform.name,
                     'capabilities': self.platform.get_capabilities()
-                }
+                },
+                'displays': get_display_topology(self.platform).to_layout()
             }
             
             # Save to file
@@ -514,6 +560,7 @@ class RecordingEngine:
         self.current_session = None
         self.current_user_id = None
         self.recorded_events.clear()
+        self._template_crops.clear()
         self.event_count = 0
         
         # Clean up resources
@@ -564,6 +611,8 @@ class RecordingEngine:
         self.event_processor.cleanup()
         self.overlay.cleanup()
         self.platform.cleanup()
+        if self.screen_capture is not None:
+            self.screen_capture.close()
         
         # Clean up async resources
         if self._event_loop:
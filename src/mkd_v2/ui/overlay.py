@@ -15,6 +15,7 @@ from enum import Enum
 from abc import ABC, abstractmethod
 
 from ..platform.base import PlatformInterface, OverlayConfig
+from ..automation.display_topology import get_display_topology
 
 logger = logging.getLogger(__name__)
 
@@ -154,8 +155,8 @@ class ScreenOverlay:
                 if timer_config:
                     self.timer_config = timer_config
                 
-                # Get monitor information
-                monitors = self.platform.get_monitor_info()
+                # Get monitor information from the shared layout
+                monitors = get_display_topology(self.platform).get_monitor_info()
                 if not monitors:
                     logger.error("No monitors detected")
                     self.state = OverlayState.ERROR
@@ -291,7 +292,8 @@ class ScreenOverlay:
                     color=self.border_config.color,
                     width=self.border_config.width,
                     opacity=self.border_config.opacity,
-                    style=self.border_config.style
+                    style=self.border_config.style,
+                    monitors=[monitor['index']]
                 )
                 
                 # Create platform-specific overlay
@@ -4,25 +4,40 @@ MKD Web Enhancement Module
 Provides advanced web automation capabilities:
 - Deep DOM inspection and manipulation
 - Browser automation and management
+- DevTools-protocol browser backend
 - Multi-tab coordination and management
 - JavaScript injection and custom scripting
 - Unified web automation engine
+- Streaming extraction to JSONL/CSV/Parquet sinks
+- Batch workflow job runner with browser session pooling
 """
 
 from .dom_inspector import DOMInspector, ElementInfo, DOMQuery, DetectionStrategy
+from .dom_query_compiler import DOMQueryCompiler, CompiledQuery
+from .element_cache import ElementCache, DOM_OBSERVER_SCRIPT
 from .browser_controller import BrowserController, BrowserSession, TabManager, BrowserType
+from .cdp_client import CDPBrowser, CDPConnection, CDPError
 from .javascript_injector import JavaScriptInjector, ScriptResult, ScriptContext, ScriptType
+from .extraction_stream import StreamingExtractor, ExtractionSpec, create_sink
 from .web_automation_engine import WebAutomationEngine, WebAction, WebWorkflow, InteractionMode
+from .job_runner import WorkflowJobRunner, BrowserSessionPool, WorkflowJob
 
 __all__ = [
     'DOMInspector',
     'ElementInfo',
     'DOMQuery',
     'DetectionStrategy',
+    'DOMQueryCompiler',
+    'CompiledQuery',
+    'ElementCache',
+    'DOM_OBSERVER_SCRIPT',
     'BrowserController', 
     'BrowserSession',
     'TabManager',
     'BrowserType',
+    'CDPBrowser',
+    'CDPConnection',
+    'CDPError',
     'JavaScriptInjector',
     'ScriptResult',
     'ScriptContext',
@@ -30,5 +45,11 @@ __all__ = [
     'WebAutomationEngine',
     'WebAction',
     'WebWorkflow',
-    'InteractionMode'
+    'InteractionMode',
+    'StreamingExtractor',
+    'ExtractionSpec',
+    'create_sink',
+    'WorkflowJobRunner',
+    'BrowserSessionPool',
+    'WorkflowJob'
 ]
\ No newline at end of file
@@ -7,19 +7,26 @@ Provides comprehensive browser automation and multi-tab coordination:
 - Cross-browser compatibility (Chrome, Firefox, Safari, Edge)
 - Window and tab state management
 - Browser process monitoring and control
+- DevTools-protocol backend with pushed tab, load and console events
 """
 
 from dataclasses import dataclass, field
 from typing import Dict, List, Any, Optional, Callable, Set, Tuple
 from enum import Enum
 import time
+import itertools
 import threading
 import subprocess
+import tempfile
+import shutil
 import json
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
+from pathlib import Path
 from urllib.parse import urlparse
 
+from .cdp_client import CDPBrowser, CDPError
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,6 +63,8 @@ class BrowserCommand(Enum):
     INJECT_CSS = "inject_css"
     GET_COOKIES = "get_cookies"
     SET_COOKIES = "set_cookies"
+    CLEAR_COOKIES = "clear_cookies"
+    CLEAR_STORAGE = "clear_storage"
 
 
 @dataclass
@@ -75,6 +84,7 @@ class TabInfo:
     resources_loaded: bool = False
     javascript_enabled: bool = True
     cookies: List[Dict[str, Any]] = field(default_factory=list)
+    visited_origins: Set[str] = field(default_factory=set)
 
 
 @dataclass
@@ -141,6 +151,7 @@ class TabManager:
         self.sync_lock = threading.Lock()
         self.monitoring_active = False
         self.activity_callbacks: List[Callable] = []
+        self.command_executor: Optional[Callable[[BrowserCommand, str, Dict[str, Any]], CommandResult]] = None
     
     def register_tab(self, tab_info: TabInfo) -> None:
         """Register a new tab for management"""
@@ -239,9 +250,12 @@ class TabManager:
     
     def _execute_tab_command(self, tab_id: str, command: BrowserCommand, params: Dict[str, Any]) -> CommandResult:
         """Execute command on specific tab"""
+        if self.command_executor is not None:
+            return self.command_executor(command, tab_id, params)
+        
         start_time = time.time()
         
-        # Mock implementation - would integrate with actual browser controller
+        # Mock implementation - used when no browser controller is attached
         try:
             if command == BrowserCommand.NAVIGATE:
                 url = params.get('url', '')
@@ -287,13 +301,22 @@ class BrowserController:
         self.active_session_id: Optional[str] = None
         self.browser_processes: Dict[str, subprocess.Popen] = {}
         self.command_queue = defaultdict(list)
-        self.monitoring_thread: Optional[threading.Thread] = None
+        self.process_watchers: Dict[str, threading.Thread] = {}
+        self._id_counter = itertools.count(1)
+        
+        # DevTools backends: one connection per browser session
+        self.cdp_browsers: Dict[str, CDPBrowser] = {}
+        self.tab_sessions: Dict[str, str] = {}  # tab id -> session id, for DevTools-backed tabs
+        self.console_messages: Dict[str, deque] = defaultdict(lambda: deque(maxlen=200))
+        self.temp_profiles: Dict[str, str] = {}  # session id -> throwaway user data dir
+        self.tab_manager.command_executor = self.execute_command
         
         # Browser-specific configurations
         self.browser_configs = {
             BrowserType.CHROME: {
                 "executable": "google-chrome",
-                "args": ["--remote-debugging-port=9222", "--no-first-run", "--no-default-browser-check"],
+                # Port 0: each browser picks a free port and reports it in DevToolsActivePort
+                "args": ["--remote-debugging-port=0", "--no-first-run", "--no-default-browser-check"],
                 "profile_dir": "~/.config/google-chrome",
                 "extension_support": True
             },
@@ -314,10 +337,16 @@ class BrowserController:
     def create_session(self, browser_type: BrowserType, 
                       profile: str = None,
                       headless: bool = False,
-                      extensions: List[str] = None) -> str:
-        """Create a new browser session"""
+                      extensions: List[str] = None,
+                      cdp_endpoint: str = None) -> str:
+        """
+        Create a new browser session
         
-        session_id = f"{browser_type.value}_{int(time.time())}"
+        With cdp_endpoint (ws:// URL or http://host:port) an already running
+        browser is attached instead of launching one.
+        """
+        
+        session_id = f"{browser_type.value}_{int(time.time())}_{next(self._id_counter)}"
         
         # Prepare browser launch configuration
         config = self.browser_configs.get(browser_type, {})
@@ -329,11 +358,17 @@ class BrowserController:
             elif browser_type == BrowserType.FIREFOX:
                 launch_args.append("--headless")
         
-        if profile:
-            if browser_type == BrowserType.CHROME:
-                launch_args.append(f"--user-data-dir={profile}")
-            elif browser_type == BrowserType.FIREFOX:
-                launch_args.append(f"--profile={profile}")
+        user_data_dir = None
+        if browser_type == BrowserType.CHROME and not cdp_endpoint:
+            # A profile of its own keeps the browser from handing off to one already
+            # running, and is where it reports its DevTools port
+            user_data_dir = profile or tempfile.mkdtemp(prefix="mkd-chrome-")
+            if not profile:
+                self.temp_profiles[session_id] = user_data_dir
+            Path(user_data_dir, "DevToolsActivePort").unlink(missing_ok=True)
+            launch_args.append(f"--user-data-dir={user_data_dir}")
+        elif profile and browser_type == BrowserType.FIREFOX:
+            launch_args.append(f"--profile={profile}")
         
         # Load extensions if specified
         if extensions and config.get("extension_support"):
@@ -343,7 +378,10 @@ class BrowserController:
         
         try:
             # Launch browser process
-            process = self._launch_browser(browser_type, launch_args)
+            process = None if cdp_endpoint else self._launch_browser(browser_type, launch_args)
+            if process is None and session_id in self.temp_profiles:
+                # Nothing was started, so the throwaway profile stays unused
+                shutil.rmtree(self.temp_profiles.pop(session_id), ignore_errors=True)
             
             session = BrowserSession(
                 session_id=session_id,
@@ -364,9 +402,13 @@ class BrowserController:
             
             logger.info(f"Created browser session {session_id} for {browser_type.value}")
             
-            # Start monitoring if not already running
-            if not self.monitoring_thread or not self.monitoring_thread.is_alive():
-                self._start_monitoring()
+            if process is not None:
+                self._watch_process(session_id, process)
+                if user_data_dir:
+                    cdp_endpoint = self._wait_for_devtools_endpoint(user_data_dir, process)
+            
+            if cdp_endpoint:
+                self.connect_cdp(session_id, cdp_endpoint)
             
             return session_id
             
@@ -374,6 +416,25 @@ class BrowserController:
             logger.error(f"Failed to create browser session: {e}")
             raise
     
+    def _wait_for_devtools_endpoint(self, user_data_dir: str, process: subprocess.Popen,
+                                    timeout: float = 10.0) -> str:
+        """DevTools websocket URL a browser launched with --remote-debugging-port=0 reports"""
+        active_port = Path(user_data_dir, "DevToolsActivePort")
+        deadline = time.time() + timeout
+        
+        while time.time() < deadline:
+            try:
+                lines = active_port.read_text().splitlines()
+            except OSError:
+                lines = []
+            if len(lines) >= 2 and lines[0].strip().isdigit():
+                return f"ws://127.0.0.1:{lines[0].strip()}{lines[1].strip()}"
+            if process.poll() is not None:
+                raise RuntimeError(f"Browser exited with code {process.returncode} before reporting its DevTools port")
+            time.sleep(0.05)
+        
+        raise TimeoutError(f"Browser did not report a DevTools port within {timeout}s")
+    
     def _launch_browser(self, browser_type: BrowserType, args: List[str]) -> subprocess.Popen:
         """Launch browser process with specified arguments"""
         config = self.browser_configs[browser_type]
@@ -388,6 +449,115 @@ class BrowserController:
             logger.error(f"Failed to launch browser {browser_type.value}: {e}")
             raise
     
+    def connect_cdp(self, session_id: str, endpoint: str, attempts: int = 20) -> CDPBrowser:
+        """Attach a DevTools backend to a session, retrying while the browser starts"""
+        for attempt in range(attempts):
+            try:
+                browser = CDPBrowser.connect(endpoint)
+                break
+            except OSError as e:
+                if attempt == attempts - 1:
+                    raise
+                logger.debug(f"DevTools endpoint {endpoint} not ready: {e}")
+                time.sleep(0.25)
+        
+        self.cdp_browsers[session_id] = browser
+        browser.listeners.append(lambda event, tab_id, params: self._on_cdp_event(session_id, event, tab_id, params))
+        browser.connection.on_close(lambda: self._on_cdp_closed(session_id))
+        
+        for target in browser.get_tabs():
+            self._register_cdp_tab(session_id, target)
+        
+        logger.info(f"Connected DevTools backend for session {session_id} ({len(browser.sessions)} tabs attached)")
+        return browser
+    
+    def is_connected(self, target: Optional[str]) -> bool:
+        """Whether a tab (or session) is driven by a live DevTools backend"""
+        return self._resolve_cdp_tab(target)[0] is not None
+    
+    def execute_script(self, script: str, tab_id: Optional[str] = None, await_promise: bool = False) -> Any:
+        """Evaluate a script expression in a DevTools-backed tab and return its value"""
+        browser, tab_id = self._resolve_cdp_tab(tab_id)
+        if browser is None:
+            raise CDPError(f"No DevTools backend for tab {tab_id}")
+        return browser.evaluate(tab_id, script, await_promise)
+    
+    def _resolve_cdp_tab(self, target: Optional[str]) -> Tuple[Optional[CDPBrowser], Optional[str]]:
+        """DevTools browser and tab for a tab id, or for a session id (its first tab)"""
+        session_id = self.tab_sessions.get(target)
+        if session_id is None and target in self.cdp_browsers:
+            session_id = target
+            target = next((t for t, s in self.tab_sessions.items() if s == session_id), None)
+        
+        browser = self.cdp_browsers.get(session_id)
+        if browser is None or not browser.connected or target is None:
+            return None, target
+        return browser, target
+    
+    def _register_cdp_tab(self, session_id: str, target: Dict[str, Any]) -> None:
+        tab_id = target['targetId']
+        self.tab_sessions[tab_id] = session_id
+        if tab_id not in self.tab_manager.tabs:
+            self.tab_manager.register_tab(TabInfo(
+                tab_id=tab_id,
+                window_id=session_id,
+                url=target.get('url', ''),
+                title=target.get('title', ''),
+                state=TabState.LOADING,
+                is_active=bool(target.get('attached')),
+                is_pinned=False
+            ))
+    
+    def _on_cdp_event(self, session_id: str, event: str, tab_id: Optional[str], params: Dict[str, Any]) -> None:
+        """Apply pushed DevTools events to tab state (runs on the connection's reader thread)"""
+        tab = self.tab_manager.tabs.get(tab_id) if tab_id else None
+        
+        if event == 'Target.targetCreated' and params.get('targetInfo', {}).get('type') == 'page':
+            self._register_cdp_tab(session_id, params['targetInfo'])
+        elif event == 'Target.targetInfoChanged' and tab:
+            tab.url = params['targetInfo'].get('url', tab.url)
+            tab.title = params['targetInfo'].get('title', tab.title)
+        elif event == 'Target.targetDestroyed' and tab_id:
+            self.tab_sessions.pop(tab_id, None)
+            self.console_messages.pop(tab_id, None)
+            self.tab_manager.unregister_tab(tab_id)
+        elif event == 'Target.targetCrashed' and tab:
+            self.tab_manager.update_tab_state(tab_id, TabState.CRASHED)
+        elif event == 'Page.frameNavigated' and tab:
+            frame = params.get('frame', {})
+            origin = frame.get('securityOrigin')
+            if origin and origin != 'null' and origin.startswith(('http://', 'https://')):
+                tab.visited_origins.add(origin)
+            if not frame.get('parentId'):
+                tab.url = frame.get('url', tab.url)
+                tab.dom_ready = tab.resources_loaded = False
+        elif event == 'Page.domContentEventFired' and tab:
+            tab.dom_ready = True
+            self.tab_manager.update_tab_state(tab_id, TabState.INTERACTIVE)
+        elif event == 'Page.loadEventFired' and tab:
+            tab.resources_loaded = True
+            tab.load_time = time.time() - tab.last_activity
+            self.tab_manager.update_tab_state(tab_id, TabState.COMPLETE)
+        elif event == 'Runtime.consoleAPICalled' and tab_id:
+            args = [str(a.get('value', a.get('description', ''))) for a in params.get('args', [])]
+            self.console_messages[tab_id].append(f"[{params.get('type', 'log')}] {' '.join(args)}")
+        
+        for callback in self.tab_manager.activity_callbacks:
+            try:
+                callback(event, tab_id, params)
+            except Exception as e:
+                logger.error(f"Tab activity callback failed: {e}")
+    
+    def _on_cdp_closed(self, session_id: str) -> None:
+        """The browser went away: drop its tabs instead of waiting for a poll to notice"""
+        if self.cdp_browsers.pop(session_id, None) is None:
+            return
+        
+        logger.warning(f"DevTools connection for session {session_id} closed")
+        for tab_id in [t for t, s in self.tab_sessions.items() if s == session_id]:
+            self.tab_sessions.pop(tab_id, None)
+            self.tab_manager.unregister_tab(tab_id)
+    
     def close_session(self, session_id: str) -> bool:
         """Close browser session and cleanup"""
         try:
@@ -398,6 +568,12 @@ class BrowserController:
                     for tab in window.tabs:
                         self.tab_manager.unregister_tab(tab.tab_id)
                 
+                # Disconnect the DevTools backend
+                browser = self.cdp_browsers.get(session_id)
+                if browser is not None:
+                    browser.close()
+                    self._on_cdp_closed(session_id)
+                
                 # Terminate browser process
                 if session_id in self.browser_processes:
                     process = self.browser_processes[session_id]
@@ -406,6 +582,10 @@ class BrowserController:
                         process.wait(timeout=5)
                     del self.browser_processes[session_id]
                 
+                temp_profile = self.temp_profiles.pop(session_id, None)
+                if temp_profile:
+                    shutil.rmtree(temp_profile, ignore_errors=True)
+                
                 del self.sessions[session_id]
                 
                 # Update active session
@@ -439,6 +619,16 @@ class BrowserController:
             if not target:
                 return CommandResult(False, command, None, error_message="No target specified or available")
             
+            # DevTools-backed commands
+            if command != BrowserCommand.NEW_TAB:
+                browser, tab_id = self._resolve_cdp_tab(target)
+            else:
+                browser, tab_id = self.cdp_browsers.get(target), target
+            if browser is not None:
+                result = self._execute_cdp_command(browser, command, tab_id, params)
+                result.execution_time = time.time() - start_time
+                return result
+            
             # Route command based on type
             if command in [BrowserCommand.NEW_TAB, BrowserCommand.CLOSE_TAB, BrowserCommand.SWITCH_TAB]:
                 return self._handle_tab_command(command, target, params)
@@ -446,7 +636,8 @@ class BrowserController:
                 return self._handle_navigation_command(command, target, params)
             elif command in [BrowserCommand.EXECUTE_SCRIPT, BrowserCommand.INJECT_CSS]:
                 return self._handle_script_command(command, target, params)
-            elif command in [BrowserCommand.GET_COOKIES, BrowserCommand.SET_COOKIES]:
+            elif command in [BrowserCommand.GET_COOKIES, BrowserCommand.SET_COOKIES,
+                             BrowserCommand.CLEAR_COOKIES, BrowserCommand.CLEAR_STORAGE]:
                 return self._handle_cookie_command(command, target, params)
             else:
                 return CommandResult(False, command, target, error_message=f"Unsupported command: {command.value}")
@@ -455,12 +646,89 @@ class BrowserController:
             logger.error(f"Command execution failed: {e}")
             return CommandResult(False, command, target, execution_time=time.time() - start_time, error_message=str(e))
     
+    def _execute_cdp_command(self, browser: CDPBrowser, command: BrowserCommand,
+                             target: str, params: Dict[str, Any]) -> CommandResult:
+        """Execute a command over a DevTools connection"""
+        try:
+            if command == BrowserCommand.NEW_TAB:
+                tab_id = browser.create_tab(params.get('url', 'about:blank'))
+                self._register_cdp_tab(target, {'targetId': tab_id, 'url': params.get('url', 'about:blank'),
+                                                'title': "New Tab", 'attached': True})
+                return CommandResult(True, command, tab_id, {"tab_id": tab_id})
+            
+            if command == BrowserCommand.CLOSE_TAB:
+                browser.close_tab(target)
+                self.tab_sessions.pop(target, None)
+                self.tab_manager.unregister_tab(target)
+                return CommandResult(True, command, target, {"closed": True})
+            
+            if command == BrowserCommand.SWITCH_TAB:
+                browser.activate_tab(target)
+                for tab_id, tab in self.tab_manager.tabs.items():
+                    tab.is_active = (tab_id == target)
+                return CommandResult(True, command, target, {"switched": True})
+            
+            if command in (BrowserCommand.NAVIGATE, BrowserCommand.REFRESH,
+                           BrowserCommand.BACK, BrowserCommand.FORWARD):
+                tab_info = self.tab_manager.tabs.get(target)
+                if tab_info:
+                    # Completion arrives as a pushed Page.loadEventFired
+                    tab_info.state = TabState.LOADING
+                    tab_info.last_activity = time.time()
+                
+                if command == BrowserCommand.NAVIGATE:
+                    url = params.get('url', '')
+                    if not url:
+                        return CommandResult(False, command, target, error_message="Navigation requires a url")
+                    browser.navigate(target, url)
+                    return CommandResult(True, command, target, {"navigated_to": url})
+                if command == BrowserCommand.REFRESH:
+                    browser.reload(target)
+                    return CommandResult(True, command, target, {"refreshed": True})
+                browser.evaluate(target, f"history.{command.value}()")
+                return CommandResult(True, command, target, {"navigated": command.value})
+            
+            if command == BrowserCommand.EXECUTE_SCRIPT:
+                value = browser.evaluate(target, params.get('script', ''), params.get('await_promise', False))
+                return CommandResult(True, command, target, {"result": value})
+            
+            if command == BrowserCommand.INJECT_CSS:
+                css = json.dumps(params.get('css', ''))
+                browser.evaluate(target, "(function (css) { var style = document.createElement('style'); "
+                                         f"style.textContent = css; document.head.appendChild(style); }})({css})")
+                return CommandResult(True, command, target, {"result": "css_injected"})
+            
+            if command == BrowserCommand.GET_COOKIES:
+                return CommandResult(True, command, target, {"cookies": browser.get_cookies(target)})
+            
+            if command == BrowserCommand.SET_COOKIES:
+                cookies = params.get('cookies', [])
+                browser.set_cookies(target, cookies)
+                return CommandResult(True, command, target, {"cookies_set": len(cookies)})
+            
+            if command == BrowserCommand.CLEAR_COOKIES:
+                browser.clear_cookies(target)
+                return CommandResult(True, command, target, {"cookies_cleared": True})
+            
+            if command == BrowserCommand.CLEAR_STORAGE:
+                origins = self._storage_origins(target, params)
+                browser.clear_storage(origins)
+                tab_info = self.tab_manager.tabs.get(target)
+                if tab_info:
+                    tab_info.visited_origins.clear()
+                return CommandResult(True, command, target, {"origins_cleared": origins})
+            
+            return CommandResult(False, command, target, error_message=f"Unsupported command: {command.value}")
+        
+        except CDPError as e:
+            return CommandResult(False, command, target, error_message=str(e))
+    
     def _handle_tab_command(self, command: BrowserCommand, target: str, params: Dict[str, Any]) -> CommandResult:
         """Handle tab-related commands"""
         if command == BrowserCommand.NEW_TAB:
             # Create new tab
             url = params.get('url', 'about:blank')
-            new_tab_id = f"tab_{int(time.time() * 1000)}"
+            new_tab_id = f"tab_{int(time.time() * 1000)}_{next(self._id_counter)}"
             
             # Create tab info
             tab_info = TabInfo(
@@ -560,28 +828,44 @@ class BrowserController:
             tab_info.cookies = cookies
             return CommandResult(True, command, target, {"cookies_set": len(cookies)})
         
+        elif command == BrowserCommand.CLEAR_COOKIES:
+            tab_info.cookies = []
+            return CommandResult(True, command, target, {"cookies_cleared": True})
+        
+        elif command == BrowserCommand.CLEAR_STORAGE:
+            origins = self._storage_origins(target, params)
+            tab_info.visited_origins.clear()
+            return CommandResult(True, command, target, {"origins_cleared": origins})
+        
         return CommandResult(False, command, target, error_message="Cookie command not implemented")
     
-    def _start_monitoring(self) -> None:
-        """Start background monitoring of browser sessions"""
-        def monitor_loop():
-            while self.sessions:
-                try:
-                    for session_id, session in list(self.sessions.items()):
-                        # Check if browser process is still alive
-                        process = self.browser_processes.get(session_id)
-                        if process and process.poll() is not None:
-                            logger.warning(f"Browser process for session {session_id} has terminated")
-                            # Could implement automatic restart or cleanup
-                    
-                    time.sleep(5)  # Check every 5 seconds
-                    
-                except Exception as e:
-                    logger.error(f"Monitor loop error: {e}")
-                    time.sleep(10)
-        
-        self.monitoring_thread = threading.Thread(target=monitor_loop, daemon=True)
-        self.monitoring_thread.start()
+    def _storage_origins(self, target: str, params: Dict[str, Any]) -> List[str]:
+        """Origins to clear: explicit ones, else every origin the tab has loaded"""
+        if params.get('origins'):
+            return list(params['origins'])
+        
+        tab_info = self.tab_manager.tabs.get(target)
+        if not tab_info:
+            return []
+        
+        origins = set(tab_info.visited_origins)
+        parsed = urlparse(tab_info.url)
+        if parsed.scheme in ('http', 'https'):
+            origins.add(f"{parsed.scheme}://{parsed.netloc}")
+        return sorted(origins)
+    
+    def _watch_process(self, session_id: str, process: subprocess.Popen) -> None:
+        """Report browser exit as soon as it happens (blocks on the process, no polling)"""
+        def wait_for_exit():
+            code = process.wait()
+            if session_id in self.sessions:
+                logger.warning(f"Browser process for session {session_id} has terminated (exit code {code})")
+                self._on_cdp_closed(session_id)
+            self.process_watchers.pop(session_id, None)
+        
+        watcher = threading.Thread(target=wait_for_exit, name=f"browser-watch-{session_id}", daemon=True)
+        self.process_watchers[session_id] = watcher
+        watcher.start()
     
     def coordinate_cross_tab_action(self, action_name: str, 
                                    source_tab: str, 
@@ -624,11 +908,14 @@ class BrowserController:
             session_info = {
                 "browser_type": session.browser_type.value,
                 "windows": len(session.windows),
-                "total_tabs": sum(len(w.tabs) for w in session.windows),
+                "total_tabs": (sum(len(w.tabs) for w in session.windows)
+                               + sum(1 for s in self.tab_sessions.values() if s == sid)),
                 "headless": session.headless,
                 "extensions_enabled": session.extensions_enabled,
                 "uptime": time.time() - session.startup_time,
-                "process_alive": self.browser_processes.get(sid, {}).get('poll', lambda: None)() is None
+                "process_alive": (self.browser_processes.get(sid) is not None
+                                  and self.browser_processes[sid].poll() is None),
+                "devtools": self.cdp_browsers[sid].get_browser_stats() if sid in self.cdp_browsers else None
             }
             
             status["sessions"][sid] = session_info
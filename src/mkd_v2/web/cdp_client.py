@@ -0,0 +1,462 @@
+"""
+Chrome DevTools Protocol Backend
+
+Event-driven browser control over one persistent websocket per browser:
+- Minimal RFC 6455 websocket client built on the standard library
+- Commands pipelined: written immediately, replies matched by id
+- Tabs multiplexed over the browser connection with flattened session ids
+- Target, page-load and console events pushed to listeners
+- Command latency and tabs-per-browser metrics
+"""
+
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+import urllib.request
+
+from .javascript_injector import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+# Listener signature: (event method, params, flattened session id or None)
+EventListener = Callable[[str, Dict[str, Any], Optional[str]], None]
+
+
+class CDPError(Exception):
+    """A DevTools command failed or the connection was lost"""
+
+
+def _apply_mask(data: bytes, key: bytes) -> bytes:
+    if not data:
+        return data
+    repeated = (key * (len(data) // 4 + 1))[:len(data)]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(data), 'big')
+
+
+def encode_frame(payload: bytes, opcode: int = OP_TEXT, mask: bool = True) -> bytes:
+    """Encode one final websocket frame (clients must mask, servers must not)"""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack('!H', length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack('!Q', length)
+    
+    if not mask:
+        return bytes(header) + payload
+    key = os.urandom(4)
+    return bytes(header) + key + _apply_mask(payload, key)
+
+
+def read_frame(stream) -> Tuple[bool, int, bytes]:
+    """Read one websocket frame: (final, opcode, unmasked payload)"""
+    head = _read_exact(stream, 2)
+    final = bool(head[0] & 0x80)
+    opcode = head[0] & 0x0F
+    length = head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', _read_exact(stream, 2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', _read_exact(stream, 8))[0]
+    
+    key = _read_exact(stream, 4) if head[1] & 0x80 else None
+    payload = _read_exact(stream, length)
+    return final, opcode, _apply_mask(payload, key) if key else payload
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size) if size else b''
+    if len(data) < size:
+        raise ConnectionError("Websocket closed by peer")
+    return data
+
+
+def discover_websocket_url(endpoint: str, timeout: float = 5.0) -> str:
+    """Browser websocket URL from a DevTools HTTP endpoint such as http://127.0.0.1:9222"""
+    with urllib.request.urlopen(f"{endpoint.rstrip('/')}/json/version", timeout=timeout) as response:
+        return json.loads(response.read().decode('utf-8'))['webSocketDebuggerUrl']
+
+
+class WebSocketConnection:
+    """Blocking text-message websocket client; one reader, any number of writers"""
+    
+    def __init__(self, url: str, timeout: float = 10.0):
+        parsed = urlparse(url)
+        if parsed.scheme != 'ws':
+            raise ValueError(f"Unsupported websocket URL (DevTools endpoints are ws://): {url}")
+        
+        self.sock = socket.create_connection((parsed.hostname, parsed.port or 80), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._send_lock = threading.Lock()
+        self.closed = False
+        
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else '')
+        self.sock.sendall((
+            f"GET {path} HTTP/1.1\r\nHost: {parsed.netloc}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        
+        self._stream = self.sock.makefile('rb')
+        status = self._stream.readline()
+        headers = {}
+        while True:
+            line = self._stream.readline().decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        
+        expected = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        if b' 101 ' not in status or headers.get('sec-websocket-accept') != expected:
+            self.sock.close()
+            raise ConnectionError(f"Websocket handshake failed: {status!r}")
+        
+        self.sock.settimeout(None)
+    
+    def send_text(self, text: str) -> None:
+        frame = encode_frame(text.encode('utf-8'))
+        with self._send_lock:
+            self.sock.sendall(frame)
+    
+    def recv_text(self) -> Optional[str]:
+        """Next text message, or None once the peer closed the connection"""
+        parts = []
+        while True:
+            final, opcode, payload = read_frame(self._stream)
+            if opcode == OP_PING:
+                with self._send_lock:
+                    self.sock.sendall(encode_frame(payload, OP_PONG))
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                self.closed = True
+                return None
+            
+            parts.append(payload)
+            if final:
+                return b''.join(parts).decode('utf-8')
+    
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            with self._send_lock:
+                self.sock.sendall(encode_frame(struct.pack('!H', 1000), OP_CLOSE))
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class CDPConnection:
+    """
+    One DevTools websocket with pipelined commands and pushed events.
+    
+    `send()` writes a command and returns a Future without waiting for
+    earlier replies; a reader thread resolves futures by message id and
+    dispatches events. Listeners run on the reader thread, so they must
+    not block on `call()`.
+    """
+    
+    def __init__(self, ws_url: str, timeout: float = 30.0):
+        self.ws_url = ws_url
+        self.timeout = timeout
+        self._ws = WebSocketConnection(ws_url)
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Tuple[Future, str, float]] = {}
+        self._lock = threading.Lock()
+        self._listeners: Dict[str, List[EventListener]] = defaultdict(list)
+        self._close_callbacks: List[Callable[[], None]] = []
+        self.closed = False
+        
+        self.latency = LatencyHistogram()
+        self.stats = {
+            'commands': 0,
+            'errors': 0,
+            'events': 0,
+            'max_in_flight': 0
+        }
+        
+        self._reader = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self._reader.start()
+    
+    def send(self, method: str, params: Optional[Dict[str, Any]] = None,
+             session_id: Optional[str] = None) -> Future:
+        """Send a command without waiting; the Future resolves to its result"""
+        future: Future = Future()
+        message_id = next(self._ids)
+        message = {'id': message_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        
+        with self._lock:
+            if self.closed:
+                future.set_exception(CDPError(f"{method}: connection closed"))
+                return future
+            self._pending[message_id] = (future, method, time.perf_counter())
+            self.stats['commands'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], len(self._pending))
+        
+        try:
+            self._ws.send_text(json.dumps(message))
+        except OSError as e:
+            with self._lock:
+                self._pending.pop(message_id, None)
+            future.set_exception(CDPError(f"{method}: send failed: {e}"))
+        return future
+    
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None,
+             session_id: Optional[str] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a command and wait for its result"""
+        return self.send(method, params, session_id).result(timeout or self.timeout)
+    
+    def on(self, method: str, listener: EventListener) -> None:
+        """Listen for an event method, or every event with '*'"""
+        self._listeners[method].append(listener)
+    
+    def on_close(self, callback: Callable[[], None]) -> None:
+        """Called once when the connection is lost or closed"""
+        self._close_callbacks.append(callback)
+    
+    def close(self) -> None:
+        self._ws.close()
+        self._reader.join(timeout=2.0)
+        self._shutdown()
+    
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """Get command and event statistics"""
+        stats = self.stats.copy()
+        stats['in_flight'] = len(self._pending)
+        stats['avg_command_latency'] = self.latency.mean
+        stats['p95_command_latency'] = self.latency.percentile(0.95)
+        stats['max_command_latency'] = self.latency.max
+        return stats
+    
+    def _read_loop(self) -> None:
+        try:
+            while True:
+                text = self._ws.recv_text()
+                if text is None:
+                    break
+                message = json.loads(text)
+                if 'id' in message:
+                    self._resolve(message)
+                else:
+                    self._dispatch(message)
+        except (OSError, ValueError) as e:
+            if not self.closed and not self._ws.closed:
+                logger.warning(f"DevTools connection lost: {e}")
+        finally:
+            self._shutdown()
+    
+    def _resolve(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            entry = self._pending.pop(message['id'], None)
+        if entry is None:
+            return
+        
+        future, method, started = entry
+        self.latency.record(time.perf_counter() - started)
+        if 'error' in message:
+            self.stats['errors'] += 1
+            error = message['error']
+            future.set_exception(CDPError(f"{method}: {error.get('message', error)}"))
+        else:
+            future.set_result(message.get('result', {}))
+    
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        self.stats['events'] += 1
+        method = message.get('method', '')
+        params = message.get('params', {})
+        session_id = message.get('sessionId')
+        for listener in self._listeners.get(method, []) + self._listeners.get('*', []):
+            try:
+                listener(method, params, session_id)
+            except Exception as e:
+                logger.error(f"DevTools event listener failed for {method}: {e}")
+    
+    def _shutdown(self) -> None:
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            pending, self._pending = self._pending, {}
+        
+        for future, method, _ in pending.values():
+            future.set_exception(CDPError(f"{method}: connection closed"))
+        for callback in self._close_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"DevTools close callback failed: {e}")
+
+
+class CDPBrowser:
+    """
+    A browser driven over a single DevTools connection.
+    
+    Tabs are page targets identified by target id. Each tab is attached
+    once with a flattened session id, after which all of its commands
+    and events share the browser connection.
+    """
+    
+    def __init__(self, connection: CDPConnection):
+        self.connection = connection
+        self.sessions: Dict[str, str] = {}  # target id -> session id
+        self._targets: Dict[str, str] = {}  # session id -> target id
+        self._lock = threading.Lock()
+        self.listeners: List[Callable[[str, Optional[str], Dict[str, Any]], None]] = []  # (event, target id, params)
+        
+        connection.on('*', self._on_event)
+        connection.send('Target.setDiscoverTargets', {'discover': True})
+    
+    @classmethod
+    def connect(cls, endpoint: str, timeout: float = 30.0) -> 'CDPBrowser':
+        """Connect to a ws:// browser URL or an http:// DevTools endpoint"""
+        ws_url = endpoint if endpoint.startswith('ws') else discover_websocket_url(endpoint)
+        return cls(CDPConnection(ws_url, timeout))
+    
+    @property
+    def connected(self) -> bool:
+        return not self.connection.closed
+    
+    def get_tabs(self) -> List[Dict[str, Any]]:
+        """Page targets currently open in the browser"""
+        targets = self.connection.call('Target.getTargets').get('targetInfos', [])
+        return [t for t in targets if t.get('type') == 'page']
+    
+    def attach(self, target_id: str) -> str:
+        """Session id of a tab, attaching to it on first use"""
+        with self._lock:
+            session_id = self.sessions.get(target_id)
+        if session_id:
+            return session_id
+        
+        session_id = self.connection.call('Target.attachToTarget',
+                                          {'targetId': target_id, 'flatten': True})['sessionId']
+        with self._lock:
+            self.sessions[target_id] = session_id
+            self._targets[session_id] = target_id
+        
+        # Subscribe to page and console events in one pipelined burst
+        enabled = [self.connection.send(method, session_id=session_id) for method in ('Page.enable', 'Runtime.enable')]
+        for future in enabled:
+            future.result(self.connection.timeout)
+        return session_id
+    
+    def create_tab(self, url: str = 'about:blank') -> str:
+        target_id = self.connection.call('Target.createTarget', {'url': url})['targetId']
+        self.attach(target_id)
+        return target_id
+    
+    def close_tab(self, target_id: str) -> None:
+        self.connection.call('Target.closeTarget', {'targetId': target_id})
+        self._forget(target_id)
+    
+    def activate_tab(self, target_id: str) -> None:
+        self.connection.call('Target.activateTarget', {'targetId': target_id})
+    
+    def navigate(self, target_id: str, url: str) -> Dict[str, Any]:
+        result = self.connection.call('Page.navigate', {'url': url}, self.attach(target_id))
+        if result.get('errorText'):
+            raise CDPError(f"Navigation to {url} failed: {result['errorText']}")
+        return result
+    
+    def reload(self, target_id: str) -> None:
+        self.connection.call('Page.reload', {}, self.attach(target_id))
+    
+    def evaluate(self, target_id: str, expression: str, await_promise: bool = False,
+                 timeout: Optional[float] = None) -> Any:
+        """Evaluate an expression in a tab and return its JSON value"""
+        return self._evaluation_value(self.connection.call(
+            'Runtime.evaluate', self._evaluate_params(expression, await_promise),
+            self.attach(target_id), timeout
+        ))
+    
+    def evaluate_many(self, target_id: str, expressions: List[str], await_promise: bool = False) -> List[Any]:
+        """Evaluate several expressions, all sent before the first reply is awaited"""
+        session_id = self.attach(target_id)
+        futures = [self.connection.send('Runtime.evaluate', self._evaluate_params(e, await_promise), session_id)
+                   for e in expressions]
+        return [self._evaluation_value(f.result(self.connection.timeout)) for f in futures]
+    
+    def get_cookies(self, target_id: str) -> List[Dict[str, Any]]:
+        return self.connection.call('Network.getCookies', {}, self.attach(target_id)).get('cookies', [])
+    
+    def set_cookies(self, target_id: str, cookies: List[Dict[str, Any]]) -> None:
+        self.connection.call('Network.setCookies', {'cookies': cookies}, self.attach(target_id))
+    
+    def clear_cookies(self, target_id: str) -> None:
+        """Delete every cookie in the tab's browser context"""
+        self.connection.call('Network.clearBrowserCookies', {}, self.attach(target_id))
+    
+    def clear_storage(self, origins: List[str], storage_types: str = 'all') -> None:
+        """Clear stored data (local storage, IndexedDB, caches, ...) of several origins in one burst"""
+        futures = [self.connection.send('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': storage_types})
+                   for origin in origins]
+        for future in futures:
+            future.result(self.connection.timeout)
+    
+    def close(self) -> None:
+        self.connection.close()
+    
+    def get_browser_stats(self) -> Dict[str, Any]:
+        """Get connection metrics and the number of attached tabs"""
+        stats = self.connection.get_connection_stats()
+        stats['tabs'] = len(self.sessions)
+        stats['connected'] = self.connected
+        return stats
+    
+    def _evaluate_params(self, expression: str, await_promise: bool) -> Dict[str, Any]:
+        return {'expression': expression, 'returnByValue': True, 'awaitPromise': await_promise}
+    
+    def _evaluation_value(self, result: Dict[str, Any]) -> Any:
+        details = result.get('exceptionDetails')
+        if details:
+            exception = details.get('exception', {})
+            raise CDPError(str(exception.get('value') or exception.get('description') or details.get('text')))
+        return result.get('result', {}).get('value')
+    
+    def _forget(self, target_id: str) -> None:
+        with self._lock:
+            session_id = self.sessions.pop(target_id, None)
+            self._targets.pop(session_id, None)
+    
+    def _on_event(self, method: str, params: Dict[str, Any], session_id: Optional[str]) -> None:
+        if session_id:
+            target_id = self._targets.get(session_id)
+        else:
+            target_id = params.get('targetInfo', {}).get('targetId') or params.get('targetId')
+        
+        if method == 'Target.targetDestroyed' and target_id:
+            self._forget(target_id)
+        elif method == 'Target.detachedFromTarget':
+            with self._lock:
+                target_id = self._targets.pop(params.get('sessionId'), None) or target_id
+                self.sessions.pop(target_id, None)
+        
+        for listener in self.listeners:
+            listener(method, target_id, params)
@@ -7,6 +7,8 @@ Provides deep DOM analysis and manipulation capabilities for web automation:
 - XPath generation with fallback options
 - Element interaction verification
 - Dynamic content handling
+- All strategies compiled into one in-page query per lookup
+- Bounded per-tab element cache invalidated by navigation and DOM mutations
 """
 
 from dataclasses import dataclass, field
@@ -14,10 +16,14 @@ from typing import Dict, List, Any, Optional, Tuple, Union, Callable
 from enum import Enum
 import time
 import re
+import inspect
 import logging
 import json
 from collections import defaultdict
 
+from .dom_query_compiler import DOMQueryCompiler
+from .element_cache import ElementCache, DOM_OBSERVER_SCRIPT, with_page_state
+
 logger = logging.getLogger(__name__)
 
 
@@ -93,17 +99,39 @@ class InspectionResult:
     confidence_score: float = 0.0
     errors: List[str] = field(default_factory=list)
     recommendations: List[str] = field(default_factory=list)
+    from_cache: bool = False
 
 
 class DOMInspector:
     """Advanced DOM inspector with multiple detection strategies"""
     
-    def __init__(self, browser_interface=None):
+    # Semantic role scoring tables, shared with the in-page evaluator
+    SEMANTIC_TAG_SCORES = {
+        'button': {'button': 0.9, 'input': 0.7, 'a': 0.3},
+        'link': {'a': 0.9, 'button': 0.2},
+        'input': {'input': 0.9, 'textarea': 0.8, 'select': 0.7},
+        'form': {'form': 0.9, 'div': 0.2},
+        'image': {'img': 0.9, 'svg': 0.7, 'canvas': 0.5}
+    }
+    SEMANTIC_KEYWORDS = {
+        'button': ['click', 'submit', 'save', 'cancel', 'ok', 'continue'],
+        'link': ['read more', 'learn more', 'view', 'details'],
+        'search': ['search', 'find', 'query'],
+        'menu': ['menu', 'options', 'settings']
+    }
+    
+    def __init__(self, browser_interface=None, max_cached_elements: int = 256):
         self.browser_interface = browser_interface
-        self.element_cache: Dict[str, ElementInfo] = {}
+        self.element_cache = ElementCache(max_entries=max_cached_elements)
         self.selector_cache: Dict[str, str] = {}
         self.performance_stats = defaultdict(list)
         self.confidence_threshold = 0.7
+        self.query_compiler = DOMQueryCompiler(self)
+        self.query_stats = {
+            'round_trips': 0,
+            'records_returned': 0,
+            'page_state_reads': 0
+        }
         
         # Strategy priorities (higher = more preferred)
         self.strategy_priorities = {
@@ -116,9 +144,20 @@ class DOMInspector:
         }
     
     def inspect_element(self, query: DOMQuery, page_context: Dict[str, Any] = None) -> InspectionResult:
-        """Inspect DOM element using multiple strategies"""
+        """
+        Inspect DOM element using multiple strategies
+        
+        page_context may carry 'tab_id', 'url' and 'dom_version'; without a
+        'dom_version' the tab's DOM_OBSERVER_SCRIPT state comes back with the
+        revalidation or query script, so a lookup stays one round-trip and a
+        cached element is always revalidated. A changed URL or document drops
+        the tab's cached elements and a changed DOM version makes them
+        revalidate before reuse.
+        """
         start_time = time.time()
         page_context = page_context or {}
+        tab_id = page_context.get('tab_id')
+        cache_key = self._generate_cache_key(query)
         
         logger.info(f"Inspecting element with {len(query.strategies)} strategies")
         
@@ -130,24 +169,49 @@ class DOMInspector:
         )
         
         try:
-            # Execute detection strategies in priority order
-            sorted_strategies = sorted(query.strategies, 
-                                     key=lambda s: self.strategy_priorities.get(s, 0), 
-                                     reverse=True)
+            self.element_cache.observe(tab_id, page_context.get('url'), page_context.get('dom_version'),
+                                       page_context.get('document'))
+            state_known = tab_id is None or 'dom_version' in page_context
+            
+            def execute(script: str) -> Any:
+                if state_known:
+                    return self._execute_browser_query(script, tab_id)
+                return self._execute_with_page_state(script, tab_id, page_context)
+            
+            cached = self.element_cache.lookup(tab_id, cache_key, execute, state_known)
+            if cached is not None:
+                result.elements = [cached]
+                result.success = True
+                result.from_cache = True
+                result.best_selector = self._generate_optimal_selector(cached)
+                result.confidence_score = cached.interaction_confidence
+                result.query_time = time.time() - start_time
+                self.performance_stats['inspection_times'].append(result.query_time)
+                return result
+            
+            # All strategies run in-page in one round-trip; the page scores,
+            # deduplicates and returns only the top-k records
+            compiled = self.query_compiler.compile(query)
+            records = execute(compiled.script) or []
+            self.query_stats['round_trips'] += 1
+            self.query_stats['records_returned'] += len(records)
             
             all_elements = []
-            for strategy in sorted_strategies:
-                try:
-                    elements = self._execute_strategy(strategy, query, page_context)
-                    if elements:
-                        all_elements.extend(elements)
+            for record in records:
+                selector_type = SelectorType(record.get('selectorType', SelectorType.CSS.value))
+                element_info = self._create_element_info(record, selector_type, record.get('selector', ''))
+                if 'score' in record:
+                    element_info.interaction_confidence = record['score']
+                if not self._matches_query_criteria(element_info, query):
+                    continue
+                
+                all_elements.append(element_info)
+                for value in record.get('strategies', []):
+                    strategy = DetectionStrategy(value)
+                    if strategy not in result.strategies_used:
                         result.strategies_used.append(strategy)
-                        logger.debug(f"Strategy {strategy.value} found {len(elements)} elements")
-                except Exception as e:
-                    logger.warning(f"Strategy {strategy.value} failed: {e}")
-                    result.errors.append(f"{strategy.value}: {str(e)}")
             
-            # Remove duplicates and rank elements
+            # Records arrive ranked; re-ranking keeps the order stable for non-browser stand-ins
             unique_elements = self._deduplicate_elements(all_elements)
             ranked_elements = self._rank_elements(unique_elements, query)
             
@@ -161,8 +225,7 @@ class DOMInspector:
                 result.confidence_score = best_element.interaction_confidence
                 
                 # Cache successful results
-                cache_key = self._generate_cache_key(query)
-                self.element_cache[cache_key] = best_element
+                self.element_cache.put(tab_id, cache_key, best_element, result.best_selector)
             
             # Generate recommendations
             result.recommendations = self._generate_recommendations(result, query)
@@ -176,180 +239,6 @@ class DOMInspector:
         
         return result
     
-    def _execute_strategy(self, strategy: DetectionStrategy, 
-                         query: DOMQuery, 
-                         page_context: Dict[str, Any]) -> List[ElementInfo]:
-        """Execute a specific detection strategy"""
-        
-        if strategy == DetectionStrategy.CSS_SELECTOR:
-            return self._detect_by_css_selector(query, page_context)
-        elif strategy == DetectionStrategy.XPATH:
-            return self._detect_by_xpath(query, page_context)
-        elif strategy == DetectionStrategy.ATTRIBUTES:
-            return self._detect_by_attributes(query, page_context)
-        elif strategy == DetectionStrategy.TEXT_CONTENT:
-            return self._detect_by_text_content(query, page_context)
-        elif strategy == DetectionStrategy.VISUAL_POSITION:
-            return self._detect_by_visual_position(query, page_context)
-        elif strategy == DetectionStrategy.AI_SEMANTIC:
-            return self._detect_by_ai_semantic(query, page_context)
-        else:
-            raise ValueError(f"Unknown detection strategy: {strategy}")
-    
-    def _detect_by_css_selector(self, query: DOMQuery, page_context: Dict[str, Any]) -> List[ElementInfo]:
-        """Detect elements using CSS selectors"""
-        elements = []
-        
-        # Generate CSS selectors from target attributes
-        selectors = self._generate_css_selectors(query.target_attributes)
-        
-        for selector in selectors:
-            try:
-                # Execute selector in browser (mock implementation)
-                raw_elements = self._execute_browser_query(f"document.querySelectorAll('{selector}')")
-                
-                for raw_element in raw_elements:
-                    element_info = self._create_element_info(raw_element, SelectorType.CSS, selector)
-                    if self._matches_query_criteria(element_info, query):
-                        elements.append(element_info)
-                        
-            except Exception as e:
-                logger.debug(f"CSS selector '{selector}' failed: {e}")
-        
-        return elements
-    
-    def _detect_by_xpath(self, query: DOMQuery, page_context: Dict[str, Any]) -> List[ElementInfo]:
-        """Detect elements using XPath expressions"""
-        elements = []
-        
-        # Generate XPath expressions
-        xpaths = self._generate_xpath_expressions(query.target_attributes, query.text_patterns)
-        
-        for xpath in xpaths:
-            try:
-                # Execute XPath in browser (mock implementation)
-                raw_elements = self._execute_browser_query(
-                    f"document.evaluate('{xpath}', document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null)"
-                )
-                
-                for raw_element in raw_elements:
-                    element_info = self._create_element_info(raw_element, SelectorType.XPATH, xpath)
-                    if self._matches_query_criteria(element_info, query):
-                        elements.append(element_info)
-                        
-            except Exception as e:
-                logger.debug(f"XPath '{xpath}' failed: {e}")
-        
-        return elements
-    
-    def _detect_by_attributes(self, query: DOMQuery, page_context: Dict[str, Any]) -> List[ElementInfo]:
-        """Detect elements by their attributes"""
-        elements = []
-        
-        # Build attribute-based selectors
-        for attr_name, attr_value in query.target_attributes.items():
-            if attr_name in ['id', 'class', 'data-*', 'aria-*', 'role']:
-                selector = f"[{attr_name}='{attr_value}']"
-                try:
-                    raw_elements = self._execute_browser_query(f"document.querySelectorAll('{selector}')")
-                    
-                    for raw_element in raw_elements:
-                        element_info = self._create_element_info(raw_element, SelectorType.ATTRIBUTE, selector)
-                        if self._matches_query_criteria(element_info, query):
-                            elements.append(element_info)
-                            
-                except Exception as e:
-                    logger.debug(f"Attribute selector '{selector}' failed: {e}")
-        
-        return elements
-    
-    def _detect_by_text_content(self, query: DOMQuery, page_context: Dict[str, Any]) -> List[ElementInfo]:
-        """Detect elements by their text content"""
-        elements = []
-        
-        for text_pattern in query.text_patterns:
-            try:
-                # Create XPath for text matching
-                xpath = f"//*[contains(text(), '{text_pattern}')]"
-                raw_elements = self._execute_browser_query(
-                    f"document.evaluate('{xpath}', document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null)"
-                )
-                
-                for raw_element in raw_elements:
-                    element_info = self._create_element_info(raw_element, SelectorType.TEXT, text_pattern)
-                    if self._matches_query_criteria(element_info, query):
-                        elements.append(element_info)
-                        
-            except Exception as e:
-                logger.debug(f"Text pattern '{text_pattern}' failed: {e}")
-        
-        return elements
-    
-    def _detect_by_visual_position(self, query: DOMQuery, page_context: Dict[str, Any]) -> List[ElementInfo]:
-        """Detect elements by their visual position"""
-        elements = []
-        
-        # Get elements at specific coordinates
-        target_position = query.target_attributes.get('position')
-        if target_position:
-            x, y = target_position.get('x', 0), target_position.get('y', 0)
-            tolerance = query.position_tolerance
-            
-            try:
-                # Get element at coordinates (mock implementation)
-                script = f"document.elementFromPoint({x}, {y})"
-                raw_element = self._execute_browser_query(script)
-                
-                if raw_element:
-                    element_info = self._create_element_info(raw_element, SelectorType.CSS, f"position({x},{y})")
-                    
-                    # Check if position is within tolerance
-                    element_x = element_info.position.get('x', 0)
-                    element_y = element_info.position.get('y', 0)
-                    
-                    if (abs(element_x - x) <= tolerance and 
-                        abs(element_y - y) <= tolerance and
-                        self._matches_query_criteria(element_info, query)):
-                        elements.append(element_info)
-                        
-            except Exception as e:
-                logger.debug(f"Position detection failed: {e}")
-        
-        return elements
-    
-    def _detect_by_ai_semantic(self, query: DOMQuery, page_context: Dict[str, Any]) -> List[ElementInfo]:
-        """Detect elements using AI semantic analysis"""
-        elements = []
-        
-        # This would integrate with AI/ML models for semantic understanding
-        # For now, implement rule-based semantic matching
-        
-        semantic_hints = query.target_attributes.get('semantic_role', [])
-        if not isinstance(semantic_hints, list):
-            semantic_hints = [semantic_hints]
-        
-        for hint in semantic_hints:
-            try:
-                # Map semantic roles to likely selectors
-                semantic_selectors = self._map_semantic_to_selectors(hint)
-                
-                for selector in semantic_selectors:
-                    raw_elements = self._execute_browser_query(f"document.querySelectorAll('{selector}')")
-                    
-                    for raw_element in raw_elements:
-                        element_info = self._create_element_info(raw_element, SelectorType.COMPOSITE, selector)
-                        # Add semantic confidence scoring
-                        element_info.interaction_confidence = self._calculate_semantic_confidence(element_info, hint)
-                        
-                        if (element_info.interaction_confidence >= self.confidence_threshold and
-                            self._matches_query_criteria(element_info, query)):
-                            elements.append(element_info)
-                            
-            except Exception as e:
-                logger.debug(f"Semantic detection for '{hint}' failed: {e}")
-        
-        return elements
-    
     def _generate_css_selectors(self, target_attributes: Dict[str, Any]) -> List[str]:
         """Generate CSS selectors from target attributes"""
         selectors = []
@@ -454,13 +343,7 @@ class DOMInspector:
         confidence = 0.0
         
         # Tag name matching
-        tag_scores = {
-            'button': {'button': 0.9, 'input': 0.7, 'a': 0.3},
-            'link': {'a': 0.9, 'button': 0.2},
-            'input': {'input': 0.9, 'textarea': 0.8, 'select': 0.7},
-            'form': {'form': 0.9, 'div': 0.2},
-            'image': {'img': 0.9, 'svg': 0.7, 'canvas': 0.5}
-        }
+        tag_scores = self.SEMANTIC_TAG_SCORES
         
         if semantic_role in tag_scores:
             confidence += tag_scores[semantic_role].get(element_info.tag_name, 0.1)
@@ -478,12 +361,7 @@ class DOMInspector:
         
         # Text content matching
         text_lower = element_info.text_content.lower()
-        role_keywords = {
-            'button': ['click', 'submit', 'save', 'cancel', 'ok', 'continue'],
-            'link': ['read more', 'learn more', 'view', 'details'],
-            'search': ['search', 'find', 'query'],
-            'menu': ['menu', 'options', 'settings']
-        }
+        role_keywords = self.SEMANTIC_KEYWORDS
         
         if semantic_role in role_keywords:
             for keyword in role_keywords[semantic_role]:
@@ -493,10 +371,21 @@ class DOMInspector:
         
         return min(confidence, 1.0)
     
-    def _execute_browser_query(self, script: str) -> List[Dict[str, Any]]:
-        """Execute JavaScript query in browser"""
-        # Mock implementation - in real implementation would use selenium, CDP, or similar
-        # This would communicate with browser extension or automation driver
+    def _execute_browser_query(self, script: str, tab_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a JavaScript expression in the browser and return its value.
+        
+        Backends taking a tab_id (the DevTools controller, the extension
+        bridge) evaluate the expression; WebDriver's execute_script(script,
+        *args) runs a function body, so it gets `return (<expression>);`.
+        """
+        if self.browser_interface is not None and hasattr(self.browser_interface, 'execute_script'):
+            is_connected = getattr(self.browser_interface, 'is_connected', None)
+            if is_connected is None or is_connected(tab_id):
+                execute_script = self.browser_interface.execute_script
+                if self._accepts_tab_id(execute_script):
+                    return execute_script(script, tab_id=tab_id)
+                return execute_script(f"return ({script});")
         
         # Return mock elements for demonstration
         return [
@@ -510,6 +399,14 @@ class DOMInspector:
             }
         ]
     
+    @staticmethod
+    def _accepts_tab_id(execute_script: Callable) -> bool:
+        """Whether a backend's execute_script takes a tab_id keyword"""
+        try:
+            return 'tab_id' in inspect.signature(execute_script).parameters
+        except (TypeError, ValueError):
+            return False
+    
     def _create_element_info(self, raw_element: Dict[str, Any], 
                            selector_type: SelectorType, 
                            selector: str) -> ElementInfo:
@@ -703,13 +600,70 @@ class DOMInspector:
         
         return recommendations
     
+    def read_page_state(self, tab_id: Any) -> Dict[str, Any]:
+        """
+        Install the tab's DOM observer if needed and read its state.
+        
+        A tab whose state cannot be read is marked dirty, so its cached
+        elements are revalidated rather than trusted.
+        """
+        self.query_stats['page_state_reads'] += 1
+        try:
+            state = self._execute_browser_query(DOM_OBSERVER_SCRIPT.strip(), tab_id)
+        except Exception as e:
+            logger.debug(f"Could not read page state of tab {tab_id}: {e}")
+            state = None
+        
+        if not isinstance(state, dict):
+            self.element_cache.mark_dirty(tab_id)
+            return {}
+        return {'url': state.get('url'), 'dom_version': state.get('version'), 'document': state.get('document')}
+    
+    def _execute_with_page_state(self, script: str, tab_id: Any, page_context: Dict[str, Any]) -> Any:
+        """
+        Run a lookup script and apply the page state reported with its result.
+        
+        State given by the caller in page_context takes precedence; a backend
+        that does not report state marks the tab dirty.
+        """
+        response = self._execute_browser_query(with_page_state(script), tab_id)
+        if not isinstance(response, dict) or not isinstance(response.get('state'), dict):
+            self.element_cache.mark_dirty(tab_id)
+            return response
+        
+        state = response['state']
+        self.element_cache.observe(tab_id, page_context.get('url', state.get('url')), state.get('version'),
+                                   page_context.get('document', state.get('document')))
+        return response.get('value')
+    
+    def notify_tab_attached(self, tab_id: Any) -> None:
+        """Start tracking DOM changes in a tab the automation will work in"""
+        self.read_page_state(tab_id)
+    
+    def notify_navigation(self, tab_id: Any = None, url: Optional[str] = None) -> None:
+        """Drop cached elements of a tab that navigated"""
+        self.element_cache.invalidate_tab(tab_id)
+        if url is not None:
+            self.element_cache.observe(tab_id, url=url)
+    
+    def notify_dom_mutation(self, tab_id: Any = None) -> None:
+        """Mark a tab's cached elements for revalidation after its DOM changed"""
+        self.element_cache.mark_dirty(tab_id)
+    
+    def notify_tab_closed(self, tab_id: Any) -> None:
+        """Forget cached elements of a closed tab"""
+        self.element_cache.forget_tab(tab_id)
+    
     def _generate_cache_key(self, query: DOMQuery) -> str:
         """Generate cache key for query"""
         key_parts = [
             ','.join(s.value for s in query.strategies),
             json.dumps(query.target_attributes, sort_keys=True),
             ','.join(query.text_patterns),
-            str(query.timeout)
+            str(query.timeout),
+            str(query.include_hidden),
+            json.dumps(query.css_properties, sort_keys=True),
+            str(query.position_tolerance)
         ]
         return '|'.join(key_parts)
     
@@ -771,13 +725,22 @@ class DOMInspector:
             return {"status": "No inspection data available"}
         
         times = self.performance_stats['inspection_times']
+        element_cache = self.element_cache.get_cache_stats()
         
         return {
             "total_inspections": len(times),
             "average_time": sum(times) / len(times),
             "min_time": min(times),
             "max_time": max(times),
-            "cache_hits": len(self.element_cache),
+            "cache_hits": self.element_cache.stats['hits'],
+            "cache_hit_rate": element_cache['hit_rate'],
+            "revalidations": element_cache['revalidations'],
+            "avg_revalidation_time": element_cache['avg_revalidation_time'],
+            "element_cache": element_cache,
             "cached_selectors": len(self.selector_cache),
+            "browser_round_trips": self.query_stats['round_trips'],
+            "records_returned": self.query_stats['records_returned'],
+            "compiled_queries": self.query_compiler.stats['compiled'],
+            "compiled_query_hits": self.query_compiler.stats['cache_hits'],
             "strategy_priorities": self.strategy_priorities
         }
\ No newline at end of file
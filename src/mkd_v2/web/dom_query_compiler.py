@@ -0,0 +1,280 @@
+"""
+DOM Query Compiler
+
+Turns a whole DOMQuery into one injected script:
+- Every detection strategy evaluated in-page in a single browser round-trip
+- Each selector/XPath evaluated once even when several strategies share it
+- Filtering, scoring and deduplication done in-page
+- Only the top-k compact element records are returned
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import json
+import logging
+
+if TYPE_CHECKING:
+    from .dom_inspector import DOMInspector, DOMQuery
+
+logger = logging.getLogger(__name__)
+
+
+# In-page evaluator; the compiled query is passed in as `spec`
+EVALUATOR_SOURCE = r"""
+(function (spec) {
+    var found = new Map();
+    var order = 0;
+    var memo = {};
+    
+    function run(kind, expr) {
+        var key = kind + '\u0000' + expr;
+        if (memo[key]) return memo[key];
+        var out = [];
+        try {
+            if (kind === 'xpath') {
+                var snapshot = document.evaluate(expr, document, null, 7, null);
+                for (var i = 0; i < snapshot.snapshotLength; i++) out.push(snapshot.snapshotItem(i));
+            } else {
+                out = Array.prototype.slice.call(document.querySelectorAll(expr));
+            }
+        } catch (e) {}
+        memo[key] = out;
+        return out;
+    }
+    
+    function semantic(el, role) {
+        var table = spec.semantic[role] || {};
+        var score = 0;
+        var tag = el.tagName.toLowerCase();
+        if (table.tags) score += (tag in table.tags) ? table.tags[tag] : 0.1;
+        if (el.getAttribute('role') === role) score += 0.8;
+        var classes = (el.getAttribute('class') || '').toLowerCase().split(/\s+/);
+        for (var i = 0; i < classes.length; i++) {
+            if (classes[i] && classes[i].indexOf(role) >= 0) { score += 0.3; break; }
+        }
+        var text = (el.textContent || '').toLowerCase();
+        var keywords = table.keywords || [];
+        for (var j = 0; j < keywords.length; j++) {
+            if (text.indexOf(keywords[j]) >= 0) { score += 0.2; break; }
+        }
+        return Math.min(score, 1.0);
+    }
+    
+    function add(el, q, label) {
+        if (!el || el.nodeType !== 1) return;
+        var hit = found.get(el);
+        if (!hit) {
+            hit = {el: el, order: order++, strategies: [], type: q.type, selector: label,
+                   priority: q.priority, semantic: null, structural: false};
+            found.set(el, hit);
+        }
+        if (hit.strategies.indexOf(q.strategy) < 0) hit.strategies.push(q.strategy);
+        if (q.priority > hit.priority) {
+            hit.priority = q.priority;
+            hit.type = q.type;
+            hit.selector = label;
+        }
+        if (q.role) {
+            hit.semantic = Math.max(hit.semantic || 0, semantic(el, q.role));
+        } else {
+            hit.structural = true;
+        }
+    }
+    
+    spec.queries.forEach(function (q) {
+        run(q.kind, q.expr).forEach(function (el) { add(el, q, q.label || q.expr); });
+    });
+    
+    if (spec.point) {
+        var p = spec.point;
+        var atPoint = document.elementFromPoint(p.x, p.y);
+        if (atPoint) {
+            var r = atPoint.getBoundingClientRect();
+            if (Math.abs(r.x - p.x) <= p.tolerance && Math.abs(r.y - p.y) <= p.tolerance) {
+                add(atPoint, p, 'position(' + p.x + ',' + p.y + ')');
+            }
+        }
+    }
+    
+    var patterns = spec.textPatterns;
+    var records = [];
+    found.forEach(function (hit) {
+        var el = hit.el;
+        var style = window.getComputedStyle(el);
+        var hidden = style.display === 'none' || style.visibility === 'hidden' || style.opacity === '0';
+        if (hidden && !spec.includeHidden) return;
+        
+        for (var prop in spec.cssProperties) {
+            if (style.getPropertyValue(prop) !== spec.cssProperties[prop]) return;
+        }
+        
+        var text = (el.textContent || '').trim();
+        if (patterns.length) {
+            var lower = text.toLowerCase();
+            if (!patterns.some(function (t) { return lower.indexOf(t) >= 0; })) return;
+        }
+        
+        // Semantic-only candidates must be confident enough on their own
+        if (!hit.structural && hit.semantic !== null && hit.semantic < spec.semanticThreshold) return;
+        
+        var rect = el.getBoundingClientRect();
+        var classAttr = el.getAttribute('class') || '';
+        var disabled = el.hasAttribute('disabled') && el.getAttribute('disabled') !== 'false';
+        var loading = /loading|spinner|pending/.test(classAttr.toLowerCase());
+        var state = hidden ? 0.1 : disabled ? 0.2 : loading ? 0.3 : 1.0;
+        
+        var score = 0.5 * state;
+        if (el.id) score += 0.3; else if (classAttr.trim()) score += 0.1;
+        if (rect.width > 0 && rect.height > 0) score += 0.1;
+        if (text) score += 0.1;
+        score = Math.min(score, 1.0);
+        if (!hit.structural && hit.semantic !== null) score = hit.semantic;
+        
+        var attributes = {};
+        for (var i = 0; i < el.attributes.length; i++) {
+            attributes[el.attributes[i].name] = el.attributes[i].value;
+        }
+        var styles = {display: style.display, visibility: style.visibility, opacity: style.opacity};
+        for (var name in spec.cssProperties) styles[name] = style.getPropertyValue(name);
+        
+        records.push({
+            tagName: el.tagName,
+            attributes: attributes,
+            textContent: text.slice(0, spec.maxText),
+            innerHTML: (el.innerHTML || '').slice(0, spec.maxText),
+            computedStyles: styles,
+            boundingRect: {x: rect.x, y: rect.y, width: rect.width, height: rect.height},
+            selectorType: hit.type,
+            selector: hit.selector,
+            strategies: hit.strategies,
+            score: score,
+            _priority: hit.priority,
+            _order: hit.order
+        });
+    });
+    
+    records.sort(function (a, b) {
+        return (b.score - a.score) || (b.strategies.length - a.strategies.length) ||
+               (b._priority - a._priority) || (a._order - b._order);
+    });
+    return records.slice(0, spec.topK).map(function (r) {
+        delete r._priority;
+        delete r._order;
+        return r;
+    });
+})
+"""
+
+
+@dataclass
+class CompiledQuery:
+    """A DOMQuery compiled into a single in-page script."""
+    script: str
+    spec: Dict[str, Any]
+    strategies: List[str]
+
+
+class DOMQueryCompiler:
+    """
+    Compiles DOMQuery objects into one self-contained evaluation script.
+    
+    Selector and XPath generation is delegated to the inspector so the
+    in-page evaluation matches what the per-strategy detectors produced.
+    Compiled scripts are cached per query.
+    """
+    
+    def __init__(self, inspector: 'DOMInspector', top_k: int = 5, max_text: int = 200,
+                 max_cached: int = 128):
+        self.inspector = inspector
+        self.top_k = top_k
+        self.max_text = max_text
+        self.max_cached = max_cached
+        self._cache: 'OrderedDict[str, CompiledQuery]' = OrderedDict()
+        self.stats = {
+            'compiled': 0,
+            'cache_hits': 0
+        }
+    
+    def compile(self, query: 'DOMQuery', top_k: Optional[int] = None) -> CompiledQuery:
+        """Compile a query (cached by query content)."""
+        top_k = top_k or self.top_k
+        cache_key = f"{self.inspector._generate_cache_key(query)}|{top_k}"
+        
+        compiled = self._cache.get(cache_key)
+        if compiled is not None:
+            self._cache.move_to_end(cache_key)
+            self.stats['cache_hits'] += 1
+            return compiled
+        
+        spec = self._build_spec(query, top_k)
+        script = f"{EVALUATOR_SOURCE.strip()}({json.dumps(spec)})"
+        compiled = CompiledQuery(script, spec, [s.value for s in query.strategies])
+        
+        self._cache[cache_key] = compiled
+        self.stats['compiled'] += 1
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        
+        return compiled
+    
+    def _build_spec(self, query: 'DOMQuery', top_k: int) -> Dict[str, Any]:
+        inspector = self.inspector
+        attributes = query.target_attributes
+        priorities = {s.value: p for s, p in inspector.strategy_priorities.items()}
+        strategies = {s.value for s in query.strategies}
+        queries: List[Dict[str, Any]] = []
+        
+        def add(strategy: str, kind: str, expr: str, selector_type: str, **extra):
+            queries.append(dict(strategy=strategy, kind=kind, expr=expr, type=selector_type,
+                                priority=priorities.get(strategy, 0), **extra))
+        
+        if 'css_selector' in strategies:
+            for selector in inspector._generate_css_selectors(attributes):
+                add('css_selector', 'css', selector, 'css')
+        
+        if 'xpath' in strategies:
+            for xpath in inspector._generate_xpath_expressions(attributes, query.text_patterns):
+                add('xpath', 'xpath', xpath, 'xpath')
+        
+        if 'attributes' in strategies:
+            for name, value in attributes.items():
+                if name in ['id', 'class', 'data-*', 'aria-*', 'role']:
+                    add('attributes', 'css', f"[{name}='{value}']", 'attribute')
+        
+        if 'text_content' in strategies:
+            for pattern in query.text_patterns:
+                add('text_content', 'xpath', f"//*[contains(text(), '{pattern}')]", 'text', label=pattern)
+        
+        semantic = {}
+        if 'ai_semantic' in strategies:
+            hints = attributes.get('semantic_role', [])
+            for hint in hints if isinstance(hints, list) else [hints]:
+                semantic[hint] = {
+                    'tags': inspector.SEMANTIC_TAG_SCORES.get(hint),
+                    'keywords': inspector.SEMANTIC_KEYWORDS.get(hint, [])
+                }
+                for selector in inspector._map_semantic_to_selectors(hint):
+                    add('ai_semantic', 'css', selector, 'composite', role=hint)
+        
+        point = None
+        position = attributes.get('position')
+        if 'visual_position' in strategies and position:
+            point = {
+                'strategy': 'visual_position', 'type': 'css',
+                'priority': priorities.get('visual_position', 0),
+                'x': position.get('x', 0), 'y': position.get('y', 0),
+                'tolerance': query.position_tolerance
+            }
+        
+        return {
+            'queries': queries,
+            'point': point,
+            'semantic': semantic,
+            'semanticThreshold': inspector.confidence_threshold,
+            'textPatterns': [p.lower() for p in query.text_patterns],
+            'cssProperties': query.css_properties,
+            'includeHidden': query.include_hidden,
+            'topK': top_k,
+            'maxText': self.max_text
+        }
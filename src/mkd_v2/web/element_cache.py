@@ -0,0 +1,213 @@
+"""
+Per-Tab Element Cache
+
+Keeps DOM inspection results reusable without trusting them blindly:
+- Entries scoped to a tab and bounded by a global LRU limit
+- Navigation drops every entry of the tab
+- DOM mutation signals mark a tab dirty instead of dropping its entries
+- An in-page MutationObserver counts DOM changes, reported with each lookup's own script
+- Entries of a dirty tab are revalidated in-page (still connected, same box) before reuse
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Tuple
+import json
+import time
+import logging
+
+if TYPE_CHECKING:
+    from .dom_inspector import ElementInfo
+
+logger = logging.getLogger(__name__)
+
+
+# Installs a MutationObserver that counts DOM changes (once per document) and reports
+# the page state: a token identifying the document, the change count and the URL
+DOM_OBSERVER_SCRIPT = """
+(function () {
+    if (!window.__mkdDomObserver) {
+        window.__mkdDomVersion = 0;
+        window.__mkdDomDocument = Math.random().toString(36).slice(2) + Date.now().toString(36);
+        window.__mkdDomObserver = new MutationObserver(function () { window.__mkdDomVersion++; });
+        window.__mkdDomObserver.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    }
+    return {document: window.__mkdDomDocument, version: window.__mkdDomVersion, url: location.href};
+})()
+"""
+
+
+def with_page_state(script: str) -> str:
+    """Wrap a lookup script so it also reports the page state: {value, state} in one round-trip."""
+    return f"({{value: ({script}), state: {DOM_OBSERVER_SCRIPT.strip()}}})"
+
+
+# Cheap reuse check: the cached selector still resolves to a connected element in the same place
+REVALIDATION_SOURCE = """
+(function (selector, box, tolerance) {
+    var el;
+    try { el = document.querySelector(selector); } catch (e) { return false; }
+    if (!el || !el.isConnected) return false;
+    var r = el.getBoundingClientRect();
+    return Math.abs(r.x - box.x) <= tolerance && Math.abs(r.y - box.y) <= tolerance &&
+           Math.abs(r.width - box.width) <= tolerance && Math.abs(r.height - box.height) <= tolerance;
+})
+"""
+
+
+@dataclass
+class CachedElement:
+    """An inspection result cached for one tab."""
+    element: 'ElementInfo'
+    selector: str
+    generation: int  # Tab generation the entry was last known valid at
+    stored_at: float = field(default_factory=time.time)
+
+
+class ElementCache:
+    """
+    Bounded per-tab cache of inspected elements.
+    
+    Each tab has a generation counter that mutation signals bump. An
+    entry stored at the current generation is reused as is; an older
+    entry needs a revalidation round-trip first.
+    """
+    
+    def __init__(self, max_entries: int = 256, tolerance: float = 2.0):
+        self.max_entries = max_entries
+        self.tolerance = tolerance
+        self._entries: 'OrderedDict[Tuple[Hashable, str], CachedElement]' = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._urls: Dict[Hashable, str] = {}
+        self._documents: Dict[Hashable, str] = {}
+        self._dom_versions: Dict[Hashable, Any] = {}
+        
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidations': 0,
+            'revalidation_failures': 0,
+            'revalidation_time': 0.0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def observe(self, tab_id: Hashable, url: Optional[str] = None, dom_version: Any = None,
+                document: Optional[str] = None) -> None:
+        """
+        Apply page state reported with a lookup.
+        
+        A new URL or document drops the tab's entries; a new DOM version
+        makes them revalidate before reuse.
+        """
+        if document is not None:
+            if tab_id in self._documents and self._documents[tab_id] != document:
+                self.invalidate_tab(tab_id)
+            self._documents[tab_id] = document
+        
+        if url is not None:
+            if tab_id in self._urls and self._urls[tab_id] != url:
+                self.invalidate_tab(tab_id)
+            self._urls[tab_id] = url
+        
+        if dom_version is not None:
+            if tab_id in self._dom_versions and self._dom_versions[tab_id] != dom_version:
+                self.mark_dirty(tab_id)
+            self._dom_versions[tab_id] = dom_version
+    
+    def lookup(self, tab_id: Hashable, key: str,
+               revalidate: Callable[[str], Any], state_known: bool = True) -> Optional['ElementInfo']:
+        """
+        Cached element for a query, revalidated first if the tab changed.
+        
+        Args:
+            tab_id: Tab the query runs in
+            key: Query cache key
+            revalidate: Runs a script in the tab and returns its result; it
+                may observe() page state reported with it
+            state_known: False when the tab's current state was not observed,
+                so even an entry of a clean tab is revalidated
+        
+        Returns:
+            The element if it can be reused, otherwise None
+        """
+        entry = self._entries.get((tab_id, key))
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        
+        if not state_known or entry.generation != self._generations.get(tab_id, 0):
+            started = time.perf_counter()
+            try:
+                valid = revalidate(self._revalidation_script(entry)) is True
+            except Exception as e:
+                logger.debug(f"Element revalidation failed: {e}")
+                valid = False
+            self.stats['revalidations'] += 1
+            self.stats['revalidation_time'] += time.perf_counter() - started
+            
+            # State observed with the revalidation may have dropped the entry (navigation)
+            if not valid or (tab_id, key) not in self._entries:
+                self._entries.pop((tab_id, key), None)
+                self.stats['revalidation_failures'] += 1
+                self.stats['misses'] += 1
+                return None
+            entry.generation = self._generations.get(tab_id, 0)
+        
+        self._entries.move_to_end((tab_id, key))
+        self.stats['hits'] += 1
+        return entry.element
+    
+    def put(self, tab_id: Hashable, key: str, element: 'ElementInfo', selector: str) -> None:
+        """Cache an element found for a query in a tab."""
+        self._entries[(tab_id, key)] = CachedElement(element, selector, self._generations.get(tab_id, 0))
+        self._entries.move_to_end((tab_id, key))
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+    
+    def mark_dirty(self, tab_id: Hashable) -> None:
+        """The tab's DOM changed: its entries need revalidation before reuse."""
+        self._generations[tab_id] = self._generations.get(tab_id, 0) + 1
+    
+    def invalidate_tab(self, tab_id: Hashable) -> int:
+        """The tab navigated: drop all its entries; returns how many were dropped."""
+        keys = [k for k in self._entries if k[0] == tab_id]
+        for k in keys:
+            del self._entries[k]
+        self._dom_versions.pop(tab_id, None)
+        self.mark_dirty(tab_id)
+        self.stats['invalidations'] += 1
+        return len(keys)
+    
+    def forget_tab(self, tab_id: Hashable) -> None:
+        """The tab closed: drop its entries and state."""
+        self.invalidate_tab(tab_id)
+        self._generations.pop(tab_id, None)
+        self._urls.pop(tab_id, None)
+        self._documents.pop(tab_id, None)
+    
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        stats = self.stats.copy()
+        stats['size'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        stats['tabs'] = len({k[0] for k in self._entries})
+        stats['tracked_tabs'] = len(self._generations)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['avg_revalidation_time'] = (stats['revalidation_time'] / stats['revalidations']
+                                          if stats['revalidations'] else 0.0)
+        return stats
+    
+    def _revalidation_script(self, entry: CachedElement) -> str:
+        box = {k: entry.element.position.get(k, 0) for k in ('x', 'y', 'width', 'height')}
+        return f"{REVALIDATION_SOURCE.strip()}({json.dumps(entry.selector)}, {json.dumps(box)}, {self.tolerance})"
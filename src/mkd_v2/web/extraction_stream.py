@@ -0,0 +1,477 @@
+"""
+Streaming Data Extraction
+
+Extracts large tables and listings without holding them in memory:
+- In-page extractor returns rows in bounded chunks (offset/limit)
+- Rows appended to JSONL, CSV or Parquet sinks as they arrive
+- Bounded queue between page and sink for backpressure
+- Pagination driven as a generator pipeline: pages -> chunks -> sink
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+import os
+import csv
+import json
+import time
+import queue
+import logging
+import threading
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pyarrow = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from .javascript_injector import JavaScriptInjector, ScriptContext
+
+logger = logging.getLogger(__name__)
+
+
+# Returns rows [offset, offset + limit) of the page; the row list is kept in-page between chunks
+ROW_EXTRACTOR_SOURCE = r"""
+(function (spec) {
+    var state = window.__mkdExtractRows;
+    if (spec.offset === 0 || !state || state.selector !== spec.rowSelector) {
+        state = window.__mkdExtractRows = {
+            selector: spec.rowSelector,
+            rows: Array.prototype.slice.call(document.querySelectorAll(spec.rowSelector))
+        };
+    }
+    var rows = state.rows;
+    var end = Math.min(rows.length, spec.offset + spec.limit);
+    var out = [];
+    for (var i = spec.offset; i < end; i++) {
+        var record = {};
+        for (var key in spec.fields) {
+            var f = spec.fields[key];
+            var el = f.selector ? rows[i].querySelector(f.selector) : rows[i];
+            var value = null;
+            if (el) {
+                value = f.attribute ? el.getAttribute(f.attribute)
+                      : f.property ? el[f.property]
+                      : (el.textContent || '').trim();
+            }
+            if (typeof value === 'string' && value.length > spec.maxText) value = value.slice(0, spec.maxText);
+            record[key] = value;
+        }
+        out.push(record);
+    }
+    if (end >= rows.length) window.__mkdExtractRows = null;
+    return {rows: out, total: rows.length};
+})
+"""
+
+# Identifies the rows currently shown, to tell when a next-page click has rendered
+PAGE_SIGNATURE_SOURCE = r"""
+(function (rowSelector) {
+    var rows = document.querySelectorAll(rowSelector);
+    var first = rows.length ? (rows[0].textContent || '').trim().slice(0, 200) : '';
+    var last = rows.length ? (rows[rows.length - 1].textContent || '').trim().slice(0, 200) : '';
+    return rows.length + '|' + first + '|' + last;
+})
+"""
+
+# Clicks the next-page control; false when there is none or it is disabled
+NEXT_PAGE_SOURCE = r"""
+(function (selector) {
+    var el = document.querySelector(selector);
+    if (!el || el.disabled || el.getAttribute('aria-disabled') === 'true') return false;
+    el.click();
+    return true;
+})
+"""
+
+
+class RowSink(ABC):
+    """Append-only destination for extracted rows."""
+    
+    format = ""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.rows_written = 0
+    
+    @abstractmethod
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """Append a chunk of rows."""
+        pass
+    
+    def close(self) -> None:
+        pass
+    
+    @property
+    def bytes_written(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+
+class JSONLSink(RowSink):
+    """One JSON object per line."""
+    
+    format = "jsonl"
+    
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, 'w', encoding='utf-8')
+    
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._file.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+        self._file.flush()
+        self.rows_written += len(rows)
+    
+    def close(self) -> None:
+        self._file.close()
+
+
+class CSVSink(RowSink):
+    """CSV with the header taken from the configured fields (or the first row)."""
+    
+    format = "csv"
+    
+    def __init__(self, path: str, fieldnames: Optional[List[str]] = None):
+        super().__init__(path)
+        self.fieldnames = fieldnames
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = None
+    
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames or list(rows[0]),
+                                          extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+        self._file.flush()
+        self.rows_written += len(rows)
+    
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink(RowSink):
+    """Parquet file written one row group at a time (requires pyarrow)."""
+    
+    format = "parquet"
+    
+    def __init__(self, path: str, row_group_size: int = 10000):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow not available - Parquet output disabled")
+        super().__init__(path)
+        self.row_group_size = row_group_size
+        self._buffer: List[Dict[str, Any]] = []
+        self._writer = None
+    
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+    
+    def close(self) -> None:
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+    
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        table = pyarrow.Table.from_pylist(self._buffer, schema=self._writer.schema if self._writer else None)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+
+SINK_TYPES = {
+    'jsonl': JSONLSink,
+    'csv': CSVSink,
+    'parquet': ParquetSink
+}
+
+
+def create_sink(path: str, format: Optional[str] = None, fields: Optional[List[str]] = None) -> RowSink:
+    """Create a sink; the format defaults to the file extension."""
+    format = (format or os.path.splitext(path)[1].lstrip('.') or 'jsonl').lower()
+    if format == 'json':
+        format = 'jsonl'
+    if format not in SINK_TYPES:
+        raise ValueError(f"Unsupported extraction sink format: {format}")
+    
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    if format == 'csv':
+        return CSVSink(path, fieldnames=fields)
+    return SINK_TYPES[format](path)
+
+
+class SinkWriter:
+    """
+    Writes row chunks to a sink on a background thread.
+    
+    At most `max_pending` chunks wait between the page and the sink:
+    `put` blocks when the sink falls behind, which stops further page
+    reads until it catches up.
+    """
+    
+    _CLOSE = object()
+    
+    def __init__(self, sink: RowSink, max_pending: int = 4):
+        self.sink = sink
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._failure: Optional[BaseException] = None
+        self.stats = {
+            'chunks': 0,
+            'backpressure_waits': 0,
+            'backpressure_time': 0.0
+        }
+        self._thread = threading.Thread(target=self._run, name="extraction-sink", daemon=True)
+        self._thread.start()
+    
+    def put(self, rows: List[Dict[str, Any]]) -> None:
+        """Queue a chunk, waiting while the sink is behind."""
+        if self._failure is not None:
+            raise RuntimeError(f"Extraction sink failed: {self._failure}")
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            started = time.perf_counter()
+            self._queue.put(rows)
+            self.stats['backpressure_waits'] += 1
+            self.stats['backpressure_time'] += time.perf_counter() - started
+        self.stats['chunks'] += 1
+    
+    def close(self) -> None:
+        """Drain pending chunks and close the sink."""
+        self._queue.put(self._CLOSE)
+        self._thread.join()
+        if self._failure is not None:
+            raise RuntimeError(f"Extraction sink failed: {self._failure}")
+    
+    def _run(self) -> None:
+        while True:
+            rows = self._queue.get()
+            if rows is self._CLOSE:
+                break
+            if self._failure is None:
+                try:
+                    self.sink.write_rows(rows)
+                except Exception as e:
+                    logger.error(f"Extraction sink write failed: {e}")
+                    self._failure = e
+        try:
+            self.sink.close()
+        except Exception as e:
+            self._failure = self._failure or e
+
+
+@dataclass
+class ExtractionSpec:
+    """What to extract and how to page through it."""
+    row_selector: str
+    fields: Dict[str, Any]
+    chunk_size: int = 200
+    max_text: int = 10000
+    next_selector: Optional[str] = None
+    url_template: Optional[str] = None
+    max_pages: int = 1
+    page_timeout: float = 10.0
+    
+    @classmethod
+    def from_parameters(cls, parameters: Dict[str, Any]) -> 'ExtractionSpec':
+        """Build from extract_data action parameters."""
+        pagination = parameters.get('pagination', {})
+        paginated = pagination.get('next_selector') or pagination.get('url_template')
+        return cls(
+            row_selector=parameters['rows'],
+            fields=parameters.get('extractors', {}),
+            chunk_size=parameters.get('chunk_size', 200),
+            max_text=parameters.get('max_text', 10000),
+            next_selector=pagination.get('next_selector'),
+            url_template=pagination.get('url_template'),
+            max_pages=pagination.get('max_pages', 100 if paginated else 1),
+            page_timeout=pagination.get('timeout', 10.0)
+        )
+    
+    def field_specs(self) -> Dict[str, Dict[str, Any]]:
+        """Field extractors in the in-page form; plain strings are selectors."""
+        return {key: {'selector': config} if isinstance(config, str) else config
+                for key, config in self.fields.items()}
+
+
+@dataclass
+class ExtractionSummary:
+    """Outcome of a streaming extraction; stands in for the rows themselves."""
+    path: str
+    format: str
+    rows: int = 0
+    pages: int = 0
+    chunks: int = 0
+    bytes_written: int = 0
+    backpressure_waits: int = 0
+    execution_time: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'format': self.format,
+            'rows': self.rows,
+            'pages': self.pages,
+            'chunks': self.chunks,
+            'bytes_written': self.bytes_written,
+            'backpressure_waits': self.backpressure_waits,
+            'execution_time': self.execution_time,
+            'errors': list(self.errors)
+        }
+
+
+class StreamingExtractor:
+    """
+    Pulls rows out of a page chunk by chunk and streams them to a sink.
+    
+    Only one chunk per page read and `max_pending` chunks per sink are
+    held at once, so memory use does not grow with the extraction.
+    """
+    
+    def __init__(self, injector: 'JavaScriptInjector', max_pending: int = 4, poll_interval: float = 0.1):
+        self.injector = injector
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.stats = {
+            'extractions': 0,
+            'round_trips': 0,
+            'chunks': 0,
+            'rows': 0,
+            'pages': 0,
+            'backpressure_waits': 0
+        }
+    
+    def extract_to_sink(self, context: 'ScriptContext', spec: ExtractionSpec, sink: RowSink,
+                        navigate: Optional[Callable[[str], None]] = None,
+                        on_page_change: Optional[Callable[[], None]] = None) -> ExtractionSummary:
+        """
+        Run the extraction pipeline into a sink.
+        
+        Args:
+            context: Script context of the tab to extract from
+            spec: Rows, fields and pagination
+            sink: Destination; closed when the extraction ends
+            navigate: Loads a URL in the tab (for `url_template` pagination)
+            on_page_change: Called after a next-page click changed the page
+        
+        Returns:
+            Summary with the sink path and row counts
+        """
+        started = time.perf_counter()
+        summary = ExtractionSummary(path=sink.path, format=sink.format)
+        writer = SinkWriter(sink, self.max_pending)
+        self.stats['extractions'] += 1
+        
+        try:
+            for page in self.iter_pages(context, spec, navigate, on_page_change):
+                summary.pages = page
+                for rows in self.iter_chunks(context, spec):
+                    writer.put(rows)
+                    summary.chunks += 1
+                    summary.rows += len(rows)
+        except Exception as e:
+            logger.error(f"Streaming extraction failed: {e}")
+            summary.errors.append(str(e))
+        finally:
+            try:
+                writer.close()
+            except Exception as e:
+                summary.errors.append(str(e))
+        
+        summary.bytes_written = sink.bytes_written
+        summary.backpressure_waits = writer.stats['backpressure_waits']
+        summary.execution_time = time.perf_counter() - started
+        self.stats['backpressure_waits'] += summary.backpressure_waits
+        logger.info(f"Extracted {summary.rows} rows from {summary.pages} pages to {summary.path}")
+        return summary
+    
+    def iter_pages(self, context: 'ScriptContext', spec: ExtractionSpec,
+                   navigate: Optional[Callable[[str], None]] = None,
+                   on_page_change: Optional[Callable[[], None]] = None) -> Iterator[int]:
+        """
+        Yield page numbers, moving the tab to each page before it is yielded.
+        
+        Pagination ends when there is no next-page control or, for URL
+        templates, at the first page without rows.
+        """
+        for page in range(1, spec.max_pages + 1):
+            if page > 1:
+                if spec.url_template and navigate is not None:
+                    navigate(spec.url_template.format(page=page))
+                    signature = self._run(context, PAGE_SIGNATURE_SOURCE, spec.row_selector)
+                    if not isinstance(signature, str) or signature.startswith('0|'):
+                        return
+                elif spec.next_selector:
+                    if not self._next_page(context, spec):
+                        return
+                    if on_page_change is not None:
+                        on_page_change()
+                else:
+                    return
+            
+            self.stats['pages'] += 1
+            yield page
+    
+    def iter_chunks(self, context: 'ScriptContext', spec: ExtractionSpec) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the rows of the current page, `chunk_size` at a time."""
+        fields = spec.field_specs()
+        offset = 0
+        while True:
+            chunk = self._run(context, ROW_EXTRACTOR_SOURCE, {
+                'rowSelector': spec.row_selector,
+                'fields': fields,
+                'offset': offset,
+                'limit': spec.chunk_size,
+                'maxText': spec.max_text
+            })
+            rows = chunk.get('rows') if isinstance(chunk, dict) else None
+            if not rows:
+                return
+            
+            self.stats['chunks'] += 1
+            self.stats['rows'] += len(rows)
+            yield rows
+            
+            offset += len(rows)
+            if offset >= chunk.get('total', 0):
+                return
+    
+    def get_extraction_stats(self) -> Dict[str, Any]:
+        """Get streaming extraction statistics."""
+        return self.stats.copy()
+    
+    def _next_page(self, context: 'ScriptContext', spec: ExtractionSpec) -> bool:
+        """Click the next-page control and wait until different rows are shown."""
+        before = self._run(context, PAGE_SIGNATURE_SOURCE, spec.row_selector)
+        if self._run(context, NEXT_PAGE_SOURCE, spec.next_selector) is not True:
+            return False
+        
+        deadline = time.time() + spec.page_timeout
+        while time.time() < deadline:
+            if self._run(context, PAGE_SIGNATURE_SOURCE, spec.row_selector) != before:
+                return True
+            time.sleep(self.poll_interval)
+        
+        logger.warning(f"Next page did not render within {spec.page_timeout}s; stopping pagination")
+        return False
+    
+    def _run(self, context: 'ScriptContext', source: str, argument: Any) -> Any:
+        self.stats['round_trips'] += 1
+        script_result = self.injector.inject_script(f"return {source.strip()}({json.dumps(argument)});", context)
+        if not script_result.success:
+            raise RuntimeError("; ".join(script_result.errors) or "Extraction script failed")
+        return script_result.result_value
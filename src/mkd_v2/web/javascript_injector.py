@@ -7,10 +7,12 @@ Provides advanced JavaScript injection and execution capabilities:
 - Asynchronous script execution with promises
 - Script result handling and serialization
 - Security sandboxing and validation
+- Per-tab library residency: library sources are sent only where missing
+- Bounded script cache and fixed-size latency statistics
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional, Callable, Union
+from typing import Dict, List, Any, Optional, Callable, Union, Tuple
 from enum import Enum
 import time
 import json
@@ -18,10 +20,15 @@ import re
 import logging
 import asyncio
 import hashlib
-from collections import defaultdict
+import math
+from collections import OrderedDict, deque
 
 logger = logging.getLogger(__name__)
 
+# Page-side registry of installed libraries: library id -> content hash
+LIBRARY_REGISTRY = "window.__mkdLibs"
+MISSING_LIBRARY_MARKER = "mkdMissingLibrary"
+
 
 class ScriptType(Enum):
     """Types of JavaScript scripts"""
@@ -95,20 +102,32 @@ class ScriptLibrary:
 class JavaScriptInjector:
     """Advanced JavaScript injection and execution system"""
     
-    def __init__(self, browser_interface=None):
+    def __init__(self, browser_interface=None, max_cached_scripts: int = 256):
         self.browser_interface = browser_interface
-        self.script_cache: Dict[str, str] = {}
+        self.max_cached_scripts = max_cached_scripts
+        self.script_cache: 'OrderedDict[str, str]' = OrderedDict()
+        self._script_ids: 'OrderedDict[str, str]' = OrderedDict()  # Memoised ids of repeated scripts
         self.libraries: Dict[str, ScriptLibrary] = {}
         self.execution_contexts: Dict[str, ScriptContext] = {}
         self.active_scripts: Dict[str, Dict[str, Any]] = {}
         self.security_validator = ScriptSecurityValidator()
         self.performance_monitor = ScriptPerformanceMonitor()
         
+        # Libraries believed installed per tab/frame/world: library id -> content hash
+        self.installed_libraries: Dict[Tuple, Dict[str, str]] = {}
+        
         # Pre-loaded utility libraries
         self._load_builtin_libraries()
         
         # Execution statistics
-        self.execution_stats = defaultdict(list)
+        self.execution_times = LatencyHistogram()
+        self.library_stats = {
+            'installs': 0,
+            'reuses': 0,
+            'bytes_sent': 0,
+            'bytes_saved': 0,
+            'missing_library_retries': 0
+        }
     
     def _load_builtin_libraries(self) -> None:
         """Load built-in utility libraries"""
@@ -477,9 +496,9 @@ class JavaScriptInjector:
         )
         
         # Store libraries
-        self.libraries["dom_utils"] = dom_utils
-        self.libraries["automation_utils"] = automation_utils
-        self.libraries["debug_utils"] = debug_utils
+        for library in (dom_utils, automation_utils, debug_utils):
+            library.cache_key = hashlib.md5(library.source_code.encode()).hexdigest()
+            self.libraries[library.library_id] = library
     
     def inject_script(self, script: str, 
                      context: ScriptContext,
@@ -507,16 +526,20 @@ class JavaScriptInjector:
                 result.errors.append("Script failed security validation")
                 return result
             
-            # Prepare script with libraries
-            prepared_script = self._prepare_script_with_libraries(script, libraries or [])
+            # Prepare script with the libraries this tab does not have yet
+            library_ids = libraries or []
+            prepared_script, installing = self._prepare_script_with_libraries(script, library_ids, context)
+            execution_result = self._execute_prepared_script(prepared_script, context, async_execution)
+            
+            # The page lost libraries we believed resident (unobserved reload): resend them all
+            if self._reports_missing_library(execution_result):
+                self.library_stats['missing_library_retries'] += 1
+                self.installed_libraries.pop(self._residency_key(context), None)
+                prepared_script, installing = self._prepare_script_with_libraries(script, library_ids, context)
+                execution_result = self._execute_prepared_script(prepared_script, context, async_execution)
             
-            # Execute script
-            if async_execution:
-                # Handle asynchronous execution
-                execution_result = self._execute_async_script(prepared_script, context)
-            else:
-                # Synchronous execution
-                execution_result = self._execute_sync_script(prepared_script, context)
+            if execution_result.get('success', False) and installing:
+                self.installed_libraries.setdefault(self._residency_key(context), {}).update(installing)
             
             result.success = execution_result.get('success', False)
             result.result_value = execution_result.get('result')
@@ -528,49 +551,111 @@ class JavaScriptInjector:
             # Cache successful scripts
             if result.success and script_type in [ScriptType.FUNCTION, ScriptType.UTILITY]:
                 self.script_cache[script_id] = prepared_script
-            
-            # Monitor performance
-            self.performance_monitor.record_execution(script_id, result.execution_time, result.success)
-            
+                self.script_cache.move_to_end(script_id)
+                while len(self.script_cache) > self.max_cached_scripts:
+                    self.script_cache.popitem(last=False)
+        
         except Exception as e:
             logger.error(f"Script injection failed: {e}")
             result.errors.append(f"Injection error: {str(e)}")
         
         result.execution_time = time.time() - start_time
-        self.execution_stats['total_executions'].append(result.execution_time)
+        self.execution_times.record(result.execution_time)
+        
+        # Monitor performance
+        self.performance_monitor.record_execution(script_id, result.execution_time, result.success)
         
         return result
     
-    def _prepare_script_with_libraries(self, script: str, library_ids: List[str]) -> str:
-        """Prepare script by injecting required libraries"""
+    def _prepare_script_with_libraries(self, script: str, library_ids: List[str],
+                                       context: ScriptContext) -> Tuple[str, Dict[str, str]]:
+        """
+        Prepare script by injecting required libraries
         
-        # Collect library dependencies
-        all_libraries = set(library_ids)
-        for lib_id in library_ids:
-            if lib_id in self.libraries:
-                all_libraries.update(self.libraries[lib_id].dependencies)
+        Only libraries the context does not already hold (by content hash) are
+        sent; resident ones get a one-line presence check instead.
+        
+        Returns:
+            The prepared script and the libraries it installs (id -> hash)
+        """
+        installed = self.installed_libraries.get(self._residency_key(context), {})
+        installing: Dict[str, str] = {}
         
         # Build combined script
         script_parts = []
         
-        # Add library code
-        for lib_id in all_libraries:
-            if lib_id in self.libraries:
-                library = self.libraries[lib_id]
-                script_parts.append(f"// Library: {library.name} v{library.version}")
-                script_parts.append(library.source_code)
-                script_parts.append("")
+        # Add library code, dependencies first
+        for library in self._resolve_libraries(library_ids):
+            digest = library.cache_key or hashlib.md5(library.source_code.encode()).hexdigest()
+            if installed.get(library.library_id) == digest:
+                script_parts.append(
+                    f"if (({LIBRARY_REGISTRY} || {{}})[{json.dumps(library.library_id)}] !== {json.dumps(digest)}) "
+                    f"throw {json.dumps(f'{MISSING_LIBRARY_MARKER}:{library.library_id}')};"
+                )
+                self.library_stats['reuses'] += 1
+                self.library_stats['bytes_saved'] += len(library.source_code)
+                continue
+            
+            script_parts.append(f"// Library: {library.name} v{library.version}")
+            script_parts.append(library.source_code)
+            script_parts.append(f"({LIBRARY_REGISTRY} = {LIBRARY_REGISTRY} || {{}})"
+                                f"[{json.dumps(library.library_id)}] = {json.dumps(digest)};")
+            script_parts.append("")
+            installing[library.library_id] = digest
+            self.library_stats['installs'] += 1
+            self.library_stats['bytes_sent'] += len(library.source_code)
         
         # Add main script
         script_parts.append("// Main script")
         script_parts.append(script)
         
-        return "\n".join(script_parts)
+        return "\n".join(script_parts), installing
+    
+    def _resolve_libraries(self, library_ids: List[str]) -> List[ScriptLibrary]:
+        """Requested libraries and their dependencies, dependencies first"""
+        ordered: List[ScriptLibrary] = []
+        seen = set()
+        
+        def visit(lib_id: str) -> None:
+            if lib_id in seen or lib_id not in self.libraries:
+                return
+            seen.add(lib_id)
+            library = self.libraries[lib_id]
+            for dependency in library.dependencies:
+                visit(dependency)
+            ordered.append(library)
+        
+        for lib_id in library_ids:
+            visit(lib_id)
+        return ordered
+    
+    def _residency_key(self, context: ScriptContext) -> Tuple:
+        """Where injected libraries live: tab, frame and JavaScript world"""
+        return (context.tab_id or context.context_id, context.frame_id,
+                context.execution_context.value, context.isolated_world)
+    
+    def _reports_missing_library(self, execution_result: Dict[str, Any]) -> bool:
+        return any(MISSING_LIBRARY_MARKER in str(error) for error in execution_result.get('errors', []))
+    
+    def _execute_prepared_script(self, script: str, context: ScriptContext,
+                                 async_execution: bool) -> Dict[str, Any]:
+        if async_execution:
+            # Handle asynchronous execution
+            return self._execute_async_script(script, context)
+        # Synchronous execution
+        return self._execute_sync_script(script, context)
+    
+    def notify_navigation(self, tab_id: str) -> None:
+        """A tab navigated or closed: its libraries must be installed again"""
+        for key in [k for k in self.installed_libraries if k[0] == tab_id]:
+            del self.installed_libraries[key]
     
     def _execute_sync_script(self, script: str, context: ScriptContext) -> Dict[str, Any]:
         """Execute script synchronously"""
+        if self._browser_connected(context):
+            return self._execute_in_browser(script, context, await_promise=False)
         
-        # Mock implementation - in real implementation would use CDP, selenium, etc.
+        # Mock implementation when no browser backend is connected
         execution_result = {
             'success': True,
             'result': 'script_executed_successfully',
@@ -595,6 +680,8 @@ class JavaScriptInjector:
     
     def _execute_async_script(self, script: str, context: ScriptContext) -> Dict[str, Any]:
         """Execute script asynchronously"""
+        if self._browser_connected(context):
+            return self._execute_in_browser(script, context, await_promise=True)
         
         # Wrap script in async function if needed
         if 'await' in script and not script.strip().startswith('async'):
@@ -612,6 +699,34 @@ class JavaScriptInjector:
         
         return self._execute_sync_script(wrapped_script, context)
     
+    def _browser_connected(self, context: ScriptContext) -> bool:
+        if self.browser_interface is None or not hasattr(self.browser_interface, 'execute_script'):
+            return False
+        is_connected = getattr(self.browser_interface, 'is_connected', None)
+        return is_connected is None or is_connected(context.tab_id)
+    
+    def _execute_in_browser(self, script: str, context: ScriptContext, await_promise: bool) -> Dict[str, Any]:
+        """Run a script body (which may `return`) in the context's tab"""
+        wrapper = "async function" if await_promise else "function"
+        execution_result = {
+            'success': False,
+            'result': None,
+            'console_output': [],
+            'errors': [],
+            'warnings': [],
+            'side_effects': {}
+        }
+        
+        try:
+            execution_result['result'] = self.browser_interface.execute_script(
+                f"({wrapper} () {{\n{script}\n}})()", tab_id=context.tab_id, await_promise=await_promise
+            )
+            execution_result['success'] = True
+        except Exception as e:
+            execution_result['errors'].append(str(e))
+        
+        return execution_result
+    
     def inject_function(self, function_name: str, 
                        function_code: str,
                        context: ScriptContext,
@@ -659,13 +774,12 @@ class JavaScriptInjector:
             result.errors.append(f"Library '{library_id}' not found")
             return result
         
-        library = self.libraries[library_id]
-        
+        # Installs the library and its dependencies unless already resident
         return self.inject_script(
-            library.source_code,
+            "",
             context,
             ScriptType.LIBRARY,
-            libraries=library.dependencies
+            libraries=[library_id]
         )
     
     def create_automation_script(self, actions: List[Dict[str, Any]], 
@@ -761,8 +875,17 @@ class JavaScriptInjector:
         return "\n".join(script_parts)
     
     def _generate_script_id(self, script: str) -> str:
-        """Generate unique ID for script"""
-        return f"script_{hashlib.md5(script.encode()).hexdigest()[:8]}_{int(time.time())}"
+        """Content-derived ID for script, memoised for scripts sent repeatedly"""
+        script_id = self._script_ids.get(script)
+        if script_id is not None:
+            self._script_ids.move_to_end(script)
+            return script_id
+        
+        script_id = f"script_{hashlib.md5(script.encode()).hexdigest()[:12]}"
+        self._script_ids[script] = script_id
+        while len(self._script_ids) > self.max_cached_scripts:
+            self._script_ids.popitem(last=False)
+        return script_id
     
     def add_library(self, library: ScriptLibrary) -> None:
         """Add a custom JavaScript library"""
@@ -782,21 +905,22 @@ class JavaScriptInjector:
     
     def get_injection_statistics(self) -> Dict[str, Any]:
         """Get comprehensive injection statistics"""
-        total_executions = len(self.execution_stats['total_executions'])
+        execution_times = self.execution_times
         
-        if total_executions == 0:
+        if execution_times.count == 0:
             return {"status": "No executions recorded"}
         
-        execution_times = self.execution_stats['total_executions']
-        
         return {
-            "total_executions": total_executions,
-            "average_execution_time": sum(execution_times) / len(execution_times),
-            "min_execution_time": min(execution_times),
-            "max_execution_time": max(execution_times),
+            "total_executions": execution_times.count,
+            "average_execution_time": execution_times.mean,
+            "min_execution_time": execution_times.min,
+            "max_execution_time": execution_times.max,
+            "p95_execution_time": execution_times.percentile(0.95),
             "cached_scripts": len(self.script_cache),
             "available_libraries": len(self.libraries),
             "active_script_contexts": len(self.active_scripts),
+            "library_contexts": len(self.installed_libraries),
+            "library_stats": self.library_stats.copy(),
             "performance_metrics": self.performance_monitor.get_metrics()
         }
 
@@ -864,11 +988,66 @@ class ScriptSecurityValidator:
         return True
 
 
+class LatencyHistogram:
+    """
+    Fixed-size histogram of durations in seconds.
+    
+    Buckets grow geometrically (4% wide) from one microsecond to several
+    minutes, so percentiles stay within a few percent of the true value
+    while memory stays constant however many samples are recorded.
+    """
+    
+    def __init__(self, min_value: float = 1e-6, growth: float = 1.04, buckets: int = 512):
+        self.min_value = min_value
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+    
+    def record(self, value: float) -> None:
+        """Add one sample."""
+        if self.count == 0:
+            self.min = self.max = value
+        else:
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+        
+        index = 0
+        if value > self.min_value:
+            index = min(len(self.counts) - 1, int(math.log(value / self.min_value) / self._log_growth) + 1)
+        self.counts[index] += 1
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+    
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (0 <= q <= 1)."""
+        if not self.count:
+            return 0.0
+        
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(max(self.min_value * self.growth ** index, self.min), self.max)
+        return self.max
+
+
 class ScriptPerformanceMonitor:
     """Monitor script execution performance"""
     
-    def __init__(self):
-        self.execution_records = []
+    def __init__(self, max_scripts: int = 256, recent_window: int = 100):
+        self.max_scripts = max_scripts
+        self.histogram = LatencyHistogram()
+        self.script_histograms: 'OrderedDict[str, LatencyHistogram]' = OrderedDict()
+        self.recent_executions: deque = deque(maxlen=recent_window)  # (time ms, success)
         self.performance_thresholds = {
             'slow_execution': 1000,  # ms
             'very_slow_execution': 5000,  # ms
@@ -877,16 +1056,19 @@ class ScriptPerformanceMonitor:
     
     def record_execution(self, script_id: str, execution_time: float, success: bool) -> None:
         """Record script execution metrics"""
-        self.execution_records.append({
-            'script_id': script_id,
-            'execution_time': execution_time * 1000,  # Convert to ms
-            'success': success,
-            'timestamp': time.time()
-        })
+        self.histogram.record(execution_time)
+        self.recent_executions.append((execution_time * 1000, success))  # Convert to ms
         
-        # Keep only recent records (last 1000)
-        if len(self.execution_records) > 1000:
-            self.execution_records = self.execution_records[-1000:]
+        # Per-script histograms for the most recently used scripts only
+        script_histogram = self.script_histograms.get(script_id)
+        if script_histogram is None:
+            script_histogram = LatencyHistogram()
+            self.script_histograms[script_id] = script_histogram
+            while len(self.script_histograms) > self.max_scripts:
+                self.script_histograms.popitem(last=False)
+        else:
+            self.script_histograms.move_to_end(script_id)
+        script_histogram.record(execution_time)
         
         # Log performance warnings
         execution_time_ms = execution_time * 1000
@@ -895,21 +1077,42 @@ class ScriptPerformanceMonitor:
         elif execution_time_ms > self.performance_thresholds['slow_execution']:
             logger.info(f"Slow script execution: {script_id} took {execution_time_ms:.2f}ms")
     
+    def get_script_metrics(self, script_id: str) -> Dict[str, Any]:
+        """Get latency metrics of one script (ms)"""
+        histogram = self.script_histograms.get(script_id)
+        if histogram is None:
+            return {"status": "No performance data available"}
+        return self._summarise(histogram)
+    
     def get_metrics(self) -> Dict[str, Any]:
         """Get performance metrics"""
-        if not self.execution_records:
+        if not self.histogram.count:
             return {"status": "No performance data available"}
         
-        recent_records = self.execution_records[-100:]  # Last 100 executions
+        recent_records = self.recent_executions  # Last 100 executions
         
-        execution_times = [r['execution_time'] for r in recent_records]
-        successful_executions = [r for r in recent_records if r['success']]
+        execution_times = [t for t, _ in recent_records]
+        successful_executions = [s for _, s in recent_records if s]
         
-        return {
-            "total_executions": len(self.execution_records),
+        metrics = {
+            "total_executions": self.histogram.count,
             "recent_executions": len(recent_records),
             "success_rate": len(successful_executions) / len(recent_records),
             "average_execution_time": sum(execution_times) / len(execution_times),
             "slow_executions": len([t for t in execution_times if t > self.performance_thresholds['slow_execution']]),
-            "very_slow_executions": len([t for t in execution_times if t > self.performance_thresholds['very_slow_execution']])
-        }
\ No newline at end of file
+            "very_slow_executions": len([t for t in execution_times if t > self.performance_thresholds['very_slow_execution']]),
+            "tracked_scripts": len(self.script_histograms)
+        }
+        metrics.update({f"{k}_execution_time": v for k, v in self._summarise(self.histogram).items()
+                        if k.startswith('p')})
+        return metrics
+    
+    def _summarise(self, histogram: LatencyHistogram) -> Dict[str, Any]:
+        return {
+            "count": histogram.count,
+            "mean": histogram.mean * 1000,
+            "p50": histogram.percentile(0.50) * 1000,
+            "p95": histogram.percentile(0.95) * 1000,
+            "p99": histogram.percentile(0.99) * 1000,
+            "max": histogram.max * 1000
+        }
@@ -0,0 +1,385 @@
+"""
+Workflow Job Runner
+
+Batch execution of web workflows over warm browser sessions:
+- Pool of browser sessions with a dedicated work tab per session
+- Reset-between-jobs hygiene and max-uses recycling
+- Job queue drained by a bounded set of workers
+- Queue wait, session reuse and per-job timing metrics
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+from collections import deque
+import json
+import time
+import queue
+import logging
+import threading
+import itertools
+
+from .browser_controller import BrowserController, BrowserType, BrowserCommand
+from .web_automation_engine import WebAutomationEngine, WebWorkflow, WorkflowResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledSession:
+    """Browser session held by the pool"""
+    session_id: str
+    tab_id: str
+    config_key: str
+    uses: int = 0
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+
+
+@dataclass
+class WorkflowJob:
+    """Queued workflow execution"""
+    job_id: str
+    workflow: WebWorkflow
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float = 0.0
+    completed_at: float = 0.0
+    result: Optional[WorkflowResult] = None
+    session_id: Optional[str] = None
+    reused_session: bool = False
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+    
+    @property
+    def queue_wait(self) -> float:
+        """Time spent queued before a worker picked the job up"""
+        return self.started_at - self.submitted_at if self.started_at else 0.0
+    
+    @property
+    def execution_time(self) -> float:
+        """Time from pickup to completion, including session acquisition"""
+        return self.completed_at - self.started_at if self.completed_at else 0.0
+
+
+class BrowserSessionPool:
+    """
+    Pool of warm browser sessions keyed by browser configuration.
+    
+    Sessions are reset after every job (storage of every origin the work
+    tab loaded and all cookies cleared, then the work tab replaced by a
+    fresh one so session storage and history go too) and retired once
+    they reach max_uses, fail a reset, or sit idle longer than max_idle_time.
+    """
+    
+    def __init__(self, browser_controller: BrowserController, max_idle_sessions: int = 4,
+                 max_uses: int = 25, max_idle_time: float = 300.0):
+        self.browser_controller = browser_controller
+        self.max_idle_sessions = max_idle_sessions
+        self.max_uses = max_uses
+        self.max_idle_time = max_idle_time
+        
+        self._idle: List[PooledSession] = []
+        self._lock = threading.Lock()
+        
+        self.stats = {
+            'sessions_created': 0,
+            'sessions_reused': 0,
+            'sessions_recycled': 0,
+            'reset_failures': 0
+        }
+    
+    def acquire(self, browser_config: Dict[str, Any]) -> Tuple[PooledSession, bool]:
+        """
+        Lease a session matching the browser configuration.
+        
+        Returns:
+            (session, reused) where reused is False for a freshly launched session
+        """
+        config_key = json.dumps(browser_config, sort_keys=True, default=str)
+        expired = []
+        leased = None
+        
+        with self._lock:
+            now = time.time()
+            for pooled in list(self._idle):
+                if now - pooled.last_used > self.max_idle_time:
+                    self._idle.remove(pooled)
+                    expired.append(pooled)
+                elif leased is None and pooled.config_key == config_key:
+                    self._idle.remove(pooled)
+                    leased = pooled
+            
+            if leased is not None:
+                self.stats['sessions_reused'] += 1
+        
+        for pooled in expired:
+            self._retire(pooled)
+        
+        if leased is not None:
+            return leased, True
+        
+        return self._create(browser_config, config_key), False
+    
+    def release(self, pooled: PooledSession, healthy: bool = True) -> bool:
+        """
+        Return a session to the pool, recycling it if it is worn out.
+        
+        Returns:
+            True if the session was kept warm, False if it was retired
+        """
+        pooled.uses += 1
+        pooled.last_used = time.time()
+        
+        if not healthy or pooled.uses >= self.max_uses or not self._reset(pooled):
+            self._retire(pooled)
+            return False
+        
+        with self._lock:
+            if len(self._idle) < self.max_idle_sessions:
+                self._idle.append(pooled)
+                return True
+        
+        self._retire(pooled)
+        return False
+    
+    def close_all(self) -> List[PooledSession]:
+        """Close every idle session and return what was closed"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        
+        for pooled in idle:
+            self._retire(pooled)
+        
+        return idle
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        with self._lock:
+            idle = len(self._idle)
+        
+        stats = self.stats.copy()
+        stats['idle_sessions'] = idle
+        return stats
+    
+    def _create(self, browser_config: Dict[str, Any], config_key: str) -> PooledSession:
+        """Launch a session and open its work tab"""
+        session_id = self.browser_controller.create_session(
+            browser_type=BrowserType(browser_config.get('type', 'chrome')),
+            headless=browser_config.get('headless', False),
+            extensions=browser_config.get('extensions', []),
+            cdp_endpoint=browser_config.get('cdp_endpoint')
+        )
+        
+        tab_result = self.browser_controller.execute_command(
+            BrowserCommand.NEW_TAB,
+            target=session_id,
+            params={'url': 'about:blank'}
+        )
+        if not tab_result.success:
+            self.browser_controller.close_session(session_id)
+            raise Exception(f"Failed to open work tab in {session_id}: {tab_result.error_message}")
+        
+        with self._lock:
+            self.stats['sessions_created'] += 1
+        
+        return PooledSession(session_id=session_id, tab_id=tab_result.target_tab_id, config_key=config_key)
+    
+    def _reset(self, pooled: PooledSession) -> bool:
+        """Clear browser state left behind by the previous job"""
+        commands = [
+            (BrowserCommand.CLEAR_STORAGE, pooled.tab_id, {}),
+            (BrowserCommand.CLEAR_COOKIES, pooled.tab_id, {}),
+            (BrowserCommand.NEW_TAB, pooled.session_id, {'url': 'about:blank'}),
+            (BrowserCommand.CLOSE_TAB, pooled.tab_id, {})
+        ]
+        fresh_tab_id = None
+        
+        for command, target, params in commands:
+            result = self.browser_controller.execute_command(command, target=target, params=params)
+            if not result.success:
+                logger.warning(f"Session reset failed for {pooled.session_id} ({command.value}): {result.error_message}")
+                with self._lock:
+                    self.stats['reset_failures'] += 1
+                return False
+            if command == BrowserCommand.NEW_TAB:
+                fresh_tab_id = result.target_tab_id
+        
+        pooled.tab_id = fresh_tab_id
+        return True
+    
+    def _retire(self, pooled: PooledSession) -> None:
+        """Close a session permanently"""
+        self.browser_controller.execute_command(BrowserCommand.CLOSE_TAB, target=pooled.tab_id)
+        self.browser_controller.close_session(pooled.session_id)
+        
+        with self._lock:
+            self.stats['sessions_recycled'] += 1
+        
+        logger.debug(f"Retired pooled session {pooled.session_id} after {pooled.uses} uses")
+
+
+class WorkflowJobRunner:
+    """Runs queued workflows concurrently on pooled browser sessions"""
+    
+    def __init__(self, engine: Optional[WebAutomationEngine] = None, max_concurrent: int = 3,
+                 max_session_uses: int = 25, max_idle_time: float = 300.0, max_finished_jobs: int = 1000):
+        if max_concurrent <= 0:
+            raise ValueError("max_concurrent must be positive")
+        
+        self.engine = engine or WebAutomationEngine()
+        self.max_concurrent = max_concurrent
+        self.max_finished_jobs = max_finished_jobs
+        self.session_pool = BrowserSessionPool(
+            self.engine.browser_controller,
+            max_idle_sessions=max_concurrent,
+            max_uses=max_session_uses,
+            max_idle_time=max_idle_time
+        )
+        
+        self.jobs: Dict[str, WorkflowJob] = {}
+        self._finished: deque = deque()  # Job ids in completion order, oldest evicted first
+        self._queue: "queue.Queue[Optional[WorkflowJob]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._job_counter = itertools.count(1)
+        self._lock = threading.Lock()
+        
+        self.stats = {
+            'jobs_submitted': 0,
+            'jobs_completed': 0,
+            'jobs_failed': 0,
+            'sessions_reused': 0,
+            'queue_waits': deque(maxlen=1000),
+            'job_times': deque(maxlen=1000)
+        }
+    
+    def start(self) -> None:
+        """Start worker threads"""
+        if self._workers:
+            return
+        
+        for i in range(self.max_concurrent):
+            worker = threading.Thread(target=self._worker_loop, name=f"workflow-job-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        
+        logger.info(f"Workflow job runner started with {self.max_concurrent} workers")
+    
+    def stop(self, wait: bool = True) -> None:
+        """Stop workers after queued jobs drain and close pooled sessions"""
+        for _ in self._workers:
+            self._queue.put(None)
+        
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        
+        self._workers = []
+        for pooled in self.session_pool.close_all():
+            self.engine.release_session_context(pooled.tab_id)
+    
+    def submit(self, workflow: WebWorkflow) -> str:
+        """Queue a workflow and return its job id"""
+        job = WorkflowJob(job_id=f"job_{next(self._job_counter)}", workflow=workflow)
+        
+        with self._lock:
+            self.jobs[job.job_id] = job
+            self.stats['jobs_submitted'] += 1
+        
+        self._queue.put(job)
+        return job.job_id
+    
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[WorkflowJob]:
+        """Block until a job finishes; returns None on timeout or unknown job"""
+        job = self.jobs.get(job_id)
+        if job is None or not job.done.wait(timeout):
+            return None
+        return job
+    
+    def _worker_loop(self) -> None:
+        """Pull jobs until a stop sentinel arrives"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            
+            try:
+                self._run_job(job)
+            finally:
+                self._queue.task_done()
+    
+    def _run_job(self, job: WorkflowJob) -> None:
+        """Execute one job on a pooled session"""
+        job.started_at = time.time()
+        pooled = None
+        used_tab_id = None
+        healthy = False
+        
+        try:
+            pooled, job.reused_session = self.session_pool.acquire(job.workflow.browser_config)
+            job.session_id = pooled.session_id
+            used_tab_id = pooled.tab_id
+            
+            job.result = self.engine.execute_workflow(job.workflow, session_id=pooled.session_id, tab_id=pooled.tab_id)
+            healthy = True
+        
+        except Exception as e:
+            logger.error(f"Workflow job {job.job_id} failed: {e}")
+            job.error = str(e)
+        
+        finally:
+            if pooled is not None:
+                # A kept session gets a fresh work tab and a retired one is closed,
+                # so the script context of the job's tab is stale either way
+                self.session_pool.release(pooled, healthy)
+                self.engine.release_session_context(used_tab_id)
+            
+            job.completed_at = time.time()
+            
+            with self._lock:
+                succeeded = job.result is not None and job.result.success
+                self.stats['jobs_completed' if succeeded else 'jobs_failed'] += 1
+                if job.reused_session:
+                    self.stats['sessions_reused'] += 1
+                self.stats['queue_waits'].append(job.queue_wait)
+                self.stats['job_times'].append(job.execution_time)
+                
+                self._finished.append(job.job_id)
+                while len(self._finished) > self.max_finished_jobs:
+                    self.jobs.pop(self._finished.popleft(), None)
+            
+            job.done.set()
+    
+    def get_job_timings(self) -> List[Dict[str, Any]]:
+        """Get per-job timing for finished jobs"""
+        with self._lock:
+            jobs = [job for job in self.jobs.values() if job.done.is_set()]
+        
+        return [{
+            'job_id': job.job_id,
+            'workflow_id': job.workflow.workflow_id,
+            'queue_wait': job.queue_wait,
+            'execution_time': job.execution_time,
+            'reused_session': job.reused_session,
+            'success': job.result is not None and job.result.success
+        } for job in jobs]
+    
+    def get_runner_stats(self) -> Dict[str, Any]:
+        """Get queue, reuse and timing statistics"""
+        with self._lock:
+            stats = self.stats.copy()
+            queue_waits = sorted(stats.pop('queue_waits'))
+            job_times = sorted(stats.pop('job_times'))
+        
+        finished = stats['jobs_completed'] + stats['jobs_failed']
+        stats['queued_jobs'] = self._queue.qsize()
+        stats['session_reuse_rate'] = stats['sessions_reused'] / finished if finished else 0.0
+        
+        for name, values in (('queue_wait', queue_waits), ('job_time', job_times)):
+            if values:
+                stats[f'avg_{name}'] = sum(values) / len(values)
+                stats[f'p95_{name}'] = values[min(len(values) - 1, int(len(values) * 0.95))]
+            else:
+                stats[f'avg_{name}'] = 0.0
+                stats[f'p95_{name}'] = 0.0
+        
+        stats['session_pool'] = self.session_pool.get_pool_stats()
+        return stats
@@ -7,19 +7,23 @@ Unified web automation system integrating all web enhancement components:
 - JavaScript injection and execution
 - Cross-browser compatibility
 - Advanced web interaction patterns
+- Streaming extraction of large, paginated data sets to disk
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional, Callable, Union
+from typing import Dict, List, Any, Optional, Callable, Union, Set, Tuple
 from enum import Enum
 import time
+import json
 import logging
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 from .dom_inspector import DOMInspector, DOMQuery, DetectionStrategy, ElementInfo, InspectionResult
 from .browser_controller import BrowserController, BrowserType, BrowserCommand, TabInfo, CommandResult
 from .javascript_injector import JavaScriptInjector, ScriptType, ExecutionContext, ScriptContext, ScriptSecurity, ScriptResult
+from .extraction_stream import StreamingExtractor, ExtractionSpec, create_sink
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +64,11 @@ class WebAction:
     retry_delay: float = 1.0
     validation: Optional[Dict[str, Any]] = None
     fallback_actions: List['WebAction'] = field(default_factory=list)
+    
+    # Scheduling scope for parallel workflows; None means the workflow default
+    tab_key: Optional[str] = None
+    session_key: Optional[str] = None
+    depends_on: List[int] = field(default_factory=list)  # Indices of earlier actions
 
 
 @dataclass
@@ -101,6 +110,79 @@ class WorkflowResult:
     failed_actions: List[int] = field(default_factory=list)
     extracted_data: Dict[str, Any] = field(default_factory=dict)
     final_state: Dict[str, Any] = field(default_factory=dict)
+    critical_path: List[int] = field(default_factory=list)
+    critical_path_time: float = 0.0
+
+
+class ActionGraph:
+    """
+    Dependency DAG over workflow actions.
+    
+    Actions sharing a (session, tab) scope are chained in workflow order;
+    explicit depends_on indices add cross-scope edges. Dependencies may
+    only point backwards, so index order is always a valid topological order.
+    """
+    
+    DEFAULT_SESSION = "default"
+    DEFAULT_TAB = "main"
+    
+    def __init__(self, actions: List[WebAction]):
+        self.actions = actions
+        self.scopes: List[Tuple[str, str]] = []
+        self.dependencies: List[Set[int]] = []
+        self.dependents: List[Set[int]] = [set() for _ in actions]
+        
+        last_in_scope: Dict[Tuple[str, str], int] = {}
+        
+        for index, action in enumerate(actions):
+            scope = (action.session_key or self.DEFAULT_SESSION, action.tab_key or self.DEFAULT_TAB)
+            deps = set()
+            
+            for dep in action.depends_on:
+                if not 0 <= dep < index:
+                    raise ValueError(f"Action {index} depends on invalid action index {dep}")
+                deps.add(dep)
+            
+            if scope in last_in_scope:
+                deps.add(last_in_scope[scope])
+            last_in_scope[scope] = index
+            
+            for dep in deps:
+                self.dependents[dep].add(index)
+            
+            self.scopes.append(scope)
+            self.dependencies.append(deps)
+    
+    def roots(self) -> List[int]:
+        """Get actions with no dependencies."""
+        return [i for i, deps in enumerate(self.dependencies) if not deps]
+    
+    def scope_keys(self) -> List[Tuple[str, str]]:
+        """Get distinct scopes in first-use order."""
+        return list(dict.fromkeys(self.scopes))
+    
+    def critical_path(self, durations: Dict[int, float]) -> Tuple[List[int], float]:
+        """Get the longest duration-weighted dependency chain."""
+        if not self.actions:
+            return [], 0.0
+        
+        finish: List[float] = []
+        previous: List[Optional[int]] = []
+        
+        for index, deps in enumerate(self.dependencies):
+            best_dep = max(deps, key=lambda d: finish[d], default=None)
+            start = finish[best_dep] if best_dep is not None else 0.0
+            finish.append(start + durations.get(index, 0.0))
+            previous.append(best_dep)
+        
+        node = max(range(len(finish)), key=lambda i: finish[i])
+        total = finish[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        
+        return list(reversed(path)), total
 
 
 class WebAutomationEngine:
@@ -110,13 +192,16 @@ class WebAutomationEngine:
         self.interaction_mode = interaction_mode
         
         # Initialize component systems
-        self.dom_inspector = DOMInspector()
         self.browser_controller = BrowserController()
-        self.javascript_injector = JavaScriptInjector()
+        self.dom_inspector = DOMInspector(browser_interface=self.browser_controller)
+        self.javascript_injector = JavaScriptInjector(browser_interface=self.browser_controller)
+        self.streaming_extractor = StreamingExtractor(self.javascript_injector)
+        self.browser_controller.tab_manager.activity_callbacks.append(self._on_tab_activity)
         
         # Execution state
         self.active_workflows: Dict[str, Dict[str, Any]] = {}
         self.session_contexts: Dict[str, ScriptContext] = {}
+        self.preloaded_contexts: Set[str] = set()
         self.execution_history: List[WorkflowResult] = []
         
         # Performance and reliability settings
@@ -135,6 +220,7 @@ class WebAutomationEngine:
                 "implicit_wait": 0.5,
                 "script_timeout": 5.0,
                 "parallel_actions": True,
+                "max_parallel_per_browser": 4,
                 "cache_elements": True,
                 "preload_scripts": True
             },
@@ -144,6 +230,7 @@ class WebAutomationEngine:
                 "implicit_wait": 2.0,
                 "script_timeout": 30.0,
                 "parallel_actions": False,
+                "max_parallel_per_browser": 1,
                 "cache_elements": False,
                 "preload_scripts": False
             },
@@ -153,6 +240,7 @@ class WebAutomationEngine:
                 "implicit_wait": 1.0,
                 "script_timeout": 15.0,
                 "parallel_actions": False,
+                "max_parallel_per_browser": 2,
                 "cache_elements": True,
                 "preload_scripts": True
             }
@@ -188,14 +276,31 @@ class WebAutomationEngine:
                 "fallback_strategies": True,
                 "human_like_delays": True,
                 "randomize_timing": True
+            },
+            InteractionMode.STANDARD: {
+                "max_retries": 3,
+                "retry_delay_multiplier": 1.5,
+                "element_stability_wait": 0.5,
+                "verify_actions": True,
+                "screenshot_on_error": False,
+                "fallback_strategies": True
             }
         }
-        
+
         return configs.get(self.interaction_mode, configs[InteractionMode.STANDARD])
     
-    def execute_workflow(self, workflow: WebWorkflow) -> WorkflowResult:
-        """Execute complete web automation workflow"""
+    def execute_workflow(self, workflow: WebWorkflow, session_id: Optional[str] = None,
+                         tab_id: Optional[str] = None) -> WorkflowResult:
+        """
+        Execute complete web automation workflow
+        
+        Args:
+            workflow: Workflow to execute
+            session_id: Existing browser session to reuse instead of launching one
+            tab_id: Tab within the reused session to run in
+        """
         start_time = time.time()
+        opened_scopes: List[Tuple[str, str]] = []  # Sessions and tabs opened for parallel scopes
         
         logger.info(f"Starting workflow execution: {workflow.name} ({len(workflow.actions)} actions)")
         
@@ -209,29 +314,41 @@ class WebAutomationEngine:
         )
         
         try:
-            # Create browser session
-            session_id = self._setup_browser_session(workflow)
+            # Create browser session unless a warm one was provided
+            if session_id is None:
+                session_id = self._setup_browser_session(workflow)
+            context_key = tab_id or session_id
             
             # Navigate to initial URL if specified
             if workflow.initial_url:
-                self._navigate_to_url(session_id, workflow.initial_url)
+                self._navigate_to_url(session_id, workflow.initial_url, tab_id)
             
-            # Setup script context
-            context = self._create_script_context(session_id)
-            self.session_contexts[session_id] = context
+            # Setup script context, reusing one already bound to this tab
+            context = self.session_contexts.get(context_key)
+            if context is None:
+                context = self._create_script_context(context_key)
+                self.session_contexts[context_key] = context
             
             # Preload libraries if enabled
-            if self.performance_config.get("preload_scripts", False):
+            if self.performance_config.get("preload_scripts", False) and context.context_id not in self.preloaded_contexts:
                 self._preload_automation_libraries(context)
+                self.preloaded_contexts.add(context.context_id)
             
             # Execute actions
             if workflow.parallel_execution and self.performance_config.get("parallel_actions", False):
-                execution_results = self._execute_actions_parallel(workflow.actions, context)
+                execution_results = self._execute_actions_parallel(workflow.actions, context, workflow,
+                                                                   opened_scopes, session_id)
             else:
                 execution_results = self._execute_actions_sequential(workflow.actions, context)
             
             result.execution_results = execution_results
             
+            # Report the chain that bounded total execution time
+            if len(execution_results) == len(workflow.actions):
+                result.critical_path, result.critical_path_time = ActionGraph(workflow.actions).critical_path(
+                    {i: r.execution_time for i, r in enumerate(execution_results)}
+                )
+            
             # Calculate success metrics
             successful_actions = [r for r in execution_results if r.success]
             result.success_rate = len(successful_actions) / len(execution_results) if execution_results else 0.0
@@ -249,6 +366,7 @@ class WebAutomationEngine:
             result.success = False
             
         finally:
+            self._close_scopes(opened_scopes)
             result.total_execution_time = time.time() - start_time
             
             # Store in history
@@ -261,15 +379,7 @@ class WebAutomationEngine:
     
     def _setup_browser_session(self, workflow: WebWorkflow) -> str:
         """Setup browser session for workflow"""
-        browser_type = BrowserType(workflow.browser_config.get('type', 'chrome'))
-        headless = workflow.browser_config.get('headless', False)
-        extensions = workflow.browser_config.get('extensions', [])
-        
-        session_id = self.browser_controller.create_session(
-            browser_type=browser_type,
-            headless=headless,
-            extensions=extensions
-        )
+        session_id = self._launch_workflow_browser(workflow)
         
         self.active_workflows[workflow.workflow_id] = {
             'session_id': session_id,
@@ -279,28 +389,61 @@ class WebAutomationEngine:
         
         return session_id
     
-    def _navigate_to_url(self, session_id: str, url: str) -> None:
+    def release_session_context(self, context_key: str) -> None:
+        """Forget the script context bound to a session or tab"""
+        context = self.session_contexts.pop(context_key, None)
+        if context is not None:
+            self.preloaded_contexts.discard(context.context_id)
+            self.javascript_injector.notify_navigation(context.tab_id)
+            self.dom_inspector.notify_tab_closed(context.tab_id)
+    
+    def _on_tab_activity(self, event: str, tab_id: Optional[str], params: Dict[str, Any]) -> None:
+        """Keep the element cache in step with pushed tab events"""
+        if event == 'Target.targetDestroyed' and tab_id:
+            self.dom_inspector.notify_tab_closed(tab_id)
+        elif event == 'Page.frameNavigated' and tab_id and not params.get('frame', {}).get('parentId'):
+            self.dom_inspector.notify_navigation(tab_id, params['frame'].get('url'))
+    
+    def _launch_workflow_browser(self, workflow: WebWorkflow) -> str:
+        """Create a browser session from the workflow's browser config"""
+        browser_type = BrowserType(workflow.browser_config.get('type', 'chrome'))
+        headless = workflow.browser_config.get('headless', False)
+        extensions = workflow.browser_config.get('extensions', [])
+        
+        return self.browser_controller.create_session(
+            browser_type=browser_type,
+            headless=headless,
+            extensions=extensions,
+            cdp_endpoint=workflow.browser_config.get('cdp_endpoint')
+        )
+    
+    def _navigate_to_url(self, session_id: str, url: str, tab_id: Optional[str] = None) -> None:
         """Navigate to initial URL"""
         result = self.browser_controller.execute_command(
             BrowserCommand.NAVIGATE,
+            target=tab_id,
             params={'url': url}
         )
         
         if not result.success:
             raise Exception(f"Failed to navigate to {url}: {result.error_message}")
+        self.dom_inspector.notify_navigation(tab_id or session_id, url)
+        self.javascript_injector.notify_navigation(tab_id or session_id)
         
         # Wait for page load
         time.sleep(self.performance_config.get("implicit_wait", 1.0))
     
     def _create_script_context(self, session_id: str) -> ScriptContext:
-        """Create script execution context for session"""
-        return ScriptContext(
+        """Create script execution context for session and start tracking its DOM changes"""
+        context = ScriptContext(
             context_id=f"ctx_{session_id}",
             execution_context=ExecutionContext.PAGE,
             security_level=ScriptSecurity.SANDBOXED,
             isolated_world=True,
             tab_id=session_id  # Simplified - in real implementation would get actual tab ID
         )
+        self.dom_inspector.notify_tab_attached(context.tab_id)
+        return context
     
     def _preload_automation_libraries(self, context: ScriptContext) -> None:
         """Preload automation utility libraries"""
@@ -341,11 +484,130 @@ class WebAutomationEngine:
         
         return results
     
-    def _execute_actions_parallel(self, actions: List[WebAction], context: ScriptContext) -> List[ExecutionResult]:
-        """Execute actions in parallel where possible"""
-        # Group actions by dependency - for now, execute sequentially
-        # In real implementation, would analyze action dependencies and parallelize independent actions
-        return self._execute_actions_sequential(actions, context)
+    def _execute_actions_parallel(self, actions: List[WebAction], context: ScriptContext,
+                                  workflow: Optional[WebWorkflow] = None,
+                                  opened: Optional[List[Tuple[str, str]]] = None,
+                                  session_id: Optional[str] = None) -> List[ExecutionResult]:
+        """
+        Execute actions as a dependency DAG.
+        
+        Independent (session, tab) scopes run concurrently on the engine's
+        thread pool, each scope keeps its own action order, and at most
+        max_parallel_per_browser actions run against one browser session.
+        Sessions and tabs opened for the scopes are recorded in `opened`
+        for the caller to close. `session_id` is the browser session behind
+        `context` (defaults to its tab id, which is the session's own tab).
+        """
+        graph = ActionGraph(actions)
+        contexts = self._create_scope_contexts(graph, context, workflow, opened if opened is not None else [],
+                                               session_id or context.tab_id)
+        max_per_browser = max(1, self.performance_config.get("max_parallel_per_browser", 1))
+        stop_on_failure = workflow is not None and not workflow.error_recovery
+        
+        results: List[Optional[ExecutionResult]] = [None] * len(actions)
+        remaining = [len(deps) for deps in graph.dependencies]
+        ready = graph.roots()
+        running: Dict[Any, int] = {}
+        running_per_browser: Dict[str, int] = defaultdict(int)
+        
+        def complete(index: int, execution_result: ExecutionResult):
+            results[index] = execution_result
+            for dependent in sorted(graph.dependents[index]):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        
+        while ready or running:
+            # Submit ready actions in workflow order, respecting per-browser limits
+            ready.sort()
+            deferred = []
+            for index in ready:
+                session_key = graph.scopes[index][0]
+                failed_deps = [d for d in graph.dependencies[index] if not results[d].success]
+                
+                if stop_on_failure and failed_deps:
+                    skipped = ExecutionResult(success=False, action=actions[index], execution_time=0.0)
+                    skipped.errors.append(f"Skipped: dependency {failed_deps[0]} failed")
+                    complete(index, skipped)
+                elif running_per_browser[session_key] < max_per_browser:
+                    future = self.executor.submit(self._execute_single_action, actions[index], contexts[graph.scopes[index]])
+                    running[future] = index
+                    running_per_browser[session_key] += 1
+                else:
+                    deferred.append(index)
+            ready[:] = deferred
+            
+            if not running:
+                continue
+            
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                running_per_browser[graph.scopes[index][0]] -= 1
+                try:
+                    execution_result = future.result()
+                except Exception as e:
+                    execution_result = ExecutionResult(success=False, action=actions[index], execution_time=0.0)
+                    execution_result.errors.append(str(e))
+                complete(index, execution_result)
+        
+        return results
+    
+    def _create_scope_contexts(self, graph: ActionGraph, default_context: ScriptContext,
+                               workflow: Optional[WebWorkflow],
+                               opened: List[Tuple[str, str]],
+                               default_session_id: str) -> Dict[Tuple[str, str], ScriptContext]:
+        """Open a tab (and browser session if needed) for every scope in the graph, recording each in `opened`"""
+        contexts: Dict[Tuple[str, str], ScriptContext] = {}
+        # New tabs are opened against the browser session, never a tab id
+        sessions: Dict[str, str] = {ActionGraph.DEFAULT_SESSION: default_session_id}
+        
+        for session_key, tab_key in graph.scope_keys():
+            if session_key == ActionGraph.DEFAULT_SESSION and tab_key == ActionGraph.DEFAULT_TAB:
+                contexts[(session_key, tab_key)] = default_context
+                continue
+            
+            if session_key not in sessions:
+                if workflow is None:
+                    raise ValueError(f"Cannot open browser session '{session_key}' without a workflow")
+                sessions[session_key] = self._launch_workflow_browser(workflow)
+                opened.append(('session', sessions[session_key]))
+            
+            session_id = sessions[session_key]
+            if tab_key == ActionGraph.DEFAULT_TAB:
+                tab_id = session_id
+            else:
+                tab_result = self.browser_controller.execute_command(
+                    BrowserCommand.NEW_TAB,
+                    target=session_id,
+                    params={'url': workflow.initial_url if workflow and workflow.initial_url else 'about:blank'}
+                )
+                if not tab_result.success:
+                    raise Exception(f"Failed to open tab '{tab_key}': {tab_result.error_message}")
+                tab_id = tab_result.target_tab_id
+                opened.append(('tab', tab_id))
+            
+            scope_context = self._create_script_context(tab_id)
+            self.session_contexts[tab_id] = scope_context
+            contexts[(session_key, tab_key)] = scope_context
+        
+        return contexts
+    
+    def _close_scopes(self, opened: List[Tuple[str, str]]) -> None:
+        """Close the tabs, then the browser sessions, opened for parallel scopes"""
+        for kind in ('tab', 'session'):
+            for scope_kind, scope_id in reversed(opened):
+                if scope_kind != kind:
+                    continue
+                self.release_session_context(scope_id)
+                try:
+                    if kind == 'tab':
+                        self.browser_controller.execute_command(BrowserCommand.CLOSE_TAB, target=scope_id)
+                    else:
+                        self.browser_controller.close_session(scope_id)
+                except Exception as e:
+                    logger.warning(f"Failed to close parallel scope {kind} {scope_id}: {e}")
+        opened.clear()
     
     def _execute_single_action(self, action: WebAction, context: ScriptContext) -> ExecutionResult:
         """Execute a single web action with retries"""
@@ -436,6 +698,9 @@ class WebAutomationEngine:
         )
         
         result.result_data = cmd_result.result_data
+        if cmd_result.success:
+            self.dom_inspector.notify_navigation(context.tab_id, url)
+            self.javascript_injector.notify_navigation(context.tab_id)
         return cmd_result.success
     
     def _execute_click_action(self, action: WebAction, context: ScriptContext, result: ExecutionResult) -> bool:
@@ -463,6 +728,7 @@ class WebAutomationEngine:
             libraries=['automation_utils'],
             async_execution=True
         )
+        self.dom_inspector.notify_dom_mutation(context.tab_id)
         
         result.console_logs.extend(script_result.console_output)
         result.errors.extend(script_result.errors)
@@ -498,6 +764,7 @@ class WebAutomationEngine:
             libraries=['automation_utils'],
             async_execution=True
         )
+        self.dom_inspector.notify_dom_mutation(context.tab_id)
         
         result.console_logs.extend(script_result.console_output)
         result.errors.extend(script_result.errors)
@@ -571,6 +838,7 @@ class WebAutomationEngine:
             libraries=libraries,
             async_execution=async_execution
         )
+        self.dom_inspector.notify_dom_mutation(context.tab_id)
         
         result.result_data = script_result.result_value
         result.console_logs.extend(script_result.console_output)
@@ -585,6 +853,9 @@ class WebAutomationEngine:
             result.errors.append("Extract data action missing 'extractors' parameter")
             return False
         
+        if action.parameters.get('sink'):
+            return self._execute_streaming_extraction(action, context, result)
+        
         extract_script = f"""
         const extractors = {json.dumps(extractors)};
         return AutomationUtils.extractData(extractors);
@@ -604,6 +875,36 @@ class WebAutomationEngine:
         
         return script_result.success
     
+    def _execute_streaming_extraction(self, action: WebAction, context: ScriptContext, result: ExecutionResult) -> bool:
+        """Stream rows to a file sink; result_data holds the sink summary, not the rows"""
+        if not action.parameters.get('rows'):
+            result.errors.append("Streaming extraction missing 'rows' selector parameter")
+            return False
+        
+        sink_config = action.parameters['sink']
+        if isinstance(sink_config, str):
+            sink_config = {'path': sink_config}
+        
+        spec = ExtractionSpec.from_parameters(action.parameters)
+        try:
+            sink = create_sink(sink_config['path'], sink_config.get('format'), list(spec.fields))
+        except (KeyError, ValueError, RuntimeError, OSError) as e:
+            result.errors.append(f"Cannot open extraction sink: {e}")
+            return False
+        
+        def navigate(url: str) -> None:
+            self._navigate_to_url(context.tab_id, url, context.tab_id)
+        
+        summary = self.streaming_extractor.extract_to_sink(
+            context, spec, sink,
+            navigate=navigate,
+            on_page_change=lambda: self.dom_inspector.notify_dom_mutation(context.tab_id)
+        )
+        
+        result.result_data = summary.to_dict()
+        result.errors.extend(summary.errors)
+        return not summary.errors
+    
     def _find_element(self, target: Dict[str, Any], context: ScriptContext) -> Optional[ElementInfo]:
         """Find element using DOM inspector"""
         
@@ -629,7 +930,7 @@ class WebAutomationEngine:
             timeout=10.0
         )
         
-        inspection_result = self.dom_inspector.inspect_element(query)
+        inspection_result = self.dom_inspector.inspect_element(query, {'tab_id': context.tab_id})
         
         if inspection_result.success and inspection_result.elements:
             return inspection_result.elements[0]  # Return best match
@@ -721,6 +1022,7 @@ class WebAutomationEngine:
             "component_stats": {
                 "dom_inspector": self.dom_inspector.get_inspection_statistics(),
                 "browser_controller": self.browser_controller.get_session_status(),
-                "javascript_injector": self.javascript_injector.get_injection_statistics()
+                "javascript_injector": self.javascript_injector.get_injection_statistics(),
+                "streaming_extractor": self.streaming_extractor.get_extraction_stats()
             }
         }
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""
+Unit tests for the persistent AdaptationStore.
+"""
+
+import pytest
+
+
+class TestAdaptationStore:
+    """Test persistence and known-good lookup of learned adaptations."""
+    
+    @pytest.fixture
+    def store(self, temp_dir):
+        """Create a store in a temporary directory."""
+        from mkd_v2.advanced_playback.adaptation_store import AdaptationStore
+        return AdaptationStore(storage_path=temp_dir)
+    
+    def test_success_is_persisted(self, store, temp_dir):
+        """Test a recorded success survives reopening the store."""
+        from mkd_v2.advanced_playback.adaptation_store import AdaptationStore
+        
+        # Act
+        store.record_success("click_100_100", "ctx", "element_search", {}, (30, 20), 0.05)
+        reopened = AdaptationStore(storage_path=temp_dir)
+        
+        # Assert
+        learned = reopened.lookup("click_100_100", "ctx")
+        assert learned is not None
+        assert learned.coordinate_shift == (30, 20)
+        assert learned.apply({'type': 'click', 'coordinates': (110, 105)})['coordinates'] == (140, 125)
+    
+    def test_apply_keeps_incoming_action(self, store):
+        """Test only the stored delta is applied, never a previously adapted action."""
+        # Arrange
+        store.record_success("sig", "ctx", "element_search", {'button': 'right'}, None, 0.01)
+        
+        # Act
+        adapted = store.lookup("sig", "ctx").apply({'type': 'key_press', 'key': 'b'})
+        
+        # Assert
+        assert adapted == {'type': 'key_press', 'key': 'b', 'button': 'right'}
+    
+    def test_failures_demote_adaptation(self, store):
+        """Test an adaptation stops being served once it fails as often as it works."""
+        # Arrange
+        store.record_success("sig", "ctx", "coordinate_shift", {'type': 'click'}, (5, 5), 0.01)
+        
+        # Act
+        store.record_failure("sig", "ctx")
+        
+        # Assert
+        assert store.lookup("sig", "ctx") is None
+        assert store.get_stats()['entries'] == 1
+    
+    def test_lookup_is_context_scoped(self, store):
+        """Test adaptations learned in one context are not reused in another."""
+        store.record_success("sig", "ctx-a", "coordinate_shift", {'type': 'click'}, (1, 1), 0.01)
+        
+        assert store.lookup("sig", "ctx-a") is not None
+        assert store.lookup("sig", "ctx-b") is None
@@ -0,0 +1,134 @@
+"""
+Unit tests for element search in the AdaptiveExecutor.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+
+class TestClosestElement:
+    """Test the spatial index is only reused for the list it was built from."""
+    
+    @pytest.fixture
+    def executor(self, temp_dir):
+        from mkd_v2.advanced_playback.adaptive_executor import AdaptiveExecutor
+        from mkd_v2.advanced_playback.adaptation_store import AdaptationStore
+        return AdaptiveExecutor(Mock(), Mock(), AdaptationStore(storage_path=temp_dir))
+    
+    def test_equal_sized_new_list_is_reindexed(self, executor):
+        """Test a different list of the same length never reuses a stale index."""
+        # Arrange
+        first = [{'id': 'a', 'bounds': (0, 0, 10, 10)}, {'id': 'b', 'bounds': (100, 100, 10, 10)}]
+        executor._find_closest_element(first, (5, 5))
+        second = [{'id': 'c', 'bounds': (0, 0, 10, 10)}, {'id': 'd', 'bounds': (100, 100, 10, 10)}]
+        
+        # Act
+        closest = executor._find_closest_element(second, (5, 5))
+        
+        # Assert
+        assert closest['id'] == 'c'
+    
+    def test_in_place_change_needs_invalidation(self, executor):
+        """Test the index is rebuilt after an explicit invalidation."""
+        # Arrange
+        elements = [{'id': 'a', 'bounds': (0, 0, 10, 10)}]
+        executor._find_closest_element(elements, (5, 5))
+        elements[0] = {'id': 'moved', 'bounds': (0, 0, 10, 10)}
+        
+        # Act
+        executor.invalidate_element_index()
+        closest = executor._find_closest_element(elements, (5, 5))
+        
+        # Assert
+        assert closest['id'] == 'moved'
+
+
+class TestLayoutMapping:
+    """Test recorded actions are mapped onto the current displays."""
+    
+    def test_template_searched_at_current_dpi(self, temp_dir):
+        """Test a crop recorded at 1x is searched at 2x on a HiDPI replay monitor."""
+        from mkd_v2.advanced_playback.adaptive_executor import AdaptiveExecutor
+        from mkd_v2.advanced_playback.adaptation_store import AdaptationStore
+        from mkd_v2.automation.display_topology import DisplayTopology
+        
+        # Arrange
+        platform = Mock()
+        platform.get_monitor_info.return_value = [
+            {'index': 0, 'name': 'DP-1', 'width': 3840, 'height': 2160, 'scale_factor': 2.0}
+        ]
+        executor = AdaptiveExecutor(Mock(), Mock(), AdaptationStore(storage_path=temp_dir))
+        executor.display_topology = DisplayTopology(platform)
+        executor.set_recorded_layout([{'index': 0, 'name': 'DP-1', 'width': 1920, 'height': 1080}])
+        action = {'coordinates': (100, 100), 'template': {'path': 'icon.png', 'bounds': [90, 90, 20, 20]}}
+        context = Mock()
+        context.current_context.window_bounds = context.expected_context.window_bounds = {}
+        
+        # Act
+        mapped = executor._map_to_current_layout(action)
+        executor._find_element_by_template(mapped, context)
+        
+        # Assert
+        assert mapped['coordinates'] == (200, 200)
+        assert mapped['template']['pixel_scale'] == 2.0
+        assert executor.automation_engine.find_element_by_template.call_args[0][3] == 2.0
+
+
+class TestLearning:
+    """Test which successful adaptations are remembered and under which signature."""
+    
+    @pytest.fixture
+    def executor(self, temp_dir):
+        from mkd_v2.advanced_playback.adaptive_executor import AdaptiveExecutor
+        from mkd_v2.advanced_playback.adaptation_store import AdaptationStore
+        executor = AdaptiveExecutor(Mock(), Mock(), AdaptationStore(storage_path=temp_dir))
+        executor._get_context_fingerprint = Mock(return_value="ctx")
+        return executor
+    
+    def _success(self, action, adapted_action, adaptation_type):
+        from mkd_v2.advanced_playback.adaptive_executor import AdaptationResult
+        return AdaptationResult(success=True, adapted_action=adapted_action,
+                                adaptation_type=adaptation_type, confidence=0.8, execution_time=0.01)
+    
+    def test_signature_covers_full_identity(self, executor):
+        """Test different keys and long texts with a common prefix never share a signature."""
+        prefix = "x" * 30
+        
+        assert (executor._get_action_signature({'type': 'key_press', 'key': 'a'}) !=
+                executor._get_action_signature({'type': 'key_press', 'key': 'b'}))
+        assert (executor._get_action_signature({'type': 'type', 'text': prefix + "one"}) !=
+                executor._get_action_signature({'type': 'type', 'text': prefix + "two"}))
+    
+    def test_jitter_is_not_persisted(self, executor):
+        """Test a random coordinate nudge that happened to work is not learned."""
+        from mkd_v2.advanced_playback.adaptive_executor import AdaptationType
+        
+        # Arrange
+        action = {'type': 'click', 'coordinates': (100, 100)}
+        result = self._success(action, {'type': 'click', 'coordinates': (103, 98)},
+                               AdaptationType.COORDINATE_SHIFT)
+        
+        # Act
+        executor._learn_from_success(action, result, Mock())
+        
+        # Assert
+        assert executor.adaptation_store.get_stats()['entries'] == 0
+    
+    def test_element_search_shift_is_persisted(self, executor):
+        """Test a located element's offset is replayed onto the next matching action."""
+        from mkd_v2.advanced_playback.adaptive_executor import AdaptationType
+        
+        # Arrange
+        action = {'type': 'click', 'coordinates': (100, 100)}
+        result = self._success(action, {'type': 'click', 'coordinates': (130, 120)},
+                               AdaptationType.ELEMENT_SEARCH)
+        
+        # Act
+        executor._learn_from_success(action, result, Mock())
+        
+        # Assert
+        learned = executor.adaptation_store.lookup(executor._get_action_signature(action), "ctx")
+        assert learned.apply({'type': 'click', 'coordinates': (110, 105)}) == {
+            'type': 'click', 'coordinates': (140, 125)
+        }
@@ -0,0 +1,174 @@
+"""
+Unit tests for batched input dispatch in the PerformanceOptimizer.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+
+class TestPerformanceOptimizerBatching:
+    """Test that primitive input runs reach the platform as one call."""
+    
+    @pytest.fixture
+    def platform(self):
+        """Platform double that records execute_batch calls."""
+        platform = Mock()
+        platform.execute_batch.side_effect = lambda actions: [True] * len(actions)
+        return platform
+    
+    @pytest.fixture
+    def optimizer(self, platform):
+        """Create an optimizer wired to the fake platform."""
+        from mkd_v2.advanced_playback.performance_optimizer import PerformanceOptimizer
+        handler = Mock(return_value={'success': True})
+        optimizer = PerformanceOptimizer(platform=platform, action_handler=handler)
+        yield optimizer
+        optimizer.shutdown()
+    
+    def test_contiguous_input_sent_in_one_call(self, optimizer, platform):
+        """Test a run of moves, clicks and typing is dispatched once."""
+        # Arrange
+        batch = [
+            {'type': 'move', 'coordinates': (10, 10)},
+            {'type': 'click', 'coordinates': (20, 20)},
+            {'type': 'type', 'text': 'hello'},
+            {'type': 'scroll', 'x': 5, 'y': 5, 'dy': -3},
+        ]
+        
+        # Act
+        results = optimizer._execute_batch(batch)
+        
+        # Assert
+        assert platform.execute_batch.call_count == 1
+        assert len(platform.execute_batch.call_args[0][0]) == 4
+        assert [r['action'] for r in results] == batch
+        assert all(r['success'] for r in results)
+    
+    def test_non_primitive_action_splits_run(self, optimizer, platform):
+        """Test OCR actions go through the handler and split input runs."""
+        # Arrange
+        batch = [
+            {'type': 'click', 'coordinates': (1, 1)},
+            {'type': 'click', 'use_ocr': True, 'text': 'OK'},
+            {'type': 'click', 'coordinates': (2, 2)},
+        ]
+        
+        # Act
+        results = optimizer._execute_batch(batch)
+        
+        # Assert
+        assert platform.execute_batch.call_count == 2
+        optimizer.action_handler.assert_called_once_with(batch[1])
+        assert [r['action'] for r in results] == batch
+    
+    def test_independent_actions_use_worker_pool(self, optimizer, platform):
+        """Test independent actions keep their result position."""
+        # Arrange
+        batches = [[
+            {'type': 'click', 'coordinates': (1, 1)},
+            {'type': 'screenshot'},
+            {'type': 'key_press', 'key': 'Return'},
+        ]]
+        
+        # Act
+        results = optimizer._execute_optimized_batches(batches)
+        
+        # Assert
+        assert [r['action']['type'] for r in results] == ['click', 'screenshot', 'key_press']
+        assert optimizer.dispatch_stats['independent_actions'] == 1
+        assert optimizer._worker_pool is not None
+    
+    def test_input_order_preserved_by_sequence_optimization(self, optimizer):
+        """Test sequence optimization does not reorder input actions."""
+        # Arrange
+        actions = [
+            {'type': 'click', 'coordinates': (1, 1)},
+            {'type': 'type', 'text': 'a'},
+            {'type': 'click', 'coordinates': (2, 2)},
+        ]
+        
+        # Act
+        optimized = optimizer._optimize_action_sequence(actions)
+        
+        # Assert
+        assert optimized == actions
+    
+    def test_plan_only_dispatches_nothing(self, optimizer, platform):
+        """Test a planned sequence is returned for the caller without being executed."""
+        # Arrange
+        actions = [{'type': 'click', 'coordinates': (1, 1)}, {'type': 'type', 'text': 'a'}]
+        
+        # Act
+        result = optimizer.optimize_execution(actions, execute=False)
+        
+        # Assert
+        assert result.success
+        assert result.planned_actions == actions
+        assert result.action_results == []
+        platform.execute_batch.assert_not_called()
+
+
+class TestPlaybackEngineDispatch:
+    """Test the playback engine executes each action through exactly one path."""
+    
+    @pytest.fixture
+    def platform(self):
+        platform = Mock()
+        platform.execute_batch.side_effect = lambda actions: [True] * len(actions)
+        return platform
+    
+    @pytest.fixture
+    def make_engine(self):
+        """Build engines with the adaptive components replaced by doubles."""
+        from unittest.mock import patch
+        from mkd_v2.advanced_playback.advanced_playback_engine import AdvancedPlaybackEngine, PlaybackConfig
+        
+        engines = []
+        
+        def make(mode, platform):
+            module = 'mkd_v2.advanced_playback.advanced_playback_engine'
+            with patch(f'{module}.ContextVerifier'), patch(f'{module}.AdaptiveExecutor'), \
+                    patch(f'{module}.RecoveryEngine'):
+                engine = AdvancedPlaybackEngine(PlaybackConfig(mode=mode), platform=platform)
+            engine._verify_execution_context = Mock(return_value=True)
+            engine.adaptive_executor.execute_with_adaptation.return_value = Mock(success=True, adaptations_made=0)
+            engines.append(engine)
+            return engine
+        
+        yield make
+        for engine in engines:
+            engine.performance_optimizer.shutdown()
+    
+    @pytest.fixture
+    def actions(self):
+        return [{'type': 'click', 'coordinates': (1, 1)}, {'type': 'key_press', 'key': 'Return'}]
+    
+    def test_fast_mode_runs_through_platform_only(self, make_engine, platform, actions):
+        """Test FAST mode batches input to the platform and skips adaptive execution."""
+        from mkd_v2.advanced_playback.advanced_playback_engine import PlaybackMode
+        
+        # Arrange
+        engine = make_engine(PlaybackMode.FAST, platform)
+        
+        # Act
+        result = engine.execute_playbook(actions)
+        
+        # Assert
+        platform.execute_batch.assert_called_once()
+        engine.adaptive_executor.execute_with_adaptation.assert_not_called()
+        assert result.successful_actions == 2
+    
+    def test_adaptive_mode_only_plans_with_optimizer(self, make_engine, platform, actions):
+        """Test ADAPTIVE mode executes each action once, through the adaptive executor."""
+        from mkd_v2.advanced_playback.advanced_playback_engine import PlaybackMode
+        
+        # Arrange
+        engine = make_engine(PlaybackMode.ADAPTIVE, platform)
+        
+        # Act
+        result = engine.execute_playbook(actions)
+        
+        # Assert
+        platform.execute_batch.assert_not_called()
+        assert engine.adaptive_executor.execute_with_adaptation.call_count == 2
+        assert result.successful_actions == 2
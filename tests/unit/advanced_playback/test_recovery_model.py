@@ -0,0 +1,48 @@
+"""
+Unit tests for the persistent RecoveryModel.
+"""
+
+import pytest
+
+
+class TestRecoveryModel:
+    """Test persistence and expected-cost ranking of recovery strategies."""
+    
+    @pytest.fixture
+    def model(self, temp_dir):
+        """Create a model in a temporary directory."""
+        from mkd_v2.advanced_playback.recovery_model import RecoveryModel
+        return RecoveryModel(storage_path=temp_dir)
+    
+    def test_outcomes_are_persisted(self, model, temp_dir):
+        """Test recorded attempts survive reopening the model."""
+        from mkd_v2.advanced_playback.recovery_model import RecoveryModel
+        
+        # Act
+        model.record("timeout", "Editor:document", "retry_with_delay", True, 2.0)
+        model.record("timeout", "Editor:document", "retry_with_delay", False, 4.0)
+        reopened = RecoveryModel(storage_path=temp_dir)
+        
+        # Assert
+        entry = reopened.get("timeout", "Editor:document", "retry_with_delay")
+        assert entry.attempts == 2
+        assert entry.successes == 1
+        assert entry.avg_latency == pytest.approx(3.0)
+    
+    def test_cheap_reliable_strategy_ranked_first(self, model):
+        """Test a slow strategy is demoted once a cheap one proves reliable."""
+        # Arrange
+        priors = {"application_restart": 10.0, "context_restoration": 2.5}
+        for _ in range(3):
+            model.record("application_crash", "App:main", "context_restoration", True, 1.0)
+        
+        # Act
+        ranked = model.rank("application_crash", "App:main",
+                            ["application_restart", "context_restoration"], priors)
+        other_context = model.rank("application_crash", "Other:main",
+                                   ["context_restoration", "application_restart"],
+                                   {"application_restart": 0.5, "context_restoration": 2.5})
+        
+        # Assert
+        assert ranked == ["context_restoration", "application_restart"]
+        assert other_context == ["application_restart", "context_restoration"]
@@ -0,0 +1,128 @@
+"""
+Unit tests for the display topology service.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+
+class TestDisplayTopology:
+    """Test layout caching, coordinate mapping and per-monitor capture."""
+    
+    @pytest.fixture
+    def topology(self):
+        """Topology over a 4K primary with a 1080p monitor to its right."""
+        from mkd_v2.automation.display_topology import DisplayTopology
+        platform = Mock()
+        platform.get_monitor_info.return_value = [
+            {'index': 0, 'name': 'DP-1', 'x': 0, 'y': 0, 'width': 3840, 'height': 2160,
+             'is_primary': True, 'scale_factor': 2.0},
+            {'index': 1, 'name': 'HDMI-1', 'x': 3840, 'y': 0, 'width': 1920, 'height': 1080,
+             'is_primary': False, 'scale_factor': 1.0}
+        ]
+        return DisplayTopology(platform)
+    
+    def test_maps_recorded_layout_per_monitor(self, topology):
+        """Test points map through the transform of the monitor they were recorded on."""
+        # Arrange
+        recorded = [
+            {'index': 0, 'name': 'DP-1', 'x': 0, 'y': 0, 'width': 1920, 'height': 1080, 'scale_factor': 1.0},
+            {'index': 1, 'name': 'HDMI-1', 'x': 1920, 'y': 0, 'width': 1920, 'height': 1080}
+        ]
+        
+        # Act
+        on_primary = topology.map_point(960, 540, recorded)
+        on_secondary = topology.map_point(2020, 100, recorded)
+        mapping = topology.get_mapping(recorded)
+        
+        # Assert
+        assert on_primary == (1920, 1080)
+        assert on_secondary == (3940, 100)
+        assert mapping.transform_at(960, 540).pixel_scale == 2.0
+        assert topology.get_topology_stats()['mapping_builds'] == 1
+        assert topology.platform.get_monitor_info.call_count == 1
+    
+    def test_same_layout_is_identity(self, topology):
+        """Test replaying on the recording layout leaves coordinates alone."""
+        # Act
+        mapping = topology.get_mapping(topology.to_layout())
+        
+        # Assert
+        assert mapping.is_identity
+        assert mapping.map_point(4000, 500) == (4000, 500)
+    
+    def test_captures_each_monitor(self, topology):
+        """Test every monitor is captured separately at its own bounds."""
+        # Arrange
+        regions = []
+        topology.screen_capture = SimpleNamespace(
+            capture=lambda region=None: regions.append(region) or SimpleNamespace(bounds=region)
+        )
+        
+        # Act
+        frames = topology.capture_monitors()
+        topology.close()
+        
+        # Assert
+        assert sorted(regions) == [(0, 0, 3840, 2160), (3840, 0, 1920, 1080)]
+        assert set(frames) == {0, 1}
+        assert topology.get_topology_stats()['parallel_captures'] == 1
+    
+    def test_layout_change_detected_on_refresh(self, topology):
+        """Test stale geometry is re-read and mappings survive only an unchanged layout."""
+        # Arrange
+        recorded = [{'index': 0, 'name': 'DP-1', 'x': 0, 'y': 0, 'width': 1920, 'height': 1080}]
+        topology.get_mapping(recorded)
+        topology.refresh_interval = 0.0
+        
+        # Act
+        topology.get_mapping(recorded)  # Geometry re-read, layout unchanged
+        topology.platform.get_monitor_info.return_value = [
+            {'index': 0, 'name': 'DP-1', 'x': 0, 'y': 0, 'width': 3840, 'height': 2160,
+             'is_primary': True, 'scale_factor': 2.0}
+        ]  # HDMI-1 unplugged
+        monitors = topology.monitors
+        topology.get_mapping(recorded)
+        
+        # Assert
+        stats = topology.get_topology_stats()
+        assert [m.name for m in monitors] == ['DP-1']
+        assert stats['layout_changes'] == 1
+        assert stats['mapping_hits'] == 1
+        assert stats['mapping_builds'] == 2
+    
+    def test_full_screen_detection_captures_per_monitor(self, topology):
+        """Test detectors capture each monitor instead of the whole virtual screen."""
+        from mkd_v2.automation.element_detector import VisualElementDetector
+        
+        # Arrange
+        regions = []
+        topology.screen_capture = SimpleNamespace(
+            capture=lambda region=None: regions.append(region) or SimpleNamespace(bounds=region)
+        )
+        detector = VisualElementDetector(screen_capture=topology.screen_capture, display_topology=topology)
+        
+        # Act
+        frames = detector._take_full_screenshot()
+        topology.close()
+        
+        # Assert
+        assert None not in regions
+        assert [frame.bounds for frame in frames] == [(0, 0, 3840, 2160), (3840, 0, 1920, 1080)]
+    
+    def test_release_capture_detaches_only_that_capture(self, topology):
+        """Test an engine closing its capture leaves the shared topology usable."""
+        # Arrange
+        mine, other = Mock(), Mock()
+        topology.screen_capture = mine
+        
+        # Act
+        topology.release_capture(other)
+        kept = topology.screen_capture
+        topology.release_capture(mine)
+        
+        # Assert
+        assert kept is mine
+        assert topology.screen_capture is None
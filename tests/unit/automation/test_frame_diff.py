@@ -0,0 +1,71 @@
+"""
+Unit tests for tile-hash frame differencing and incremental detection.
+"""
+
+import pytest
+
+
+class TestFrameDiff:
+    """Test dirty-tile reporting and detection reuse."""
+    
+    def test_merge_tiles_into_rectangles(self):
+        """Test adjacent dirty tiles merge into row runs stacked vertically."""
+        from mkd_v2.automation.frame_diff import FrameDiffTracker
+        
+        # Arrange
+        tiles = {(0, 0), (0, 1), (1, 0), (1, 1), (1, 3), (3, 0)}
+        
+        # Act
+        rects = FrameDiffTracker.merge_tiles(tiles)
+        
+        # Assert
+        assert rects == [(0, 0, 2, 2), (1, 3, 1, 1), (3, 0, 1, 1)]
+    
+    def test_only_changed_tiles_are_dirty(self):
+        """Test a one-pixel change dirties a single tile."""
+        np = pytest.importorskip("numpy")
+        from mkd_v2.automation.frame_diff import FrameDiffTracker
+        from mkd_v2.automation.screen_capture import ScreenFrame
+        
+        # Arrange
+        tracker = FrameDiffTracker(tile_size=16)
+        pixels = np.zeros((40, 40, 3), dtype=np.uint8)
+        first = tracker.update(ScreenFrame(pixels.copy(), (100, 200), "test"))
+        pixels[20, 35] = 255
+        
+        # Act
+        second = tracker.update(ScreenFrame(pixels, (100, 200), "test"))
+        
+        # Assert
+        assert first.full
+        assert second.dirty_tiles == 1 and second.total_tiles == 9
+        assert second.dirty_regions == [(132, 216, 8, 16)]
+    
+    def test_unchanged_frame_skips_detection(self, monkeypatch):
+        """Test repeated polls of a static region reuse cached elements."""
+        np = pytest.importorskip("numpy")
+        from mkd_v2.automation import element_detector
+        from mkd_v2.automation.element_detector import VisualElementDetector, UIElementInfo
+        from mkd_v2.automation.screen_capture import ScreenFrame
+        
+        # Arrange
+        monkeypatch.setattr(element_detector, "CV2_AVAILABLE", True)
+        capture = type("Capture", (), {})()
+        capture.capture = lambda region=None: ScreenFrame(np.zeros((64, 64, 3), dtype=np.uint8), (0, 0), "test")
+        detector = VisualElementDetector(screen_capture=capture)
+        calls = []
+        
+        def detect(frame):
+            calls.append(frame.bounds)
+            return [UIElementInfo("button_10_10", "button", (10, 10, 30, 20), detection_method="contour_analysis")]
+        
+        monkeypatch.setattr(detector, "_detect_frame_elements", detect)
+        
+        # Act
+        first = detector.detect_elements_in_region(0, 0, 64, 64)
+        second = detector.detect_elements_in_region(0, 0, 64, 64)
+        
+        # Assert
+        assert len(calls) == 1
+        assert [e.element_id for e in second.elements] == [e.element_id for e in first.elements]
+        assert detector.get_detection_stats()['cached_detections'] == 1
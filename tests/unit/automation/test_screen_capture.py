@@ -0,0 +1,81 @@
+"""
+Unit tests for raw-pixel screen capture.
+"""
+
+import pytest
+
+
+class TestScreenCapture:
+    """Test region capture into arrays without encode/decode round trips."""
+    
+    @pytest.fixture
+    def fake_mss(self, monkeypatch):
+        """mss double over a 64x48 BGRA virtual screen."""
+        np = pytest.importorskip("numpy")
+        from mkd_v2.automation import screen_capture
+        
+        screen = np.arange(48 * 64 * 4, dtype=np.uint32).astype(np.uint8).reshape(48, 64, 4)
+        
+        class Shot:
+            def __init__(self, monitor):
+                self.width, self.height = monitor['width'], monitor['height']
+                x, y = monitor['left'], monitor['top']
+                self.raw = bytearray(screen[y:y + self.height, x:x + self.width].tobytes())
+        
+        class Sct:
+            monitors = [{'left': 0, 'top': 0, 'width': 64, 'height': 48}]
+            grab = staticmethod(Shot)
+            
+            def close(self):
+                pass
+        
+        monkeypatch.setattr(screen_capture, "MSS_AVAILABLE", True)
+        monkeypatch.setattr(screen_capture, "mss", type("mss", (), {"mss": Sct}))
+        return screen
+    
+    def test_region_capture_is_clipped_view(self, fake_mss):
+        """Test region capture clips to the screen and wraps the raw buffer."""
+        from mkd_v2.automation.screen_capture import ScreenCapture
+        
+        # Arrange
+        capture = ScreenCapture()
+        
+        # Act
+        frame = capture.capture((50, 40, 32, 32))
+        
+        # Assert
+        assert capture.backend == "mss"
+        assert frame.bounds == (50, 40, 14, 8)
+        assert (frame.pixels == fake_mss[40:48, 50:64, :3]).all()
+        assert frame.pixels.base is not None  # View over the grab, not a copy
+    
+    def test_crop_uses_screen_coordinates(self, fake_mss):
+        """Test cropping a frame by screen coordinates returns a view."""
+        from mkd_v2.automation.screen_capture import ScreenCapture
+        
+        # Arrange
+        frame = ScreenCapture().capture((10, 10, 20, 20))
+        
+        # Act
+        cropped = frame.crop(15, 12, 5, 4)
+        
+        # Assert
+        assert cropped.bounds == (15, 12, 5, 4)
+        assert (cropped.pixels == fake_mss[12:16, 15:20, :3]).all()
+        assert frame.crop(100, 100, 5, 5) is None
+    
+    def test_detector_reports_missing_capture(self, monkeypatch):
+        """Test detection fails cleanly when no capture backend exists."""
+        from mkd_v2.automation import screen_capture
+        from mkd_v2.automation.element_detector import VisualElementDetector
+        
+        # Arrange
+        monkeypatch.setattr(screen_capture, "NUMPY_AVAILABLE", False)
+        detector = VisualElementDetector(screenshot_func=lambda region=None: b"not an image")
+        
+        # Act
+        result = detector.detect_elements_in_region(0, 0, 100, 100)
+        
+        # Assert
+        assert not result.success
+        assert result.error_message == "Failed to capture screenshot"
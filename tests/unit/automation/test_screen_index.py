@@ -0,0 +1,86 @@
+"""
+Unit tests for the shared ScreenIndex.
+"""
+
+import time
+
+import pytest
+from unittest.mock import Mock
+
+
+class TestScreenIndex:
+    """Test window hit-testing with z-order and incremental element refresh."""
+    
+    @pytest.fixture
+    def window_state(self):
+        """Window state model over a window manager double."""
+        from mkd_v2.automation.window_manager import WindowInfo
+        from mkd_v2.automation.window_state import WindowStateModel
+        manager = Mock()
+        manager.get_window_list.return_value = [
+            WindowInfo("0x1", "Dialog", "app", 1, (100, 100, 200, 200), is_active=True, z_order=0),
+            WindowInfo("0x2", "Main", "app", 1, (0, 0, 1000, 800), z_order=1),
+        ]
+        state = WindowStateModel(manager, use_x11_events=False)
+        state._started = True
+        state.refresh()
+        return state
+    
+    @pytest.fixture
+    def index(self, window_state):
+        """Screen index following the window state."""
+        from mkd_v2.automation.screen_index import ScreenIndex
+        return ScreenIndex(window_state)
+    
+    def test_window_at_point_follows_restack(self, index, window_state):
+        """Test hit-tests respect z-order and update when windows restack."""
+        from mkd_v2.automation.window_manager import WindowInfo
+        
+        # Arrange
+        assert index.get_window_at_point(150, 150).title == "Dialog"
+        window_state.window_manager.get_window_list.return_value = [
+            WindowInfo("0x2", "Main", "app", 1, (0, 0, 1000, 800), is_active=True, z_order=0),
+            WindowInfo("0x1", "Dialog", "app", 1, (100, 100, 200, 200), z_order=1),
+        ]
+        
+        # Act
+        window_state.refresh()
+        
+        # Assert
+        assert index.get_window_at_point(150, 150).title == "Main"
+        assert index.get_window_at_point(5000, 5000) is None
+    
+    def test_region_refresh_replaces_elements(self, index):
+        """Test a detection refresh replaces only elements inside its region."""
+        from mkd_v2.automation.element_detector import UIElementInfo
+        
+        # Arrange
+        index.update_elements([
+            UIElementInfo("a", "button", (10, 10, 20, 20)),
+            UIElementInfo("b", "button", (500, 500, 20, 20)),
+        ])
+        
+        # Act
+        index.update_elements([UIElementInfo("c", "text", (12, 12, 10, 10))], region=(0, 0, 100, 100))
+        
+        # Assert
+        assert [e.element_id for e in index.get_elements_in_region(0, 0, 100, 100)] == ["c"]
+        assert index.get_element_at_point(505, 505).element_id == "b"
+        assert index.is_region_fresh(10, 10, 50, 50)
+    
+    def test_point_queries_with_many_elements(self, index):
+        """Test point hit-tests stay fast with thousands of elements."""
+        from mkd_v2.automation.element_detector import UIElementInfo
+        
+        # Arrange
+        elements = [UIElementInfo(f"e{i}", "button", ((i % 80) * 24, (i // 80) * 24, 20, 20)) for i in range(4000)]
+        index.update_elements(elements)
+        
+        # Act
+        start = time.perf_counter()
+        for i in range(1000):
+            index.get_element_at_point((i * 7) % 1900, (i * 13) % 1200)
+        per_query = (time.perf_counter() - start) / 1000
+        
+        # Assert
+        assert per_query < 0.001
@@ -0,0 +1,64 @@
+"""
+Unit tests for the grid-based SpatialIndex.
+"""
+
+import random
+
+import pytest
+
+
+class TestSpatialIndex:
+    """Test point, region and nearest-center queries."""
+    
+    @pytest.fixture
+    def index(self):
+        """Create an index with a small fixed layout."""
+        from mkd_v2.automation.spatial_index import SpatialIndex
+        index = SpatialIndex(cell_size=50)
+        index.insert("a", (0, 0, 100, 30), "button_a")
+        index.insert("b", (200, 200, 40, 40), "button_b")
+        index.insert("c", (90, 10, 20, 20), "icon_c")
+        return index
+    
+    def test_query_point(self, index):
+        """Test hit-testing returns every containing rectangle."""
+        assert sorted(index.query_point(95, 15)) == ["button_a", "icon_c"]
+        assert index.query_point(150, 150) == []
+    
+    def test_query_region(self, index):
+        """Test region queries return intersecting rectangles once."""
+        assert sorted(index.query_region(180, 180, 100, 100)) == ["button_b"]
+        assert len(index.query_region(0, 0, 300, 300)) == 3
+    
+    def test_update_and_remove(self, index):
+        """Test incremental updates move items between cells."""
+        index.update("b", (0, 100, 10, 10))
+        assert index.query_point(205, 205) == []
+        assert index.query_point(5, 105) == ["button_b"]
+        
+        assert index.remove("b") is True
+        assert index.remove("b") is False
+        assert len(index) == 2
+    
+    def test_nearest_matches_linear_scan(self):
+        """Test nearest-center search agrees with a brute-force scan."""
+        from mkd_v2.automation.spatial_index import SpatialIndex
+        
+        rng = random.Random(42)
+        rects = [(rng.randint(0, 1900), rng.randint(0, 1000), rng.randint(5, 80), rng.randint(5, 40))
+                 for _ in range(500)]
+        index = SpatialIndex.from_items(rects, lambda r: r, cell_size=64)
+        
+        for _ in range(100):
+            x, y = rng.randint(0, 2000), rng.randint(0, 1100)
+            found = index.nearest(x, y)
+            
+            def d2(r):
+                return (r[0] + r[2] // 2 - x) ** 2 + (r[1] + r[3] // 2 - y) ** 2
+            
+            assert d2(found) == min(d2(r) for r in rects)
+    
+    def test_nearest_respects_max_distance(self, index):
+        """Test max_distance limits nearest search."""
+        assert index.nearest(1000, 1000, max_distance=10) is None
+        assert index.nearest(1000, 1000) == "button_b"
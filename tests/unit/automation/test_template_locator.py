@@ -0,0 +1,72 @@
+"""
+Unit tests for the template-matching element locator.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+
+class TestTemplateLocator:
+    """Test template storage, search regions and matching."""
+    
+    def test_store_sits_next_to_recording(self, tmp_path):
+        """Test recordings keep their crops in a sibling directory."""
+        from mkd_v2.automation.template_locator import TemplateStore
+        
+        # Act
+        store = TemplateStore.for_recording(tmp_path / "recording_20250101_000000_abcd1234.mkd")
+        
+        # Assert
+        assert store.directory == tmp_path / "recording_20250101_000000_abcd1234.templates"
+        assert store.path("evt").name == "evt.png"
+    
+    def test_predicted_region_follows_window_offset(self):
+        """Test the search region is the recorded bounds moved and padded."""
+        from mkd_v2.automation.template_locator import TemplateLocator
+        
+        # Arrange
+        locator = TemplateLocator(screen_capture=None, search_margin=10)
+        pyramid = [(1.0, SimpleNamespace(shape=(40, 40))), (1.25, SimpleNamespace(shape=(50, 50)))]
+        
+        # Act
+        region = locator._predicted_region(pyramid, (100, 200, 40, 40), offset=(30, -20))
+        
+        # Assert
+        assert region == (110, 160, 80, 80)
+    
+    def test_locates_moved_icon_in_predicted_region(self, tmp_path):
+        """Test an icon that moved with its window is found without a full-frame search."""
+        np = pytest.importorskip("numpy")
+        cv2 = pytest.importorskip("cv2")
+        from mkd_v2.automation.screen_capture import ScreenFrame
+        from mkd_v2.automation.template_locator import TemplateLocator
+        
+        # Arrange
+        rng = np.random.default_rng(0)
+        icon = rng.integers(0, 255, (24, 24, 3), dtype=np.uint8)
+        screen = np.zeros((400, 600, 3), dtype=np.uint8)
+        screen[230:254, 330:354] = icon  # Recorded at (300, 200), window moved by (30, 30)
+        template = tmp_path / "icon.png"
+        cv2.imwrite(str(template), icon)
+        
+        regions = []
+        
+        def capture(region=None):
+            regions.append(region)
+            x, y, w, h = region or (0, 0, 600, 400)
+            x, y = max(0, x), max(0, y)
+            return ScreenFrame(screen[y:y + h, x:x + w], (x, y), "test")
+        
+        locator = TemplateLocator(SimpleNamespace(capture=capture))
+        
+        # Act
+        first = locator.locate(template, predicted=(300, 200, 24, 24), offset=(30, 30))
+        second = locator.locate(template, predicted=(300, 200, 24, 24), offset=(30, 30))
+        
+        # Assert
+        assert first.bounds == (330, 230, 24, 24)
+        assert first.confidence > 0.95 and not first.full_frame
+        assert None not in regions
+        assert second.bounds == first.bounds
+        assert locator.get_locator_stats()['pyramid_builds'] == 1
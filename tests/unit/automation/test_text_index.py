@@ -0,0 +1,73 @@
+"""
+Unit tests for the OCR result cache and text index.
+"""
+
+import pytest
+
+
+class TestTextIndex:
+    """Test token lookups and OCR reuse."""
+    
+    @pytest.fixture
+    def index(self):
+        """Index over a few OCR words."""
+        from mkd_v2.automation.element_detector import UIElementInfo
+        from mkd_v2.automation.text_index import TextIndex
+        index = TextIndex()
+        for word, bounds in [("Save", (300, 10, 40, 12)), ("Cancel", (10, 50, 50, 12)), ("Saved", (10, 10, 45, 12))]:
+            element = UIElementInfo(f"ocr_text_{bounds[0]}_{bounds[1]}", "text", bounds, text=word)
+            index.add(("tesseract_ocr", bounds), element)
+        return index
+    
+    def test_exact_and_fuzzy_lookup(self, index):
+        """Test exact lookups hit one token and fuzzy ones match containment."""
+        # Act
+        exact = index.lookup("save", fuzzy=False)
+        fuzzy = index.lookup("Save")
+        
+        # Assert
+        assert [e.text for e in exact] == ["Save"]
+        assert [e.text for e in fuzzy] == ["Saved", "Save"]  # Reading order
+        assert index.lookup("cancel button")[0].text == "Cancel"
+    
+    def test_remove_drops_token(self, index):
+        """Test removing the last element for a token empties it."""
+        from mkd_v2.automation.element_detector import UIElementInfo
+        
+        # Act
+        index.remove(("tesseract_ocr", (10, 50, 50, 12)), UIElementInfo("x", "text", (10, 50, 50, 12), text="Cancel"))
+        
+        # Assert
+        assert index.lookup("cancel") == []
+        assert len(index) == 2
+    
+    def test_repeated_lookup_skips_ocr(self, monkeypatch):
+        """Test text lookups on a static screen are answered without OCR."""
+        np = pytest.importorskip("numpy")
+        from mkd_v2.automation import element_detector
+        from mkd_v2.automation.element_detector import VisualElementDetector, UIElementInfo
+        from mkd_v2.automation.screen_capture import ScreenFrame
+        
+        # Arrange
+        monkeypatch.setattr(element_detector, "CV2_AVAILABLE", True)
+        monkeypatch.setattr(element_detector, "TESSERACT_AVAILABLE", True)
+        capture = type("Capture", (), {})()
+        capture.capture = lambda region=None: ScreenFrame(np.zeros((64, 64, 3), dtype=np.uint8), (0, 0), "test")
+        detector = VisualElementDetector(screen_capture=capture)
+        calls = []
+        
+        def ocr(image, offset_x=0, offset_y=0):
+            calls.append(image.shape)
+            return [UIElementInfo("ocr_text_5_5", "text", (5, 5, 30, 10), text="OK", confidence=0.9,
+                                  detection_method="tesseract_ocr")]
+        
+        monkeypatch.setattr(detector, "_ocr_detect_text", ocr)
+        
+        # Act
+        first = detector.find_element_by_text("ok")
+        detector.text_index_ttl = 0.0
+        second = detector.find_element_by_text("ok", fuzzy=False)
+        
+        # Assert
+        assert first.bounds == second.bounds == (5, 5, 30, 10)
+        assert len(calls) == 1
@@ -0,0 +1,88 @@
+"""
+Unit tests for tiled element detection planning and seam merging.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+
+class TestTiledDetection:
+    """Test tile layout and merging of per-tile boxes."""
+    
+    @pytest.fixture
+    def detector(self):
+        """Tiled detector with small tiles; no pool is started."""
+        from mkd_v2.automation.tiled_detection import TiledDetector
+        return TiledDetector(tile_size=100, overlap=20, max_workers=1)
+    
+    def test_tiles_cover_frame_with_overlap(self):
+        """Test cores partition the frame and extended tiles add overlap."""
+        from mkd_v2.automation.tiled_detection import plan_tiles
+        
+        # Act
+        tiles = plan_tiles(250, 100, 100, 20)
+        
+        # Assert
+        assert [core for core, _ in tiles] == [(0, 0, 100, 100), (100, 0, 100, 100), (200, 0, 50, 100)]
+        assert [extended for _, extended in tiles] == [(0, 0, 120, 100), (80, 0, 140, 100), (180, 0, 70, 100)]
+    
+    def test_merge_dedupes_and_joins_seams(self, detector):
+        """Test overlap duplicates collapse and seam-cut boxes are unioned."""
+        from mkd_v2.automation.element_detector import UIElementInfo
+        from mkd_v2.automation.tiled_detection import plan_tiles
+        
+        # Arrange
+        frame = SimpleNamespace(origin=(1000, 0), width=200, height=100)
+        tiles = plan_tiles(200, 100, 100, 20)
+        
+        def button(x, y, w):
+            return UIElementInfo(f"button_{x}_{y}", "button", (x, y, w, 25), confidence=0.7,
+                                 detection_method="contour_analysis")
+        
+        # A button inside the overlap strip is seen whole by both tiles; a wide
+        # button across the seam is cut at x=1120 on the left and x=1080 on the right
+        left_tile = [button(1090, 60, 20), button(1070, 10, 50)]
+        right_tile = [button(1090, 60, 20), button(1080, 10, 60)]
+        
+        # Act
+        merged = detector._merge(frame, tiles, [left_tile, right_tile])
+        
+        # Assert
+        assert [e.bounds for e in merged] == [(1070, 10, 70, 25), (1090, 60, 20, 25)]
+        assert merged[0].element_id == "button_1070_10"
+        assert detector.stats['duplicates_removed'] == 1
+    
+    def test_process_pool_matches_in_process(self):
+        """Test spawned workers reading the shared block find what in-process tiles find."""
+        np = pytest.importorskip("numpy")
+        cv2 = pytest.importorskip("cv2")
+        from multiprocessing import shared_memory
+        from mkd_v2.automation.screen_capture import ScreenFrame
+        from mkd_v2.automation.tiled_detection import TiledDetector
+        
+        # Arrange
+        pixels = np.full((300, 400, 3), 240, dtype=np.uint8)
+        for x, y in [(20, 20), (130, 120), (300, 220)]:
+            cv2.rectangle(pixels, (x, y), (x + 70, y + 30), (60, 60, 60), 2)
+        frame = ScreenFrame(pixels, (0, 0), "test")
+        pooled = TiledDetector(tile_size=150, overlap=30, max_workers=2, min_pixels=0)
+        in_process = TiledDetector(tile_size=150, overlap=30, max_workers=1, min_pixels=0)
+        
+        # Act
+        try:
+            first = pooled.detect(frame)
+            second = pooled.detect(frame)  # Workers reuse their attachment to the block
+            block_name = pooled._block.name
+        finally:
+            pooled.close()
+        expected = in_process.detect(frame)
+        
+        # Assert
+        assert first.success and second.success
+        assert pooled.stats['parallel_frames'] == 2
+        assert 'share' in first.stage_timings
+        assert [e.bounds for e in first.elements] == [e.bounds for e in expected.elements]
+        assert [e.bounds for e in second.elements] == [e.bounds for e in expected.elements]
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=block_name)
@@ -0,0 +1,145 @@
+"""
+Unit tests for the LinuxWindowManager subprocess fallback and point lookup.
+"""
+
+import importlib.util
+import os
+import shutil
+import subprocess
+
+import pytest
+
+
+def fake_run(outputs):
+    """subprocess.run stand-in answering by tool name; unknown tools fail."""
+    def run(command, *args, **kwargs):
+        output = outputs.get(command[0])
+        return subprocess.CompletedProcess(command, 0 if output is not None else 1, output or "", "")
+    return run
+
+
+class TestLinuxWindowManager:
+    """Test window enumeration without an X connection."""
+    
+    @pytest.fixture
+    def manager(self, monkeypatch):
+        """Window manager forced onto the subprocess path."""
+        from mkd_v2.automation import window_manager
+        monkeypatch.setattr(window_manager, "XLIB_AVAILABLE", False)
+        return window_manager.LinuxWindowManager()
+    
+    def test_wmctrl_geometry_parsed(self, manager, monkeypatch):
+        """Test wmctrl -lpG output yields real bounds and PIDs."""
+        # Arrange
+        output = (
+            "0x03c00003  0 1234   10 20  800 600  host Editor - notes.txt\n"
+            "0x04a00007  0 5678  900 50  400 300  host Terminal\n"
+        )
+        monkeypatch.setattr(subprocess, "run", fake_run({"wmctrl": output}))
+        
+        # Act
+        windows = manager.get_window_list()
+        
+        # Assert
+        assert [w.title for w in windows] == ["Editor - notes.txt", "Terminal"]
+        assert windows[0].bounds == (10, 20, 800, 600)
+        assert windows[1].process_id == 5678
+    
+    def test_wmctrl_fallback_reads_stacking_and_focus(self, manager, monkeypatch):
+        """Test z_order and focus come from the root window's EWMH properties."""
+        # Arrange
+        outputs = {
+            "wmctrl": (
+                "0x03c00003  0 1234   10 20  800 600  host Editor\n"
+                "0x04a00007  0 5678  900 50  400 300  host Terminal\n"
+                "0x05000001  0 9012    0  0  100 100  host Unstacked\n"
+            ),
+            "xprop": (
+                "_NET_CLIENT_LIST_STACKING(WINDOW): window id # 0x3c00003, 0x4a00007\n"
+                "_NET_ACTIVE_WINDOW(WINDOW): window id # 0x4a00007\n"
+            )
+        }
+        monkeypatch.setattr(subprocess, "run", fake_run(outputs))
+        
+        # Act
+        windows = manager.get_window_list()
+        
+        # Assert
+        assert [w.title for w in windows] == ["Terminal", "Editor", "Unstacked"]
+        assert [w.z_order for w in windows] == [0, 1, 4]
+        assert [w.is_active for w in windows] == [True, False, False]
+    
+    def test_window_at_point_uses_topmost(self, manager, monkeypatch):
+        """Test the first (topmost) containing window is returned."""
+        from mkd_v2.automation.window_manager import WindowInfo
+        
+        # Arrange
+        windows = [
+            WindowInfo("0x2", "Top", "a", 1, (100, 100, 200, 200), z_order=0),
+            WindowInfo("0x1", "Bottom", "b", 2, (0, 0, 1000, 1000), z_order=1),
+        ]
+        monkeypatch.setattr(manager, "get_window_list", lambda: windows)
+        
+        # Act / Assert
+        assert manager.get_window_at_point(150, 150).title == "Top"
+        assert manager.get_window_at_point(50, 50).title == "Bottom"
+        assert manager.get_window_at_point(2000, 2000) is None
+
+
+@pytest.mark.skipif(not (shutil.which("Xvfb") and importlib.util.find_spec("Xlib")),
+                    reason="needs Xvfb and python-xlib")
+class TestLinuxWindowManagerXlib:
+    """Test window enumeration over a real X connection."""
+    
+    @pytest.fixture
+    def display_name(self):
+        """Private Xvfb server; yields its display name."""
+        read_fd, write_fd = os.pipe()
+        server = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x800x24",
+                                   "-nolisten", "tcp"], pass_fds=(write_fd,))
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            number = f.readline().strip()
+        yield f":{number}"
+        server.terminate()
+        server.wait(timeout=5)
+    
+    def test_reads_clients_over_xlib(self, display_name):
+        """Test titles, geometry, stacking and focus are read from EWMH properties."""
+        from Xlib import X, Xatom, display as xdisplay
+        from mkd_v2.automation.window_manager import LinuxWindowManager
+        
+        # Arrange: act as the window manager and publish the EWMH root properties
+        conn = xdisplay.Display(display_name)
+        screen = conn.screen()
+        
+        def client(title, x, y, width, height):
+            window = screen.root.create_window(x, y, width, height, 0, screen.root_depth)
+            window.change_property(conn.intern_atom("_NET_WM_NAME"), conn.intern_atom("UTF8_STRING"),
+                                   8, title.encode("utf-8"))
+            window.change_property(conn.intern_atom("_NET_WM_PID"), Xatom.CARDINAL, 32, [os.getpid()])
+            window.map()
+            return window
+        
+        editor = client("Editor", 10, 20, 300, 200)
+        terminal = client("Terminal", 400, 50, 200, 100)
+        screen.root.change_property(conn.intern_atom("_NET_CLIENT_LIST_STACKING"), Xatom.WINDOW, 32,
+                                    [editor.id, terminal.id])
+        screen.root.change_property(conn.intern_atom("_NET_ACTIVE_WINDOW"), Xatom.WINDOW, 32, [terminal.id])
+        conn.sync()
+        manager = LinuxWindowManager(display_name=display_name)
+        
+        # Act
+        try:
+            windows = manager.get_window_list()
+            active = manager.get_active_window()
+        finally:
+            manager.close()
+            conn.close()
+        
+        # Assert
+        assert [w.title for w in windows] == ["Terminal", "Editor"]
+        assert [w.z_order for w in windows] == [0, 1]
+        assert windows[0].is_active and active.window_id == windows[0].window_id
+        assert windows[1].bounds == (10, 20, 300, 200)
+        assert windows[1].process_id == os.getpid()
@@ -0,0 +1,82 @@
+"""
+Unit tests for the event-driven WindowStateModel.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+
+class TestWindowStateModel:
+    """Test snapshot reads and change events."""
+    
+    @pytest.fixture
+    def windows(self):
+        """Two windows, the editor focused and on top."""
+        from mkd_v2.automation.window_manager import WindowInfo
+        return [
+            WindowInfo("0x1", "Editor", "code", 10, (0, 0, 800, 600), is_active=True, z_order=0),
+            WindowInfo("0x2", "Terminal", "bash", 20, (100, 100, 400, 300), z_order=1),
+        ]
+    
+    @pytest.fixture
+    def model(self, windows):
+        """Model over a window manager double; no background thread."""
+        from mkd_v2.automation.window_state import WindowStateModel
+        manager = Mock()
+        manager.get_window_list.return_value = windows
+        model = WindowStateModel(manager, use_x11_events=False)
+        model._started = True
+        model.refresh()
+        return model
+    
+    def test_reads_served_from_snapshot(self, model):
+        """Test reads do not query the window manager again."""
+        # Act
+        active = model.get_active_window()
+        listed = model.get_window_list()
+        
+        # Assert
+        assert active.title == "Editor"
+        assert [w.window_id for w in listed] == ["0x1", "0x2"]
+        assert model.window_manager.get_window_list.call_count == 1
+    
+    def test_focus_change_emits_event(self, model):
+        """Test a focus move bumps the version and notifies listeners."""
+        from mkd_v2.automation.window_manager import WindowInfo
+        
+        # Arrange
+        events = []
+        model.add_listener(events.append)
+        version = model.version
+        model.window_manager.get_window_list.return_value = [
+            WindowInfo("0x2", "Terminal", "bash", 20, (100, 100, 400, 300), is_active=True, z_order=0),
+            WindowInfo("0x1", "Editor", "code", 10, (0, 0, 800, 600), z_order=1),
+        ]
+        
+        # Act
+        model.refresh()
+        
+        # Assert
+        assert model.get_active_window().window_id == "0x2"
+        assert model.get_stacking_order() == ["0x2", "0x1"]
+        assert {e.event_type for e in events} == {"stacking_changed", "focus_changed"}
+        assert model.version == version + 1
+    
+    def test_polling_backs_off_while_unchanged(self, model):
+        """Test idle polls stretch the interval and a change or read resets it."""
+        # Act
+        intervals = []
+        for changed in (model.refresh(), model.refresh(), model.refresh()):
+            model._current_poll_interval = model._next_poll_interval(changed)
+            intervals.append(model._current_poll_interval)
+        model.get_window_list()
+        
+        # Assert
+        assert intervals == [1.0, 2.0, 4.0]
+        assert model._poll_wake.is_set()
+        assert model._next_poll_interval(True) == model.poll_interval
+        
+        # Capped at max_poll_interval
+        for _ in range(10):
+            model._current_poll_interval = model._next_poll_interval(False)
+        assert model._current_poll_interval == model.max_poll_interval
@@ -0,0 +1,56 @@
+"""
+Unit tests for the browser event push channel.
+"""
+
+import json
+import urllib.request
+import pytest
+
+
+class TestEventCollector:
+    """Test ordering, gap detection and the local push endpoint."""
+    
+    @pytest.fixture
+    def collector(self):
+        pytest.importorskip("selenium")  # mkd.browser imports selenium on package import
+        from mkd.browser.event_channel import EventCollector
+        events = []
+        collector = EventCollector(events.append)
+        collector.received = events
+        yield collector
+        collector.stop()
+        
+    def test_duplicates_dropped_and_gaps_counted(self, collector):
+        """Test drained copies of pushed events are ignored and missing seqs reported."""
+        # Act
+        collector.ingest({'page': 'p1', 'events': [{'seq': 1}, {'seq': 2}]})
+        collector.ingest({'page': 'p1', 'events': [{'seq': 2}, {'seq': 5}, {'seq': 3}]})
+        
+        # Assert
+        assert [e['seq'] for e in collector.received] == [1, 2, 3, 5]
+        assert collector.stats['duplicates'] == 1
+        assert collector.stats['lost_events'] == 1
+        assert collector.gaps == [('p1', 4, 4)]
+        
+    def test_pushed_batch_delivered_without_polling(self, collector):
+        """Test a batch posted to the endpoint is delivered; a bad token is rejected."""
+        # Arrange
+        collector.start()
+        
+        def post(token):
+            body = json.dumps({'token': token, 'page': 'p1', 'events': [{'seq': 1, 'type': 'scroll'}]})
+            request = urllib.request.Request(collector.endpoint, data=body.encode(), method='POST')
+            try:
+                return urllib.request.urlopen(request, timeout=5).status
+            except urllib.error.HTTPError as e:
+                return e.code
+                
+        # Act
+        rejected = post('wrong')
+        accepted = post(collector.token)
+        
+        # Assert
+        assert (rejected, accepted) == (403, 204)
+        assert [e['type'] for e in collector.received] == ['scroll']
+        assert collector.stats['rejected_batches'] == 1
+        
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Unit tests for compiled context classification and the detection cache.
+"""
+
+
+class TestContextClassifier:
+    """Test rule priority and cache eviction."""
+    
+    def test_earliest_rule_wins(self):
+        """Test rule order decides between matches anywhere in the text."""
+        from mkd_v2.intelligence.context_classifier import PatternClassifier
+        
+        # Arrange
+        classifier = PatternClassifier([("loading", "loading"), ("context menu", "context"), ("menu", "menu")])
+        
+        # Act / Assert
+        assert classifier.classify("Context Menu") == "context"
+        assert classifier.classify("Main menu - Loading...") == "loading"
+        assert classifier.classify("Settings") is None
+    
+    def test_overlapping_matches_keep_rule_priority(self):
+        """Test a later rule whose match overlaps an earlier rule's match does not hide it."""
+        from mkd_v2.intelligence.context_classifier import PatternClassifier
+        
+        # Arrange
+        classifier = PatternClassifier([("bc", "A"), ("abc", "B")])
+        regex_classifier = PatternClassifier()
+        regex_classifier.add(r"b+c", "A", regex=True)
+        regex_classifier.add(r"ab", "B", regex=True)
+        
+        # Act / Assert
+        assert classifier.classify("abc") == "A"
+        assert classifier.classify("xabx") is None
+        assert regex_classifier.classify("abbc") == "A"
+        assert regex_classifier.classify("abd") == "B"
+    
+    def test_user_rules_extend_detector(self):
+        """Test rules added at runtime take part in classification."""
+        from unittest.mock import Mock
+        from mkd_v2.intelligence.context_detector import ContextDetector, ContextType
+        
+        # Arrange
+        detector = ContextDetector(Mock())
+        
+        # Act
+        detector.add_app_rule(r"^blender(\.exe)?$", ContextType.MEDIA_PLAYER, regex=True)
+        
+        # Assert
+        assert detector._classify_application("blender", "untitled.blend") == ContextType.MEDIA_PLAYER
+        assert detector._classify_application("xyz", "My Page - Firefox") == ContextType.WEB_BROWSER
+        assert detector._classify_application("xyz", "untitled") == ContextType.UNKNOWN
+    
+    def test_cache_bounded_and_evicts_exited_processes(self):
+        """Test the cache stays bounded and drops processes that exit."""
+        from mkd_v2.intelligence.context_classifier import DetectionCache
+        
+        # Arrange
+        alive = {1: True, 2: False}
+        cache = DetectionCache(max_entries=2, ttl=60.0, is_alive=lambda pid: alive.get(pid, True))
+        
+        # Act
+        cache.put("a:1", 1, "a")
+        cache.put("b:2", 2, "b")
+        cache.put("c:3", 3, "c")
+        cache.sweep()
+        evicted = cache.evict_process(3)
+        
+        # Assert
+        assert "a:1" not in cache  # Least recently used
+        assert "b:2" not in cache  # Process exited
+        assert evicted == 1 and len(cache) == 0
+        assert cache.get_cache_stats()['evictions'] == 1
@@ -0,0 +1,79 @@
+"""
+Unit tests for concurrent command handling in the native messaging host.
+"""
+
+import io
+import json
+import struct
+import threading
+import time
+
+
+def encode(message):
+    body = json.dumps(message).encode('utf-8')
+    return struct.pack('=I', len(body)) + body
+
+
+def decode_all(data):
+    messages = []
+    while data:
+        length = struct.unpack('=I', data[:4])[0]
+        messages.append(json.loads(data[4:4 + length]))
+        data = data[4 + length:]
+    return messages
+
+
+class TestConcurrentDispatch:
+    """Test status queries are answered while exclusive commands are still running."""
+    
+    def test_ping_answered_before_slow_stop_recording(self, tmp_path):
+        """Test responses go out in completion order, correlated by id."""
+        # Arrange
+        from mkd_v2.native_host.host import NativeHost
+        stdin = io.BytesIO(encode({'id': 'stop-1', 'command': 'STOP_RECORDING'}) +
+                           encode({'id': 'ping-1', 'command': 'PING'}))
+        stdout = io.BytesIO()
+        host = NativeHost(storage_path=tmp_path, input_stream=stdin, output_stream=stdout)
+        
+        def slow_stop(params):
+            time.sleep(0.3)
+            return {'stopped': True}
+        host.message_handlers['STOP_RECORDING'] = slow_stop
+        
+        # Act
+        host.start()
+        
+        # Assert
+        responses = decode_all(stdout.getvalue())
+        assert [r['id'] for r in responses] == ['ping-1', 'stop-1']
+        assert all(r['success'] for r in responses)
+        assert responses[1]['data'] == {'stopped': True}
+    
+    def test_exclusive_class_runs_in_arrival_order(self):
+        """Test commands of one class never overlap and keep their order."""
+        # Arrange
+        from mkd_v2.native_host.dispatcher import CommandDispatcher
+        dispatcher = CommandDispatcher({'START': 'recording', 'STOP': 'recording'}, max_workers=4)
+        order, running, overlaps = [], [], []
+        lock = threading.Lock()
+        
+        def handler(name):
+            with lock:
+                if running:
+                    overlaps.append(name)
+                running.append(name)
+            time.sleep(0.02)
+            with lock:
+                running.remove(name)
+                order.append(name)
+        
+        # Act
+        for i in range(5):
+            dispatcher.submit('START', handler, f"start-{i}")
+            dispatcher.submit('STOP', handler, f"stop-{i}")
+        dispatcher.shutdown(wait=True)
+        
+        # Assert
+        assert order == [n for i in range(5) for n in (f"start-{i}", f"stop-{i}")]
+        assert overlaps == []
+        assert dispatcher.get_dispatch_stats()['completed'] == 10
@@ -0,0 +1,43 @@
+"""
+Unit tests for native host cold start.
+"""
+
+import pytest
+
+
+class TestStartup:
+    """Test a freshly launched host answers before creating heavy components."""
+    
+    @pytest.fixture
+    def profile(self, tmp_path):
+        from mkd_v2.native_host.startup import measure_startup
+        return measure_startup(storage_path=tmp_path / "storage", env={'HOME': str(tmp_path)})
+    
+    def test_first_ping_skips_heavy_imports(self, profile):
+        """Test PING is answered without importing the recording stack."""
+        # Assert
+        assert profile.response['data']['status'] == 'alive'
+        assert profile.imported('mkd_v2.native_host.host')
+        for module in ('mkd_v2.recording.recording_engine', 'mkd_v2.core.session_manager', 'sqlite3', 'asyncio'):
+            assert not profile.imported(module), module
+    
+    def test_time_to_first_response_within_budget(self, profile):
+        """Test process start to first response stays within the startup budget."""
+        # Generous bound: includes interpreter start and -X importtime overhead
+        assert profile.time_to_first_response < 1.0
+    
+    def test_components_created_on_first_use(self, tmp_path):
+        """Test components are built lazily, once, and status does not build them."""
+        # Arrange
+        from mkd_v2.native_host.host import NativeHost
+        host = NativeHost(storage_path=tmp_path, warm_up_delay=None)
+        
+        # Act
+        status = host._handle_get_status({})
+        engine = host.recording_engine
+        
+        # Assert
+        assert status['engine']['initialized'] is False
+        assert engine is host.recording_engine
+        assert host.session_manager is engine.session_manager
+        assert 'message_broker' not in host._components
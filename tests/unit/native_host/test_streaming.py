@@ -0,0 +1,87 @@
+"""
+Unit tests for chunked stream transfer over native messaging.
+"""
+
+import base64
+import json
+import threading
+import time
+import zlib
+import pytest
+
+
+def reassemble(messages):
+    chunks = [m for m in messages if isinstance(m, dict) and m['type'] == 'stream_chunk']
+    raw = b''.join(zlib.decompress(base64.b64decode(c['data'])) if c['compressed']
+                   else base64.b64decode(c['data']) for c in sorted(chunks, key=lambda c: c['seq']))
+    return raw
+
+
+class TestStreamManager:
+    """Test outbound streaming, flow control and inbound reassembly."""
+    
+    @pytest.fixture
+    def sent(self):
+        return []
+    
+    @pytest.fixture
+    def manager(self, sent):
+        from mkd_v2.native_host.streaming import StreamManager
+        return StreamManager(sent.append, chunk_size=4096, window=2, ack_timeout=5.0)
+    
+    def test_large_result_streamed_small_result_inline(self, sent):
+        """Test only oversized results are split, and chunks rebuild the exact result."""
+        # Arrange
+        from mkd_v2.native_host.streaming import StreamManager
+        manager = StreamManager(sent.append, chunk_size=4096, window=1000)
+        data = {'events': [{'seq': i, 'kind': 'click'} for i in range(3000)]}
+        
+        # Act
+        manager.send_json({'id': 'small', 'type': 'response', 'success': True}, {'status': 'alive'})
+        manager.send_json({'id': 'big', 'type': 'response', 'success': True}, data, inline_limit=8192)
+        
+        # Assert
+        assert json.loads(sent[0]) == {'id': 'small', 'type': 'response', 'success': True, 'data': {'status': 'alive'}}
+        assert sent[1]['type'] == 'stream_start' and sent[1]['id'] == 'big'
+        assert sent[-1]['type'] == 'stream_end'
+        assert json.loads(reassemble(sent[2:-1])) == data
+        assert all(len(json.dumps(m)) < 8192 for m in sent[1:])
+    
+    def test_sender_waits_for_acknowledgements(self, manager, sent):
+        """Test no more than `window` chunks are outstanding."""
+        # Arrange
+        payload = bytes(range(256)) * 64  # 16 KiB -> 4 chunks
+        sender = threading.Thread(target=manager.send_stream, args=('r1', [payload]))
+        
+        # Act
+        sender.start()
+        time.sleep(0.2)
+        before_ack = [m for m in sent if m['type'] == 'stream_chunk']
+        stream_id = sent[0]['stream']
+        for seq in range(4):
+            manager.handle_control('STREAM_ACK', {'stream': stream_id, 'seq': seq})
+            time.sleep(0.05)
+        sender.join(timeout=5)
+        
+        # Assert
+        assert len(before_ack) == 2
+        assert sent[-1]['type'] == 'stream_end'
+        assert reassemble(sent) == payload
+    
+    def test_inbound_chunks_reassembled_into_message(self, manager, sent):
+        """Test a message sent in chunks is rebuilt and each chunk acknowledged."""
+        # Arrange
+        body = json.dumps({'id': 'up-1', 'command': 'PING', 'params': {'blob': 'x' * 5000}}).encode()
+        parts = [body[:3000], body[3000:]]
+        
+        # Act
+        first = manager.handle_control('STREAM_CHUNK', {
+            'stream': 'in-1', 'seq': 0, 'data': base64.b64encode(parts[0]).decode()})
+        message = manager.handle_control('STREAM_CHUNK', {
+            'stream': 'in-1', 'seq': 1, 'data': base64.b64encode(zlib.compress(parts[1])).decode(),
+            'compressed': True, 'last': True})
+        
+        # Assert
+        assert first is None
+        assert message['command'] == 'PING' and len(message['params']['blob']) == 5000
+        assert [m['seq'] for m in sent if m['type'] == 'stream_ack'] == [0, 1]
@@ -0,0 +1,120 @@
+"""
+Unit tests for batched xdotool input on the MKD v2 Linux platform.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+
+class TestXdotoolBatch:
+    """Test actions are translated into batched xdotool calls."""
+    
+    @pytest.fixture
+    def platform(self):
+        from mkd_v2.platform.implementations.linux import LinuxPlatform
+        platform = LinuxPlatform()
+        platform._xdotool_path = "/usr/bin/xdotool"
+        return platform
+    
+    def run_batch(self, platform, actions):
+        """Execute a batch and return the argv and script passed to xdotool."""
+        with patch("mkd_v2.platform.implementations.linux.subprocess.run",
+                   return_value=Mock(returncode=0, stderr="")) as run:
+            results = platform.execute_batch(actions)
+        assert results == [True] * len(actions)
+        args, kwargs = run.call_args
+        return args[0], kwargs["input"].splitlines()
+    
+    def test_single_process_for_batch(self, platform):
+        """Test the whole batch is piped to one xdotool reading stdin."""
+        from mkd_v2.platform.base import MouseAction, MouseButton
+        
+        # Act
+        argv, script = self.run_batch(platform, [
+            MouseAction(action="click", button=MouseButton.RIGHT, x=10, y=20),
+            MouseAction(action="scroll", x=5, y=5, dy=-3),
+        ])
+        
+        # Assert
+        assert argv == ["/usr/bin/xdotool", "-"]
+        assert script == ["mousemove 10 20", "click 3", "mousemove 5 5", "click --repeat 3 5"]
+    
+    def test_mouse_modifiers_held_for_gesture(self, platform):
+        """Test ctrl+shift are held around a click instead of being dropped."""
+        from mkd_v2.platform.base import MouseAction, MouseButton, KeyModifier
+        
+        # Act
+        _, script = self.run_batch(platform, [
+            MouseAction(action="click", button=MouseButton.LEFT, x=1, y=2,
+                        modifiers=[KeyModifier.CTRL, KeyModifier.SHIFT]),
+        ])
+        
+        # Assert
+        assert script == ["keydown ctrl+shift", "mousemove 1 2", "click 1", "keyup ctrl+shift"]
+    
+    def test_press_and_release_are_key_down_and_up(self, platform):
+        """Test press/release map to keydown/keyup so a key can be held."""
+        from mkd_v2.platform.base import KeyboardAction, KeyModifier
+        
+        # Act
+        _, script = self.run_batch(platform, [
+            KeyboardAction(action="press", key="a", modifiers=[KeyModifier.CMD]),
+            KeyboardAction(action="release", key="a", modifiers=[KeyModifier.CMD]),
+            KeyboardAction(action="key_combination", key="c", modifiers=[KeyModifier.CTRL]),
+        ])
+        
+        # Assert
+        assert script == ["keydown super+a", "keyup super+a", "key ctrl+c"]
+    
+    def test_text_typed_with_own_argv(self, platform):
+        """Test text bypasses the script so quotes, $, # and spacing arrive verbatim."""
+        from mkd_v2.platform.base import KeyboardAction, MouseAction, MouseButton
+        
+        # Arrange
+        text = "it's $HOME  # 50%"
+        
+        # Act
+        with patch("mkd_v2.platform.implementations.linux.subprocess.run",
+                   return_value=Mock(returncode=0, stderr="")) as run:
+            results = platform.execute_batch([
+                KeyboardAction(action="key_combination", key="a"),
+                KeyboardAction(action="type", text=text),
+                MouseAction(action="click", button=MouseButton.LEFT, x=1, y=2),
+            ])
+        
+        # Assert
+        assert results == [True, True, True]
+        calls = [(call.args[0], call.kwargs["input"]) for call in run.call_args_list]
+        assert calls == [
+            (["/usr/bin/xdotool", "-"], "key a\n"),
+            (["/usr/bin/xdotool", "type", "--", text], None),
+            (["/usr/bin/xdotool", "-"], "mousemove 1 2\nclick 1\n"),
+        ]
+    
+    def test_failed_text_stops_batch(self, platform):
+        """Test actions after a failed xdotool call are not sent and report failure."""
+        from mkd_v2.platform.base import KeyboardAction
+        
+        # Act
+        with patch("mkd_v2.platform.implementations.linux.subprocess.run",
+                   return_value=Mock(returncode=1, stderr="no display")) as run:
+            results = platform.execute_batch([
+                KeyboardAction(action="type", text="a"),
+                KeyboardAction(action="key_combination", key="b"),
+            ])
+        
+        # Assert
+        assert results == [False, False]
+        assert run.call_count == 1
+    
+    def test_keyless_press_rejected(self, platform):
+        """Test a press without a key fails the batch rather than sending a bare keydown."""
+        from mkd_v2.platform.base import KeyboardAction
+        
+        # Act
+        with patch("mkd_v2.platform.implementations.linux.subprocess.run") as run:
+            results = platform.execute_batch([KeyboardAction(action="press")])
+        
+        # Assert
+        assert results == [False]
+        run.assert_not_called()
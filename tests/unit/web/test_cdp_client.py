@@ -0,0 +1,224 @@
+"""
+Unit tests for the DevTools backend against a local stand-in browser.
+"""
+
+import base64
+import hashlib
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+
+class StandInBrowser:
+    """Single-connection DevTools stand-in with one open page target."""
+    
+    def __init__(self, hold_evaluations=0):
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.url = f"ws://127.0.0.1:{self.server.getsockname()[1]}/devtools/browser/stand-in"
+        self.hold_evaluations = hold_evaluations  # Queue this many evaluations, then reply in reverse
+        self.received = []
+        self.connections = 0
+        self._held = []
+        self._lock = threading.Lock()
+        threading.Thread(target=self._serve, daemon=True).start()
+    
+    def _serve(self):
+        from mkd_v2.web.cdp_client import WS_GUID, OP_CLOSE, read_frame
+        
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            stream = conn.makefile('rb')
+            key = None
+            for line in iter(stream.readline, b'\r\n'):
+                name, _, value = line.decode().partition(':')
+                if name.lower() == 'sec-websocket-key':
+                    key = value.strip()
+            accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+            conn.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+            
+            try:
+                while True:
+                    _, opcode, payload = read_frame(stream)
+                    if opcode == OP_CLOSE:
+                        break
+                    message = json.loads(payload)
+                    self.received.append(message['method'])
+                    self._handle(conn, message)
+            except ConnectionError:
+                pass
+            conn.close()
+    
+    def _send(self, conn, message):
+        from mkd_v2.web.cdp_client import encode_frame
+        with self._lock:
+            conn.sendall(encode_frame(json.dumps(message).encode(), mask=False))
+    
+    def _handle(self, conn, message):
+        method, params, session = message['method'], message['params'], message.get('sessionId')
+        reply = {'id': message['id'], 'result': {}}
+        
+        if method == 'Target.getTargets':
+            reply['result'] = {'targetInfos': [{'targetId': 'T1', 'type': 'page', 'url': 'about:blank',
+                                                'title': '', 'attached': False}]}
+        elif method == 'Target.attachToTarget':
+            reply['result'] = {'sessionId': f"S-{params['targetId']}"}
+        elif method == 'Target.createTarget':
+            self._send(conn, {'method': 'Target.targetCreated', 'params': {'targetInfo': {
+                'targetId': 'T2', 'type': 'page', 'url': params['url'], 'title': '', 'attached': False}}})
+            reply['result'] = {'targetId': 'T2'}
+        elif method == 'Page.navigate':
+            self._send(conn, reply)
+            for event, event_params in (
+                ('Page.frameNavigated', {'frame': {'id': 'F', 'url': params['url']}}),
+                ('Runtime.consoleAPICalled', {'type': 'log', 'args': [{'type': 'string', 'value': 'ready'}]}),
+                ('Page.loadEventFired', {'timestamp': 1.0}),
+            ):
+                self._send(conn, {'method': event, 'params': event_params, 'sessionId': session})
+            return
+        elif method == 'Runtime.evaluate':
+            if params['expression'] == 'boom':
+                reply['result'] = {'result': {'type': 'object'}, 'exceptionDetails': {
+                    'text': 'Uncaught', 'exception': {'type': 'object', 'description': 'Error: boom'}}}
+            else:
+                reply['result'] = {'result': {'type': 'string', 'value': params['expression']}}
+            if self.hold_evaluations:
+                self._held.append(reply)
+                if len(self._held) == self.hold_evaluations:
+                    for held in reversed(self._held):
+                        self._send(conn, held)
+                    self._held = []
+                return
+        elif method not in ('Target.setDiscoverTargets', 'Page.enable', 'Runtime.enable'):
+            reply = {'id': message['id'], 'error': {'code': -32601, 'message': f"'{method}' wasn't found"}}
+        
+        self._send(conn, reply)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestCDPBackend:
+    """Test pipelining, session multiplexing and pushed events."""
+    
+    def test_pipelined_replies_matched_by_id(self):
+        """Test commands are all sent before replies arrive, and out-of-order replies resolve correctly."""
+        from mkd_v2.web.cdp_client import CDPBrowser, CDPConnection, CDPError
+        
+        # Arrange
+        stand_in = StandInBrowser(hold_evaluations=3)
+        browser = CDPBrowser(CDPConnection(stand_in.url, timeout=5.0))
+        
+        try:
+            # Act
+            values = browser.evaluate_many('T1', ['1 + 1', 'document.title', 'location.href'])
+            stand_in.hold_evaluations = 0
+            with pytest.raises(CDPError, match="boom"):
+                browser.evaluate('T1', 'boom')
+            with pytest.raises(CDPError, match="wasn't found"):
+                browser.connection.call('Browser.unknown')
+            
+            # Assert
+            assert values == ['1 + 1', 'document.title', 'location.href']
+            stats = browser.get_browser_stats()
+            assert stats['max_in_flight'] >= 3 and stats['tabs'] == 1 and stats['errors'] == 1
+            assert stats['avg_command_latency'] > 0
+        finally:
+            browser.close()
+    
+    def test_controller_multiplexes_tabs_with_pushed_events(self):
+        """Test tabs share one connection and load completion is pushed, not polled."""
+        from mkd_v2.web.browser_controller import BrowserController, BrowserCommand, BrowserType, TabState
+        from mkd_v2.web.javascript_injector import (
+            JavaScriptInjector, ScriptContext, ExecutionContext, ScriptSecurity
+        )
+        
+        # Arrange
+        stand_in = StandInBrowser()
+        controller = BrowserController()
+        session_id = controller.create_session(BrowserType.CHROME, cdp_endpoint=stand_in.url)
+        
+        try:
+            # Act
+            new_tab = controller.execute_command(BrowserCommand.NEW_TAB, session_id, {'url': 'about:blank'})
+            navigated = controller.execute_command(BrowserCommand.NAVIGATE, 'T2', {'url': 'https://example.test/'})
+            loaded = wait_for(lambda: controller.tab_manager.tabs['T2'].state == TabState.COMPLETE)
+            failed = controller.execute_command(BrowserCommand.EXECUTE_SCRIPT, 'T2', {'script': 'boom'})
+            injector = JavaScriptInjector(browser_interface=controller)
+            context = ScriptContext("ctx", ExecutionContext.PAGE, ScriptSecurity.SANDBOXED, tab_id='T1')
+            injected = injector.inject_script("return 1;", context)
+            
+            # Assert
+            assert new_tab.success and new_tab.target_tab_id == 'T2'
+            assert navigated.success and loaded
+            assert controller.tab_manager.tabs['T2'].url == 'https://example.test/'
+            assert list(controller.console_messages['T2']) == ['[log] ready']
+            assert not failed.success and 'boom' in failed.error_message
+            assert injected.success and 'return 1;' in injected.result_value
+            assert stand_in.connections == 1
+            assert stand_in.received.count('Target.attachToTarget') == 2
+            devtools = controller.get_session_status(session_id)['sessions'][session_id]['devtools']
+            assert devtools['tabs'] == 2
+        finally:
+            controller.close_session(session_id)
+        
+        assert not controller.is_connected('T1') and 'T2' not in controller.tab_manager.tabs
+    
+    def test_launched_sessions_get_their_own_devtools_port(self, monkeypatch):
+        """Test each launched browser gets its own profile and reported DevTools endpoint."""
+        from pathlib import Path
+        from mkd_v2.web.browser_controller import BrowserController, BrowserType
+        
+        # Arrange
+        class LaunchedBrowser:
+            pid = 4242
+            returncode = None
+            
+            def poll(self):
+                return None
+            
+            def wait(self, timeout=None):
+                return 0
+            
+            terminate = poll
+        
+        launches, stand_ins = [], []
+        
+        def launch(browser_type, args):
+            # Stands in for Chrome writing DevToolsActivePort once it is listening
+            user_data_dir = next(a.split('=', 1)[1] for a in args if a.startswith('--user-data-dir='))
+            stand_in = StandInBrowser()
+            port = stand_in.url.split(':')[2].split('/')[0]
+            Path(user_data_dir, "DevToolsActivePort").write_text(f"{port}\n/devtools/browser/stand-in\n")
+            launches.append(args)
+            stand_ins.append(stand_in)
+            return LaunchedBrowser()
+        
+        controller = BrowserController()
+        monkeypatch.setattr(controller, '_launch_browser', launch)
+        
+        # Act
+        sessions = [controller.create_session(BrowserType.CHROME, headless=True) for _ in range(2)]
+        profiles = [controller.temp_profiles[s] for s in sessions]
+        try:
+            # Assert
+            assert all('--remote-debugging-port=0' in args for args in launches)
+            assert profiles[0] != profiles[1]
+            assert [s.connections for s in stand_ins] == [1, 1]
+            assert all(controller.cdp_browsers[s].connected for s in sessions)
+        finally:
+            for session_id in sessions:
+                controller.close_session(session_id)
+        
+        assert not any(Path(p).exists() for p in profiles)
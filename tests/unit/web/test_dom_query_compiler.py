@@ -0,0 +1,161 @@
+"""
+Unit tests for the single round-trip DOM query compiler.
+"""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+
+# Fixed DOM served to the compiled script: selectors and XPaths resolve from a table
+DOM_STAND_IN = r"""
+function makeElement(tag, attrs, text, style, rect) {
+    var el = {nodeType: 1, tagName: tag, id: attrs.id || '', textContent: text, innerHTML: text,
+              attributes: Object.keys(attrs).map(function (k) { return {name: k, value: attrs[k]}; }),
+              getAttribute: function (k) { return k in attrs ? attrs[k] : null; },
+              hasAttribute: function (k) { return k in attrs; },
+              getBoundingClientRect: function () { return rect; }};
+    el.style = style;
+    return el;
+}
+var visible = {display: 'block', visibility: 'visible', opacity: '1'};
+var button = makeElement('BUTTON', {id: 'save'}, 'Save', visible, {x: 10, y: 10, width: 80, height: 30});
+var draft = makeElement('SPAN', {}, 'Save draft', visible, {x: 10, y: 50, width: 60, height: 20});
+var ghost = makeElement('DIV', {}, 'Save', {display: 'none', visibility: 'visible', opacity: '1'},
+                        {x: 0, y: 0, width: 0, height: 0});
+var tables = {
+    css: {'#save': [button], "[id='save']": [button]},
+    xpath: {"//*[@id='save']": [button], "//*[text()='Save']": [button, ghost],
+            "//*[contains(text(), 'Save')]": [button, draft, ghost],
+            "//*[normalize-space(text())='Save']": [button]}
+};
+var calls = 0;
+var document = {
+    querySelectorAll: function (s) { calls++; return tables.css[s] || []; },
+    evaluate: function (x) {
+        calls++;
+        var items = tables.xpath[x] || [];
+        return {snapshotLength: items.length, snapshotItem: function (i) { return items[i]; }};
+    },
+    elementFromPoint: function () { return null; }
+};
+var window = {getComputedStyle: function (el) {
+    var s = Object.assign({}, el.style);
+    s.getPropertyValue = function (k) { return s[k] || ''; };
+    return s;
+}};
+"""
+
+
+class TestDOMQueryCompiler:
+    """Test compiling a DOMQuery into one in-page evaluation."""
+    
+    @pytest.fixture
+    def query(self):
+        """Query combining selector, XPath, attribute and text strategies."""
+        from mkd_v2.web.dom_inspector import DOMQuery, DetectionStrategy
+        return DOMQuery(
+            target_attributes={'id': 'save'},
+            text_patterns=['Save'],
+            strategies=[DetectionStrategy.CSS_SELECTOR, DetectionStrategy.XPATH,
+                        DetectionStrategy.ATTRIBUTES, DetectionStrategy.TEXT_CONTENT]
+        )
+    
+    def test_inspect_is_one_round_trip(self, query):
+        """Test inspection of a tab sends one script, page state included, and uses the page's ranking."""
+        from mkd_v2.web.dom_inspector import DOMInspector, DetectionStrategy
+        
+        # Arrange
+        class FakeBrowser:
+            def __init__(self):
+                self.scripts = []
+            
+            def execute_script(self, script, tab_id=None):
+                self.scripts.append(script)
+                records = [{'tagName': 'BUTTON', 'attributes': {'id': 'save'}, 'textContent': 'Save',
+                            'boundingRect': {'x': 10, 'y': 10, 'width': 80, 'height': 30},
+                            'selectorType': 'css', 'selector': '#save',
+                            'strategies': ['css_selector', 'xpath'], 'score': 0.95}]
+                state = {'document': 'doc-1', 'version': 0, 'url': 'https://app.example/'}
+                return {'value': records, 'state': state} if script.startswith('({value:') else records
+        
+        browser = FakeBrowser()
+        inspector = DOMInspector(browser_interface=browser)
+        
+        # Act
+        result = inspector.inspect_element(query, {'tab_id': 'tab-1'})
+        
+        # Assert
+        assert len(browser.scripts) == 1
+        assert result.success
+        assert result.strategies_used == [DetectionStrategy.CSS_SELECTOR, DetectionStrategy.XPATH]
+        assert result.elements[0].interaction_confidence == 0.95
+        assert inspector.get_inspection_statistics()['browser_round_trips'] == 1
+    
+    def test_webdriver_backend_gets_function_body(self, query):
+        """Test WebDriver-style backends get a returning script and no tab_id keyword."""
+        from mkd_v2.web.dom_inspector import DOMInspector
+        
+        # Arrange
+        class FakeWebDriver:
+            def __init__(self):
+                self.scripts = []
+            
+            def execute_script(self, script, *args):
+                self.scripts.append(script)
+                return [{'tagName': 'BUTTON', 'attributes': {'id': 'save'}, 'textContent': 'Save',
+                         'boundingRect': {'x': 10, 'y': 10, 'width': 80, 'height': 30},
+                         'selectorType': 'css', 'selector': '#save', 'strategies': ['css_selector'], 'score': 0.9}]
+        
+        driver = FakeWebDriver()
+        inspector = DOMInspector(browser_interface=driver)
+        
+        # Act
+        result = inspector.inspect_element(query)
+        
+        # Assert
+        assert result.success
+        assert driver.scripts and all(s.startswith("return (") and s.endswith(");") for s in driver.scripts)
+    
+    def test_compiled_scripts_are_cached(self, query):
+        """Test the same query compiles once."""
+        from mkd_v2.web.dom_inspector import DOMInspector
+        
+        # Arrange
+        inspector = DOMInspector()
+        
+        # Act
+        first = inspector.query_compiler.compile(query)
+        second = inspector.query_compiler.compile(query)
+        
+        # Assert
+        assert first is second
+        assert inspector.query_compiler.stats == {'compiled': 1, 'cache_hits': 1}
+    
+    @pytest.mark.skipif(shutil.which("node") is None, reason="node not available")
+    def test_script_dedupes_filters_and_ranks_in_page(self, query):
+        """Test the compiled script against a fixed DOM stand-in."""
+        from mkd_v2.web.dom_inspector import DOMInspector
+        
+        # Arrange
+        compiled = DOMInspector().query_compiler.compile(query, top_k=2)
+        program = f"{DOM_STAND_IN}\nvar records = {compiled.script};\n" \
+                  "console.log(JSON.stringify({records: records, calls: calls}));"
+        
+        # Act
+        output = subprocess.run(["node", "-e", program], capture_output=True, text=True,
+                                check=True, timeout=30).stdout
+        result = json.loads(output)
+        records = result['records']
+        
+        # Assert
+        # The hidden match is filtered and the button is returned once despite six hits
+        assert [r['tagName'] for r in records] == ['BUTTON', 'SPAN']
+        assert records[0]['selector'] == '#save'
+        assert records[0]['strategies'] == ['css_selector', 'xpath', 'attributes', 'text_content']
+        assert records[0]['score'] == pytest.approx(1.0)
+        assert records[1]['score'] == pytest.approx(0.7)
+        # The XPath shared by the xpath and text strategies is evaluated once
+        assert result['calls'] == 6
@@ -0,0 +1,129 @@
+"""
+Unit tests for the per-tab DOM element cache.
+"""
+
+import pytest
+
+
+class FakeBrowser:
+    """Answers inspection queries with one button, revalidations with a fixed verdict
+    and page state with a DOM version the test bumps to simulate page-side changes."""
+    
+    def __init__(self):
+        self.round_trips = 0
+        self.queries = 0
+        self.revalidations = 0
+        self.still_valid = True
+        self.document = 'doc-1'
+        self.dom_version = 0
+    
+    def execute_script(self, script, tab_id=None):
+        self.round_trips += 1
+        state = {'document': self.document, 'version': self.dom_version, 'url': 'https://app.example/'}
+        wrapped = script.startswith('({value:')
+        if 'isConnected' in script:
+            self.revalidations += 1
+            value = self.still_valid
+        elif wrapped or '__mkdDomObserver' not in script:
+            self.queries += 1
+            value = [{'tagName': 'BUTTON', 'attributes': {'id': 'save'}, 'textContent': 'Save',
+                      'boundingRect': {'x': 10, 'y': 10, 'width': 80, 'height': 30},
+                      'selectorType': 'css', 'selector': '#save', 'strategies': ['css_selector'], 'score': 0.9}]
+        else:
+            return state
+        return {'value': value, 'state': state} if wrapped else value
+
+
+class TestElementCache:
+    """Test reuse, revalidation and invalidation of cached elements."""
+    
+    @pytest.fixture
+    def browser(self):
+        return FakeBrowser()
+    
+    @pytest.fixture
+    def inspector(self, browser):
+        from mkd_v2.web.dom_inspector import DOMInspector
+        return DOMInspector(browser_interface=browser, max_cached_elements=2)
+    
+    @pytest.fixture
+    def query(self):
+        from mkd_v2.web.dom_inspector import DOMQuery, DetectionStrategy
+        return DOMQuery(target_attributes={'id': 'save'}, strategies=[DetectionStrategy.CSS_SELECTOR])
+    
+    def test_clean_tab_reuses_without_requery(self, inspector, browser, query):
+        """Test an unchanged tab serves the cached element from one round-trip each lookup."""
+        # Act
+        first = inspector.inspect_element(query, {'tab_id': 'tab-1'})
+        second = inspector.inspect_element(query, {'tab_id': 'tab-1'})
+        other_tab = inspector.inspect_element(query, {'tab_id': 'tab-2'})
+        
+        # Assert
+        assert not first.from_cache and second.from_cache and not other_tab.from_cache
+        assert second.elements[0] is first.elements[0]
+        assert browser.queries == 2 and browser.revalidations == 1
+        assert browser.round_trips == 3
+        assert inspector.get_inspection_statistics()['cache_hit_rate'] == pytest.approx(1 / 3)
+    
+    def test_known_dom_version_needs_no_round_trip(self, inspector, browser, query):
+        """Test a caller-tracked DOM version lets a clean tab reuse its element without the browser."""
+        # Arrange
+        inspector.inspect_element(query, {'tab_id': 'tab-1', 'dom_version': 4})
+        
+        # Act
+        reused = inspector.inspect_element(query, {'tab_id': 'tab-1', 'dom_version': 4})
+        
+        # Assert
+        assert reused.from_cache
+        assert browser.round_trips == 1
+    
+    def test_mutation_revalidates_before_reuse(self, inspector, browser, query):
+        """Test a dirty tab checks the element in-page and requeries when it moved."""
+        # Arrange
+        inspector.inspect_element(query, {'tab_id': 'tab-1', 'dom_version': 0})
+        
+        # Act
+        kept = inspector.inspect_element(query, {'tab_id': 'tab-1', 'dom_version': 1})
+        inspector.notify_dom_mutation('tab-1')
+        browser.still_valid = False
+        replaced = inspector.inspect_element(query, {'tab_id': 'tab-1', 'dom_version': 1})
+        
+        # Assert
+        assert kept.from_cache and not replaced.from_cache
+        assert browser.revalidations == 2 and browser.queries == 2
+        stats = inspector.get_inspection_statistics()['element_cache']
+        assert stats['revalidation_failures'] == 1
+    
+    def test_page_side_mutations_detected_by_observer(self, inspector, browser, query):
+        """Test DOM changes made by the page itself trigger revalidation, a new document a requery."""
+        # Arrange
+        inspector.inspect_element(query, {'tab_id': 'tab-1'})
+        
+        # Act
+        browser.dom_version = 3  # The page changed its own DOM
+        revalidated = inspector.inspect_element(query, {'tab_id': 'tab-1'})
+        browser.document = 'doc-2'  # Same URL, reloaded
+        reloaded = inspector.inspect_element(query, {'tab_id': 'tab-1'})
+        inspector.notify_tab_closed('tab-1')
+        
+        # Assert
+        assert revalidated.from_cache and not reloaded.from_cache
+        assert browser.revalidations == 2 and browser.queries == 2
+        assert browser.round_trips == 4  # The reload is only seen with the failed revalidation
+        assert inspector.get_inspection_statistics()['element_cache']['tracked_tabs'] == 0
+    
+    def test_navigation_and_lru_bound(self, inspector, browser, query):
+        """Test navigation drops a tab's entries and the cache stays bounded."""
+        # Arrange
+        inspector.inspect_element(query, {'tab_id': 'tab-1', 'url': 'https://a.example/'})
+        
+        # Act
+        after_navigation = inspector.inspect_element(query, {'tab_id': 'tab-1', 'url': 'https://b.example/'})
+        for tab in ('tab-2', 'tab-3'):
+            inspector.inspect_element(query, {'tab_id': tab})
+        
+        # Assert
+        assert not after_navigation.from_cache
+        assert browser.revalidations == 0
+        stats = inspector.get_inspection_statistics()['element_cache']
+        assert stats['size'] == 2 and stats['evictions'] == 1 and stats['invalidations'] == 1
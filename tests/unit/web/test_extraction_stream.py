@@ -0,0 +1,138 @@
+"""
+Unit tests for streaming data extraction.
+"""
+
+import csv
+import json
+import threading
+import time
+import pytest
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.success = True
+        self.result_value = value
+        self.errors = []
+
+
+class PagedListing:
+    """Stands in for a paginated listing page; answers the extractor's scripts."""
+    
+    def __init__(self, pages):
+        self.pages = pages
+        self.current = 0
+    
+    def inject_script(self, script, context, **kwargs):
+        argument = json.loads(script[script.rindex('})(') + 3:-2])
+        rows = self.pages[self.current] if self.current < len(self.pages) else []
+        
+        if 'el.click()' in script:
+            if self.current + 1 >= len(self.pages):
+                return FakeResult(False)
+            self.current += 1
+            return FakeResult(True)
+        if 'rowSelector' in script and isinstance(argument, str):
+            return FakeResult(f"{len(rows)}|{rows[0]}|{rows[-1]}" if rows else "0||")
+        
+        chunk = rows[argument['offset']:argument['offset'] + argument['limit']]
+        return FakeResult({'rows': [{'name': name} for name in chunk], 'total': len(rows)})
+
+
+class TestStreamingExtraction:
+    """Test chunked, paginated extraction into file sinks."""
+    
+    @pytest.fixture
+    def listing(self):
+        return PagedListing([[f"item-{p}-{i}" for i in range(5)] for p in range(3)])
+    
+    def test_paginated_extraction_streams_all_rows_to_jsonl(self, listing, tmp_path):
+        """Test every row of every page reaches the sink in bounded chunks."""
+        # Arrange
+        from mkd_v2.web.extraction_stream import StreamingExtractor, ExtractionSpec, create_sink
+        extractor = StreamingExtractor(listing, poll_interval=0)
+        spec = ExtractionSpec.from_parameters({
+            'rows': 'li.result', 'extractors': {'name': '.title'}, 'chunk_size': 2,
+            'pagination': {'next_selector': 'a.next'}
+        })
+        sink = create_sink(str(tmp_path / "out" / "items.jsonl"))
+        
+        # Act
+        summary = extractor.extract_to_sink(None, spec, sink)
+        
+        # Assert
+        lines = (tmp_path / "out" / "items.jsonl").read_text().splitlines()
+        assert [json.loads(line)['name'] for line in lines] == [f"item-{p}-{i}" for p in range(3) for i in range(5)]
+        assert summary.rows == 15
+        assert summary.pages == 3
+        assert summary.chunks == 9  # 3 chunks of at most 2 rows per page
+        assert summary.errors == []
+    
+    def test_url_template_pagination_stops_at_first_empty_page(self, listing, tmp_path):
+        """Test URL-template pagination ends at an empty page instead of running max_pages."""
+        # Arrange
+        from mkd_v2.web.extraction_stream import StreamingExtractor, ExtractionSpec, create_sink
+        extractor = StreamingExtractor(listing, poll_interval=0)
+        spec = ExtractionSpec.from_parameters({
+            'rows': 'li.result', 'extractors': {'name': '.title'},
+            'pagination': {'url_template': 'https://shop.example/items?page={page}'}
+        })
+        visited = []
+        
+        def navigate(url):
+            visited.append(url)
+            listing.current = int(url.rsplit('=', 1)[1]) - 1
+        
+        # Act
+        summary = extractor.extract_to_sink(None, spec, create_sink(str(tmp_path / "items.jsonl")), navigate=navigate)
+        
+        # Assert
+        assert summary.rows == 15 and summary.pages == 3
+        assert len(visited) == 3  # Pages 2 and 3, then the empty page 4
+    
+    def test_csv_sink_uses_field_order_for_header(self, tmp_path):
+        """Test CSV output keeps the configured columns across chunks."""
+        # Arrange
+        from mkd_v2.web.extraction_stream import create_sink
+        path = tmp_path / "rows.csv"
+        sink = create_sink(str(path), fields=['name', 'price'])
+        
+        # Act
+        sink.write_rows([{'price': '3', 'name': 'a'}])
+        sink.write_rows([{'name': 'b', 'price': '4', 'extra': 'x'}])
+        sink.close()
+        
+        # Assert
+        with open(path, newline='') as handle:
+            assert list(csv.reader(handle)) == [['name', 'price'], ['a', '3'], ['b', '4']]
+        assert sink.rows_written == 2
+    
+    def test_slow_sink_applies_backpressure(self):
+        """Test producers wait once the pending-chunk queue is full."""
+        # Arrange
+        from mkd_v2.web.extraction_stream import RowSink, SinkWriter
+        
+        class SlowSink(RowSink):
+            def __init__(self):
+                super().__init__("slow")
+                self.release = threading.Event()
+            
+            def write_rows(self, rows):
+                self.release.wait()
+                self.rows_written += len(rows)
+        
+        sink = SlowSink()
+        writer = SinkWriter(sink, max_pending=1)
+        threading.Timer(0.2, sink.release.set).start()
+        
+        # Act
+        started = time.perf_counter()
+        for _ in range(3):
+            writer.put([{'n': 1}])
+        waited = time.perf_counter() - started
+        writer.close()
+        
+        # Assert
+        assert writer.stats['backpressure_waits'] >= 1
+        assert waited >= 0.1
+        assert sink.rows_written == 3
@@ -0,0 +1,116 @@
+"""
+Unit tests for per-tab library residency in JavaScriptInjector.
+"""
+
+import pytest
+
+
+class TestLibraryResidency:
+    """Test libraries are sent once per tab and resent when the tab loses them."""
+    
+    @pytest.fixture
+    def injector(self):
+        """Injector with a small library that depends on another."""
+        from mkd_v2.web.javascript_injector import JavaScriptInjector, ScriptLibrary
+        injector = JavaScriptInjector()
+        injector.add_library(ScriptLibrary("base", "Base", "1.0", "window.Base = {};", ["noop"]))
+        injector.add_library(ScriptLibrary("widgets", "Widgets", "1.0", "window.Widgets = {};", ["make"],
+                                           dependencies=["base"]))
+        return injector
+    
+    @pytest.fixture
+    def context(self):
+        from mkd_v2.web.javascript_injector import ScriptContext, ExecutionContext, ScriptSecurity
+        return ScriptContext("ctx", ExecutionContext.PAGE, ScriptSecurity.SANDBOXED, tab_id="tab-1")
+    
+    def inject(self, injector, context, script="return 1;"):
+        from mkd_v2.web.javascript_injector import ScriptType
+        result = injector.inject_script(script, context, ScriptType.UTILITY, libraries=["widgets"])
+        return injector.script_cache[result.script_id]
+    
+    def test_libraries_sent_once_per_tab(self, injector, context):
+        """Test the second script only checks resident libraries."""
+        # Act
+        first = self.inject(injector, context)
+        second = self.inject(injector, context, "return 2;")
+        
+        # Assert
+        assert first.index("window.Base = {};") < first.index("window.Widgets = {};")
+        assert "window.Base" not in second and "mkdMissingLibrary" in second
+        assert injector.library_stats['installs'] == 2 and injector.library_stats['reuses'] == 2
+    
+    def test_navigation_reinstalls(self, injector, context):
+        """Test libraries are resent after the tab navigates."""
+        # Arrange
+        self.inject(injector, context)
+        
+        # Act
+        injector.notify_navigation("tab-1")
+        after = self.inject(injector, context, "return 2;")
+        
+        # Assert
+        assert "window.Widgets = {};" in after
+        assert injector.library_stats['installs'] == 4
+    
+    def test_missing_library_is_resent(self, injector, context):
+        """Test a page that lost its libraries gets them again in a retry."""
+        # Arrange
+        self.inject(injector, context)
+        scripts = []
+        
+        def page_without_libraries(script, ctx):
+            scripts.append(script)
+            missing = "window.Base = {};" not in script
+            return {'success': not missing, 'errors': ["{mkdMissingLibrary: 'base'}"] if missing else []}
+        injector._execute_sync_script = page_without_libraries
+        
+        # Act
+        result = injector.inject_script("return 2;", context, libraries=["widgets"])
+        
+        # Assert
+        assert result.success
+        assert len(scripts) == 2 and "window.Base = {};" in scripts[1]
+        assert injector.library_stats['missing_library_retries'] == 1
+
+
+class TestBoundedInjectorState:
+    """Test caches and statistics stay fixed-size."""
+    
+    def test_histogram_percentiles(self):
+        """Test percentiles are within a bucket of the true value."""
+        from mkd_v2.web.javascript_injector import LatencyHistogram
+        
+        # Arrange
+        histogram = LatencyHistogram()
+        
+        # Act
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+        
+        # Assert
+        assert histogram.count == 1000 and histogram.mean == pytest.approx(0.5005)
+        assert histogram.percentile(0.5) == pytest.approx(0.5, rel=0.05)
+        assert histogram.percentile(0.99) == pytest.approx(0.99, rel=0.05)
+        assert histogram.percentile(1.0) == 1.0
+    
+    def test_script_cache_and_ids_bounded(self):
+        """Test the script cache and id memo evict least recently used scripts."""
+        from mkd_v2.web.javascript_injector import (
+            JavaScriptInjector, ScriptContext, ExecutionContext, ScriptSecurity, ScriptType
+        )
+        
+        # Arrange
+        injector = JavaScriptInjector(max_cached_scripts=3)
+        injector.performance_monitor.max_scripts = 3
+        context = ScriptContext("ctx", ExecutionContext.PAGE, ScriptSecurity.SANDBOXED, tab_id="tab-1")
+        
+        # Act
+        ids = [injector.inject_script(f"return {i};", context, ScriptType.UTILITY).script_id for i in range(5)]
+        repeat = injector.inject_script("return 4;", context, ScriptType.UTILITY).script_id
+        
+        # Assert
+        assert repeat == ids[4]
+        assert list(injector.script_cache) == ids[2:]
+        assert len(injector._script_ids) == 3
+        metrics = injector.get_injection_statistics()['performance_metrics']
+        assert metrics['total_executions'] == 6 and metrics['tracked_scripts'] == 3
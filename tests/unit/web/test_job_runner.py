@@ -0,0 +1,110 @@
+"""
+Unit tests for the pooled WorkflowJobRunner.
+"""
+
+import pytest
+
+
+class TestWorkflowJobRunner:
+    """Test session pooling, recycling and runner metrics."""
+    
+    @pytest.fixture
+    def runner(self):
+        """Runner with a single worker so pooled sessions are reused."""
+        from mkd_v2.web.job_runner import WorkflowJobRunner
+        runner = WorkflowJobRunner(max_concurrent=1, max_session_uses=2)
+        runner.start()
+        yield runner
+        runner.stop()
+    
+    @pytest.fixture
+    def make_workflow(self):
+        """Factory for empty workflows."""
+        from mkd_v2.web.web_automation_engine import WebWorkflow
+        
+        def make(workflow_id):
+            return WebWorkflow(workflow_id=workflow_id, name=workflow_id, actions=[])
+        return make
+    
+    def test_sessions_reused_and_recycled(self, runner, make_workflow):
+        """Test jobs share warm sessions until max uses is reached."""
+        # Arrange
+        job_ids = [runner.submit(make_workflow(f"wf{i}")) for i in range(3)]
+        
+        # Act
+        jobs = [runner.wait(job_id, timeout=5) for job_id in job_ids]
+        
+        # Assert
+        assert [job.reused_session for job in jobs] == [False, True, False]
+        assert jobs[0].session_id == jobs[1].session_id != jobs[2].session_id
+        pool_stats = runner.session_pool.get_pool_stats()
+        assert pool_stats['sessions_created'] == 2
+        assert pool_stats['sessions_recycled'] == 1
+    
+    def test_runner_stats(self, runner, make_workflow):
+        """Test queue wait, reuse rate and per-job timing are reported."""
+        # Arrange
+        job_ids = [runner.submit(make_workflow(f"wf{i}")) for i in range(2)]
+        
+        # Act
+        for job_id in job_ids:
+            runner.wait(job_id, timeout=5)
+        stats = runner.get_runner_stats()
+        timings = runner.get_job_timings()
+        
+        # Assert
+        assert stats['jobs_submitted'] == 2
+        assert stats['session_reuse_rate'] == 0.5
+        assert stats['avg_queue_wait'] >= 0.0
+        assert {t['workflow_id'] for t in timings} == {'wf0', 'wf1'}
+    
+    def test_finished_jobs_are_capped(self, make_workflow):
+        """Test the runner only keeps the most recent finished jobs."""
+        # Arrange
+        from mkd_v2.web.job_runner import WorkflowJobRunner
+        runner = WorkflowJobRunner(max_concurrent=1, max_finished_jobs=2)
+        runner.start()
+        
+        # Act
+        job_ids = [runner.submit(make_workflow(f"wf{i}")) for i in range(4)]
+        runner.wait(job_ids[-1], timeout=5)
+        runner.stop()
+        
+        # Assert
+        assert list(runner.jobs) == job_ids[2:]
+
+
+class TestBrowserSessionPool:
+    """Test pooled sessions come back isolated from the previous job."""
+    
+    def test_reset_clears_cookies_storage_and_replaces_tab(self):
+        """Test a reused session has no cookies and a fresh work tab."""
+        # Arrange
+        from mkd_v2.web.browser_controller import BrowserController, BrowserCommand
+        from mkd_v2.web.job_runner import BrowserSessionPool
+        controller = BrowserController()
+        pool = BrowserSessionPool(controller)
+        pooled, _ = pool.acquire({'headless': True})
+        first_tab = pooled.tab_id
+        controller.execute_command(BrowserCommand.SET_COOKIES, target=first_tab, params={'cookies': [{'name': 'sid'}]})
+        controller.tab_manager.tabs[first_tab].visited_origins.add("https://example.com")
+        issued = []
+        execute = controller.execute_command
+        
+        def record(command, target=None, params=None):
+            result = execute(command, target=target, params=params)
+            issued.append((command, target, result.result_data))
+            return result
+        controller.execute_command = record
+        
+        # Act
+        kept = pool.release(pooled)
+        reused, was_reused = pool.acquire({'headless': True})
+        
+        # Assert
+        assert kept and was_reused
+        assert reused.tab_id != first_tab
+        assert first_tab not in controller.tab_manager.tabs
+        assert (BrowserCommand.CLEAR_STORAGE, first_tab, {'origins_cleared': ["https://example.com"]}) in issued
+        assert (BrowserCommand.CLEAR_COOKIES, first_tab, {'cookies_cleared': True}) in issued
+        assert controller.tab_manager.tabs[reused.tab_id].cookies == []
@@ -0,0 +1,183 @@
+"""
+Unit tests for dependency-aware parallel execution in the WebAutomationEngine.
+"""
+
+import threading
+import time
+
+import pytest
+
+
+class TestActionGraph:
+    """Test dependency DAG construction and critical path reporting."""
+    
+    @pytest.fixture
+    def web(self):
+        """Import the engine module."""
+        from mkd_v2.web import web_automation_engine
+        return web_automation_engine
+    
+    def test_same_tab_actions_are_chained(self, web):
+        """Test actions in one tab depend on their predecessor only."""
+        # Arrange
+        actions = [
+            web.WebAction(web.WebActionType.CLICK, target={'css': '#a'}),
+            web.WebAction(web.WebActionType.CLICK, target={'css': '#b'}, tab_key='second'),
+            web.WebAction(web.WebActionType.CLICK, target={'css': '#c'}),
+            web.WebAction(web.WebActionType.CLICK, target={'css': '#d'}, tab_key='second', depends_on=[2]),
+        ]
+        
+        # Act
+        graph = web.ActionGraph(actions)
+        
+        # Assert
+        assert graph.roots() == [0, 1]
+        assert graph.dependencies[2] == {0}
+        assert graph.dependencies[3] == {1, 2}
+    
+    def test_forward_dependency_rejected(self, web):
+        """Test depends_on may only reference earlier actions."""
+        # Arrange
+        actions = [web.WebAction(web.WebActionType.CLICK, target={}, depends_on=[1])]
+        
+        # Act / Assert
+        with pytest.raises(ValueError):
+            web.ActionGraph(actions)
+    
+    def test_critical_path(self, web):
+        """Test the longest weighted chain is reported."""
+        # Arrange
+        actions = [
+            web.WebAction(web.WebActionType.CLICK, target={}),
+            web.WebAction(web.WebActionType.CLICK, target={}, tab_key='other'),
+            web.WebAction(web.WebActionType.CLICK, target={}),
+        ]
+        graph = web.ActionGraph(actions)
+        
+        # Act
+        path, total = graph.critical_path({0: 1.0, 1: 5.0, 2: 1.0})
+        
+        # Assert
+        assert path == [1]
+        assert total == 5.0
+
+
+class TestParallelExecution:
+    """Test the DAG scheduler in _execute_actions_parallel."""
+    
+    @pytest.fixture
+    def engine(self):
+        """Engine in performance mode with action execution stubbed per call."""
+        from mkd_v2.web.web_automation_engine import WebAutomationEngine, InteractionMode
+        engine = WebAutomationEngine(InteractionMode.PERFORMANCE)
+        yield engine
+        engine.executor.shutdown(wait=True)
+    
+    def test_tabs_run_concurrently_in_order(self, engine):
+        """Test independent tabs overlap while each tab keeps its order."""
+        from mkd_v2.web.web_automation_engine import WebAction, WebActionType, WebWorkflow, ExecutionResult
+        
+        # Arrange
+        actions = [
+            WebAction(WebActionType.CLICK, target={'css': f'#{i}'}, tab_key=f'tab{i % 2}')
+            for i in range(4)
+        ]
+        workflow = WebWorkflow(workflow_id='wf', name='parallel', actions=actions, parallel_execution=True)
+        order = []
+        lock = threading.Lock()
+        
+        def execute(action, context):
+            with lock:
+                order.append((context.tab_id, action.target['css']))
+            time.sleep(0.05)
+            return ExecutionResult(success=True, action=action, execution_time=0.05)
+        
+        engine._execute_single_action = execute
+        context = engine._create_script_context('session')
+        
+        # Act
+        start = time.time()
+        results = engine._execute_actions_parallel(actions, context, workflow)
+        elapsed = time.time() - start
+        
+        # Assert
+        assert [r.action for r in results] == actions
+        assert elapsed < 0.18
+        tab0 = [css for tab, css in order if css in ('#0', '#2')]
+        assert tab0 == ['#0', '#2']
+    
+    def test_failed_dependency_skips_dependents(self, engine):
+        """Test dependents are skipped when error recovery is disabled."""
+        from mkd_v2.web.web_automation_engine import WebAction, WebActionType, WebWorkflow, ExecutionResult
+        
+        # Arrange
+        actions = [
+            WebAction(WebActionType.CLICK, target={'css': '#fail'}),
+            WebAction(WebActionType.CLICK, target={'css': '#next'}),
+            WebAction(WebActionType.CLICK, target={'css': '#other'}, tab_key='other'),
+        ]
+        workflow = WebWorkflow(workflow_id='wf', name='skip', actions=actions,
+                               parallel_execution=True, error_recovery=False)
+        engine._execute_single_action = lambda action, context: ExecutionResult(
+            success=action.target['css'] != '#fail', action=action, execution_time=0.01
+        )
+        
+        # Act
+        results = engine._execute_actions_parallel(actions, engine._create_script_context('s'), workflow)
+        
+        # Assert
+        assert [r.success for r in results] == [False, False, True]
+        assert results[1].errors == ["Skipped: dependency 0 failed"]
+    
+    def test_new_tabs_opened_in_reused_session(self, engine):
+        """Test extra tabs target the reused browser session, not the tab the workflow runs in."""
+        from unittest.mock import Mock
+        from mkd_v2.web.web_automation_engine import WebAction, WebActionType, WebWorkflow, ExecutionResult
+        from mkd_v2.web.browser_controller import BrowserCommand
+        
+        # Arrange
+        actions = [
+            WebAction(WebActionType.CLICK, target={'css': '#a'}),
+            WebAction(WebActionType.CLICK, target={'css': '#b'}, tab_key='second'),
+        ]
+        workflow = WebWorkflow(workflow_id='wf', name='tabs', actions=actions, parallel_execution=True)
+        engine._execute_single_action = lambda action, context: ExecutionResult(
+            success=True, action=action, execution_time=0.01
+        )
+        engine.browser_controller = Mock()
+        engine.browser_controller.execute_command.return_value = Mock(success=True, target_tab_id='tab-2')
+        
+        # Act
+        engine._execute_actions_parallel(actions, engine._create_script_context('tab-1'), workflow,
+                                         session_id='session-1')
+        
+        # Assert
+        command, = engine.browser_controller.execute_command.call_args_list
+        assert command.args[0] == BrowserCommand.NEW_TAB
+        assert command.kwargs['target'] == 'session-1'
+    
+    def test_scope_sessions_and_tabs_closed_after_workflow(self, engine):
+        """Test browsers and tabs opened for parallel scopes do not outlive the workflow."""
+        from mkd_v2.web.web_automation_engine import WebAction, WebActionType, WebWorkflow, ExecutionResult
+        
+        # Arrange
+        actions = [
+            WebAction(WebActionType.CLICK, target={'css': '#a'}),
+            WebAction(WebActionType.CLICK, target={'css': '#b'}, tab_key='second'),
+            WebAction(WebActionType.CLICK, target={'css': '#c'}, session_key='other', tab_key='extra'),
+        ]
+        workflow = WebWorkflow(workflow_id='wf', name='scopes', actions=actions, parallel_execution=True,
+                               browser_config={'headless': True})
+        engine._execute_single_action = lambda action, context: ExecutionResult(
+            success=True, action=action, execution_time=0.01
+        )
+        controller = engine.browser_controller
+        
+        # Act
+        result = engine.execute_workflow(workflow)
+        
+        # Assert
+        assert result.success
+        assert len(controller.sessions) == 1  # Only the workflow's own session
+        assert controller.tab_manager.tabs == {}
+        assert set(engine.session_contexts) == set(controller.sessions)